@@ -0,0 +1,217 @@
+# Lightweight stand-ins for the discord.py objects the logging cogs touch.
+# Only the attributes the cogs actually read are modelled; anything that talks
+# to Discord goes through FakeREST, which enforces rate limits the way the
+# real API does (per-route buckets plus a global bucket).
+
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Deque, Dict, List, Optional
+
+import discord
+
+class FakeREST:
+    """
+    Local stand-in for the Discord REST/webhook API.
+
+    Every request is charged against its route bucket and the global bucket
+    (sliding windows). When a bucket is exhausted the request waits for it like
+    discord.py's HTTP client does, unless the wait exceeds `max_ratelimit_timeout`,
+    in which case discord.RateLimited is raised so the repo's backoff code runs.
+    """
+    def __init__(
+        self,
+        route_limit: int = 5,
+        route_window: float = 5.0,
+        global_limit: int = 50,
+        global_window: float = 1.0,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        max_ratelimit_timeout: Optional[float] = None,
+        seed: int = 0
+    ):
+        self.route_limit = route_limit
+        self.route_window = route_window
+        self.global_limit = global_limit
+        self.global_window = global_window
+        self.latency = latency
+        self.jitter = jitter
+        self.max_ratelimit_timeout = max_ratelimit_timeout
+        self._rng = random.Random(seed)
+        self._routes: Dict[str, Deque[float]] = {}
+        self._global: Deque[float] = deque()
+
+        self.requests = 0
+        self.rate_limited = 0 # Requests that hit an exhausted bucket at least once
+        # Seconds from embed creation to the API accepting it
+        self.delivery_latencies: List[float] = []
+
+    def _wait_for(self, window: Deque[float], limit: int, period: float, now: float) -> float:
+        while window and window[0] <= now - period:
+            window.popleft()
+        if len(window) < limit:
+            return 0.0
+        return window[0] + period - now
+
+    async def request(self, route: str, embed: Optional[discord.Embed] = None):
+        bucket = self._routes.setdefault(route, deque())
+        limited = False
+        while True:
+            now = time.monotonic()
+            wait = max(
+                self._wait_for(bucket, self.route_limit, self.route_window, now),
+                self._wait_for(self._global, self.global_limit, self.global_window, now)
+            )
+            if wait <= 0:
+                break
+            if not limited:
+                self.rate_limited += 1
+                limited = True
+            if self.max_ratelimit_timeout is not None and wait > self.max_ratelimit_timeout:
+                raise discord.RateLimited(wait)
+            await asyncio.sleep(wait)
+
+        now = time.monotonic()
+        bucket.append(now)
+        self._global.append(now)
+        await asyncio.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+
+        self.requests += 1
+        if embed is not None and embed.timestamp:
+            self.delivery_latencies.append(
+                max(0.0, (discord.utils.utcnow() - embed.timestamp).total_seconds())
+            )
+
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", role_id: int, name: str, permissions: int = 0):
+        self.guild = guild
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+        self.color = discord.Color.default()
+        self.icon = None
+        self.hoist = False
+        self.mentionable = False
+        self.permissions = discord.Permissions(permissions)
+
+    def copy_with(self, **changes) -> "FakeRole":
+        clone = FakeRole(self.guild, self.id, self.name, self.permissions.value)
+        clone.color, clone.hoist, clone.mentionable = self.color, self.hoist, self.mentionable
+        for key, value in changes.items():
+            setattr(clone, key, value)
+        return clone
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", member_id: int, name: str, roles: List[FakeRole], age_days: int):
+        self.guild = guild
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{member_id}>"
+        self.bot = False
+        self.roles = roles
+        self.created_at = datetime.now(timezone.utc) - timedelta(days=age_days)
+        self.display_avatar = SimpleNamespace(url=f"https://cdn.discordapp.com/embed/avatars/{member_id % 5}.png")
+
+    def with_roles(self, roles: List[FakeRole]) -> "FakeMember":
+        clone = FakeMember(self.guild, self.id, self.name, roles, 0)
+        clone.created_at = self.created_at
+        return clone
+
+class FakeChannel:
+    def __init__(self, guild: "FakeGuild", channel_id: int, name: str):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, content=None, *, embed: Optional[discord.Embed] = None, **kwargs):
+        await self.guild.rest.request(f"channels/{self.id}/messages", embed)
+
+class FakeMessage:
+    def __init__(self, message_id: int, channel: FakeChannel, author: FakeMember, content: str):
+        self.id = message_id
+        self.guild = channel.guild
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.attachments = []
+        self.embeds = []
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{message_id}"
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str, rest: FakeREST):
+        self.id = guild_id
+        self.name = name
+        self.rest = rest
+        self.shard_id = 0
+        self.channels: Dict[int, FakeChannel] = {}
+        self.text_channels: List[FakeChannel] = [] # Everything except the log channel
+        self.roles: List[FakeRole] = []
+        self.members: List[FakeMember] = []
+        self.log_channel: Optional[FakeChannel] = None
+
+    @property
+    def member_count(self) -> int:
+        return len(self.members)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    async def audit_logs(self, **kwargs):
+        # Audit log reads are REST calls too and share the rate limits; the
+        # replayed events never have a matching entry.
+        await self.rest.request(f"guilds/{self.id}/audit-logs")
+        return
+        yield # pragma: no cover - makes this an async generator
+
+class FakeBot:
+    """Just enough of commands.Bot for BaseLogger: guild lookup, config_sync and http_session."""
+    def __init__(self, guilds: List[FakeGuild]):
+        self.guilds = guilds
+        self._by_id = {g.id: g for g in guilds}
+        self.http_session = None
+        # Empty dashboard config, so the local DB is the authority like a fresh install
+        self.config_sync = SimpleNamespace(get=lambda guild_id: {})
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self._by_id.get(guild_id)
+
+def build_world(
+    rest: FakeREST,
+    guilds: int,
+    members: int,
+    channels: int,
+    roles: int,
+    seed: int = 0
+) -> FakeBot:
+    """Creates `guilds` fake guilds, each with its own members, channels, roles and a log channel."""
+    rng = random.Random(seed)
+    next_id = 10_000
+    out = []
+    for g in range(guilds):
+        guild = FakeGuild(next_id, f"guild-{g}", rest)
+        next_id += 1
+
+        guild.roles = [FakeRole(guild, next_id + r, f"role-{r}") for r in range(roles)]
+        next_id += roles
+
+        for c in range(channels):
+            channel = FakeChannel(guild, next_id, f"channel-{c}")
+            guild.channels[channel.id] = channel
+            guild.text_channels.append(channel)
+            next_id += 1
+        guild.log_channel = FakeChannel(guild, next_id, "server-logs")
+        guild.channels[guild.log_channel.id] = guild.log_channel
+        next_id += 1
+
+        for m in range(members):
+            member_roles = rng.sample(guild.roles, k=min(len(guild.roles), rng.randint(0, 3)))
+            guild.members.append(FakeMember(guild, next_id, f"member-{m}", member_roles, rng.randint(1, 2000)))
+            next_id += 1
+
+        out.append(guild)
+    return FakeBot(out)
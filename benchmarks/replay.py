@@ -0,0 +1,363 @@
+# Synthetic gateway replay benchmark for the logging pipeline.
+#
+# Builds a fake world (guilds, members, channels, roles), generates or loads an
+# event stream and dispatches it through the real logging cogs. Sends go to
+# FakeREST, which applies Discord-style rate limits. Settings and log rows use
+# the real DatabaseManager on a throwaway SQLite file.
+#
+#   python -m benchmarks.replay --guilds 50 --events 1000 --rate 200
+#   python -m benchmarks.replay --record stream.jsonl      # save the generated stream
+#   python -m benchmarks.replay --replay stream.jsonl      # replay it later
+#   python -m benchmarks.replay --json out.json --compare baseline.json
+#
+# Reports events/s, handler and delivery latency percentiles, DB write
+# throughput and peak memory. With --compare it exits non-zero when
+# throughput drops or p95 latency rises by more than --tolerance.
+
+import os
+os.environ.setdefault("DISCORD_TOKEN", "benchmark") # config.py refuses to import without one
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+from benchmarks.fakes import FakeBot, FakeMessage, FakeREST, build_world
+from database.core import db
+from logging_modules.member_join import MemberJoin
+from logging_modules.message_delete import MessageDelete
+from logging_modules.message_edit import MessageEdit
+from logging_modules.role_update import RoleUpdate
+from utils.metrics import DB_BATCH_SECONDS, DB_ROWS_TOTAL
+from utils.profiler import percentile, profiler
+
+COGS = (MessageDelete, MessageEdit, MemberJoin, RoleUpdate)
+
+# Default mix, roughly what a busy community server produces
+DEFAULT_MIX = {
+    "message_delete": 35,
+    "message_edit": 35,
+    "member_join": 10,
+    "member_roles": 12,
+    "role_update": 5,
+    "bulk_delete": 3,
+}
+
+# -- Event streams --
+
+def generate_stream(bot: FakeBot, count: int, rate: float, mix: Dict[str, int], seed: int = 0) -> List[dict]:
+    """
+    Plain-dict events so a stream can be written to JSONL and replayed later.
+    `t` is the dispatch offset in seconds (0 for everything when rate is 0).
+    """
+    rng = random.Random(seed)
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    stream = []
+    for i in range(count):
+        guild_index = rng.randrange(len(bot.guilds))
+        guild = bot.guilds[guild_index]
+        stream.append({
+            "t": i / rate if rate > 0 else 0.0,
+            "type": rng.choices(kinds, weights)[0],
+            "guild": guild_index,
+            "channel": rng.randrange(len(guild.text_channels)),
+            "member": rng.randrange(len(guild.members)),
+            "role": rng.randrange(len(guild.roles)) if guild.roles else None,
+            "count": rng.randint(2, 100),
+            "content": " ".join(rng.choice(("lorem", "ipsum", "dolor", "sit", "amet")) for _ in range(rng.randint(1, 40))),
+        })
+    return stream
+
+def load_stream(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_stream(path: str, stream: List[dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        for event in stream:
+            f.write(json.dumps(event) + "\n")
+
+class Dispatcher:
+    """Turns stream entries into (listener, args) against the fake world, like bot.dispatch would."""
+    def __init__(self, bot: FakeBot):
+        self.bot = bot
+        self.listeners = {}
+        for cog_cls in COGS:
+            cog = cog_cls(bot)
+            for event_name, listener in cog.get_listeners():
+                self.listeners[event_name] = listener
+        self._message_id = 1
+
+    def _next_message_id(self) -> int:
+        self._message_id += 1
+        return self._message_id
+
+    def build(self, event: dict):
+        guild = self.bot.guilds[event["guild"] % len(self.bot.guilds)]
+        channel = guild.text_channels[event["channel"] % len(guild.text_channels)]
+        member = guild.members[event["member"] % len(guild.members)]
+        kind = event["type"]
+
+        if kind == "message_delete":
+            message = FakeMessage(self._next_message_id(), channel, member, event["content"])
+            return self.listeners["on_message_delete"], (message,)
+
+        if kind == "message_edit":
+            message_id = self._next_message_id()
+            before = FakeMessage(message_id, channel, member, event["content"])
+            after = FakeMessage(message_id, channel, member, event["content"] + " (edited)")
+            return self.listeners["on_message_edit"], (before, after)
+
+        if kind == "member_join":
+            return self.listeners["on_member_join"], (member,)
+
+        if kind == "member_roles" and guild.roles:
+            role = guild.roles[(event["role"] or 0) % len(guild.roles)]
+            roles = [r for r in member.roles if r is not role]
+            after = member.with_roles(roles if role in member.roles else roles + [role])
+            return self.listeners["on_member_update"], (member, after)
+
+        if kind == "role_update" and guild.roles:
+            before = guild.roles[(event["role"] or 0) % len(guild.roles)]
+            after = before.copy_with(name=before.name + "-renamed", hoist=not before.hoist)
+            return self.listeners["on_guild_role_update"], (before, after)
+
+        if kind == "bulk_delete":
+            messages = [
+                FakeMessage(self._next_message_id(), channel, member, event["content"])
+                for _ in range(event["count"])
+            ]
+            return self.listeners["on_bulk_message_delete"], (messages,)
+
+        return None, ()
+
+# -- Setup --
+
+async def seed_database(bot: FakeBot, list_entries: int, seed: int = 0):
+    """Every guild gets a log channel and every benchmarked module enabled; optionally some list entries."""
+    modules = json.dumps({cog.__name__: True for cog in COGS})
+    await db.connection.executemany(
+        "INSERT INTO guild_settings (guild_id, log_channel_id, enabled_modules) VALUES (?, ?, ?)",
+        [(g.id, g.log_channel.id, modules) for g in bot.guilds]
+    )
+
+    if list_entries:
+        rng = random.Random(seed)
+        rows = []
+        for g in bot.guilds:
+            for member in rng.sample(g.members, k=min(list_entries, len(g.members))):
+                rows.append((g.id, rng.choice(("blacklist", "whitelist")), "user", member.id, member.name))
+        await db.connection.executemany(
+            "INSERT OR IGNORE INTO server_lists (guild_id, list_type, entity_type, entity_id, entity_name) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+    await db.connection.commit()
+
+# -- Run --
+
+async def run(args) -> dict:
+    rest = FakeREST(
+        route_limit=args.route_limit,
+        route_window=args.route_window,
+        global_limit=args.global_limit,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        max_ratelimit_timeout=args.max_ratelimit_timeout,
+        seed=args.seed
+    )
+    bot = build_world(rest, args.guilds, args.members, args.channels, args.roles, seed=args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="chromium-bench-") as tmp:
+        db.db_path = os.path.join(tmp, "bench.sqlite")
+        await db.connect()
+        try:
+            await seed_database(bot, args.list_entries, seed=args.seed)
+
+            if args.replay:
+                stream = load_stream(args.replay)
+            else:
+                mix = json.loads(args.mix) if args.mix else DEFAULT_MIX
+                stream = generate_stream(bot, args.events, args.rate, mix, seed=args.seed)
+            if args.record:
+                save_stream(args.record, stream)
+
+            if args.profile:
+                profiler.enable()
+            dispatcher = Dispatcher(bot)
+            rows_before = DB_ROWS_TOTAL.value()
+            handler_latencies: List[float] = []
+            errors: Dict[str, int] = {}
+
+            async def invoke(listener, event_args):
+                started = time.perf_counter()
+                try:
+                    await listener(*event_args)
+                except Exception as e:
+                    name = f"{listener.__qualname__}: {type(e).__name__}: {e}"
+                    errors[name] = errors.get(name, 0) + 1
+                handler_latencies.append(time.perf_counter() - started)
+
+            if args.tracemalloc:
+                tracemalloc.start()
+
+            tasks = []
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            for event in stream:
+                delay = started + event.get("t", 0.0) / args.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                listener, event_args = dispatcher.build(event)
+                if listener is not None:
+                    tasks.append(asyncio.create_task(invoke(listener, event_args)))
+
+            await asyncio.gather(*tasks)
+            handled_at = loop.time()
+            await db._log_queue.join()
+            drained_at = loop.time()
+
+            peak_traced = None
+            if args.tracemalloc:
+                peak_traced = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        finally:
+            await db.close()
+            db.connection = None
+
+    handler_latencies.sort()
+    delivery = sorted(rest.delivery_latencies)
+    elapsed = max(handled_at - started, 1e-9)
+    rows = DB_ROWS_TOTAL.value() - rows_before
+
+    def pct(values: List[float]) -> dict:
+        return {f"p{int(q * 100)}_ms": round(percentile(values, q) * 1000, 2) for q in (0.50, 0.95, 0.99)}
+
+    result = {
+        "events": len(tasks),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "events_per_s": round(len(tasks) / elapsed, 2),
+        "handler_latency": pct(handler_latencies),
+        "delivery_latency": pct(delivery),
+        "deliveries": rest.requests,
+        "rate_limited": rest.rate_limited,
+        "db_rows": int(rows),
+        "db_rows_per_s": round(rows / max(drained_at - started, 1e-9), 2),
+        "db_batch_p95_ms": round((DB_BATCH_SECONDS.quantile(0.95) or 0.0) * 1000, 2),
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_traced_mb": round(peak_traced / 1048576, 2) if peak_traced is not None else None,
+    }
+    if args.profile:
+        result["profile"] = profiler.report()
+    return result
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round(peak / (1048576 if sys.platform == "darwin" else 1024), 2)
+
+# -- Reporting --
+
+def print_report(result: dict):
+    print(f"Events:            {result['events']} ({sum(result['errors'].values())} errors) in {result['elapsed_s']}s")
+    print(f"Throughput:        {result['events_per_s']} events/s")
+    for key in ("handler_latency", "delivery_latency"):
+        lat = result[key]
+        print(f"{key.replace('_', ' ').capitalize() + ':':<19}p50 {lat['p50_ms']}ms  p95 {lat['p95_ms']}ms  p99 {lat['p99_ms']}ms")
+    print(f"Deliveries:        {result['deliveries']} ({result['rate_limited']} rate limited)")
+    print(f"DB writes:         {result['db_rows']} rows, {result['db_rows_per_s']} rows/s (batch p95 {result['db_batch_p95_ms']}ms)")
+    print(f"Peak RSS:          {result['peak_rss_mb']} MB" + (
+        f" (traced Python heap {result['peak_traced_mb']} MB)" if result["peak_traced_mb"] is not None else ""
+    ))
+    for error, count in result["errors"].items():
+        print(f"  error x{count}: {error}")
+    if "profile" in result:
+        for phase, st in result["profile"]["phases"].items():
+            print(f"  phase {phase:<10} p50 {st['p50']:.2f}ms  p95 {st['p95']:.2f}ms  p99 {st['p99']:.2f}ms")
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance` (fractional) against a previous --json output."""
+    problems = []
+    if result["events_per_s"] < baseline["events_per_s"] * (1 - tolerance):
+        problems.append(f"events/s {result['events_per_s']} < baseline {baseline['events_per_s']}")
+    for key in ("handler_latency", "delivery_latency"):
+        now, then = result[key]["p95_ms"], baseline[key]["p95_ms"]
+        if then and now > then * (1 + tolerance):
+            problems.append(f"{key} p95 {now}ms > baseline {then}ms")
+    if baseline.get("db_rows_per_s") and result["db_rows_per_s"] < baseline["db_rows_per_s"] * (1 - tolerance):
+        problems.append(f"db rows/s {result['db_rows_per_s']} < baseline {baseline['db_rows_per_s']}")
+    return problems
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay synthetic gateway traffic through the logging cogs.")
+    world = parser.add_argument_group("world")
+    world.add_argument("--guilds", type=int, default=50)
+    world.add_argument("--members", type=int, default=200, help="Members per guild")
+    world.add_argument("--channels", type=int, default=20, help="Text channels per guild")
+    world.add_argument("--roles", type=int, default=15, help="Roles per guild")
+    world.add_argument("--list-entries", type=int, default=0, help="Blacklist/whitelist user entries per guild")
+
+    stream = parser.add_argument_group("stream")
+    stream.add_argument("--events", type=int, default=1000)
+    stream.add_argument("--rate", type=float, default=200.0, help="Target events/s (0 = burst everything at once)")
+    stream.add_argument("--speed", type=float, default=1.0, help="Playback speed multiplier for recorded timings")
+    stream.add_argument("--mix", help='JSON weights, e.g. \'{"message_delete": 1}\'')
+    stream.add_argument("--record", help="Write the generated stream to this JSONL file")
+    stream.add_argument("--replay", help="Replay a JSONL stream instead of generating one")
+    stream.add_argument("--seed", type=int, default=0)
+
+    api = parser.add_argument_group("fake Discord API")
+    api.add_argument("--route-limit", type=int, default=5, help="Requests per route per window")
+    api.add_argument("--route-window", type=float, default=5.0)
+    api.add_argument("--global-limit", type=int, default=50, help="Requests per second across all routes")
+    api.add_argument("--latency-ms", type=float, default=50.0)
+    api.add_argument("--jitter-ms", type=float, default=20.0)
+    api.add_argument("--max-ratelimit-timeout", type=float, default=None,
+                     help="Raise RateLimited instead of waiting when a bucket needs longer than this")
+
+    out = parser.add_argument_group("output")
+    out.add_argument("--profile", action="store_true", help="Enable the hot-path profiler and print phase timings")
+    out.add_argument("--tracemalloc", action="store_true", help="Also report the traced Python heap peak (slower)")
+    out.add_argument("--json", help="Write the result to this file")
+    out.add_argument("--compare", help="Baseline result JSON to check for regressions")
+    out.add_argument("--tolerance", type=float, default=0.2)
+    out.add_argument("--verbose", action="store_true", help="Keep the bot's own log output")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.verbose:
+        # Rate-limit warnings from the backoff code would drown the report
+        logging.disable(logging.WARNING)
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
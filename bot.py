@@ -4,6 +4,7 @@
 #    Licensed under the GNU Affero General Public License v3.0
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 import os
 import sys
@@ -14,9 +15,17 @@ import contextlib
 import aiohttp
 from config import shared_config
 from database.core import db
-from utils.logger import get_logger
-from utils.drive import drive_manager
+from utils.logger import get_logger, shutdown_logging
 from utils.status import StatusReporter, BotMonitor, ConfigSync
+from utils.metrics import metrics, record_config_sync
+from utils.profiler import profiler
+from utils.load_shedder import load_shedder
+from utils.outbox import outbox
+from utils.attachment_archive import attachment_archive
+from utils.memory import memory
+from utils.boot import BootTimeline, command_tree_fingerprint, command_module_map, command_modules
+from utils.presence import ShardGuildCounter, PresenceUpdater
+from utils.seeding import DashboardSeeder
 
 reporter = StatusReporter(
     api_url=os.getenv("DASHBOARD_URL"),          # Railway internal link
@@ -26,6 +35,9 @@ reporter = StatusReporter(
 
 log = get_logger()
 
+OUTBOX_DRAIN_SECONDS = 5.0 # Shutdown deadline for log sends still in flight
+CONFIG_SYNC_WAIT_SECONDS = 60.0 # Startup seeding gives up if the dashboard hasn't answered by then
+
 class Chromium(commands.AutoShardedBot):
     def __init__(self):
         intents = discord.Intents.default()
@@ -41,94 +53,158 @@ class Chromium(commands.AutoShardedBot):
             command_prefix="cr!", # Fallback, we mainly use slash commands
             intents=intents,
             help_command=None,
-            shard_count=shared_config.SHARD_COUNT if shared_config.SHARD_COUNT > 1 else None
+            shard_count=shared_config.SHARD_COUNT if shared_config.SHARD_COUNT > 1 else None,
+            shard_ids=shared_config.SHARD_IDS # Only set in cluster mode (see cluster/supervisor.py)
         )
         self.start_time = time.time()
         self._is_shutting_down = False
         self._ready_once = asyncio.Event()
+        self.shard_guilds = ShardGuildCounter()
+        self.presence = PresenceUpdater(self, self.shard_guilds)
+        self.command_modules = {} # Command qualified_name -> dashboard module keys
 
     async def global_config_check(self, interaction: discord.Interaction) -> bool:
         # 1. Dashboard Config Overrides (Enabled Modules)
         guild_id = interaction.guild.id if interaction.guild else None
-        if guild_id and interaction.type == discord.InteractionType.application_command:
-            settings = getattr(self, "config_sync", None)
-            if settings:
-                guild_cfg = settings.get(guild_id)
-                if guild_cfg:
-                    cmd = interaction.command
-                    if not cmd:
-                        return True
-                        
-                    # Module Resolution
-                    module_names = []
-                    if cmd.root_parent:
-                        module_names.append(cmd.root_parent.name.lower())
-                    
-                    # Binding/Cog check
-                    if hasattr(cmd, "binding"):
-                        cog_class = cmd.binding.__class__.__name__.lower()
-                        # Normalize CamelCase to snake_case
-                        import re
-                        normalized = re.sub(r'(?<!^)(?=[A-Z])', '_', cmd.binding.__class__.__name__).lower()
-                        # Strip common suffixes
-                        for suffix in ["commands", "cog", "commandsgroup", "logger"]:
-                            if normalized.endswith("_" + suffix):
-                                normalized = normalized[:-len(suffix)-1]
-                            elif normalized.endswith(suffix) and len(normalized) > len(suffix):
-                                normalized = normalized[:-len(suffix)]
-                        module_names.append(normalized)
-                    
-                    # Manual mapping for dashboard keys
-                    mapping = {
-                        "setup": "utility",
-                        "log_management": "logging",
-                        "list": "logging",
-                        "export": "logging"
-                    }
-                    
-                    final_modules = []
-                    for m in module_names:
-                        final_modules.append(m)
-                        if m in mapping:
-                            final_modules.append(mapping[m])
-
-                    modules_settings = guild_cfg.get("enabled_modules", {})
-                    blocked_module = None
-                    for m in final_modules:
-                        if modules_settings.get(m) is False:
-                            blocked_module = m
-                            break
-                            
-                    if blocked_module:
-                        log.info(f"Blocking command /{cmd.qualified_name} in guild {guild_id}: module '{blocked_module}' is disabled.")
-                        await interaction.response.send_message(
-                            f"❌ The `{blocked_module}` module is disabled in this server.",
-                            ephemeral=True
-                        )
-                        return False
-        return True
+        if not guild_id or interaction.type != discord.InteractionType.application_command:
+            return True
+        settings = getattr(self, "config_sync", None)
+        cmd = interaction.command
+        if not settings or not cmd:
+            return True
+        disabled = settings.disabled_modules(guild_id)
+        if not disabled:
+            return True
+
+        # Module keys are resolved once per command (see _index_commands)
+        modules = self.command_modules.get(cmd.qualified_name) if isinstance(cmd, app_commands.Command) else None
+        if modules is None:
+            modules = command_modules(cmd)
+            if isinstance(cmd, app_commands.Command):
+                self.command_modules[cmd.qualified_name] = modules # Added after boot (extension reload)
+        blocked = disabled.intersection(modules)
+        if not blocked:
+            return True
+
+        blocked_module = next(m for m in modules if m in blocked)
+        log.info(f"Blocking command /{cmd.qualified_name} in guild {guild_id}: module '{blocked_module}' is disabled.")
+        await interaction.response.send_message(
+            f"❌ The `{blocked_module}` module is disabled in this server.",
+            ephemeral=True
+        )
+        return False
+
+    def _register_memory_caches(self):
+        """Caches owned by discord.py and the bot itself, for /debug memory and the memory report."""
+        state = self._connection
+        memory.register_cache(
+            "discord.members", lambda: [guild._members for guild in self.guilds],
+            count=lambda parts: sum(len(members) for members in parts)
+        )
+        memory.register_cache("discord.users", lambda: state._users)
+        memory.register_cache("discord.messages", lambda: state._messages)
+        memory.register_cache("config_sync", lambda: self.config_sync._cache)
+        memory.register_cache("db.log_queue", lambda: db._log_queue)
+        memory.register_cache("event_queue", lambda: self.event_queue.queue)
+
+    def _index_commands(self):
+        """Maps every slash command to the dashboard modules that gate it (for global_config_check)."""
+        self.command_modules = command_module_map(self.tree)
 
     async def setup_hook(self):
         """
         Async setup hook to initialize DB and load extensions.
+        Each step is timed into self.boot so slow boots can be pinned to a phase.
         """
+        self.boot = BootTimeline()
+
         # Start shared http session early so it's available for extensions
         self.http_session = aiohttp.ClientSession()
         
         # Initialize event queue for rate-limited API calls
         from utils.rate_limiter import init_event_queue
         self.event_queue = init_event_queue(self)
+
+        if shared_config.PROFILING:
+            profiler.enable()
+            log.info("Hot-path profiler enabled (PROFILING=true). See /debug perf.")
+        if shared_config.MEMORY_TRACING:
+            memory.start_tracing(shared_config.MEMORY_TRACE_FRAMES)
+
+        load_shedder.configure(
+            priorities=shared_config.LOG_PRIORITIES,
+            sample_lag=shared_config.SHED_SAMPLE_LAG,
+            digest_lag=shared_config.SHED_DIGEST_LAG,
+            enabled=shared_config.LOAD_SHEDDING
+        )
         
         # Initialize Database
-        await asyncio.sleep(5) # Give network some time to settle
-        # Attempt to restore from Drive if available
-        await db.restore_from_drive()
-        await db.connect()
+        # No fixed settle delay: we're already logged in (so the network is up) and
+        # restore_from_drive retries the Drive service itself.
+        if shared_config.CLUSTER_ID is not None:
+            # Cluster worker: the storage writer owns the file (and the Drive restore)
+            async with self.boot.phase("storage writer connect"):
+                await db.connect_remote(shared_config.STORAGE_SOCKET, shared_config.CLUSTER_ID)
+        else:
+            async with self.boot.phase("drive restore"):
+                await db.restore_from_drive()
+            async with self.boot.phase("database connect"):
+                await db.connect()
+
+        # Deliveries still pending when the last run stopped are replayed once ready
+        from database.queries import write_outbox, load_outbox, mark_outbox_attempted
+        outbox.configure(write=write_outbox, load=load_outbox, mark_attempted=mark_outbox_attempted)
+        outbox.start()
+
+        # Downloads attachments of opted-in guilds (MessageDelete queues them)
+        from database.queries import (
+            save_archived_attachment, get_archived_attachments, get_archive_usage, evict_archived_attachments
+        )
+        attachment_archive.configure(
+            save=save_archived_attachment,
+            lookup=get_archived_attachments,
+            usage=get_archive_usage,
+            evict=evict_archived_attachments,
+            root=shared_config.ARCHIVE_DIR,
+            max_file_bytes=int(shared_config.ARCHIVE_MAX_FILE_MB * 1024 * 1024),
+            guild_quota_bytes=int(shared_config.ARCHIVE_GUILD_QUOTA_MB * 1024 * 1024),
+            max_age=shared_config.ARCHIVE_MAX_AGE_DAYS * 86400,
+            concurrency=shared_config.ARCHIVE_CONCURRENCY,
+        )
+        attachment_archive.start(self.http_session)
+
+        # Settings changed here or in another cluster -> listeners drop their caches
+        db.add_invalidation_listener(
+            lambda op_name, guild_ids: self.dispatch("settings_invalidated", op_name, guild_ids)
+        )
+
+        # Warm dashboard config from the last persisted sync BEFORE any listener
+        # can fire, so cold starts route/enable exactly like the previous run.
+        from database.queries import load_config_snapshot, save_config_snapshot
+        # Every worker pulls the config it routes by, but only cluster 0 persists it
+        self.config_sync = ConfigSync(
+            api_url=os.getenv("DASHBOARD_URL"),
+            bot_id="chromium",
+            bot=self,
+            on_maintenance_cleared=self._push_initial_state,
+            load_snapshot=load_config_snapshot,
+            save_snapshot=save_config_snapshot if not shared_config.CLUSTER_ID else None,
+            on_sync_result=record_config_sync,
+        )
+        async with self.boot.phase("config snapshot"):
+            await self.config_sync.load_snapshot()
+
+        self._register_memory_caches()
+        memory.start(shared_config.MEMORY_REPORT_MINUTES * 60)
         
         # Load Logging Modules, Commands, and Services
-        await self._load_extensions_from("logging_modules")
-        await self._load_extensions_from("commands")
-        await self._load_extensions_from("services")
+        # Extensions don't depend on each other at load time, so load them all at once.
+        async with self.boot.phase("extensions"):
+            await asyncio.gather(
+                self._load_extensions_from("logging_modules"),
+                self._load_extensions_from("commands"),
+                self._load_extensions_from("services"),
+            )
 
         # Start status reporter for dashboard
         self.cached_total_logs = 0
@@ -143,30 +219,52 @@ class Chromium(commands.AutoShardedBot):
         self.loop.create_task(update_logs())
         self.loop.create_task(self._push_initial_state())
         
+        # Each cluster reports only its own guilds; the dashboard merges them by cluster_id
         monitor = BotMonitor(
             reporter, 
             self, 
-            custom_metrics_callback=lambda: {"total_logs": self.cached_total_logs}
+            custom_metrics_callback=lambda: {
+                "total_logs": self.cached_total_logs,
+                "metrics": metrics.summary(),
+                "shard_ids": shared_config.SHARD_IDS,
+            },
+            cluster_id=shared_config.CLUSTER_ID,
         )
         asyncio.create_task(monitor.run_forever())
         
         # Start config polling
-        self.config_sync = ConfigSync(
-            api_url=os.getenv("DASHBOARD_URL"),
-            bot_id="chromium",
-            bot=self,
-            on_maintenance_cleared=self._push_initial_state,
-        )
         asyncio.create_task(self.config_sync.run_forever())
 
         # Register global checks
+        self._index_commands()
         self.tree.interaction_check = self.global_config_check
         
+        # Commands are global, so in cluster mode only cluster 0 syncs them
+        if not shared_config.CLUSTER_ID:
+            async with self.boot.phase("command sync"):
+                await self._sync_command_tree()
+
+        log.info(self.boot.render())
+
+    async def _sync_command_tree(self):
+        """
+        Syncs global commands only when the tree differs from the last successful sync.
+        The hash is stored per application so beta and production tokens don't collide.
+        """
+        from database.queries import get_bot_meta, set_bot_meta
+        fingerprint = command_tree_fingerprint(self.tree)
+        meta_key = f"command_tree_hash:{self.application_id}"
+
+        if not shared_config.FORCE_COMMAND_SYNC and await get_bot_meta(meta_key) == fingerprint:
+            log.discord(f"Command tree unchanged ({fingerprint[:12]}), skipping sync.")
+            return
+
         # Sync generic commands (global)
         try:
             log.info("Starting command tree sync...")
             synced = await asyncio.wait_for(self.tree.sync(), timeout=30.0)
             log.discord(f"Synced {len(synced)} command(s) globally.")
+            await set_bot_meta(meta_key, fingerprint)
         except asyncio.TimeoutError:
             log.error("Command tree sync timed out after 30 seconds.")
         except Exception as e:
@@ -177,82 +275,82 @@ class Chromium(commands.AutoShardedBot):
             os.makedirs(folder)
             return
 
-        failed_extensions = []
-        for filename in os.listdir(folder):
-            if filename.endswith(".py") and not filename.startswith("__") and filename != "base.py":
-                extension_name = f"{folder}.{filename[:-3]}"
-                try:
-                    await self.load_extension(extension_name)
-                    log.info(f"Loaded extension: {extension_name}")
-                except Exception as e:
-                    failed_extensions.append(extension_name)
-                    log.error(f"Failed to load extension {extension_name}", exc_info=e)
+        extension_names = [
+            f"{folder}.{filename[:-3]}"
+            for filename in sorted(os.listdir(folder))
+            if filename.endswith(".py") and not filename.startswith("__") and filename != "base.py"
+        ]
+
+        async def load(extension_name: str):
+            try:
+                await self.load_extension(extension_name)
+                log.info(f"Loaded extension: {extension_name}")
+                return None
+            except Exception as e:
+                log.error(f"Failed to load extension {extension_name}", exc_info=e)
+                return extension_name
+
+        results = await asyncio.gather(*(load(name) for name in extension_names))
+        failed_extensions = [name for name in results if name]
 
         if failed_extensions:
             log.error(f"Failed to load extensions: {failed_extensions}")
         else:
-            log.discord("All extensions loaded successfully.")
+            log.discord(f"All extensions in {folder}/ loaded successfully.")
 
     async def _push_initial_state(self):
         """Pushes local guild settings to the dashboard only if they are missing from it."""
+        if shared_config.CLUSTER_ID:
+            return # Seeding covers every guild in the database, cluster 0 does it once for all
         await self.wait_until_ready()
-        # Wait for the first bulk pull to complete so we know what's already on the dashboard
-        await asyncio.sleep(15) 
-        
-        from database.queries import get_all_guild_settings_full
-        all_local_guilds = await get_all_guild_settings_full()
-        
-        log.info(f"StartupSync: Checking {len(all_local_guilds)} local guilds for dashboard alignment...")
-        
-        import re
-        guilds_to_push = {}
-        for g in all_local_guilds:
-            try:
-                guild_id_str = str(g["guild_id"])
-                
-                # If dashboard already has settings for this guild, DO NOT overwrite them.
-                # The dashboard is the source of truth for existing entries.
-                if self.config_sync.get(guild_id_str):
-                    continue
-
-                # Determine mode
-                is_complex = bool(g["msg_id"] or g["mem_id"])
-                
-                # Normalize modules
-                normalized_modules = {
-                    (re.sub(r'(?<!^)(?=[A-Z])', '_', k).lower()): v 
-                    for k, v in g["modules"].items()
-                }
-                
-                payload = {
-                    "log_channel_id": str(g["log_channel_id"]) if g["log_channel_id"] else None,
-                    "enabled_modules": normalized_modules,
-                    "log_mode": "complex" if is_complex else "simple"
-                }
-                
-                if is_complex:
-                    payload["complex_logs"] = {
-                        "system": str(g["log_channel_id"]),
-                        "message": str(g["msg_id"]),
-                        "member": str(g["mem_id"])
-                    }
-                
-                guilds_to_push[guild_id_str] = payload
-            except Exception as e:
-                log.error(f"StartupSync: Failed preparing guild {g['guild_id']}: {e}")
-        
-        if guilds_to_push:
-            success = await self.config_sync.bulk_sync(guilds_to_push)
-            if success:
-                log.info(f"StartupSync: Successfully bulk-seeded dashboard with {len(guilds_to_push)} missing guild configs.")
-            else:
-                log.error("StartupSync: Bulk sync failed.")
+        # Wait for the first LIVE bulk pull so we know what's already on the dashboard.
+        # The boot snapshot doesn't count: it may be stale and would hide missing guilds.
+        if not await self.config_sync.wait_until_synced(timeout=CONFIG_SYNC_WAIT_SECONDS):
+            # Seeding against the snapshot could push over settings changed on the dashboard since
+            log.warning(
+                f"StartupSync: No live dashboard config after {CONFIG_SYNC_WAIT_SECONDS:.0f}s, "
+                "skipping the seed (it runs again when maintenance clears or on the next start)."
+            )
+            return
+
+        if not hasattr(self, "seeder"):
+            from database.queries import (
+                iter_guild_settings_chunks, get_dashboard_seeded, mark_dashboard_seeded, clear_dashboard_seeded
+            )
+            self.seeder = DashboardSeeder(
+                self.config_sync,
+                fetch_chunks=iter_guild_settings_chunks,
+                load_confirmed=get_dashboard_seeded,
+                save_confirmed=mark_dashboard_seeded,
+                clear_confirmed=clear_dashboard_seeded,
+            )
+
+        log.info("StartupSync: Checking local guilds for dashboard alignment...")
+        report = await self.seeder.run()
+        if report.failed:
+            log.error(f"StartupSync: {report.summary()}. Failed guilds are retried on the next seed.")
+        else:
+            log.info(f"StartupSync: {report.summary()}")
+
+    async def _replay_outbox(self):
+        """Re-sends the log embeds the previous run couldn't deliver before it stopped."""
+        from logging_modules.base import replay_delivery
+        try:
+            delivered, failed, expired = await outbox.replay(
+                lambda entry: replay_delivery(self, entry),
+                is_local=lambda guild_id: self.get_guild(guild_id) is not None
+            )
+        except Exception as e:
+            log.error("Outbox: Replay failed", exc_info=e)
+            return
+        if delivered or failed or expired:
+            log.info(f"Outbox: Replayed {delivered} delivery(ies) from the last run, {failed} failed, {expired} expired.")
 
     async def on_ready(self):
         # Only run once, even though each shard calls on_ready
         if not self._ready_once.is_set():
             total_shards = self.shard_count or 1
-            log.network(f"Bot is online as {self.user} (ID: {self.user.id})")
+            log.network(f"Bot is online as {self.user} (ID: {self.user.id}) after {time.time() - self.start_time:.2f}s.")
             log.network(f"Connected to {len(self.guilds)} guilds across {total_shards} shard(s).")
             if shared_config.IS_RAILWAY:
                 log.network("Environment: Railway Detected.")
@@ -267,10 +365,10 @@ class Chromium(commands.AutoShardedBot):
             except Exception as e:
                 log.error("Failed to validate guild settings on startup", exc_info=e)
             
-            # Global status set removed in favor of per-shard status in on_shard_ready
-
-            # Initialize activity watchdog
+            # Initialize activity watchdog (recounts shards and sets their presence)
             asyncio.create_task(activity_watchdog())
+
+            asyncio.create_task(self._replay_outbox())
             
             self._ready_once.set()
         else:
@@ -290,8 +388,9 @@ async def on_shard_connect(shard_id):
 
 @bot.event
 async def on_shard_ready(shard_id):
-    guilds = [g for g in bot.guilds if g.shard_id == shard_id]
-    log.network(f"[Shard {shard_id+1}] ready - handling {len(guilds)} guild(s).")
+    # Counted as its guilds became available; READY/identify reset presence, so resend it
+    log.network(f"[Shard {shard_id+1}] ready - handling {bot.shard_guilds.count(shard_id)} guild(s).")
+    bot.presence.mark(shard_id, force=True)
 
 @bot.event
 async def on_shard_disconnect(shard_id):
@@ -309,74 +408,57 @@ async def kill_all_tasks():
     await asyncio.sleep(1)
 
 
-async def update_status():
-    try:
-        total_shards = bot.shard_count or 1
-        # Shard iteration       
-        for shard_id in range(total_shards):
-            # Calculate guild count for this shard 
-            # (approximation if we don't have exact list per shard easily, but bot.guilds has shard_id attr)
-            shard_guilds = [g for g in bot.guilds if g.shard_id == shard_id]
-            
-            activity = discord.Activity(
-                type=discord.ActivityType.watching, 
-                name=f"over {len(shard_guilds)} guilds | Shard {shard_id+1}/{total_shards}"
-            )
-            await bot.change_presence(activity=activity, shard_id=shard_id)
-    except Exception as e:
-        log.error("Failed to update status", exc_info=e)
-        # non-fatal, just log and continue
-        pass
-
 async def activity_watchdog():
     while not bot._is_shutting_down:
-        await update_status()
+        # One full recount (catches guilds lost while a shard was re-identifying)
+        # and a resend in case a shard reconnected without us noticing
+        bot.shard_guilds.rebuild(bot.guilds)
+        bot.presence.mark(force=True)
         await asyncio.sleep(1800) # 30 minutes
 
+@bot.event
+async def on_guild_available(guild):
+    # Fires per guild as each shard's READY is processed
+    bot.shard_guilds.add(guild)
+
 @bot.event
 async def on_guild_join(guild):
     log.network(f"Joined guild: {guild.name} ({guild.id})")
-    await update_status()
+    shard_id = bot.shard_guilds.add(guild)
+    if shard_id is not None:
+        bot.presence.mark(shard_id)
 
 @bot.event
 async def on_guild_remove(guild):
     log.network(f"Left guild: {guild.name} ({guild.id})")
-    await update_status()
+    shard_id = bot.shard_guilds.remove(guild)
+    if shard_id is not None:
+        bot.presence.mark(shard_id)
 
 async def graceful_shutdown():
     log.info("Shutdown signal received - performing cleanup...")
     bot._is_shutting_down = True
 
-    # Let ongoing tasks wrap up (simple sleep)
+    # Let ongoing tasks wrap up, then give in-flight log sends a deadline.
+    # Whatever is still pending is stored and replayed on the next start.
     await asyncio.sleep(1)
+    await outbox.drain(timeout=OUTBOX_DRAIN_SECONDS)
 
-    if not shared_config.ENVIRONMENT == "production":
+    if shared_config.CLUSTER_ID is not None:
+        log.info("Cluster worker, the storage writer handles the database backup.")
+    elif not shared_config.ENVIRONMENT == "production":
         log.info("Not running on production, skipping database backup.")
-        return
     else:
-        try:
-            if os.path.exists(db.db_path):
-                log.info("Uploading database backup...")
-
-                # Read file content
-                with open(db.db_path, 'rb') as f:
-                    db_content = f.read()
+        await db.backup_to_drive()
 
-                backup_name = "chromium_database_backup.sqlite"
-                existing_id = await asyncio.to_thread(drive_manager.find_file, backup_name)
-
-                if existing_id:
-                    await asyncio.to_thread(drive_manager.update_file, existing_id, db_content)
-                else:
-                    await asyncio.to_thread(drive_manager.upload_file, backup_name, db_content)
-
-                log.info("Database backup completed.")
-        except Exception as e:
-            log.error("Failed to perform final database backup", exc_info=e)
+    attachment_archive.stop()
+    memory.stop()
 
     # Close DB
     await db.close()
     
+    bot.presence.stop()
+
     # Stop event queue processing
     if hasattr(bot, 'event_queue') and bot.event_queue:
         bot.event_queue.stop_processing()
@@ -395,6 +477,7 @@ async def graceful_shutdown():
         await bot.close()
 
     log.info("Shutdown complete. Chromium signing off.")
+    shutdown_logging() # Flush the log writer thread before exiting
     sys.exit(0)
 
 async def main():
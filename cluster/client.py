@@ -0,0 +1,183 @@
+# Worker-side connection to the storage writer.
+# Log rows are buffered and shipped in batches; writer ops are request/response.
+# The connection is re-established automatically if the writer restarts, and
+# log rows buffered while it's away are sent after reconnecting.
+
+import asyncio
+import itertools
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from cluster.protocol import encode_frame, read_frame
+from utils.logger import get_logger
+
+log = get_logger()
+
+class StorageClient:
+    def __init__(
+        self,
+        socket_path: str,
+        cluster_id: int,
+        on_invalidate: Optional[Callable[[str, List[int]], None]] = None,
+        batch_size: int = 200,
+        flush_interval: float = 0.25,
+        max_buffered: int = 20000,
+        call_timeout: float = 15.0
+    ):
+        self.socket_path = socket_path
+        self.cluster_id = cluster_id
+        self.on_invalidate = on_invalidate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.call_timeout = call_timeout
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._closing = False
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        # Oldest rows are dropped first if the writer is gone for a long time
+        self._logs: Deque[list] = deque(maxlen=max_buffered)
+        self._logs_ready = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.info: dict = {}
+
+    # -- Connection --
+
+    async def connect(self, attempts: int = 30) -> dict:
+        """Connects and handshakes, retrying while the writer starts up. Returns the writer's hello reply."""
+        delay = 0.2
+        for attempt in range(attempts):
+            try:
+                await self._open()
+                break
+            except (OSError, asyncio.IncompleteReadError) as e:
+                if attempt == attempts - 1:
+                    raise ConnectionError(f"Storage writer at {self.socket_path} unreachable: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+        self._tasks.append(asyncio.create_task(self._flush_loop()))
+        return self.info
+
+    async def _open(self):
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        writer.write(encode_frame({"id": 0, "op": "hello", "cluster": self.cluster_id}))
+        await writer.drain()
+        reply = await read_frame(reader)
+        if not reply.get("ok"):
+            writer.close()
+            raise ConnectionError(reply.get("error", "handshake rejected"))
+
+        self.info = reply
+        self._reader, self._writer = reader, writer
+        self._connected.set()
+        self._tasks = [t for t in self._tasks if not t.done()]
+        self._tasks.append(asyncio.create_task(self._read_loop(reader)))
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                message = await read_frame(reader)
+                if message.get("op") == "invalidate":
+                    if self.on_invalidate:
+                        self.on_invalidate(message.get("fn", ""), message.get("guild_ids") or [])
+                    continue
+                future = self._pending.pop(message.get("id"), None)
+                if future and not future.done():
+                    if message.get("ok"):
+                        future.set_result(message.get("result"))
+                    else:
+                        future.set_exception(RuntimeError(message.get("error", "storage writer error")))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            if not self._closing:
+                log.warning(f"Lost connection to storage writer: {e}")
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            log.error("Storage writer read loop failed", exc_info=e)
+
+        self._on_disconnect()
+        if not self._closing:
+            asyncio.create_task(self._reconnect())
+
+    def _on_disconnect(self):
+        self._connected.clear()
+        if self._writer:
+            self._writer.close()
+        self._reader = self._writer = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("storage writer disconnected"))
+        self._pending.clear()
+
+    async def _reconnect(self):
+        delay = 0.5
+        while not self._closing:
+            try:
+                await self._open()
+                log.info(f"Reconnected to storage writer ({len(self._logs)} buffered log row(s)).")
+                self._logs_ready.set()
+                return
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10.0)
+
+    async def _send(self, message: dict):
+        if not self._connected.is_set():
+            raise ConnectionError("storage writer not connected")
+        self._writer.write(encode_frame(message))
+        await self._writer.drain()
+
+    # -- API --
+
+    async def call(self, fn: str, args: tuple, kwargs: dict):
+        """Runs a @writer_op query on the storage writer and returns its result."""
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send({"id": request_id, "op": "call", "fn": fn, "args": list(args), "kwargs": kwargs})
+            return await asyncio.wait_for(future, timeout=self.call_timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    def queue_log(self, guild_id: int, module_name: str, content: str):
+        self._logs.append([guild_id, module_name, content])
+        if len(self._logs) >= self.batch_size:
+            self._logs_ready.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._logs_ready.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._logs_ready.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error(f"Storage client flush failed: {e}")
+                await asyncio.sleep(1)
+
+    async def flush(self):
+        """Ships buffered log rows. Rows stay buffered while the writer is unreachable."""
+        while self._logs and self._connected.is_set():
+            batch = [self._logs.popleft() for _ in range(min(self.batch_size, len(self._logs)))]
+            try:
+                await self._send({"op": "logs", "rows": batch})
+            except (ConnectionError, OSError):
+                self._logs.extendleft(reversed(batch))
+                return
+
+    async def close(self):
+        await self.flush()
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._on_disconnect()
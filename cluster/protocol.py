@@ -0,0 +1,34 @@
+# Wire format between cluster workers and the storage writer:
+# 4-byte big-endian length prefix followed by a UTF-8 JSON object.
+#
+# worker -> writer
+#   {"id": 1, "op": "hello", "cluster": 0}
+#   {"op": "logs", "rows": [[guild_id, module_name, content], ...]}     (no reply)
+#   {"id": 2, "op": "call", "fn": "add_list_item", "args": [...], "kwargs": {...}}
+# writer -> worker
+#   {"id": 2, "ok": true, "result": ...} / {"id": 2, "ok": false, "error": "..."}
+#   {"op": "invalidate", "fn": "add_list_item", "guild_ids": [...], "origin": 0}
+
+import asyncio
+import json
+import struct
+
+MAX_FRAME = 16 * 1024 * 1024
+_HEADER = struct.Struct(">I")
+
+class ProtocolError(Exception):
+    pass
+
+def encode_frame(message: dict) -> bytes:
+    body = json.dumps(message, separators=(",", ":"), default=str).encode("utf-8")
+    if len(body) > MAX_FRAME:
+        raise ProtocolError(f"Frame too large ({len(body)} bytes)")
+    return _HEADER.pack(len(body)) + body
+
+async def read_frame(reader: asyncio.StreamReader) -> dict:
+    """Reads one message. Raises asyncio.IncompleteReadError when the peer goes away."""
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame too large ({length} bytes)")
+    return json.loads(await reader.readexactly(length))
@@ -0,0 +1,146 @@
+# Storage writer process for cluster mode.
+# Owns the SQLite file (WAL mode so workers can read concurrently), batches log
+# rows from every worker through the normal DatabaseManager writer, runs
+# @writer_op queries on their behalf and broadcasts settings invalidations.
+#
+#   python -m cluster.storage_writer --socket /tmp/chromium-storage.sock
+
+import os
+os.environ.setdefault("DISCORD_TOKEN", "storage-writer") # Never logs in; config.py just needs a value
+
+import argparse
+import asyncio
+import signal
+import sys
+from typing import Dict
+
+from cluster.protocol import encode_frame, read_frame
+from config import shared_config, Environment
+from database.core import db, guild_ids_from_args, WRITER_OPS
+import database.queries # noqa: F401 - registers WRITER_OPS
+from utils.logger import get_logger, shutdown_logging
+
+log = get_logger()
+
+class StorageWriter:
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._server = None
+        self._clients: Dict[asyncio.StreamWriter, int] = {}
+
+    async def start(self):
+        # Attempt to restore from Drive if available
+        await db.restore_from_drive()
+        await db.connect()
+        # WAL lets every worker's read-only connection read while we write
+        await db.connection.execute("PRAGMA journal_mode=WAL")
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path) # Stale socket from a crashed writer
+        self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        log.database(f"Storage writer listening on {self.socket_path} ({len(WRITER_OPS)} writer ops)")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._clients):
+            writer.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        if shared_config.ENVIRONMENT == Environment.PRODUCTION:
+            await db.backup_to_drive()
+        else:
+            log.info("Not running on production, skipping database backup.")
+        await db.close() # Drains queued log rows first
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        cluster_id = None
+        try:
+            while True:
+                message = await read_frame(reader)
+                op = message.get("op")
+
+                if op == "logs":
+                    for guild_id, module_name, content in message.get("rows", []):
+                        db.queue_log(guild_id, module_name, content)
+                elif op == "call":
+                    await self._handle_call(message, writer, cluster_id)
+                elif op == "hello":
+                    cluster_id = message.get("cluster")
+                    self._clients[writer] = cluster_id
+                    await self._reply(writer, {"id": message.get("id"), "ok": True, "db_path": os.path.abspath(db.db_path)})
+                    log.network(f"Cluster {cluster_id} connected to storage writer.")
+                else:
+                    await self._reply(writer, {"id": message.get("id"), "ok": False, "error": f"unknown op {op!r}"})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            log.error(f"Storage writer connection from cluster {cluster_id} failed", exc_info=e)
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+            if cluster_id is not None:
+                log.network(f"Cluster {cluster_id} disconnected from storage writer.")
+
+    async def _handle_call(self, message: dict, writer: asyncio.StreamWriter, cluster_id):
+        name = message.get("fn")
+        func = WRITER_OPS.get(name)
+        if func is None:
+            await self._reply(writer, {"id": message.get("id"), "ok": False, "error": f"unknown writer op {name!r}"})
+            return
+
+        args, kwargs = tuple(message.get("args") or ()), message.get("kwargs") or {}
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            log.error(f"Writer op {name} from cluster {cluster_id} failed", exc_info=e)
+            await self._reply(writer, {"id": message.get("id"), "ok": False, "error": str(e)})
+            return
+
+        await self._reply(writer, {"id": message.get("id"), "ok": True, "result": result})
+        if func.invalidates:
+            await self.broadcast({
+                "op": "invalidate",
+                "fn": name,
+                "guild_ids": guild_ids_from_args(func, args, kwargs),
+                "origin": cluster_id
+            })
+
+    async def _reply(self, writer: asyncio.StreamWriter, message: dict):
+        writer.write(encode_frame(message))
+        await writer.drain()
+
+    async def broadcast(self, message: dict):
+        frame = encode_frame(message)
+        for writer in list(self._clients):
+            try:
+                writer.write(frame)
+                await writer.drain()
+            except (ConnectionError, OSError):
+                self._clients.pop(writer, None)
+
+async def main(socket_path: str):
+    writer = StorageWriter(socket_path)
+    await writer.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    log.info("Storage writer shutting down...")
+    await writer.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chromium cluster storage writer")
+    parser.add_argument("--socket", default=shared_config.STORAGE_SOCKET or "/tmp/chromium-storage.sock")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.socket))
+    finally:
+        shutdown_logging()
+    sys.exit(0)
@@ -0,0 +1,178 @@
+# Cluster supervisor: one storage writer plus N bot worker processes, each
+# owning a contiguous range of shards. Crashed processes are restarted with
+# exponential backoff; SIGINT/SIGTERM stops the workers first (so they flush
+# their log rows) and the storage writer last (so it drains and backs up).
+#
+#   python -m cluster.supervisor --clusters 4            # shard count from Discord
+#   python -m cluster.supervisor --clusters 4 --shards 16
+
+import os
+
+import argparse
+import asyncio
+import signal
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from config import shared_config
+from utils.logger import get_logger, shutdown_logging
+
+log = get_logger()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def shard_ranges(shard_count: int, clusters: int) -> List[List[int]]:
+    """Splits shards into `clusters` contiguous ranges, sizes differing by at most one."""
+    clusters = max(1, min(clusters, shard_count))
+    base, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for i in range(clusters):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+async def recommended_shard_count(token: str) -> int:
+    """Asks Discord how many shards it wants for this bot (GET /gateway/bot)."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            return int(data["shards"])
+
+class ManagedProcess:
+    """A child process that is restarted whenever it exits, until stop() is called."""
+    STABLE_AFTER = 300 # Seconds of uptime after which the backoff resets
+    MAX_BACKOFF = 60
+
+    def __init__(self, name: str, argv: List[str], env: Dict[str, str]):
+        self.name = name
+        self.argv = argv
+        self.env = env
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.restarts = 0
+        self._stopping = False
+        self._backoff = 1.0
+        self._wake = asyncio.Event()
+
+    async def run_forever(self):
+        while not self._stopping:
+            started = time.monotonic()
+            self.proc = await asyncio.create_subprocess_exec(*self.argv, env=self.env, cwd=ROOT)
+            log.info(f"[Supervisor] Started {self.name} (pid {self.proc.pid})")
+            code = await self.proc.wait()
+            if self._stopping:
+                break
+
+            uptime = time.monotonic() - started
+            if uptime > self.STABLE_AFTER:
+                self._backoff = 1.0
+            self.restarts += 1
+            log.error(f"[Supervisor] {self.name} exited with code {code} after {uptime:.0f}s; restarting in {self._backoff:.0f}s (restart #{self.restarts})")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+
+    async def stop(self, timeout: float = 30.0):
+        self._stopping = True
+        self._wake.set()
+        if not self.proc or self.proc.returncode is not None:
+            return
+        self.proc.send_signal(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(self.proc.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"[Supervisor] {self.name} ignored SIGTERM for {timeout:.0f}s, killing.")
+            self.proc.kill()
+            await self.proc.wait()
+
+class Supervisor:
+    def __init__(self, clusters: int, shard_count: int, socket_path: str):
+        self.socket_path = socket_path
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, clusters)
+
+        writer_env = dict(os.environ, STORAGE_SOCKET=socket_path)
+        self.writer = ManagedProcess(
+            "storage-writer",
+            [sys.executable, "-m", "cluster.storage_writer", "--socket", socket_path],
+            writer_env
+        )
+        self.workers = [
+            ManagedProcess(f"cluster-{i}", [sys.executable, "bot.py"], self._worker_env(i, shard_ids))
+            for i, shard_ids in enumerate(self.ranges)
+        ]
+
+    def _worker_env(self, cluster_id: int, shard_ids: List[int]) -> Dict[str, str]:
+        env = dict(
+            os.environ,
+            CLUSTER_ID=str(cluster_id),
+            SHARD_IDS=f"{shard_ids[0]}-{shard_ids[-1]}",
+            SHARD_COUNT=str(self.shard_count),
+            STORAGE_SOCKET=self.socket_path,
+        )
+        if shared_config.METRICS_PORT:
+            # One /metrics endpoint per cluster
+            env["METRICS_PORT"] = str(shared_config.METRICS_PORT + cluster_id)
+        return env
+
+    async def _wait_for_writer(self, timeout: float = 60.0):
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(self.socket_path):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Storage writer did not open {self.socket_path} within {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+    async def run(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path) # So we don't mistake a stale socket for a live writer
+
+        tasks = [asyncio.create_task(self.writer.run_forever())]
+        await self._wait_for_writer()
+        for i, worker in enumerate(self.workers):
+            log.info(f"[Supervisor] cluster-{i}: shards {self.ranges[i][0]}-{self.ranges[i][-1]} of {self.shard_count}")
+            tasks.append(asyncio.create_task(worker.run_forever()))
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+
+        log.info("[Supervisor] Stopping clusters...")
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+        log.info("[Supervisor] Stopping storage writer...")
+        await self.writer.stop(timeout=120.0) # Drain + Drive backup can take a while
+        await asyncio.gather(*tasks, return_exceptions=True)
+        log.info("[Supervisor] All processes stopped.")
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Chromium as multiple shard clusters")
+    parser.add_argument("--clusters", type=int, default=int(os.getenv("CLUSTER_COUNT", "0")) or os.cpu_count() or 1)
+    parser.add_argument("--shards", type=int, default=0, help="Total shard count (Default: Discord's recommendation)")
+    parser.add_argument("--socket", default=shared_config.STORAGE_SOCKET or os.path.join(tempfile.gettempdir(), "chromium-storage.sock"))
+    args = parser.parse_args(argv)
+
+    shard_count = args.shards or (shared_config.SHARD_COUNT if shared_config.SHARD_COUNT > 1 else 0)
+    if not shard_count:
+        shard_count = await recommended_shard_count(shared_config.DISCORD_TOKEN)
+        log.network(f"[Supervisor] Discord recommends {shard_count} shard(s).")
+
+    await Supervisor(args.clusters, shard_count, args.socket).run()
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        sys.exit("Cluster mode needs Unix sockets and is not supported on Windows.")
+    try:
+        asyncio.run(main())
+    finally:
+        shutdown_logging()
@@ -1,11 +1,14 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import difflib
+import io
 from datetime import datetime
 from typing import List, Literal, Optional
-from database.queries import add_list_item, remove_list_item, get_list_items, search_list_items
+from database.queries import add_list_item, remove_list_item, get_list_items, get_list_page, import_list_items
 from utils.embed_builder import EmbedBuilder
+from utils.list_io import parse_import, export_csv, report_csv, MAX_IMPORT_BYTES, MAX_IMPORT_ROWS
+from utils.name_index import name_index, normalize, member_names
+from utils.views import KeysetPaginator
 
 class List(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -21,7 +24,7 @@ class List(commands.Cog):
     list_name = app_commands.Group(name="list", description="General list commands")
 
     # Helper: Resolve entity from query (ID or Name)
-    def _resolve_entity(self, guild: discord.Guild, query: str):
+    async def _resolve_entity(self, guild: discord.Guild, query: str):
         # Try ID resolve first
         if query.isdigit():
             user = guild.get_member(int(query))
@@ -31,28 +34,42 @@ class List(commands.Cog):
             channel = guild.get_channel(int(query))
             if channel: return channel, 'channel'
         
-        # Fuzzy Search
-        # Collect all candidates
-        candidates = []
-        candidates.extend([(r, r.name) for r in guild.roles])
-        candidates.extend([(m, m.name) for m in guild.members])
-        candidates.extend([(c, c.name) for c in guild.channels])
-        
-        # Use difflib to find best match
-        # We process names to simple strings
-        names = [x[1] for x in candidates]
-        matches = difflib.get_close_matches(query, names, n=1, cutoff=0.6)
-        
-        if matches:
-            # Find the object corresponding to the name
-            for obj, name in candidates:
-                if name == matches[0]:
-                    if isinstance(obj, discord.Member): return obj, 'user'
-                    if isinstance(obj, discord.Role): return obj, 'role'
-                    if isinstance(obj, discord.abc.GuildChannel): return obj, 'channel'
+        # Exact (normalized) name first, then the closest fuzzy match
+        index = await name_index.get(guild)
+        exact = [eid for eid in index.prefix(query, 5) if normalize(query) in index.get(eid).names]
+        for entity_id in exact or index.fuzzy(query, limit=1, cutoff=0.6):
+            kind = index.get(entity_id).kind
+            entity = self._get_entity(guild, kind, entity_id)
+            if entity:
+                return entity, kind
+            index.remove(entity_id) # Stale, we missed its delete event
         
         return None, None
 
+    @staticmethod
+    def _get_entity(guild: discord.Guild, kind: str, entity_id: int):
+        if kind == 'user': return guild.get_member(entity_id)
+        if kind == 'role': return guild.get_role(entity_id)
+        return guild.get_channel(entity_id)
+
+    @staticmethod
+    def _entity_name(entity) -> str:
+        return entity.name if isinstance(entity, discord.Role) or isinstance(entity, discord.abc.GuildChannel) else entity.display_name
+
+    def _resolve_id(self, guild: discord.Guild, entity_id: int, hint: Optional[str]):
+        # The file's type hint is tried first, but whatever the ID actually is wins
+        for kind in dict.fromkeys([hint, 'user', 'role', 'channel']):
+            entity = self._get_entity(guild, kind, entity_id) if kind else None
+            if entity:
+                return entity, kind
+        return None, None
+
+    async def _list_index(self, guild_id: int, list_type: str):
+        index = name_index.for_list(guild_id, list_type)
+        if index is None:
+            index = name_index.set_list(guild_id, list_type, await get_list_items(guild_id, list_type))
+        return index
+
     # Autocomplete for ADD
     async def add_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
         if not interaction.guild:
@@ -61,29 +78,16 @@ class List(commands.Cog):
         if len(current) < 3:
             return []
 
-        # Search Guild Entities
+        # Search Guild Entities (roles, channels and members, via the name index).
+        # Never waits for the index: a bounded scan answers while it builds.
+        index = name_index.lookup(interaction.guild) or name_index.scan(interaction.guild, current)
+        labels = {'role': "Role", 'channel': "Channel", 'user': "User"}
         options = []
-        
-        # Roles
-        for role in interaction.guild.roles:
-            if current.lower() in role.name.lower():
-                options.append(app_commands.Choice(name=f"Role: {role.name}", value=str(role.id)))
-        
-        # Channels
-        for channel in interaction.guild.channels:
-            if current.lower() in channel.name.lower():
-                options.append(app_commands.Choice(name=f"Channel: {channel.name}", value=str(channel.id)))
-                
-        # Members (Limit to avoid massive loops if possible, or rely on cache)
-        # Note: Large guilds might need optimization here, but simple logic for now
-        count = 0
-        for member in interaction.guild.members:
-            if current.lower() in member.display_name.lower() or current.lower() in member.name.lower():
-                options.append(app_commands.Choice(name=f"User: {member.display_name}", value=str(member.id)))
-                count += 1
-                if count > 10: break # soft limit for mixed results
+        for entity_id in index.search(current, limit=25):
+            entry = index.get(entity_id)
+            options.append(app_commands.Choice(name=f"{labels[entry.kind]}: {entry.label}"[:100], value=str(entity_id)))
                 
-        return options[:25]
+        return options
 
     # Autocomplete for REMOVE
     async def remove_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
@@ -94,23 +98,24 @@ class List(commands.Cog):
         # However, interaction.command.parent.name should give 'blacklist' or 'whitelist'
         list_type = interaction.command.parent.name
         
-        rows = await search_list_items(interaction.guild_id, list_type, current)
+        index = await self._list_index(interaction.guild_id, list_type)
+        entity_ids = index.search(current, limit=25) if current else index.ids(25)
         
         choices = []
-        for row in rows:
-            name = f"{row['entity_type'].upper()}: {row['entity_name']}"
+        for entity_id in entity_ids:
+            entry = index.get(entity_id)
             choices.append(app_commands.Choice(
-                name=name, 
-                value=str(row['entity_id'])
+                name=f"{entry.kind.upper()}: {entry.label}"[:100], 
+                value=str(entity_id)
             ))
-        return choices[:25]
+        return choices
 
     # shared logic for three commands, just parse list_type
     async def _add_command(self, interaction: discord.Interaction, query: str, list_type: str):
         await interaction.response.defer(ephemeral=True)
         
         # 1. Resolve Entity
-        entity, entity_type = self._resolve_entity(interaction.guild, query)
+        entity, entity_type = await self._resolve_entity(interaction.guild, query)
         
         if not entity:
             # If resolve returned None, check if existing by ID was passed directly via selection
@@ -139,7 +144,7 @@ class List(commands.Cog):
             list_type, 
             entity_type, 
             entity.id, 
-            entity.name if isinstance(entity, discord.Role) or isinstance(entity, discord.abc.GuildChannel) else entity.display_name
+            self._entity_name(entity)
         )
         
         if success:
@@ -161,15 +166,16 @@ class List(commands.Cog):
         if query.isdigit():
             entity_id = int(query)
         else:
-            # Try to resolve name from DB
-            rows = await search_list_items(interaction.guild_id, list_type, query)
-            for row in rows:
-                if row['entity_name'].lower() == query.lower():
-                    entity_id = row['entity_id']
+            # Try to resolve name from the list's entries (exact name wins)
+            index = await self._list_index(interaction.guild_id, list_type)
+            matches = index.search(query, limit=5)
+            for match in matches:
+                if normalize(query) in index.get(match).names:
+                    entity_id = match
                     break
             
-            if not entity_id and rows:
-                entity_id = rows[0]['entity_id']
+            if not entity_id and matches:
+                entity_id = matches[0]
             
         if not entity_id:
              await interaction.followup.send(
@@ -188,43 +194,186 @@ class List(commands.Cog):
                 embed=EmbedBuilder.error("Error", "Failed to remove item. It might not exist.")
             )
 
-    async def _show_command(self, interaction: discord.Interaction, page: int, list_type: str):
+    async def _import_command(self, interaction: discord.Interaction, file: discord.Attachment, replace: bool, list_type: str):
         await interaction.response.defer(ephemeral=True)
-        
+
+        if file.size > MAX_IMPORT_BYTES:
+            await interaction.followup.send(
+                embed=EmbedBuilder.error("File Too Large", f"Imports are limited to {MAX_IMPORT_BYTES // 1024 // 1024} MB.")
+            )
+            return
+        try:
+            text = (await file.read()).decode("utf-8-sig")
+        except (UnicodeDecodeError, discord.HTTPException):
+            await interaction.followup.send(
+                embed=EmbedBuilder.error("Unreadable File", "Upload a UTF-8 text or CSV file of IDs.")
+            )
+            return
+
+        rows = parse_import(text)
+        if not rows:
+            await interaction.followup.send(embed=EmbedBuilder.warning("Nothing To Import", "No IDs found in that file."))
+            return
+        if len(rows) > MAX_IMPORT_ROWS:
+            await interaction.followup.send(
+                embed=EmbedBuilder.error("Too Many Rows", f"Imports are limited to {MAX_IMPORT_ROWS} entries per file.")
+            )
+            return
+
+        # 1. Resolve everything against the cache (no API calls)
+        guild = interaction.guild
+        items, report, seen = [], [], set()
+        for row in rows:
+            if row.error:
+                report.append([row.line, row.raw, "invalid", row.error])
+                continue
+            if row.entity_id in seen:
+                report.append([row.line, row.raw, "duplicate", "already earlier in the file"])
+                continue
+            seen.add(row.entity_id)
+
+            entity, entity_type = self._resolve_id(guild, row.entity_id, row.entity_type)
+            if entity:
+                items.append((entity_type, entity.id, self._entity_name(entity)))
+                report.append([row.line, row.raw, None, entity_type])
+            elif row.entity_type == 'user':
+                # Members who left (or aren't cached) can still be listed by ID
+                items.append(('user', row.entity_id, row.entity_name or str(row.entity_id)))
+                report.append([row.line, row.raw, None, "user (not in server)"])
+            else:
+                report.append([row.line, row.raw, "not_found", "no user, role or channel with this ID"])
+
+        # 2. Apply in one transaction; filters see all of it or none of it
+        existing = await import_list_items(guild.id, list_type, items, replace) if items else []
+        if existing is None:
+            await interaction.followup.send(
+                embed=EmbedBuilder.error("Import Failed", "The database rejected the import; nothing was changed.")
+            )
+            return
+
+        existing = set(existing)
+        ids = iter(entity_id for _, entity_id, _ in items)
+        for result in report:
+            if result[2] is None:
+                result[2] = "updated" if next(ids) in existing else "added"
+
+        counts = {}
+        for result in report:
+            counts[result[2]] = counts.get(result[2], 0) + 1
+        summary = "\n".join(f"**{status.replace('_', ' ').capitalize()}:** {count}" for status, count in sorted(counts.items()))
+        if replace:
+            summary += f"\n\nThe previous {list_type} was replaced."
+
+        report_file = discord.File(io.BytesIO(report_csv(report).encode("utf-8")), filename=f"{list_type}_import_report.csv")
+        embed = EmbedBuilder.success("Import Complete", summary) if items else EmbedBuilder.warning("Nothing Imported", summary)
+        await interaction.followup.send(embed=embed, file=report_file)
+
+    async def _export_command(self, interaction: discord.Interaction, list_type: str):
+        await interaction.response.defer(ephemeral=True)
+
         items = await get_list_items(interaction.guild_id, list_type)
-        
         if not items:
             await interaction.followup.send(
                 embed=EmbedBuilder.warning(f"{list_type.capitalize()}", f"The {list_type} is empty.")
             )
             return
 
-        # Pagination
-        per_page = 8
-        pages = [items[i:i + per_page] for i in range(0, len(items), per_page)]
-        
-        if page < 1 or page > len(pages):
-            await interaction.followup.send(embed=EmbedBuilder.error("Error", "Invalid page number."))
+        export_file = discord.File(
+            io.BytesIO(export_csv(items).encode("utf-8")),
+            filename=f"{list_type}_{interaction.guild_id}.csv"
+        )
+        await interaction.followup.send(
+            embed=EmbedBuilder.success("Export Ready", f"Exported {len(items)} {list_type} entries. Re-import with `/{list_type} import`."),
+            file=export_file
+        )
+
+    async def _show_command(self, interaction: discord.Interaction, list_type: str, entity_type: Optional[str] = None):
+        await interaction.response.defer(ephemeral=True)
+
+        guild_id = interaction.guild_id
+        async def fetch(before_id, limit):
+            return await get_list_page(guild_id, list_type, before_id, limit, entity_type)
+
+        def render(items, page):
+            description = ""
+            for item in items:
+                # added_ts is computed by SQLite, no per-row date parsing
+                timestamp = item['added_ts'] or int(datetime.utcnow().timestamp())
+                description += f"**{item['entity_name']}** (`{item['entity_id']}`)\nType: {item['entity_type'].capitalize()} • Added: <t:{timestamp}:R>\n\n"
+            title = f"Server {list_type.capitalize()}" + (f" ({entity_type.capitalize()}s)" if entity_type else "")
+            embed = discord.Embed(title=f"{title} (Page {page})", description=description, color=discord.Color.blue())
+            embed.set_footer(text="Newest first")
+            return embed
+
+        view = KeysetPaginator(fetch, render, page_size=8, author_id=interaction.user.id)
+        embed = await view.load()
+        if not view.rows:
+            await interaction.followup.send(
+                embed=EmbedBuilder.warning(f"{list_type.capitalize()}", f"The {list_type} is empty.")
+            )
             return
-            
-        current_page_items = pages[page - 1]
-        
-        description = ""
-        for item in current_page_items:
-            # item: id, guild_id, list_type, entity_type, entity_id, entity_name, added_at
-            # Parse SQLite timestamp
-            try:
-                dt = datetime.strptime(item['added_at'], "%Y-%m-%d %H:%M:%S")
-                timestamp = int(dt.timestamp())
-            except (ValueError, TypeError):
-                timestamp = int(datetime.utcnow().timestamp())
-
-            description += f"**{item['entity_name']}** (`{item['entity_id']}`)\nType: {item['entity_type'].capitalize()} • Added: <t:{timestamp}:R>\n\n"
-            
-        embed = discord.Embed(title=f"Server {list_type.capitalize()} (Page {page}/{len(pages)})", description=description, color=discord.Color.blue())
-        embed.set_footer(text=f"Total items: {len(items)}")
-        
-        await interaction.followup.send(embed=embed)
+
+        view.message = await interaction.followup.send(embed=embed, view=view, wait=True)
+
+    # Keep built name indexes current (no-ops for guilds without one)
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        name_index.upsert(member.guild.id, member.id, 'user', member.display_name, *member_names(member))
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if member_names(before) != member_names(after):
+            name_index.upsert(after.guild.id, after.id, 'user', after.display_name, *member_names(after))
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        if before.name == after.name and before.global_name == after.global_name:
+            return
+        for guild in after.mutual_guilds:
+            member = guild.get_member(after.id)
+            if member:
+                name_index.upsert(guild.id, member.id, 'user', member.display_name, *member_names(member))
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        name_index.discard(payload.guild_id, payload.user.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        name_index.upsert(role.guild.id, role.id, 'role', role.name)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name:
+            name_index.upsert(after.guild.id, after.id, 'role', after.name)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        name_index.discard(role.guild.id, role.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        name_index.upsert(channel.guild.id, channel.id, 'channel', channel.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        if before.name != after.name:
+            name_index.upsert(after.guild.id, after.id, 'channel', after.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        name_index.discard(channel.guild.id, channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        name_index.drop(guild.id)
+
+    @commands.Cog.listener()
+    async def on_settings_invalidated(self, op_name: str, guild_ids: List[int]):
+        # List entries changed (here or in another cluster); rebuild on next use
+        if op_name in ("add_list_item", "remove_list_item", "import_list_items"):
+            for guild_id in guild_ids:
+                name_index.drop_lists(guild_id)
 
     # Register commands
     @blacklist.command(name="add", description="Add a user, role, or channel to blacklist")
@@ -247,8 +396,24 @@ class List(commands.Cog):
     @app_commands.guild_only()
     @app_commands.checks.has_permissions(manage_guild=True)
     @app_commands.checks.cooldown(1, 3, key=lambda i: (i.guild_id, i.user.id))
-    async def blacklist_show(self, interaction: discord.Interaction, page: int = 1):
-        await self._show_command(interaction, page, "blacklist")
+    @app_commands.describe(type="Only show users, roles or channels")
+    async def blacklist_show(self, interaction: discord.Interaction, type: Optional[Literal['user', 'role', 'channel']] = None):
+        await self._show_command(interaction, "blacklist", type)
+
+    @blacklist.command(name="import", description="Add many users, roles, or channels to blacklist from a file of IDs")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.describe(file="Text/CSV file: one ID or mention per line, optionally with type and name columns", replace="Replace the whole blacklist instead of adding to it")
+    @app_commands.checks.cooldown(1, 30, key=lambda i: (i.guild_id, i.user.id))
+    async def blacklist_import(self, interaction: discord.Interaction, file: discord.Attachment, replace: bool = False):
+        await self._import_command(interaction, file, replace, "blacklist")
+
+    @blacklist.command(name="export", description="Download the blacklist as CSV")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.checks.cooldown(1, 30, key=lambda i: (i.guild_id, i.user.id))
+    async def blacklist_export(self, interaction: discord.Interaction):
+        await self._export_command(interaction, "blacklist")
 
     @whitelist.command(name="add", description="Add a user, role, or channel to whitelist")
     @app_commands.guild_only()
@@ -270,8 +435,24 @@ class List(commands.Cog):
     @app_commands.guild_only()
     @app_commands.checks.has_permissions(manage_guild=True)
     @app_commands.checks.cooldown(1, 3, key=lambda i: (i.guild_id, i.user.id))
-    async def whitelist_show(self, interaction: discord.Interaction, page: int = 1):
-        await self._show_command(interaction, page, "whitelist")
+    @app_commands.describe(type="Only show users, roles or channels")
+    async def whitelist_show(self, interaction: discord.Interaction, type: Optional[Literal['user', 'role', 'channel']] = None):
+        await self._show_command(interaction, "whitelist", type)
+
+    @whitelist.command(name="import", description="Add many users, roles, or channels to whitelist from a file of IDs")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.describe(file="Text/CSV file: one ID or mention per line, optionally with type and name columns", replace="Replace the whole whitelist instead of adding to it")
+    @app_commands.checks.cooldown(1, 30, key=lambda i: (i.guild_id, i.user.id))
+    async def whitelist_import(self, interaction: discord.Interaction, file: discord.Attachment, replace: bool = False):
+        await self._import_command(interaction, file, replace, "whitelist")
+
+    @whitelist.command(name="export", description="Download the whitelist as CSV")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.checks.cooldown(1, 30, key=lambda i: (i.guild_id, i.user.id))
+    async def whitelist_export(self, interaction: discord.Interaction):
+        await self._export_command(interaction, "whitelist")
 
     @list_name.command(name="help", description="Get help with the list commands")
     @app_commands.guild_only()
@@ -283,7 +464,9 @@ class List(commands.Cog):
             **Commands:**
             • `add`: Adds a user, role, or channel to the specified list.
             • `remove`: Removes an entry from the specified list.
-            • `show`: Displays all entries in the specified list with pagination.
+            • `show`: Browse the entries in the specified list, newest first (optionally one type).
+            • `import`: Adds every ID in an uploaded text/CSV file at once, with a per-row report.
+            • `export`: Downloads the list as CSV (re-importable).
 
             **Order of Operations:**
             1 - User Whitelist (The "Suspicious Person" check-log them no matter where they are).
@@ -1,9 +1,10 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from typing import Literal
-from database.queries import get_guild_settings, upsert_guild_settings
+from typing import Literal, Optional
+from database.queries import get_guild_settings, get_logs_page, upsert_guild_settings
 from utils.embed_builder import EmbedBuilder
+from utils.views import KeysetPaginator
 from utils.permissions import MODULE_PERMISSIONS, PERMISSION_DISPLAY_NAMES
 
 # List of all available modules for autocomplete/validation
@@ -11,9 +12,12 @@ MODULES = [
     "MessageDelete", "MessageEdit", "MemberJoin", "MemberLeave", 
     "VoiceState", "RoleUpdate", "ChannelUpdate", "ErrorLogger",
     "MemberBan", "GuildUpdate", "EmojiUpdate", "MemberKick", "NicknameUpdate",
-    "TimeoutUpdate", "WebhookUpdate", "InviteUpdate", "AutoLog"
+    "TimeoutUpdate", "WebhookUpdate", "InviteUpdate", "AutoLog", "AttachmentArchive"
 ]
 
+# Stores user content, so never switched on by "/log enable All"
+OPT_IN_MODULES = {"AttachmentArchive"}
+
 # Module information for /log info command
 MODULE_INFO = {
     "MessageDelete": {
@@ -100,6 +104,11 @@ MODULE_INFO = {
         "description": "Automatically restores and protects log entries from being deleted in log channels.",
         "events": ["on_message_delete"],
         "channel": "(Same as deleted message)"
+    },
+    "AttachmentArchive": {
+        "description": "Opt-in. Keeps copies of posted attachments for a limited time and re-uploads them with the MessageDelete log, since Discord's links stop working after a delete.",
+        "events": ["on_message", "on_message_delete"],
+        "channel": "message-logs"
     }
 }
 
@@ -120,7 +129,8 @@ class LogManagement(commands.Cog):
                 success, _ = await send_with_backoff(
                     lambda: discord.Webhook.from_url(
                         log_wh, session=self.bot.http_session, client=self.bot
-                    ).send(embed=embed)
+                    ).send(embed=embed),
+                    bucket="webhook"
                 )
                 if success:
                     return
@@ -128,7 +138,7 @@ class LogManagement(commands.Cog):
             if log_id:
                 channel = guild.get_channel(log_id)
                 if channel:
-                    await send_with_backoff(lambda: channel.send(embed=embed))
+                    await send_with_backoff(lambda: channel.send(embed=embed), bucket="channel")
         except Exception:
             pass
 
@@ -227,6 +237,50 @@ class LogManagement(commands.Cog):
             for m in MODULES if current.lower() in m.lower()
         ][:25]
 
+    @log_group.command(name="browse", description="Browse this server's stored logs, newest first")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.describe(module="Only show logs from this module")
+    @app_commands.checks.cooldown(1, 5, key=lambda i: (i.guild_id, i.user.id))
+    async def browse_logs(self, interaction: discord.Interaction, module: Optional[str] = None):
+        if module and module not in MODULES:
+            await interaction.response.send_message(
+                embed=EmbedBuilder.error("Module Not Found", f"`{module}` is not a valid module. Use the autocomplete suggestions."),
+                ephemeral=True
+            )
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        guild_id = interaction.guild_id
+        async def fetch(before_id, limit):
+            return await get_logs_page(guild_id, before_id, limit, module)
+
+        def render(rows, page):
+            fields = []
+            for row in rows:
+                # Timestamps don't render in field names, so they lead the value (EmbedBuilder clamps it)
+                when = f"<t:{row['ts']}:f>\n" if row['ts'] else ""
+                fields.append((row['module_name'], when + (row['content'] or "*No content*"), False))
+            return EmbedBuilder.build(
+                title=f"📜 Stored Logs{f' ({module})' if module else ''} (Page {page})",
+                description="Newest first. Only the most recent logs per server are kept; use `/export` to download them.",
+                fields=fields
+            )
+
+        view = KeysetPaginator(fetch, render, page_size=5, author_id=interaction.user.id)
+        embed = await view.load()
+        if not view.rows:
+            await interaction.followup.send(
+                embed=EmbedBuilder.warning("No Logs", "There are no stored logs for this server" + (f" from `{module}`." if module else "."))
+            )
+            return
+
+        view.message = await interaction.followup.send(embed=embed, view=view, wait=True)
+
+    @browse_logs.autocomplete('module')
+    async def browse_logs_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await self.module_info_autocomplete(interaction, current)
+
     @log_group.command(name="enable", description="Enable logging module(s) (comma separated or 'All')")
     @app_commands.guild_only()
     @app_commands.checks.has_permissions(manage_guild=True)
@@ -235,7 +289,7 @@ class LogManagement(commands.Cog):
         await interaction.response.defer()
         
         if modules.strip().lower() == "all":
-            target_modules = MODULES
+            target_modules = [m for m in MODULES if m not in OPT_IN_MODULES]
         else:
             import re
             parts = [m.strip() for m in re.split(r'[,\s]+', modules) if m.strip()]
@@ -292,7 +346,7 @@ class LogManagement(commands.Cog):
         await interaction.response.defer()
         
         if modules.strip().lower() == "all":
-            target_modules = MODULES
+            target_modules = [m for m in MODULES if m not in OPT_IN_MODULES]
         else:
             import re
             parts = [m.strip() for m in re.split(r'[,\s]+', modules) if m.strip()]
@@ -0,0 +1,99 @@
+import discord
+import time
+from discord import app_commands
+from discord.ext import commands
+from typing import Dict, List, Literal, Optional, Tuple
+from database.core import ROLLUP_GRAINS
+from database.queries import get_log_volume
+from utils.embed_builder import EmbedBuilder
+from commands.log_management import MODULES
+
+# range -> (rollup grain, number of buckets)
+RANGES = {
+    "1h": ("minute", 60),
+    "24h": ("hour", 24),
+    "7d": ("hour", 168),
+    "30d": ("day", 30),
+    "1y": ("day", 365),
+}
+SPARK = "▁▂▃▄▅▆▇█"
+SPARK_WIDTH = 48
+TOP_MODULES = 10
+
+def summarize_volume(rows: List[Tuple[int, str, int]], start: int, step: int, buckets: int):
+    """Per-module totals and a zero-filled per-bucket series from rollup rows."""
+    totals: Dict[str, int] = {}
+    series = [0] * buckets
+    for bucket, module_name, count in rows:
+        totals[module_name] = totals.get(module_name, 0) + count
+        index = (bucket - start) // step
+        if 0 <= index < buckets:
+            series[index] += count
+    return totals, series
+
+def sparkline(series: List[int], width: int = SPARK_WIDTH) -> str:
+    """Series squeezed to at most `width` columns (summing neighbours) as block characters."""
+    if len(series) > width:
+        per = -(-len(series) // width)
+        series = [sum(series[i:i + per]) for i in range(0, len(series), per)]
+    peak = max(series) if series else 0
+    if not peak:
+        return SPARK[0] * len(series)
+    return "".join(SPARK[min(len(SPARK) - 1, (value * (len(SPARK) - 1) + peak - 1) // peak)] if value else SPARK[0] for value in series)
+
+class Stats(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="stats", description="Log volume per module over time for this server")
+    @app_commands.rename(period="range")
+    @app_commands.describe(period="Time range to show", module="Only count this module")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.checks.cooldown(1, 10, key=lambda i: (i.guild_id, i.user.id))
+    async def stats(self, interaction: discord.Interaction, period: Literal["1h", "24h", "7d", "30d", "1y"] = "24h", module: Optional[str] = None):
+        await interaction.response.defer()
+
+        grain, buckets = RANGES[period]
+        step = ROLLUP_GRAINS[grain][1]
+        # Last `buckets` buckets, the current (partial) one included
+        start = (int(time.time()) // step - buckets + 1) * step
+        rows = await get_log_volume(interaction.guild_id, grain, start, module)
+        totals, series = summarize_volume(rows, start, step, buckets)
+        total = sum(totals.values())
+
+        if not total:
+            await interaction.followup.send(embed=EmbedBuilder.info(
+                "No Log Volume",
+                f"No logs were sent{f' by `{module}`' if module else ''} in the last {period}."
+            ))
+            return
+
+        peak_index = series.index(max(series))
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        module_lines = [f"`{name}` **{count:,}** ({count * 100 / total:.0f}%)" for name, count in ranked[:TOP_MODULES]]
+        if len(ranked) > TOP_MODULES:
+            module_lines.append(f"...and {len(ranked) - TOP_MODULES} more module(s)")
+
+        fields = [
+            ("Total", f"**{total:,}** logs", True),
+            ("Peak", f"**{series[peak_index]:,}** per {grain}, <t:{start + peak_index * step}:f>", True),
+            ("By Module", "\n".join(module_lines), False),
+            (f"Timeline (per {grain})", f"`{sparkline(series)}`\n<t:{start}:R> → now", False),
+        ]
+        embed = EmbedBuilder.info(
+            title=f"📈 Log Volume, last {period}" + (f" ({module})" if module else ""),
+            description="Counted when logs are delivered; the last minute may not be included yet.",
+            fields=fields
+        )
+        await interaction.followup.send(embed=embed)
+
+    @stats.autocomplete("module")
+    async def stats_module_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=m, value=m)
+            for m in MODULES if current.lower() in m.lower()
+        ][:25]
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Stats(bot))
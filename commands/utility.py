@@ -6,14 +6,21 @@ import platform
 import sys
 from utils.embed_builder import EmbedBuilder
 from config import shared_config
+from database.core import db
 from database.queries import get_total_logs_count
+from logging_modules.base import delivery_scheduler
+from utils.load_shedder import load_shedder
+from utils.memory import memory, rss_bytes
+from utils.profiler import profiler
 
 class Utility(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    @app_commands.command(name="debug", description="Shows the bot's current status and diagnostic information")
-    async def debug(self, interaction: discord.Interaction):
+    debug_group = app_commands.Group(name="debug", description="Bot diagnostics")
+
+    @debug_group.command(name="status", description="Shows the bot's current status and diagnostic information")
+    async def debug_status(self, interaction: discord.Interaction):
         """Displays system metrics, versioning, and shard health."""
         # Calculate Uptime
         uptime_seconds = int(time.time() - self.bot.start_time)
@@ -53,7 +60,9 @@ class Utility(commands.Cog):
         if shards > 1:
             shard_details = ""
             for shard_id, shard in self.bot.shards.items():
-                shard_details += f"**Shard {shard_id+1}:** `{round(shard.latency * 1000, 2)}ms` | {len([g for g in self.bot.guilds if g.shard_id == shard_id])} Guilds\n"
+                shard_details += f"**Shard {shard_id+1}:** `{round(shard.latency * 1000, 2)}ms` | {self.bot.shard_guilds.count(shard_id)} Guilds\n"
+            presence = self.bot.presence
+            shard_details += f"\n*Presence updates: {presence.updates_sent} sent, {presence.updates_skipped} unchanged*"
             fields.append(("📡 Shard Index", shard_details.strip(), False))
 
         embed = EmbedBuilder.success(
@@ -66,5 +75,138 @@ class Utility(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
 
+    @debug_group.command(name="perf", description="Hot-path timings per logging module (bot owner only)")
+    @app_commands.describe(action="What to do with the profiler")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Report", value="report"),
+        app_commands.Choice(name="Enable", value="enable"),
+        app_commands.Choice(name="Disable", value="disable"),
+        app_commands.Choice(name="Reset", value="reset"),
+    ])
+    async def debug_perf(self, interaction: discord.Interaction, action: str = "report"):
+        """Shows p50/p95/p99 per module and phase, plus the slowest recent events."""
+        # The report contains guild IDs from every guild, so keep it to the owner
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                embed=EmbedBuilder.error(title="Not Allowed", description="This command is restricted to the bot owner."),
+                ephemeral=True
+            )
+            return
+
+        if action == "enable":
+            profiler.enable()
+        elif action == "disable":
+            profiler.disable()
+        elif action == "reset":
+            profiler.reset()
+
+        report = profiler.report()
+        state = "enabled" if profiler.enabled else "disabled"
+        description = (
+            f"Profiler is **{state}**. {report['traces']} traced event(s) "
+            f"in the last {int(report['window_seconds'] // 60)} minute(s)."
+        )
+
+        def table(rows: dict) -> str:
+            if not rows:
+                return "*No data*"
+            lines = [f"{'name':<22}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}"]
+            for name, st in rows.items():
+                lines.append(f"{name[:21]:<22}{st['count']:>6}{st['p50']:>9.1f}{st['p95']:>9.1f}{st['p99']:>9.1f}")
+            return "```\n" + "\n".join(lines) + "\n```"
+
+        modules = dict(sorted(report["modules"].items(), key=lambda kv: kv[1]["p95"], reverse=True)[:15])
+        slowest = "\n".join(
+            f"`{t['total_ms']:.0f}ms` {t['module']} ({t['event']}) guild `{t['guild_id']}`"
+            + (" - " + ", ".join(f"{p} {ms:.0f}ms" for p, ms in t["phases_ms"].items()) if t["phases_ms"] else "")
+            for t in report["slowest"]
+        ) or "*No data*"
+
+        # Per-guild fair queues: depth now, and which guilds overflowed their caps
+        overflow = delivery_scheduler.overflow + db._log_queue.overflow
+        queues = (
+            f"Sends: {delivery_scheduler.in_flight()} in flight, {delivery_scheduler.waiting()} waiting\n"
+            f"DB rows queued: {db._log_queue.qsize()}\n"
+            f"Shedding level: {load_shedder.level} (lag {load_shedder.lag:.1f}s)\n"
+            + ("Dropped: " + ", ".join(f"`{guild_id}` {count}" for guild_id, count in overflow.most_common(5)) if overflow else "Dropped: none")
+        )
+
+        embed = EmbedBuilder.info(
+            title="Chromium | Hot Path Timings (ms)",
+            description=description,
+            fields=[
+                ("Modules (by p95)", table(modules), False),
+                ("Phases", table(report["phases"]), False),
+                ("Slowest Recent Events", slowest, False),
+                ("Queues", queues, False),
+            ]
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @debug_group.command(name="memory", description="Cache sizes and top allocations (bot owner only)")
+    @app_commands.describe(action="What to do with tracemalloc")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Report", value="report"),
+        app_commands.Choice(name="Start Tracing", value="start"),
+        app_commands.Choice(name="Stop Tracing", value="stop"),
+        app_commands.Choice(name="Set Baseline", value="baseline"),
+        app_commands.Choice(name="Diff Against Baseline", value="diff"),
+    ])
+    async def debug_memory(self, interaction: discord.Interaction, action: str = "report"):
+        """Shows each registered cache's footprint and, while tracing, the top allocating lines."""
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                embed=EmbedBuilder.error(title="Not Allowed", description="This command is restricted to the bot owner."),
+                ephemeral=True
+            )
+            return
+        # Snapshots of a big process take a moment
+        await interaction.response.defer(ephemeral=True)
+
+        if action == "start":
+            memory.start_tracing(shared_config.MEMORY_TRACE_FRAMES)
+            await memory.mark_baseline()
+        elif action == "stop":
+            memory.stop_tracing()
+        elif action == "baseline":
+            await memory.mark_baseline()
+
+        def mib(size: int) -> str:
+            return f"{size / 1048576:.1f}MiB"
+
+        rss = rss_bytes()
+        current, peak = memory.traced()
+        state = f"tracing, {mib(current)} traced (peak {mib(peak)})" if memory.tracing else "not tracing"
+        description = f"RSS **{mib(rss) if rss is not None else 'unknown'}**, tracemalloc {state}."
+
+        stats = await memory.report()
+        caches = "```\n" + "\n".join(
+            [f"{'cache':<26}{'entries':>9}{'~size':>10}"]
+            + [f"{s.name[:25]:<26}{s.entries:>9}{mib(s.bytes):>10}" for s in stats[:15]]
+        ) + "\n```" if stats else "*No caches registered*"
+
+        def allocations(rows, sign: str = "") -> str:
+            if not rows:
+                return "*No data*"
+            lines = []
+            for a in rows:
+                line = f"`{sign}{mib(a.size)}` {a.where[-60:]} ({sign}{a.count} blocks)"
+                if sum(len(l) + 1 for l in lines) + len(line) > 1024:
+                    break # Embed field limit
+                lines.append(line)
+            return "\n".join(lines)
+
+        fields = [("Caches", caches, False)]
+        if action == "diff":
+            grown = await memory.diff()
+            fields.append(("Growth Since Baseline", allocations(grown, "+") if grown is not None else "*No baseline, use Set Baseline first*", False))
+        elif memory.tracing:
+            fields.append(("Top Allocations", allocations(await memory.top_allocators()), False))
+        else:
+            fields.append(("Top Allocations", "*Start tracing to see allocations (slows the bot down while on)*", False))
+
+        embed = EmbedBuilder.info(title="Chromium | Memory", description=description, fields=fields)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(Utility(bot))
@@ -29,6 +29,70 @@ class Config:
         # Sharding defaults (can be overridden by args if needed, but nice to have here)
         self.SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1")) # Default to AutoSharded logic usually, but sometimes explicit
 
+        # Cluster mode (set by cluster/supervisor.py for each worker process)
+        cluster_id = os.getenv("CLUSTER_ID")
+        self.CLUSTER_ID: Optional[int] = int(cluster_id) if cluster_id else None
+        self.SHARD_IDS: Optional[list] = self._parse_shard_ids(os.getenv("SHARD_IDS"))
+        self.STORAGE_SOCKET = os.getenv("STORAGE_SOCKET") # Unix socket of the storage writer process
+
+        # Local Prometheus-style /metrics endpoint (0 = disabled). Binds to loopback by default.
+        self.METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+        self.METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+        # Per-listener hot-path profiling (also toggleable at runtime via /debug perf)
+        self.PROFILING = os.getenv("PROFILING", "false").lower() in ("1", "true", "yes")
+
+        # Log output: "text" (colored console) or "json" (JSON lines for log shipping)
+        self.LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+        # Re-upload slash commands on boot even if the tree hash matches the last sync
+        self.FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "false").lower() in ("1", "true", "yes")
+
+        # Load shedding: priority overrides ("VoiceState=low,MemberJoin=high") and the delivery
+        # lag (seconds) at which low-priority modules are sampled, then only digested
+        self.LOAD_SHEDDING = os.getenv("LOAD_SHEDDING", "true").lower() in ("1", "true", "yes")
+        self.LOG_PRIORITIES = self._parse_priorities(os.getenv("LOG_PRIORITIES"))
+        self.SHED_SAMPLE_LAG = float(os.getenv("SHED_SAMPLE_LAG", "5"))
+        self.SHED_DIGEST_LAG = float(os.getenv("SHED_DIGEST_LAG", "20"))
+
+        # Attachment archive for guilds that enable the AttachmentArchive module
+        self.ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "attachment_archive")
+        self.ARCHIVE_MAX_FILE_MB = float(os.getenv("ARCHIVE_MAX_FILE_MB", "8"))
+        self.ARCHIVE_GUILD_QUOTA_MB = float(os.getenv("ARCHIVE_GUILD_QUOTA_MB", "100"))
+        self.ARCHIVE_MAX_AGE_DAYS = float(os.getenv("ARCHIVE_MAX_AGE_DAYS", "7"))
+        self.ARCHIVE_CONCURRENCY = int(os.getenv("ARCHIVE_CONCURRENCY", "3"))
+
+        # Memory introspection: tracemalloc from boot (slows allocations; also toggleable via
+        # /debug memory), frames kept per allocation, and minutes between cache size reports (0 = off)
+        self.MEMORY_TRACING = os.getenv("MEMORY_TRACING", "false").lower() in ("1", "true", "yes")
+        self.MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "1"))
+        self.MEMORY_REPORT_MINUTES = float(os.getenv("MEMORY_REPORT_MINUTES", "15"))
+
+    @staticmethod
+    def _parse_shard_ids(value: Optional[str]) -> Optional[list]:
+        """'0-3' or '0,1,2,3' -> [0, 1, 2, 3]"""
+        if not value:
+            return None
+        ids = []
+        for part in value.split(","):
+            part = part.strip()
+            if "-" in part:
+                start, end = part.split("-", 1)
+                ids.extend(range(int(start), int(end) + 1))
+            elif part:
+                ids.append(int(part))
+        return sorted(set(ids))
+
+    @staticmethod
+    def _parse_priorities(value: Optional[str]) -> dict:
+        """'VoiceState=low, MemberJoin=high' -> {'VoiceState': 'low', 'MemberJoin': 'high'}"""
+        priorities = {}
+        for part in (value or "").split(","):
+            module_name, _, priority = part.partition("=")
+            if module_name.strip() and priority.strip():
+                priorities[module_name.strip()] = priority.strip().lower()
+        return priorities
+
     def _get_required(self, key: str) -> str:
         value = os.getenv(key)
         if not value:
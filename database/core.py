@@ -1,21 +1,73 @@
 import aiosqlite
 import os
+import time
 import asyncio
+import functools
+import inspect
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Tuple
+from utils.fair_queue import FairQueue
 from utils.logger import get_logger
+from utils.metrics import DB_BATCH_SECONDS, DB_ROWS_TOTAL, DB_QUEUE_DEPTH
 
 # Initialize logger
 log = get_logger()
 
 DB_PATH = "chromium_database.sqlite"
 
+# Log volume rollups: grain -> (table, bucket seconds, retention seconds)
+ROLLUP_GRAINS = {
+    "minute": ("log_volume_minute", 60, 2 * 86400),
+    "hour": ("log_volume_hour", 3600, 35 * 86400),
+    "day": ("log_volume_day", 86400, 400 * 86400),
+}
+ROLLUP_PRUNE_INTERVAL = 3600
+# Log rows waiting for the writer, per guild and in total. Only the newest 50 rows
+# per guild are kept anyway, so a per-guild cap above that loses nothing.
+LOG_QUEUE_GUILD_CAP = 100
+LOG_QUEUE_MAX = 20000
+
 class DatabaseManager:
     def __init__(self, db_path: str = DB_PATH):
         self.db_path = db_path
         self.connection = None
         self._log_counter = 0
+        # (guild_id, module_name, minute bucket) -> logs written, flushed into the rollup tables
+        self._volume: Dict[Tuple[int, str, int], int] = {}
+        self._last_rollup_prune = 0.0
         self._flush_task = None
-        self._log_queue = asyncio.Queue()
+        # One sub-queue per guild, batched round-robin so a raid can't delay everyone else's rows
+        self._log_queue = FairQueue("db_log", key=lambda row: row[0], per_key_cap=LOG_QUEUE_GUILD_CAP, max_size=LOG_QUEUE_MAX)
         self._log_worker_task = None
+        # Set when this process is a cluster worker: writes go to the storage writer
+        self.remote = None
+        self._invalidation_listeners: List[Callable[[str, List[int]], None]] = []
+        # Write transactions share one connection, so they take turns (see transaction())
+        self._write_lock = asyncio.Lock()
+        self._write_owner = None
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        One write transaction on the shared connection: commits on exit, rolls
+        back and re-raises on error. The lock is held from the first statement to
+        the commit, so a rollback only ever discards this transaction's own
+        statements. Nested use from the same task joins the outer transaction.
+        """
+        task = asyncio.current_task()
+        if self._write_owner is task:
+            yield self.connection
+            return
+        async with self._write_lock:
+            self._write_owner = task
+            try:
+                yield self.connection
+                await self.connection.commit()
+            except BaseException:
+                await self.connection.rollback()
+                raise
+            finally:
+                self._write_owner = None
 
     async def connect(self):
         try:
@@ -35,6 +87,62 @@ class DatabaseManager:
             log.error("Failed to connect to database", exc_info=e)
             raise
 
+    async def connect_remote(self, socket_path: str, cluster_id: int):
+        """
+        Cluster worker mode: reads use a local read-only connection, while writes
+        (log rows and @writer_op queries) go to the storage writer process.
+        """
+        from cluster.client import StorageClient # Lazy import, only cluster workers need it
+
+        try:
+            self.remote = StorageClient(socket_path, cluster_id, on_invalidate=self.notify_invalidated)
+            info = await self.remote.connect()
+            self.db_path = info["db_path"]
+            self.connection = await aiosqlite.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            log.database(f"Cluster {cluster_id}: read-only connection to {self.db_path}, writes via {socket_path}")
+        except Exception as e:
+            log.error("Failed to connect to storage writer", exc_info=e)
+            raise
+
+    def add_invalidation_listener(self, callback: Callable[[str, List[int]], None]):
+        """callback(op_name, guild_ids) runs after any settings mutation, local or from another cluster."""
+        self._invalidation_listeners.append(callback)
+
+    def notify_invalidated(self, op_name: str, guild_ids: List[int]):
+        for callback in self._invalidation_listeners:
+            try:
+                callback(op_name, guild_ids)
+            except Exception as e:
+                log.error(f"Invalidation listener failed for {op_name}: {e}")
+
+    async def backup_to_drive(self):
+        """Uploads the SQLite file to Google Drive, replacing the previous backup."""
+        from utils.drive import drive_manager # Lazy import to avoid circular dependency issues if any
+
+        try:
+            if os.path.exists(self.db_path):
+                log.info("Uploading database backup...")
+
+                if self.connection and not self.remote:
+                    # Fold any WAL pages into the main file so the upload is complete
+                    await self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+                # Read file content
+                with open(self.db_path, 'rb') as f:
+                    db_content = f.read()
+
+                backup_name = "chromium_database_backup.sqlite"
+                existing_id = await asyncio.to_thread(drive_manager.find_file, backup_name)
+
+                if existing_id:
+                    await asyncio.to_thread(drive_manager.update_file, existing_id, db_content)
+                else:
+                    await asyncio.to_thread(drive_manager.upload_file, backup_name, db_content)
+
+                log.info("Database backup completed.")
+        except Exception as e:
+            log.error("Failed to perform final database backup", exc_info=e)
+
     async def restore_from_drive(self):
         """Attempts to support restoring database from Google Drive on startup."""
         from utils.drive import drive_manager # Lazy import to avoid circular dependency issues if any
@@ -109,6 +217,10 @@ class DatabaseManager:
             CREATE INDEX IF NOT EXISTS idx_logs_guild ON logs(guild_id);
             """,
             """
+            -- /log browse filtered by module; rowid (id) is implicit, so pages walk the index in order
+            CREATE INDEX IF NOT EXISTS idx_logs_guild_module ON logs(guild_id, module_name);
+            """,
+            """
             CREATE TABLE IF NOT EXISTS server_lists (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 guild_id INTEGER NOT NULL,
@@ -129,7 +241,99 @@ class DatabaseManager:
                 stat_key TEXT PRIMARY KEY,
                 stat_value INTEGER DEFAULT 0
             );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS config_snapshot (
+                guild_id TEXT PRIMARY KEY, -- Dashboard keys guilds by string ID
+                settings TEXT NOT NULL, -- JSON string, last-known dashboard config
+                synced_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS bot_meta (
+                meta_key TEXT PRIMARY KEY,
+                meta_value TEXT, -- e.g. last synced command tree hash
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS dashboard_seed (
+                guild_id TEXT PRIMARY KEY, -- Dashboard keys guilds by string ID
+                digest TEXT NOT NULL, -- Hash of the payload the dashboard confirmed
+                confirmed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS log_volume_minute (
+                guild_id INTEGER NOT NULL,
+                bucket INTEGER NOT NULL, -- Unix time at the start of the minute
+                module_name TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (guild_id, bucket, module_name)
+            ) WITHOUT ROWID;
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS log_volume_hour (
+                guild_id INTEGER NOT NULL,
+                bucket INTEGER NOT NULL, -- Unix time at the start of the hour
+                module_name TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (guild_id, bucket, module_name)
+            ) WITHOUT ROWID;
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS log_volume_day (
+                guild_id INTEGER NOT NULL,
+                bucket INTEGER NOT NULL, -- Unix time at the start of the day
+                module_name TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (guild_id, bucket, module_name)
+            ) WITHOUT ROWID;
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS webhook_snapshots (
+                guild_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                snapshot TEXT NOT NULL, -- JSON, webhook_id -> comparable fields (WebhookUpdate._snapshot)
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (guild_id, channel_id)
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS webhook_prefetch (
+                guild_id INTEGER PRIMARY KEY,
+                fetched_at DATETIME DEFAULT CURRENT_TIMESTAMP -- Last full guild.webhooks() snapshot
+            );
+            """,
             """
+            CREATE TABLE IF NOT EXISTS delivery_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                token TEXT NOT NULL UNIQUE, -- Assigned by the delivering process (utils/outbox.py)
+                guild_id INTEGER NOT NULL,
+                module_name TEXT NOT NULL,
+                webhook_url TEXT,
+                channel_id INTEGER,
+                embed TEXT NOT NULL, -- JSON, discord.Embed.to_dict()
+                content TEXT, -- Log row written once the embed is delivered
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0 -- Replays started
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS attachment_archive (
+                guild_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                attachment_id INTEGER NOT NULL,
+                sha256 TEXT NOT NULL, -- Blob file name (utils/attachment_archive.py)
+                filename TEXT NOT NULL,
+                content_type TEXT,
+                size INTEGER NOT NULL,
+                archived_at REAL NOT NULL,
+                PRIMARY KEY (message_id, attachment_id)
+            );
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_attachment_archive_guild ON attachment_archive (guild_id, archived_at);",
+            "CREATE INDEX IF NOT EXISTS idx_attachment_archive_sha ON attachment_archive (sha256);"
         ]
         
         try:
@@ -164,6 +368,16 @@ class DatabaseManager:
             raise
 
     async def close(self):
+        if self.remote:
+            # Hands any buffered log rows to the writer before disconnecting
+            await self.remote.close()
+            self.remote = None
+            if self.connection:
+                await self.connection.close()
+                self.connection = None
+            log.database("Storage writer connection closed.")
+            return
+
         if self._flush_task:
             self._flush_task.cancel()
             try:
@@ -212,6 +426,7 @@ class DatabaseManager:
 
     async def flush_stats(self):
         """Flushes in-memory counters to the database."""
+        await self.flush_rollups()
         if self._log_counter <= 0 or not self.connection:
             return
 
@@ -219,27 +434,75 @@ class DatabaseManager:
         self._log_counter = 0
         
         try:
-            await self.connection.execute("""
-                INSERT INTO global_stats (stat_key, stat_value) 
-                VALUES ('total_logs_sent', ?) 
-                ON CONFLICT(stat_key) DO UPDATE SET stat_value = stat_value + excluded.stat_value
-            """, (count_to_add,))
-            await self.connection.commit()
-            log.trace(f"Flushed {count_to_add} log(s) to historical counter.")
+            async with self.transaction():
+                await self.connection.execute("""
+                    INSERT INTO global_stats (stat_key, stat_value) 
+                    VALUES ('total_logs_sent', ?) 
+                    ON CONFLICT(stat_key) DO UPDATE SET stat_value = stat_value + excluded.stat_value
+                """, (count_to_add,))
+            log.trace("Flushed %d log(s) to historical counter.", count_to_add)
         except Exception as e:
             # Restore the counter if it failed
             self._log_counter += count_to_add
             log.error(f"Failed to flush log counter: {e}")
 
+    async def flush_rollups(self):
+        """
+        Adds the buffered per-minute log counts to the minute, hour and day
+        rollup tables in one transaction, and prunes rows past each grain's
+        retention about once an hour.
+        """
+        if not self._volume or not self.connection:
+            return
+
+        volume, self._volume = self._volume, {}
+        try:
+            async with self.transaction():
+                for table, seconds, _ in ROLLUP_GRAINS.values():
+                    rows: Dict[Tuple[int, int, str], int] = {}
+                    for (guild_id, module_name, minute), count in volume.items():
+                        key = (guild_id, minute - minute % seconds, module_name)
+                        rows[key] = rows.get(key, 0) + count
+                    await self.connection.executemany(
+                        f"""
+                        INSERT INTO {table} (guild_id, bucket, module_name, count) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(guild_id, bucket, module_name) DO UPDATE SET count = count + excluded.count
+                        """,
+                        [(*key, count) for key, count in rows.items()]
+                    )
+
+                now = time.time()
+                if now - self._last_rollup_prune >= ROLLUP_PRUNE_INTERVAL:
+                    for table, _, retention in ROLLUP_GRAINS.values():
+                        await self.connection.execute(f"DELETE FROM {table} WHERE bucket < ?", (int(now - retention),))
+                    self._last_rollup_prune = now
+
+            log.trace("Flushed %d log volume bucket(s).", len(volume))
+        except Exception as e:
+            # Put the counts back for the next flush
+            for key, count in volume.items():
+                self._volume[key] = self._volume.get(key, 0) + count
+            log.error(f"Failed to flush log volume rollups: {e}")
+
+    def record_volume(self, guild_id: int, module_name: str, count: int = 1):
+        """Counts logs for the per-guild, per-module rollups (flushed with the other stats)."""
+        key = (guild_id, module_name, int(time.time()) // 60 * 60)
+        self._volume[key] = self._volume.get(key, 0) + count
+
     def increment_log_count(self):
         """Increments the in-memory log counter."""
         self._log_counter += 1
 
     def queue_log(self, guild_id: int, module_name: str, content: str):
         """Queues a log entry to be written in the next batch."""
+        if self.remote:
+            # The writer batches and counts it
+            self.remote.queue_log(guild_id, module_name, content)
+            return
         self._log_queue.put_nowait((guild_id, module_name, content))
         # We still increment the counter here
         self.increment_log_count()
+        self.record_volume(guild_id, module_name)
 
     async def _log_worker(self):
         """Background task that writes logs in batches."""
@@ -275,34 +538,82 @@ class DatabaseManager:
         if not self.connection or not batch:
             return
             
+        start = time.perf_counter()
         try:
-            # Insert logs
-            await self.connection.executemany(
-                "INSERT INTO logs (guild_id, module_name, content) VALUES (?, ?, ?)",
-                batch
-            )
-            
-            # Get unique guild IDs to trim their logs
-            guild_ids = {item[0] for item in batch}
-            
-            # Trim logs for each guild
-            # NOTE: Doing this for every batch might still be excessive if the same guild logs 100 times.
-            # But it's better than doing it for EVERY single log.
-            for guild_id in guild_ids:
-                 await self.connection.execute("""
-                    DELETE FROM logs 
-                    WHERE guild_id = ? 
-                    AND id NOT IN (
-                        SELECT id FROM logs 
+            async with self.transaction():
+                # Insert logs
+                await self.connection.executemany(
+                    "INSERT INTO logs (guild_id, module_name, content) VALUES (?, ?, ?)",
+                    batch
+                )
+                
+                # Get unique guild IDs to trim their logs
+                guild_ids = {item[0] for item in batch}
+                
+                # Trim logs for each guild
+                # NOTE: Doing this for every batch might still be excessive if the same guild logs 100 times.
+                # But it's better than doing it for EVERY single log.
+                for guild_id in guild_ids:
+                     await self.connection.execute("""
+                        DELETE FROM logs 
                         WHERE guild_id = ? 
-                        ORDER BY id DESC 
-                        LIMIT 50
-                    )
-                """, (guild_id, guild_id))
+                        AND id NOT IN (
+                            SELECT id FROM logs 
+                            WHERE guild_id = ? 
+                            ORDER BY id DESC 
+                            LIMIT 50
+                        )
+                    """, (guild_id, guild_id))
             
-            await self.connection.commit()
+            DB_BATCH_SECONDS.observe(time.perf_counter() - start)
+            DB_ROWS_TOTAL.inc(len(batch))
         except Exception as e:
             log.error(f"Failed to write log batch: {e}")
 
 # Global DB instance
 db = DatabaseManager()
+DB_QUEUE_DEPTH.set_function(lambda: db._log_queue.qsize())
+
+# Mutating queries by name, so the storage writer can run what workers ask for
+WRITER_OPS: Dict[str, Callable] = {}
+
+def guild_ids_from_args(func: Callable, args: tuple, kwargs: dict) -> List[int]:
+    """Guild IDs a writer op touches, from its guild_id / guild_ids argument. Empty means unknown (treat as all)."""
+    param = getattr(func, "guild_param", None)
+    if param is None:
+        return []
+    value = kwargs.get(param, args[0] if args else None)
+    if isinstance(value, int):
+        return [value]
+    if isinstance(value, (list, tuple, set)):
+        return [g for g in value if isinstance(g, int)]
+    return []
+
+def writer_op(invalidates: bool = True, default=None):
+    """
+    Marks a query that writes. Runs locally as usual; in a cluster worker the
+    call is forwarded to the storage writer instead (returning `default` if it
+    can't be reached). When `invalidates` is set, listeners are told which
+    guilds changed, in every cluster.
+    """
+    def decorator(func):
+        params = list(inspect.signature(func).parameters)
+        func.guild_param = params[0] if params and params[0] in ("guild_id", "guild_ids") else None
+        func.invalidates = invalidates
+        WRITER_OPS[func.__name__] = func
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if db.remote is not None:
+                try:
+                    return await db.remote.call(func.__name__, args, kwargs)
+                except Exception as e:
+                    log.error(f"Storage writer call {func.__name__} failed: {e}")
+                    return default
+            result = await func(*args, **kwargs)
+            if invalidates:
+                db.notify_invalidated(func.__name__, guild_ids_from_args(func, args, kwargs))
+            return result
+
+        return wrapper
+    return decorator
@@ -1,12 +1,53 @@
 import json
 import aiosqlite
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional, Dict, Tuple
-from .core import db
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple
+from .core import db, writer_op, ROLLUP_GRAINS
 from utils.logger import get_logger
 
 log = get_logger()
 
+# --- Bulk operations ---
+# Fleet-wide statements (one row per guild the bot is in) must not bind one
+# variable per ID: SQLite caps bound variables (999 on older builds) and a huge
+# IN (...) list is slow to prepare anyway. ID sets are staged into a TEMP table
+# and joined against instead, or sent in chunks where a join doesn't fit.
+
+BULK_CHUNK_SIZE = 500
+
+def chunked(items: Iterable, size: int = BULK_CHUNK_SIZE) -> Iterator[list]:
+    """Yields lists of at most `size` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+@asynccontextmanager
+async def staged_ids(ids: Iterable[int]):
+    """
+    Stages IDs into temp.bulk_ids (id INTEGER PRIMARY KEY) for set-based joins:
+    `... WHERE guild_id IN (SELECT id FROM temp.bulk_ids)`. The table lives on
+    this connection only and is emptied on exit. Runs inside a db.transaction(),
+    joining the caller's if it has one, so one staged set exists at a time.
+    """
+    async with db.transaction():
+        await db.connection.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_ids (id INTEGER PRIMARY KEY)")
+        await db.connection.execute("DELETE FROM temp.bulk_ids")
+        try:
+            for chunk in chunked(ids):
+                await db.connection.executemany(
+                    "INSERT OR IGNORE INTO temp.bulk_ids (id) VALUES (?)", [(i,) for i in chunk]
+                )
+            yield "temp.bulk_ids"
+        finally:
+            await db.connection.execute("DELETE FROM temp.bulk_ids")
+
+@writer_op()
 async def upsert_guild_settings(
     guild_id: int, 
     log_channel_id: Optional[int] = None, 
@@ -24,57 +65,60 @@ async def upsert_guild_settings(
         return
 
     try:
-        cursor = await db.connection.execute(
-            "SELECT enabled_modules, log_channel_id, message_log_id, member_log_id, log_webhook_url, message_webhook_url, member_webhook_url FROM guild_settings WHERE guild_id = ?", 
-            (guild_id,)
-        )
-        row = await cursor.fetchone()
+        async with db.transaction():
+            cursor = await db.connection.execute(
+                "SELECT enabled_modules, log_channel_id, message_log_id, member_log_id, log_webhook_url, message_webhook_url, member_webhook_url FROM guild_settings WHERE guild_id = ?", 
+                (guild_id,)
+            )
+            row = await cursor.fetchone()
         
-        current_modules = {}
-        # Defaults
-        current_log = None
-        current_msg_log = None
-        current_mem_log = None
+            current_modules = {}
+            # Defaults
+            current_log = None
+            current_msg_log = None
+            current_mem_log = None
+            current_log_wh = None
+            current_msg_wh = None
+            current_mem_wh = None
         
-        if row:
-            current_modules = json.loads(row[0]) if row[0] else {}
-            current_log = row[1]
-            current_msg_log = row[2]
-            current_mem_log = row[3]
-            current_log_wh = row[4]
-            current_msg_wh = row[5]
-            current_mem_wh = row[6]
+            if row:
+                current_modules = json.loads(row[0]) if row[0] else {}
+                current_log = row[1]
+                current_msg_log = row[2]
+                current_mem_log = row[3]
+                current_log_wh = row[4]
+                current_msg_wh = row[5]
+                current_mem_wh = row[6]
             
-        final_log = log_channel_id if log_channel_id is not None else current_log
-        final_msg_log = message_log_id if message_log_id is not None else current_msg_log
-        final_mem_log = member_log_id if member_log_id is not None else current_mem_log
+            final_log = log_channel_id if log_channel_id is not None else current_log
+            final_msg_log = message_log_id if message_log_id is not None else current_msg_log
+            final_mem_log = member_log_id if member_log_id is not None else current_mem_log
         
-        final_log_wh = log_webhook_url if log_webhook_url is not None else current_log_wh
-        final_msg_wh = message_webhook_url if message_webhook_url is not None else current_msg_wh
-        final_mem_wh = member_webhook_url if member_webhook_url is not None else current_mem_wh
+            final_log_wh = log_webhook_url if log_webhook_url is not None else current_log_wh
+            final_msg_wh = message_webhook_url if message_webhook_url is not None else current_msg_wh
+            final_mem_wh = member_webhook_url if member_webhook_url is not None else current_mem_wh
         
-        if enabled_modules:
-            current_modules.update(enabled_modules)
+            if enabled_modules:
+                current_modules.update(enabled_modules)
             
-        final_modules_json = json.dumps(current_modules)
+            final_modules_json = json.dumps(current_modules)
         
-    # NOTE: IF YOU CHANGE THE COLUMNS IN guild_settings, YOU MUST CHANGE THE ON CONFLICT(guild_id) DO UPDATE SET
-    #       AND THE VALUES IN THE INSERT INTO guild_settings (guild_id, log_channel_id, message_log_id, member_log_id, log_webhook_url, message_webhook_url, member_webhook_url, enabled_modules)
-    #       OTHERWISE YOU WILL GET A SQL ERROR OR STALE DATA
+        # NOTE: IF YOU CHANGE THE COLUMNS IN guild_settings, YOU MUST CHANGE THE ON CONFLICT(guild_id) DO UPDATE SET
+        #       AND THE VALUES IN THE INSERT INTO guild_settings (guild_id, log_channel_id, message_log_id, member_log_id, log_webhook_url, message_webhook_url, member_webhook_url, enabled_modules)
+        #       OTHERWISE YOU WILL GET A SQL ERROR OR STALE DATA
         
-        await db.connection.execute("""
-            INSERT INTO guild_settings (guild_id, log_channel_id, message_log_id, member_log_id, log_webhook_url, message_webhook_url, member_webhook_url, enabled_modules)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET
-                log_channel_id = excluded.log_channel_id,
-                message_log_id = excluded.message_log_id,
-                member_log_id = excluded.member_log_id,
-                log_webhook_url = excluded.log_webhook_url,
-                message_webhook_url = excluded.message_webhook_url,
-                member_webhook_url = excluded.member_webhook_url,
-                enabled_modules = excluded.enabled_modules
-        """, (guild_id, final_log, final_msg_log, final_mem_log, final_log_wh, final_msg_wh, final_mem_wh, final_modules_json))
-        await db.connection.commit()
+            await db.connection.execute("""
+                INSERT INTO guild_settings (guild_id, log_channel_id, message_log_id, member_log_id, log_webhook_url, message_webhook_url, member_webhook_url, enabled_modules)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET
+                    log_channel_id = excluded.log_channel_id,
+                    message_log_id = excluded.message_log_id,
+                    member_log_id = excluded.member_log_id,
+                    log_webhook_url = excluded.log_webhook_url,
+                    message_webhook_url = excluded.message_webhook_url,
+                    member_webhook_url = excluded.member_webhook_url,
+                    enabled_modules = excluded.enabled_modules
+            """, (guild_id, final_log, final_msg_log, final_mem_log, final_log_wh, final_msg_wh, final_mem_wh, final_modules_json))
     except Exception as e:
         log.error(f"Failed to upsert settings for guild {guild_id}", exc_info=e)
 
@@ -120,6 +164,37 @@ async def get_recent_logs(guild_id: int, limit: int = 50):
         log.error(f"Failed to fetch logs for guild {guild_id}", exc_info=e)
         return []
 
+async def get_logs_page(guild_id: int, before_id: Optional[int] = None, limit: int = 5, module_name: Optional[str] = None):
+    """
+    One page of logs, newest first. Keyset paginated: pass the last row's id as
+    before_id for the next page, so every page costs the same.
+    """
+    if not db.connection:
+        return []
+
+    clauses, params = ["guild_id = ?"], [guild_id]
+    if module_name:
+        clauses.append("module_name = ?")
+        params.append(module_name)
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+
+    try:
+        db.connection.row_factory = aiosqlite.Row
+        cursor = await db.connection.execute(
+            f"""
+            SELECT id, module_name, content, CAST(strftime('%s', timestamp) AS INTEGER) AS ts
+            FROM logs WHERE {' AND '.join(clauses)} ORDER BY id DESC LIMIT ?
+            """,
+            (*params, limit)
+        )
+        return [dict(row) for row in await cursor.fetchall()]
+    except Exception as e:
+        log.error(f"Failed to fetch log page for guild {guild_id}", exc_info=e)
+        return []
+
+@writer_op()
 async def delete_guild_settings(guild_id: int):
     """
     Soft-deletes settings for a guild (sets deleted_at).
@@ -128,15 +203,16 @@ async def delete_guild_settings(guild_id: int):
         return
 
     try:
-        await db.connection.execute(
-            "UPDATE guild_settings SET deleted_at = CURRENT_TIMESTAMP WHERE guild_id = ?", 
-            (guild_id,)
-        )
-        await db.connection.commit()
+        async with db.transaction():
+            await db.connection.execute(
+                "UPDATE guild_settings SET deleted_at = CURRENT_TIMESTAMP WHERE guild_id = ?", 
+                (guild_id,)
+            )
         log.database(f"Soft-deleted settings for guild {guild_id}")
     except Exception as e:
         log.error(f"Failed to soft-delete settings for {guild_id}", exc_info=e)
 
+@writer_op()
 async def hard_delete_guild_settings(guild_id: int):
     """
     Permanently removes settings and logs.
@@ -145,13 +221,14 @@ async def hard_delete_guild_settings(guild_id: int):
         return
 
     try:
-        await db.connection.execute("DELETE FROM guild_settings WHERE guild_id = ?", (guild_id,))
-        await db.connection.execute("DELETE FROM logs WHERE guild_id = ?", (guild_id,))
-        await db.connection.commit()
+        async with db.transaction():
+            await db.connection.execute("DELETE FROM guild_settings WHERE guild_id = ?", (guild_id,))
+            await db.connection.execute("DELETE FROM logs WHERE guild_id = ?", (guild_id,))
         log.database(f"Hard-deleted settings for guild {guild_id}")
     except Exception as e:
         log.error(f"Failed to hard-delete settings for {guild_id}", exc_info=e)
 
+@writer_op()
 async def restore_guild_settings(guild_id: int):
     """
     Restores soft-deleted settings.
@@ -160,11 +237,11 @@ async def restore_guild_settings(guild_id: int):
         return
 
     try:
-        await db.connection.execute(
-            "UPDATE guild_settings SET deleted_at = NULL WHERE guild_id = ?", 
-            (guild_id,)
-        )
-        await db.connection.commit()
+        async with db.transaction():
+            await db.connection.execute(
+                "UPDATE guild_settings SET deleted_at = NULL WHERE guild_id = ?", 
+                (guild_id,)
+            )
         log.database(f"Restored settings for guild {guild_id}")
     except Exception as e:
         log.error(f"Failed to restore settings for {guild_id}", exc_info=e)
@@ -185,6 +262,7 @@ async def check_soft_deleted_settings(guild_id: int) -> bool:
     except Exception:
         return False
 
+@writer_op(default=0)
 async def restore_settings_for_active_guilds(guild_ids: list[int]) -> int:
     """
     Restores soft-deleted settings for guilds the bot is currently in.
@@ -195,18 +273,17 @@ async def restore_settings_for_active_guilds(guild_ids: list[int]) -> int:
         return 0
         
     try:
-        # Build placeholders for the IN clause
-        placeholders = ','.join('?' * len(guild_ids))
-        cursor = await db.connection.execute(
-            f"UPDATE guild_settings SET deleted_at = NULL WHERE guild_id IN ({placeholders}) AND deleted_at IS NOT NULL",
-            guild_ids
-        )
-        await db.connection.commit()
+        async with db.transaction():
+            async with staged_ids(guild_ids) as ids_table:
+                cursor = await db.connection.execute(
+                    f"UPDATE guild_settings SET deleted_at = NULL WHERE deleted_at IS NOT NULL AND guild_id IN (SELECT id FROM {ids_table})"
+                )
         return cursor.rowcount
     except Exception as e:
         log.error("Failed to restore settings for active guilds", exc_info=e)
         return 0
 
+@writer_op(default=False)
 async def add_list_item(guild_id: int, list_type: str, entity_type: str, entity_id: int, entity_name: str):
     """
     Adds an item to the blacklist or whitelist.
@@ -215,22 +292,23 @@ async def add_list_item(guild_id: int, list_type: str, entity_type: str, entity_
         return False
         
     try:
-        await db.connection.execute(
-            """
-            INSERT INTO server_lists (guild_id, list_type, entity_type, entity_id, entity_name) 
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(guild_id, list_type, entity_id) DO UPDATE SET
-                entity_name = excluded.entity_name,
-                entity_type = excluded.entity_type
-            """, 
-            (guild_id, list_type, entity_type, entity_id, entity_name)
-        )
-        await db.connection.commit()
+        async with db.transaction():
+            await db.connection.execute(
+                """
+                INSERT INTO server_lists (guild_id, list_type, entity_type, entity_id, entity_name) 
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(guild_id, list_type, entity_id) DO UPDATE SET
+                    entity_name = excluded.entity_name,
+                    entity_type = excluded.entity_type
+                """, 
+                (guild_id, list_type, entity_type, entity_id, entity_name)
+            )
         return True
     except Exception as e:
         log.error(f"Failed to add list item for guild {guild_id}", exc_info=e)
         return False
 
+@writer_op(default=False)
 async def remove_list_item(guild_id: int, list_type: str, entity_id: int):
     """
     Removes an item from the blacklist or whitelist.
@@ -239,16 +317,54 @@ async def remove_list_item(guild_id: int, list_type: str, entity_id: int):
         return False
         
     try:
-        await db.connection.execute(
-            "DELETE FROM server_lists WHERE guild_id = ? AND list_type = ? AND entity_id = ?",
-            (guild_id, list_type, entity_id)
-        )
-        await db.connection.commit()
+        async with db.transaction():
+            await db.connection.execute(
+                "DELETE FROM server_lists WHERE guild_id = ? AND list_type = ? AND entity_id = ?",
+                (guild_id, list_type, entity_id)
+            )
         return True
     except Exception as e:
         log.error(f"Failed to remove list item for guild {guild_id}", exc_info=e)
         return False
 
+@writer_op(default=None)
+async def import_list_items(guild_id: int, list_type: str, items: list, replace: bool = False):
+    """
+    Upserts many (entity_type, entity_id, entity_name) items in one transaction.
+    With replace, the list is cleared first, in the same transaction.
+    Returns the entity IDs that were already on the list, or None on failure (nothing applied).
+    """
+    if not db.connection:
+        return None
+
+    try:
+        async with db.transaction():
+            cursor = await db.connection.execute(
+                "SELECT entity_id FROM server_lists WHERE guild_id = ? AND list_type = ?",
+                (guild_id, list_type)
+            )
+            existing = {row[0] for row in await cursor.fetchall()}
+
+            if replace:
+                await db.connection.execute(
+                    "DELETE FROM server_lists WHERE guild_id = ? AND list_type = ?",
+                    (guild_id, list_type)
+                )
+            await db.connection.executemany(
+                """
+                INSERT INTO server_lists (guild_id, list_type, entity_type, entity_id, entity_name) 
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(guild_id, list_type, entity_id) DO UPDATE SET
+                    entity_name = excluded.entity_name,
+                    entity_type = excluded.entity_type
+                """,
+                [(guild_id, list_type, entity_type, entity_id, entity_name) for entity_type, entity_id, entity_name in items]
+            )
+        return [entity_id for _, entity_id, _ in items if entity_id in existing]
+    except Exception as e:
+        log.error(f"Failed to import {len(items)} list item(s) for guild {guild_id}", exc_info=e)
+        return None
+
 async def get_list_items(guild_id: int, list_type: str):
     """
     Returns all items for a specific list type.
@@ -267,6 +383,35 @@ async def get_list_items(guild_id: int, list_type: str):
         log.error(f"Failed to fetch list items for guild {guild_id}", exc_info=e)
         return []
 
+async def get_list_page(guild_id: int, list_type: str, before_id: Optional[int] = None, limit: int = 8, entity_type: Optional[str] = None):
+    """
+    One page of list entries, newest first. Keyset paginated like get_logs_page.
+    """
+    if not db.connection:
+        return []
+
+    clauses, params = ["guild_id = ?", "list_type = ?"], [guild_id, list_type]
+    if entity_type:
+        clauses.append("entity_type = ?")
+        params.append(entity_type)
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+
+    try:
+        db.connection.row_factory = aiosqlite.Row
+        cursor = await db.connection.execute(
+            f"""
+            SELECT id, entity_type, entity_id, entity_name, CAST(strftime('%s', added_at) AS INTEGER) AS added_ts
+            FROM server_lists WHERE {' AND '.join(clauses)} ORDER BY id DESC LIMIT ?
+            """,
+            (*params, limit)
+        )
+        return [dict(row) for row in await cursor.fetchall()]
+    except Exception as e:
+        log.error(f"Failed to fetch {list_type} page for guild {guild_id}", exc_info=e)
+        return []
+
 async def search_list_items(guild_id: int, list_type: str, query: str):
     """
     Fuzzy searches for items in the DB for a specific list.
@@ -299,7 +444,8 @@ async def get_all_list_items(guild_id: int):
             "SELECT * FROM server_lists WHERE guild_id = ?", 
             (guild_id,)
         )
-        return await cursor.fetchall()
+        # BaseLogger filters read these with .get(), which sqlite3.Row doesn't have
+        return [dict(row) for row in await cursor.fetchall()]
     except Exception as e:
         log.error(f"Failed to fetch all list items for guild {guild_id}", exc_info=e)
         return []
@@ -319,6 +465,26 @@ async def get_total_logs_count() -> int:
         log.error("Failed to fetch total logs count", exc_info=e)
         return 0
 
+async def get_log_volume(guild_id: int, grain: str, since: int, module_name: Optional[str] = None) -> List[Tuple[int, str, int]]:
+    """
+    (bucket, module_name, count) rows from one rollup table for buckets starting
+    at or after `since` (unix time), oldest first. Reads rollups only, never `logs`.
+    """
+    if not db.connection:
+        return []
+    table = ROLLUP_GRAINS[grain][0]
+    query = f"SELECT bucket, module_name, count FROM {table} WHERE guild_id = ? AND bucket >= ?"
+    params: list = [guild_id, since]
+    if module_name:
+        query += " AND module_name = ?"
+        params.append(module_name)
+    try:
+        cursor = await db.connection.execute(query + " ORDER BY bucket", params)
+        return [(r[0], r[1], r[2]) for r in await cursor.fetchall()]
+    except Exception as e:
+        log.error(f"Failed to read {grain} log volume for guild {guild_id}", exc_info=e)
+        return []
+
 async def get_all_guild_settings_full():
     """
     Returns a list of dicts: [ {guild_id, log_channel_id, msg_id, mem_id, modules}, ... ]
@@ -343,4 +509,402 @@ async def get_all_guild_settings_full():
         ]
     except Exception as e:
         log.error("Failed to get all guild settings", exc_info=e)
-        return []
\ No newline at end of file
+        return []
+
+async def iter_guild_settings_chunks(chunk_size: int = 500):
+    """
+    Same rows as get_all_guild_settings_full, streamed in guild_id order a chunk
+    at a time (keyset on guild_id), so a seed never holds every guild at once.
+    """
+    if not db.connection:
+        return
+    last_id = -1
+    while True:
+        try:
+            cursor = await db.connection.execute(
+                """
+                SELECT guild_id, log_channel_id, message_log_id, member_log_id, enabled_modules FROM guild_settings
+                WHERE deleted_at IS NULL AND guild_id > ? ORDER BY guild_id LIMIT ?
+                """,
+                (last_id, chunk_size)
+            )
+            rows = await cursor.fetchall()
+        except Exception as e:
+            log.error("Failed to stream guild settings", exc_info=e)
+            return
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [
+            {
+                "guild_id": r[0],
+                "log_channel_id": r[1],
+                "msg_id": r[2],
+                "mem_id": r[3],
+                "modules": json.loads(r[4]) if r[4] else {}
+            }
+            for r in rows
+        ]
+        if len(rows) < chunk_size:
+            return
+
+async def get_dashboard_seeded() -> Dict[str, str]:
+    """Returns {guild_id_str: payload_digest} for guilds the dashboard confirmed during seeding."""
+    if not db.connection:
+        return {}
+    try:
+        cursor = await db.connection.execute("SELECT guild_id, digest FROM dashboard_seed")
+        return {str(r[0]): r[1] for r in await cursor.fetchall()}
+    except Exception as e:
+        log.error("Failed to load dashboard seed state", exc_info=e)
+        return {}
+
+@writer_op(invalidates=False, default=False)
+async def mark_dashboard_seeded(entries: list) -> bool:
+    """Records [guild_id_str, digest] pairs the dashboard accepted."""
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            await db.connection.executemany(
+                """
+                INSERT INTO dashboard_seed (guild_id, digest, confirmed_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(guild_id) DO UPDATE SET digest = excluded.digest, confirmed_at = excluded.confirmed_at
+                """,
+                [(str(guild_id), digest) for guild_id, digest in entries]
+            )
+        return True
+    except Exception as e:
+        log.error("Failed to save dashboard seed state", exc_info=e)
+        return False
+
+@writer_op(invalidates=False, default=False)
+async def clear_dashboard_seeded() -> bool:
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            await db.connection.execute("DELETE FROM dashboard_seed")
+        return True
+    except Exception as e:
+        log.error("Failed to clear dashboard seed state", exc_info=e)
+        return False
+
+async def load_webhook_snapshots() -> Tuple[Dict[Tuple[int, int], dict], Dict[int, int]]:
+    """
+    Returns ({(guild_id, channel_id): snapshot}, {guild_id: fetched_at_epoch}).
+    The second map lists guilds with a complete (prefetched) snapshot.
+    """
+    if not db.connection:
+        return {}, {}
+    try:
+        cursor = await db.connection.execute("SELECT guild_id, channel_id, snapshot FROM webhook_snapshots")
+        snapshots = {}
+        for r in await cursor.fetchall():
+            try:
+                # JSON object keys are strings, webhook IDs are ints everywhere else
+                snapshots[(r[0], r[1])] = {int(wid): info for wid, info in json.loads(r[2]).items()}
+            except (TypeError, ValueError):
+                continue # Corrupt row, the next fetch of that channel rewrites it
+        cursor = await db.connection.execute("SELECT guild_id, CAST(strftime('%s', fetched_at) AS INTEGER) FROM webhook_prefetch")
+        fetched = {r[0]: r[1] for r in await cursor.fetchall()}
+        return snapshots, fetched
+    except Exception as e:
+        log.error("Failed to load webhook snapshots", exc_info=e)
+        return {}, {}
+
+@writer_op(invalidates=False, default=False)
+async def save_webhook_snapshots(guild_id: int, entries: list, complete: bool = False) -> bool:
+    """
+    Upserts [channel_id, snapshot_json] pairs for a guild. With complete, the
+    entries are the whole guild: other channels' rows are dropped and the guild
+    is marked prefetched.
+    """
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            if complete:
+                await db.connection.execute("DELETE FROM webhook_snapshots WHERE guild_id = ?", (guild_id,))
+                await db.connection.execute(
+                    """
+                    INSERT INTO webhook_prefetch (guild_id, fetched_at) VALUES (?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(guild_id) DO UPDATE SET fetched_at = excluded.fetched_at
+                    """,
+                    (guild_id,)
+                )
+            await db.connection.executemany(
+                """
+                INSERT INTO webhook_snapshots (guild_id, channel_id, snapshot, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(guild_id, channel_id) DO UPDATE SET snapshot = excluded.snapshot, updated_at = excluded.updated_at
+                """,
+                [(guild_id, channel_id, snapshot) for channel_id, snapshot in entries]
+            )
+        return True
+    except Exception as e:
+        log.error(f"Failed to save webhook snapshots for guild {guild_id}", exc_info=e)
+        return False
+
+@writer_op(invalidates=False, default=False)
+async def delete_webhook_snapshots(guild_id: int) -> bool:
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            await db.connection.execute("DELETE FROM webhook_snapshots WHERE guild_id = ?", (guild_id,))
+            await db.connection.execute("DELETE FROM webhook_prefetch WHERE guild_id = ?", (guild_id,))
+        return True
+    except Exception as e:
+        log.error(f"Failed to delete webhook snapshots for guild {guild_id}", exc_info=e)
+        return False
+
+# --- Delivery outbox ---
+
+@writer_op(invalidates=False, default=False)
+async def write_outbox(rows: list, done: list) -> bool:
+    """
+    Adds pending deliveries (OutboxEntry.to_row() lists) and removes delivered
+    ones (tokens) in one transaction.
+    """
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            if rows:
+                await db.connection.executemany(
+                    """
+                    INSERT OR IGNORE INTO delivery_outbox
+                        (token, guild_id, module_name, webhook_url, channel_id, embed, content, created_at, attempts)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [tuple(row) for row in rows]
+                )
+            if done:
+                await db.connection.executemany("DELETE FROM delivery_outbox WHERE token = ?", [(token,) for token in done])
+        return True
+    except Exception as e:
+        log.error(f"Failed to write delivery outbox (+{len(rows)}/-{len(done)})", exc_info=e)
+        return False
+
+async def load_outbox(after_id: int = 0, limit: int = 200) -> list:
+    """Pending deliveries after `after_id`, oldest first: (id, token, guild_id, ..., attempts)."""
+    if not db.connection:
+        return []
+    try:
+        cursor = await db.connection.execute(
+            """
+            SELECT id, token, guild_id, module_name, webhook_url, channel_id, embed, content, created_at, attempts
+            FROM delivery_outbox WHERE id > ? ORDER BY id LIMIT ?
+            """,
+            (after_id, limit)
+        )
+        return await cursor.fetchall()
+    except Exception as e:
+        log.error("Failed to load delivery outbox", exc_info=e)
+        return []
+
+@writer_op(invalidates=False, default=False)
+async def mark_outbox_attempted(tokens: list) -> bool:
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            await db.connection.executemany(
+                "UPDATE delivery_outbox SET attempts = attempts + 1 WHERE token = ?", [(token,) for token in tokens]
+            )
+        return True
+    except Exception as e:
+        log.error("Failed to update delivery outbox attempts", exc_info=e)
+        return False
+
+# --- Attachment archive ---
+
+@writer_op(invalidates=False, default=False)
+async def save_archived_attachment(row: list) -> bool:
+    """row: [guild_id, message_id, attachment_id, sha256, filename, content_type, size, archived_at]"""
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            await db.connection.execute(
+                """
+                INSERT OR REPLACE INTO attachment_archive
+                    (guild_id, message_id, attachment_id, sha256, filename, content_type, size, archived_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                tuple(row)
+            )
+        return True
+    except Exception as e:
+        log.error(f"Failed to save archived attachment for message {row[1]}", exc_info=e)
+        return False
+
+async def get_archived_attachments(message_id: int) -> List[Tuple[str, str, Optional[str], int]]:
+    """(sha256, filename, content_type, size) of a message's archived attachments."""
+    if not db.connection:
+        return []
+    try:
+        cursor = await db.connection.execute(
+            "SELECT sha256, filename, content_type, size FROM attachment_archive WHERE message_id = ? ORDER BY attachment_id",
+            (message_id,)
+        )
+        return [tuple(r) for r in await cursor.fetchall()]
+    except Exception as e:
+        log.error(f"Failed to fetch archived attachments for message {message_id}", exc_info=e)
+        return []
+
+# A guild is charged once per distinct blob it references
+_ARCHIVE_USAGE = """
+    SELECT guild_id, SUM(size) FROM (
+        SELECT guild_id, sha256, MAX(size) AS size FROM attachment_archive {where} GROUP BY guild_id, sha256
+    ) GROUP BY guild_id
+"""
+
+async def get_archive_usage(guild_id: int) -> int:
+    """Bytes of archived attachments charged to a guild."""
+    if not db.connection:
+        return 0
+    try:
+        cursor = await db.connection.execute(_ARCHIVE_USAGE.format(where="WHERE guild_id = ?"), (guild_id,))
+        row = await cursor.fetchone()
+        return row[1] if row else 0
+    except Exception as e:
+        log.error(f"Failed to fetch archive usage for guild {guild_id}", exc_info=e)
+        return 0
+
+@writer_op(invalidates=False, default=None)
+async def evict_archived_attachments(cutoff: float, quota: int, guild_id: Optional[int] = None) -> List[str]:
+    """
+    Drops references archived before `cutoff`, then each guild's least recently
+    archived blobs until it is within `quota` bytes (only `guild_id` if given).
+    Returns the hashes nothing references anymore; the caller deletes those files.
+    """
+    if not db.connection:
+        return []
+    scope, params = ("AND guild_id = ?", (guild_id,)) if guild_id is not None else ("", ())
+    try:
+        async with db.transaction():
+            cursor = await db.connection.execute(
+                f"SELECT DISTINCT sha256 FROM attachment_archive WHERE archived_at < ? {scope}", (cutoff, *params)
+            )
+            candidates = {r[0] for r in await cursor.fetchall()}
+            await db.connection.execute(f"DELETE FROM attachment_archive WHERE archived_at < ? {scope}", (cutoff, *params))
+
+            cursor = await db.connection.execute(
+                _ARCHIVE_USAGE.format(where="WHERE guild_id = ?" if guild_id is not None else "") + " HAVING SUM(size) > ?",
+                (*params, quota)
+            )
+            for over_guild, usage in await cursor.fetchall():
+                cursor = await db.connection.execute(
+                    """
+                    SELECT sha256, MAX(size), MAX(archived_at) AS last FROM attachment_archive
+                    WHERE guild_id = ? GROUP BY sha256 ORDER BY last
+                    """,
+                    (over_guild,)
+                )
+                for sha256, size, _ in await cursor.fetchall():
+                    if usage <= quota:
+                        break
+                    await db.connection.execute(
+                        "DELETE FROM attachment_archive WHERE guild_id = ? AND sha256 = ?", (over_guild, sha256)
+                    )
+                    candidates.add(sha256)
+                    usage -= size
+
+            orphaned = []
+            for sha256 in candidates:
+                cursor = await db.connection.execute("SELECT 1 FROM attachment_archive WHERE sha256 = ? LIMIT 1", (sha256,))
+                if not await cursor.fetchone():
+                    orphaned.append(sha256)
+        return orphaned
+    except Exception as e:
+        log.error("Failed to evict archived attachments", exc_info=e)
+        return []
+
+async def load_config_snapshot() -> Dict[str, dict]:
+    """
+    Returns the last-known dashboard config as {guild_id_str: settings_dict}.
+    Used to warm ConfigSync at boot before the first live pull completes.
+    """
+    if not db.connection:
+        return {}
+    try:
+        cursor = await db.connection.execute("SELECT guild_id, settings FROM config_snapshot")
+        rows = await cursor.fetchall()
+        snapshot = {}
+        for r in rows:
+            try:
+                snapshot[str(r[0])] = json.loads(r[1])
+            except (TypeError, ValueError):
+                continue # Skip corrupt rows, the next sync rewrites them anyway
+        return snapshot
+    except Exception as e:
+        log.error("Failed to load dashboard config snapshot", exc_info=e)
+        return {}
+
+@writer_op(invalidates=False, default=False)
+async def save_config_snapshot(snapshot: Dict[str, dict]) -> bool:
+    """
+    Replaces the persisted dashboard config snapshot in a single transaction.
+    """
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            await db.connection.execute("DELETE FROM config_snapshot")
+            await db.connection.executemany(
+                "INSERT INTO config_snapshot (guild_id, settings) VALUES (?, ?)",
+                [(str(gid), json.dumps(settings)) for gid, settings in snapshot.items()]
+            )
+        return True
+    except Exception as e:
+        log.error("Failed to save dashboard config snapshot", exc_info=e)
+        return False
+
+async def get_bot_meta(key: str) -> Optional[str]:
+    """
+    Returns a bot-level metadata value (lives in the DB so it survives redeploys via the Drive backup).
+    """
+    if not db.connection:
+        return None
+    try:
+        cursor = await db.connection.execute("SELECT meta_value FROM bot_meta WHERE meta_key = ?", (key,))
+        row = await cursor.fetchone()
+        return row[0] if row else None
+    except Exception as e:
+        log.error(f"Failed to read bot meta '{key}'", exc_info=e)
+        return None
+
+@writer_op(invalidates=False, default=False)
+async def set_bot_meta(key: str, value: str) -> bool:
+    if not db.connection:
+        return False
+    try:
+        async with db.transaction():
+            await db.connection.execute("""
+                INSERT INTO bot_meta (meta_key, meta_value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(meta_key) DO UPDATE SET meta_value = excluded.meta_value, updated_at = excluded.updated_at
+            """, (key, value))
+        return True
+    except Exception as e:
+        log.error(f"Failed to write bot meta '{key}'", exc_info=e)
+        return False
+
+@writer_op(default=0)
+async def purge_expired_guild_settings(days: int = 60) -> int:
+    """
+    Permanently removes settings soft-deleted more than `days` ago.
+    Logs and list entries go with them via ON DELETE CASCADE. Returns the row count.
+    """
+    if not db.connection:
+        return 0
+    try:
+        async with db.transaction():
+            cursor = await db.connection.execute(
+                "DELETE FROM guild_settings WHERE deleted_at IS NOT NULL AND deleted_at < datetime('now', ?)",
+                (f"-{int(days)} days",)
+            )
+        return cursor.rowcount
+    except Exception as e:
+        log.error("Failed to purge expired guild settings", exc_info=e)
+        return 0
@@ -1,22 +1,99 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 import discord
 import re
-from typing import Optional, Union, List
+import time
+from typing import Optional, Union, List, Tuple
 from discord.ext import commands
 from database.queries import get_guild_settings, add_log, get_all_list_items
-from utils.embed_builder import EmbedBuilder
+from utils.fair_queue import FairScheduler, QueueOverflow
+from utils.load_shedder import Priority, ShedTally, load_shedder
+from utils.log_record import LogRecord
 from utils.logger import get_logger
+from utils.outbox import OutboxEntry, outbox
 from utils.suspicious import suspicious_detector
 from utils.rate_limiter import send_with_backoff
+from utils.metrics import (
+    LOG_EVENT_SECONDS, LOG_EVENTS_TOTAL, DELIVERY_LATENCY_SECONDS,
+    SHOULD_LOG_SECONDS, SHOULD_LOG_TOTAL, AUDIT_LOOKUP_SECONDS
+)
+from utils.profiler import profiler
 
 log = get_logger()
 
+# Sends in flight at once across all guilds. Waiting sends get free slots round-robin
+# per guild, one guild holds at most a few slots, and its oldest waiting sends are
+# dropped once it has too many queued.
+delivery_scheduler = FairScheduler(
+    "delivery", concurrency=16, per_key_active=4, per_key_cap=200, max_waiting=5000
+)
+
+async def send_embed(bot: commands.Bot, guild: discord.Guild, webhook_url: Optional[str], channel_id: Optional[int], embed: discord.Embed, files: Optional[List[Tuple[str, str]]] = None) -> bool:
+    """
+    Webhook first, then the channel. Shared by live delivery and outbox replay.
+    `files` are (path, filename) pairs, opened fresh for every attempt.
+    """
+    def uploads() -> dict:
+        return {"files": [discord.File(path, filename=filename) for path, filename in files]} if files else {}
+
+    if webhook_url:
+        success, _ = await send_with_backoff(
+            lambda: discord.Webhook.from_url(
+                webhook_url, session=bot.http_session, client=bot
+            ).send(embed=embed, **uploads()),
+            bucket="webhook"
+        )
+        if success:
+            return True
+
+    # Fallback to Channel
+    if channel_id:
+        channel = guild.get_channel(int(channel_id))
+        if channel:
+            success, _ = await send_with_backoff(
+                lambda: channel.send(embed=embed, **uploads()),
+                bucket="channel"
+            )
+            return success
+    return False
+
+async def replay_delivery(bot: commands.Bot, entry: OutboxEntry) -> bool:
+    """Sends a delivery stored by an earlier run (see utils/outbox.py) and persists its log row."""
+    guild = bot.get_guild(entry.guild_id)
+    if guild is None:
+        return False
+    embed = discord.Embed.from_dict(entry.embed)
+    try:
+        async with delivery_scheduler.slot(guild.id):
+            sent = await send_embed(bot, guild, entry.webhook_url, entry.channel_id, embed)
+    except QueueOverflow:
+        return False
+    if sent:
+        await add_log(guild.id, entry.module_name, entry.content)
+    return sent
+
 class BaseLogger(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.module_name = self.__class__.__name__
+        # Shadow each listener with a profiled wrapper; Cog._inject picks up the instance attribute
+        for event_name, method_name in self.__cog_listeners__:
+            setattr(self, method_name, profiler.wrap_listener(self.module_name, event_name, getattr(self, method_name)))
+        load_shedder.register_reporter(self.module_name, self._report_shed)
 
     async def should_log(self, guild: discord.Guild, user: Union[discord.User, discord.Member, None] = None, channel: Optional[discord.abc.GuildChannel] = None) -> bool:
+        """
+        Timed wrapper around _evaluate_filters, see there for the rule order.
+        """
+        start = time.perf_counter()
+        profiler.tag_guild(guild.id)
+        with profiler.phase("filter"):
+            decision = await self._evaluate_filters(guild, user, channel)
+        SHOULD_LOG_SECONDS.observe(time.perf_counter() - start, module=self.module_name)
+        SHOULD_LOG_TOTAL.inc(module=self.module_name, decision="log" if decision else "skip")
+        return decision
+
+    async def _evaluate_filters(self, guild: discord.Guild, user: Union[discord.User, discord.Member, None] = None, channel: Optional[discord.abc.GuildChannel] = None) -> bool:
         """
         Check if the event should be logged based on blacklists/whitelists.
         Order:
@@ -103,6 +180,12 @@ class BaseLogger(commands.Cog):
         # 7. Default
         return True
 
+    @contextmanager
+    def audit_lookup(self):
+        """Wraps an audit log read: timed into audit_lookup_seconds and the profiler's audit phase."""
+        with profiler.phase("audit"), AUDIT_LOOKUP_SECONDS.time(module=self.module_name):
+            yield
+
     async def get_log_channel(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
         # 1. Prefer Dashboard Log Channel
         if hasattr(self.bot, "config_sync"):
@@ -150,10 +233,37 @@ class BaseLogger(commands.Cog):
         # 3. If Generic Channel is also missing, fail safely (return None)
         return channel
 
-    async def log_event(self, guild: discord.Guild, embed: discord.Embed, suspicious: bool = False):
+    async def log_event(self, guild: discord.Guild, record: Union[LogRecord, discord.Embed], suspicious: bool = False, priority: Optional[Priority] = None):
+        """
+        Delivers one record. `priority` overrides the module's class for this event
+        (see utils/load_shedder.py); suspicious events are always CRITICAL.
+        """
+        start = time.perf_counter()
+        outcome = "error"
+        if isinstance(record, LogRecord):
+            record.type = self.module_name
+        if priority is None or suspicious:
+            priority = load_shedder.priority(self.module_name, suspicious)
+        try:
+            outcome = await self._deliver(guild, record, suspicious, priority)
+        finally:
+            LOG_EVENT_SECONDS.observe(time.perf_counter() - start, module=self.module_name)
+            LOG_EVENTS_TOTAL.inc(module=self.module_name, outcome=outcome)
+
+    async def _deliver(self, guild: discord.Guild, record: Union[LogRecord, discord.Embed], suspicious: bool = False, priority: Priority = Priority.NORMAL) -> str:
+        """
+        Routes and sends one record. Enablement and the load shedder are checked
+        first; the embed is only rendered once there is somewhere to send it.
+        Returns the outcome label for metrics.
+        """
+        profiler.tag_guild(guild.id)
+        # Lag is measured from when the bot saw the event. A plain embed's timestamp
+        # can't be trusted for that: restored log embeds keep the original one.
+        created_at = record.created_at if isinstance(record, LogRecord) else time.time()
         try:
             # 1. Fetch Local Settings for Fallback & Webhooks
-            res = await get_guild_settings(guild.id)
+            with profiler.phase("settings"):
+                res = await get_guild_settings(guild.id)
             local_log_id = res[0] if res else None
             local_msg_id = res[1] if res else None
             local_mem_id = res[2] if res else None
@@ -181,18 +291,22 @@ class BaseLogger(commands.Cog):
             if dash_cfg:
                 # Dashboard has config — use it as authority
                 if dash_enabled.get(normalized_name) is False:
-                    log.trace(f"[{self.module_name}] Blocked: Disabled in Dashboard.")
-                    return
+                    log.trace("[%s] Blocked: Disabled in Dashboard.", self.module_name)
+                    return "disabled"
                 # If dashboard doesn't mention this module, check local as fallback
                 if normalized_name not in dash_enabled:
                     if not local_enabled.get(self.module_name, False):
-                        log.trace(f"[{self.module_name}] Blocked: Not in Dashboard, disabled in Local DB.")
-                        return
+                        log.trace("[%s] Blocked: Not in Dashboard, disabled in Local DB.", self.module_name)
+                        return "disabled"
             else:
                 # No dashboard config — local DB is sole authority
                 if not local_enabled.get(self.module_name, False):
-                    log.trace(f"[{self.module_name}] Blocked: Disabled in Local DB (no dashboard config).")
-                    return
+                    log.trace("[%s] Blocked: Disabled in Local DB (no dashboard config).", self.module_name)
+                    return "disabled"
+
+            # Under heavy delivery lag, low-priority modules are sampled or digested
+            if not load_shedder.admit(guild.id, self.module_name, priority, record.title or ""):
+                return "shed"
 
             # 3. Routing Logic (Prioritize Dashboard)
             target_id = None
@@ -222,42 +336,75 @@ class BaseLogger(commands.Cog):
                 if local_mem_wh: target_wh = local_mem_wh
                 if not target_id: target_id = local_mem_id
 
-            if suspicious:
-                embed.color = discord.Color.dark_red()
-                embed.title = f"⚠️ Suspicious Activity: {embed.title}"
-                
-            sent_successfully = False
-            
-            # Try Webhook
-            if target_wh:
-                success, _ = await send_with_backoff(
-                    lambda: discord.Webhook.from_url(
-                        target_wh, session=self.bot.http_session, client=self.bot
-                    ).send(embed=embed)
-                )
-                if success:
-                    sent_successfully = True
+            if not target_wh and not target_id:
+                log.warning(f"[{self.module_name}] Failed to send log to guild {guild.id}")
+                return "failed" # Nowhere to send, don't bother rendering
+
+            if isinstance(record, LogRecord):
+                embed = record.to_embed(suspicious)
+            else:
+                # Plain embeds still work (anything not yet emitting records)
+                embed = record
+                if suspicious:
+                    embed.color = discord.Color.dark_red()
+                    embed.title = f"⚠️ Suspicious Activity: {embed.title}"
+
+            if isinstance(record, LogRecord):
+                content = record.to_log_content(suspicious)
+            else:
+                content = f"{embed.title}: {embed.description}"
+                if embed.fields:
+                    content += " | " + " | ".join([f"{f.name}: {f.value}" for f in embed.fields])
 
-            # Fallback to Channel
-            if not sent_successfully and target_id:
-                channel = guild.get_channel(int(target_id))
-                if channel:
-                    await send_with_backoff(lambda: channel.send(embed=embed))
-                    sent_successfully = True
+            try:
+                # Stored if the send is still pending at shutdown, and replayed on the next start
+                with outbox.pending(guild.id, self.module_name, target_wh, target_id, embed, content):
+                    async with delivery_scheduler.slot(guild.id):
+                        with profiler.phase("send"):
+                            sent_successfully = await send_embed(
+                                self.bot, guild, target_wh, target_id, embed,
+                                files=record.files if isinstance(record, LogRecord) else None
+                            )
+            except QueueOverflow:
+                log.warning(f"[{self.module_name}] Dropped log for guild {guild.id}: too many queued sends")
+                return "overflow"
             
             if not sent_successfully:
                 log.warning(f"[{self.module_name}] Failed to send log to guild {guild.id}")
-                return
+                return "failed"
+
+            lag = max(0.0, time.time() - created_at)
+            DELIVERY_LATENCY_SECONDS.observe(lag, module=self.module_name)
+            load_shedder.observe(lag)
 
             # DB Persist (only if we successfully sent)
-            if sent_successfully:
-                content = f"{embed.title}: {embed.description}"
-                if embed.fields:
-                    content += " | " + " | ".join([f"{f.name}: {f.value}" for f in embed.fields])
-                
+            with profiler.phase("persist"):
                 await add_log(guild.id, self.module_name, content)
+            return "sent"
                 
         except discord.errors.Forbidden:
             log.error(f"Forbidden to send log in {guild.name}, bot may have been kicked")
+            return "forbidden"
         except Exception as e:
             log.error(f"Error logging event in {self.module_name}", exc_info=e)
+            return "error"
+
+    async def _report_shed(self, guild_id: int, tally: ShedTally):
+        """Posts what the load shedder skipped for this module, once the load has receded."""
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        digest = "\n".join(f"{title} ×{count}" for title, count in tally.titles.most_common())
+        record = LogRecord.warning(
+            title="Events Skipped Under Load",
+            description=(
+                f"Log delivery fell behind by up to {tally.peak_lag:.0f}s, so "
+                f"{tally.total} event(s) from this module were not posted individually."
+            ),
+            fields=[
+                ("Sampled Out", str(tally.sampled), True),
+                ("Digested", str(tally.digested), True),
+                ("Digest", digest[:1024], False)
+            ]
+        )
+        await self.log_event(guild, record, priority=Priority.HIGH)
@@ -1,33 +1,29 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
+from utils.permission_diff import diff_overwrites, overwrite_fields
 
 class ChannelPermissionUpdate(BaseLogger):
     @commands.Cog.listener()
     async def on_guild_channel_update(self, before, after):
-        if before.overwrites == after.overwrites:
-            return
-
-        diffs = []
-
-        for target, perms in after.overwrites.items():
-            before_perms = before.overwrites.get(target)
-            if before_perms != perms:
-                diffs.append(f"{target}: {before_perms} -> {perms}")
-
+        # Same cached diff ChannelUpdate computed for this event
+        diffs = diff_overwrites(before, after)
         if not diffs:
             return
 
-        embed = EmbedBuilder.warning(
+        dangerous = sorted({name for diff in diffs for name in diff.dangerous})
+        fields = overwrite_fields(diffs, after.guild, name="Overwrites", limit=10)
+        if dangerous:
+            fields.append(("Dangerous Permissions Granted", ", ".join(f"`{p}`" for p in dangerous), False))
+
+        embed = LogRecord.warning(
             title="Channel Permissions Updated",
             description=f"Permissions changed in {after.mention}",
-            fields=[
-                ("Overwrites", "\n".join(diffs[:5]), False)
-            ]
+            fields=fields
         )
 
-        await self.log_event(after.guild, embed)
+        await self.log_event(after.guild, embed, suspicious=bool(dangerous))
 
 async def setup(bot):
     await bot.add_cog(ChannelPermissionUpdate(bot))
@@ -1,22 +1,26 @@
 import discord
-import asyncio
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.aggregator import EventAggregator, listed
+from utils.log_record import LogRecord
+from utils.permission_diff import diff_overwrites, overwrite_fields
 
 class ChannelUpdate(BaseLogger):
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
-        # Queue for position updates: guild_id -> list of (before_channel, after_channel)
-        self._pos_update_queue = {}
-        self._processing_guilds = set()
+        # Position ripples: (before_channel, after_channel) pairs per guild, summarized once the burst ends
+        self.storms = EventAggregator("ChannelUpdate.storms")
+        self.storms.register("channel_positions", self._summarize_positions, window=1.5, max_items=100)
+
+    async def cog_unload(self):
+        self.storms.stop()
 
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
         if not await self.should_log(channel.guild, channel=channel):
             return    
         
-        embed = EmbedBuilder.success(
+        embed = LogRecord.success(
             title="Channel Created",
             description=f"Channel {channel.mention} (`{channel.name}`) was created."
         )
@@ -27,7 +31,7 @@ class ChannelUpdate(BaseLogger):
         if not await self.should_log(channel.guild, channel=channel):
             return    
         
-        embed = EmbedBuilder.error(
+        embed = LogRecord.error(
             title="Channel Deleted",
             description=f"Channel `{channel.name}` was deleted."
         )
@@ -52,57 +56,10 @@ class ChannelUpdate(BaseLogger):
         if before.position != after.position:
             fields.append(("Position", f"`{before.position}` → `{after.position}`", False))
 
-        # Permission overwrites diff
-        before_overwrites = before.overwrites
-        after_overwrites = after.overwrites
-
-        all_targets = set(before_overwrites) | set(after_overwrites)
-        perm_changes = []
-
-        for target in all_targets:
-            b_overwrite = before_overwrites.get(target, discord.PermissionOverwrite())
-            a_overwrite = after_overwrites.get(target, discord.PermissionOverwrite())
-
-            b_allow, b_deny = b_overwrite.pair()
-            a_allow, a_deny = a_overwrite.pair()
-
-            if b_allow == a_allow and b_deny == a_deny:
-                continue
-
-            target_name = target.name if hasattr(target, "name") else str(target)
-            target_type = "Role" if isinstance(target, discord.Role) else "Member"
-
-            added_allow = discord.Permissions(a_allow.value & ~b_allow.value)
-            removed_allow = discord.Permissions(b_allow.value & ~a_allow.value)
-            added_deny = discord.Permissions(a_deny.value & ~b_deny.value)
-            removed_deny = discord.Permissions(b_deny.value & ~a_deny.value)
-
-            change_lines = []
-            for perm, val in added_allow:
-                if val:
-                    change_lines.append(f"✅ `{perm}` allowed")
-            for perm, val in removed_allow:
-                if val:
-                    change_lines.append(f"➖ `{perm}` allow removed")
-            for perm, val in added_deny:
-                if val:
-                    change_lines.append(f"❌ `{perm}` denied")
-            for perm, val in removed_deny:
-                if val:
-                    change_lines.append(f"➖ `{perm}` deny removed")
-
-            if change_lines:
-                perm_changes.append(f"**{target_type}: {target_name}**\n" + "\n".join(change_lines))
-
-        if perm_changes:
-            chunk = ""
-            for entry in perm_changes:
-                if len(chunk) + len(entry) + 2 > 1024:
-                    fields.append(("Permission Changes", chunk.strip(), False))
-                    chunk = ""
-                chunk += entry + "\n\n"
-            if chunk:
-                fields.append(("Permission Changes", chunk.strip(), False))
+        # Permission overwrites diff (shared with ChannelPermissionUpdate for this event)
+        overwrite_diffs = diff_overwrites(before, after)
+        fields.extend(overwrite_fields(overwrite_diffs, after.guild))
+        dangerous = [name for diff in overwrite_diffs for name in diff.dangerous]
 
         # --- Text channel specific ---
         if isinstance(before, discord.TextChannel) and isinstance(after, discord.TextChannel):
@@ -163,79 +120,76 @@ class ChannelUpdate(BaseLogger):
             await self._queue_position_update(before, after)
             return
 
-        embed = EmbedBuilder.warning(
+        embed = LogRecord.warning(
             title="Channel Updated",
             description=f"Channel {after.mention} (`{after.id}`) was updated.",
             fields=fields
         )
-        await self.log_event(before.guild, embed)
+        if dangerous:
+            embed.add_field(name="Dangerous Permissions Granted", value=", ".join(f"`{p}`" for p in sorted(set(dangerous))), inline=False)
+        await self.log_event(before.guild, embed, suspicious=bool(dangerous))
 
     async def _queue_position_update(self, before, after):
-        """Queues a position change for debounced processing via audit logs."""
-        guild_id = before.guild.id
-        if guild_id not in self._pos_update_queue:
-            self._pos_update_queue[guild_id] = []
-        
-        self._pos_update_queue[guild_id].append((before, after))
+        """Queues a position change; the burst is checked against audit logs once it ends."""
+        self.storms.submit(before.guild.id, "channel_positions", (before, after))
 
-        if guild_id in self._processing_guilds:
-            return
+    async def _summarize_positions(self, guild_id: int, updates: list):
+        guild = updates[0][1].guild
 
-        self._processing_guilds.add(guild_id)
-        
-        # Wait for all ripple events to arrive (Discord usually sends them in a burst)
-        await asyncio.sleep(1.5)
-        
-        updates = self._pos_update_queue.pop(guild_id, [])
-        self._processing_guilds.remove(guild_id)
-        
-        if not updates:
-            return
+        # Keep only the latest change per channel, with its original starting position
+        by_channel = {}
+        for b, a in updates:
+            first = by_channel.get(a.id, (b, a))[0]
+            by_channel[a.id] = (first, a)
 
         # Fetch recent audit logs to identify the "real" movers
         # A single move usually generates ONE audit log entry for the target channel.
         # Ripples do NOT generate audit log entries.
-        try:
-            # We look for CHANNEL_UPDATE entries
-            audit_logs = [
-                entry async for entry in before.guild.audit_logs(
-                    limit=min(20, len(updates) + 5), 
-                    action=discord.AuditLogAction.channel_update
-                )
-            ]
-        except discord.errors.Forbidden:
-            # If we can't see audit logs, we'll log them all as a fallback 
-            # (though this may flood, it's safer than losing data if bot perm is missing)
-            audit_logs = None
-        except Exception:
-            audit_logs = None
+        with self.audit_lookup():
+            try:
+                # We look for CHANNEL_UPDATE entries
+                audit_logs = [
+                    entry async for entry in guild.audit_logs(
+                        limit=min(50, len(by_channel) + 5),
+                        action=discord.AuditLogAction.channel_update
+                    )
+                ]
+            except discord.errors.Forbidden:
+                # If we can't see audit logs, we'll report them all as a fallback
+                # (summarized below, so this can't flood)
+                audit_logs = None
+            except Exception:
+                audit_logs = None
+
+        moved = []
+        for b, a in by_channel.values():
+            if audit_logs is not None and not any(
+                entry.target and entry.target.id == a.id and hasattr(entry.after, "position")
+                for entry in audit_logs
+            ):
+                continue # Ripple: shifted by someone else's move
+            # Re-check should_log settings just in case
+            if await self.should_log(a.guild, channel=a):
+                moved.append((b, a))
+
+        if not moved:
+            return
+
+        if len(moved) == 1:
+            b, a = moved[0]
+            embed = LogRecord.warning(
+                title="Channel Moved",
+                description=f"Channel {a.mention} (`{a.id}`) position changed.",
+                fields=[("Position", f"`{b.position}` → `{a.position}`", True)]
+            )
+        else:
+            lines = [f"{a.mention}: `{b.position}` → `{a.position}`" for b, a in moved]
+            note = "" if audit_logs is not None else "\n*Audit log unavailable, shifted channels are included.*"
+            embed = LogRecord.warning(
+                title="Channels Moved",
+                description=f"{len(moved)} channels changed position.{note}\n\n" + listed(lines)
+            )
+        await self.log_event(guild, embed)
 
-        for b, a in updates:
-            should_log = False
-            
-            if audit_logs is None:
-                # Fallback: if we can't verify, log it
-                should_log = True
-            else:
-                # Find if this channel has a corresponding audit log entry with a position change
-                for entry in audit_logs:
-                    if entry.target and entry.target.id == a.id:
-                        # Inspect the audit log differences
-                        if hasattr(entry.after, "position"):
-                            should_log = True
-                            break
-            
-            if should_log:
-                # Re-check should_log settings just in case
-                if not await self.should_log(a.guild, channel=a):
-                    continue
-
-                embed = EmbedBuilder.warning(
-                    title="Channel Moved",
-                    description=f"Channel {a.mention} (`{a.id}`) position changed.",
-                    fields=[("Position", f"`{b.position}` → `{a.position}`", True)]
-                )
-                await self.log_event(a.guild, embed)
-        
 async def setup(bot: commands.Bot):
     await bot.add_cog(ChannelUpdate(bot))
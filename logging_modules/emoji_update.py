@@ -1,9 +1,19 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.aggregator import EventAggregator, listed
+from utils.log_record import LogRecord
 
 class EmojiUpdate(BaseLogger):
+    def __init__(self, bot: commands.Bot):
+        super().__init__(bot)
+        # Pack uploads add emojis one event at a time: log the first, summarize the rest
+        self.storms = EventAggregator("EmojiUpdate.storms")
+        self.storms.register("emojis", self._summarize_pack, window=3.0, max_items=50, max_wait=15.0, leading=True)
+
+    async def cog_unload(self):
+        self.storms.stop()
+
     @commands.Cog.listener()
     async def on_guild_emojis_update(self, guild: discord.Guild, before: list[discord.Emoji], after: list[discord.Emoji]):
         # Convert to sets for easy comparison
@@ -17,11 +27,12 @@ class EmojiUpdate(BaseLogger):
         if not added and not removed:
             return
 
-        db_embeds = []
+        if not self.storms.submit(guild.id, "emojis", (added, removed)):
+            return # Part of a pack upload/cleanup, summarized once it settles
         
         # Log Added
         for emoji in added:
-            embed = EmbedBuilder.success(
+            embed = LogRecord.success(
                 title="Emoji Added",
                 description=f"Emoji {emoji} (`{emoji.name}`) was added.",
                 fields=[("ID", emoji.id, True), ("Animated", str(emoji.animated), True)]
@@ -32,7 +43,7 @@ class EmojiUpdate(BaseLogger):
             
         # Log Removed
         for emoji in removed:
-             embed = EmbedBuilder.error(
+             embed = LogRecord.error(
                 title="Emoji Deleted",
                 description=f"Emoji `{emoji.name}` was deleted.",
                 fields=[("ID", emoji.id, True)]
@@ -41,5 +52,31 @@ class EmojiUpdate(BaseLogger):
                 embed.set_thumbnail(url=emoji.url)
              await self.log_event(guild, embed)
 
+    async def _summarize_pack(self, guild_id: int, updates: list):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        added = {e.id: e for batch, _ in updates for e in batch}
+        removed = {e.id: e for _, batch in updates for e in batch}
+        # Added and removed within the same burst cancels out
+        for emoji_id in set(added) & set(removed):
+            del added[emoji_id], removed[emoji_id]
+        if not added and not removed:
+            return
+
+        fields = []
+        if added:
+            fields.append((f"Added ({len(added)})", listed([str(e) for e in added.values()], sep=" "), False))
+        if removed:
+            # Deleted emojis no longer render, show their names
+            fields.append((f"Deleted ({len(removed)})", listed([f"`{e.name}`" for e in removed.values()], sep=" "), False))
+        builder = LogRecord.success if added and not removed else LogRecord.error if removed and not added else LogRecord.warning
+        embed = builder(
+            title="Emojis Updated",
+            description=f"{len(added) + len(removed)} more emoji change(s).",
+            fields=fields
+        )
+        await self.log_event(guild, embed)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(EmojiUpdate(bot))
@@ -3,6 +3,7 @@ from discord import app_commands
 from discord.ext import commands
 from .base import BaseLogger
 from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 from utils.logger import get_logger
 
 log = get_logger()
@@ -47,7 +48,7 @@ class ErrorLogger(BaseLogger):
         
         if interaction.guild:
             # Try to log to guild channel
-            embed = EmbedBuilder.error(
+            embed = LogRecord.error(
                 title="Command Error",
                 description=f"An error occurred while executing `/{interaction.command.name if interaction.command else 'command'}`.",
                 fields=[("Error", str(error)[:1024], False)]
@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 
 class GuildUpdate(BaseLogger):
     @commands.Cog.listener()
@@ -24,7 +24,7 @@ class GuildUpdate(BaseLogger):
         if not changes:
             return
 
-        embed = EmbedBuilder.warning(
+        embed = LogRecord.warning(
             title="Server Updated",
             description="\n".join(changes),
             footer=f"Guild ID: {after.id}",
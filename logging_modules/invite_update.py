@@ -1,12 +1,12 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 
 class InviteUpdate(BaseLogger):
     @commands.Cog.listener()
     async def on_invite_create(self, invite: discord.Invite):
-        embed = EmbedBuilder.success(
+        embed = LogRecord.success(
             title="Invite Created",
             description=f"Invite `{invite.code}` created for {invite.channel.mention}",
             fields=[
@@ -18,7 +18,7 @@ class InviteUpdate(BaseLogger):
 
     @commands.Cog.listener()
     async def on_invite_delete(self, invite: discord.Invite):
-        embed = EmbedBuilder.error(
+        embed = LogRecord.error(
             title="Invite Deleted",
             description=f"Invite `{invite.code}` was deleted."
         )
@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 from utils.suspicious import suspicious_detector
 
 class MemberBan(BaseLogger):
@@ -15,7 +15,7 @@ class MemberBan(BaseLogger):
         # Initial Embed
         description = f"{user.mention} (`{user.name}`) has been banned."
         
-        embed = EmbedBuilder.error(
+        embed = LogRecord.error(
             title="Member Banned",
             description=description,
             author=user,
@@ -24,15 +24,16 @@ class MemberBan(BaseLogger):
         
         executor = None
         # Enriched Audit Log Lookup
-        try:
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.ban):
-                if entry.target and entry.target.id == user.id:
-                    embed.add_field(name="Reason", value=entry.reason or "No reason provided", inline=False)
-                    embed.add_field(name="Banned By", value=entry.user.mention, inline=True)
-                    executor = entry.user
-                    break
-        except discord.Forbidden:
-            pass # Missing permission to view audit logs
+        with self.audit_lookup():
+            try:
+                async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.ban):
+                    if entry.target and entry.target.id == user.id:
+                        embed.add_field(name="Reason", value=entry.reason or "No reason provided", inline=False)
+                        embed.add_field(name="Banned By", value=entry.user.mention, inline=True)
+                        executor = entry.user
+                        break
+            except discord.Forbidden:
+                pass # Missing permission to view audit logs
             
         suspicious = False
         if executor:
@@ -47,20 +48,21 @@ class MemberBan(BaseLogger):
         
         description = f"{user.mention} (`{user.name}`) has been unbanned."
         
-        embed = EmbedBuilder.success(
+        embed = LogRecord.success(
             title="Member Unbanned",
             description=description,
             author=user,
             footer=f"ID: {user.id}"
         )
 
-        try:
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.unban):
-                if entry.target and entry.target.id == user.id:
-                    embed.add_field(name="Unbanned By", value=entry.user.mention, inline=True)
-                    break
-        except discord.Forbidden:
-            pass
+        with self.audit_lookup():
+            try:
+                async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.unban):
+                    if entry.target and entry.target.id == user.id:
+                        embed.add_field(name="Unbanned By", value=entry.user.mention, inline=True)
+                        break
+            except discord.Forbidden:
+                pass
             
         await self.log_event(guild, embed)
 
@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 from utils.suspicious import suspicious_detector
 import datetime
 
@@ -32,7 +32,7 @@ class MemberJoin(BaseLogger):
             if is_suspicious: description += "High join rate detected. "
             if is_new_account: description += "Account is less than 7 days old."
 
-        embed = EmbedBuilder.build(
+        embed = LogRecord.build(
             title="Member Joined",
             description=description,
             color=color,
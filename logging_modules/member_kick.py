@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 from utils.suspicious import suspicious_detector
 import asyncio
 
@@ -13,26 +13,33 @@ class MemberKick(BaseLogger):
         
         await asyncio.sleep(1)
 
-        try:
-            async for entry in member.guild.audit_logs(
-                limit=5,
-                action=discord.AuditLogAction.kick
-            ):
-                if entry.target.id == member.id:
-                    embed = EmbedBuilder.error(
-                        title="Member Kicked",
-                        description=f"{member.mention} was kicked.",
-                        fields=[
-                            ("By", entry.user.mention, True),
-                            ("Reason", entry.reason or "No reason provided", False)
-                        ]
-                    )
-                    
-                    suspicious = suspicious_detector.check_member_kick(member.guild.id, entry.user.id)
-                    await self.log_event(member.guild, embed, suspicious=suspicious)
-                    return
-        except discord.Forbidden:
-            pass
+        kick_entry = None
+        with self.audit_lookup():
+            try:
+                async for entry in member.guild.audit_logs(
+                    limit=5,
+                    action=discord.AuditLogAction.kick
+                ):
+                    if entry.target.id == member.id:
+                        kick_entry = entry
+                        break
+            except discord.Forbidden:
+                pass
+
+        if kick_entry is None:
+            return
+
+        embed = LogRecord.error(
+            title="Member Kicked",
+            description=f"{member.mention} was kicked.",
+            fields=[
+                ("By", kick_entry.user.mention, True),
+                ("Reason", kick_entry.reason or "No reason provided", False)
+            ]
+        )
+        
+        suspicious = suspicious_detector.check_member_kick(member.guild.id, kick_entry.user.id)
+        await self.log_event(member.guild, embed, suspicious=suspicious)
 
 async def setup(bot):
     await bot.add_cog(MemberKick(bot))
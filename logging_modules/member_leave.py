@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 
 class MemberLeave(BaseLogger):
     @commands.Cog.listener()
@@ -16,7 +16,7 @@ class MemberLeave(BaseLogger):
         roles = [r.mention for r in member.roles if r.name != "@everyone"]
         roles = ", ".join(roles)
         
-        embed = EmbedBuilder.error(
+        embed = LogRecord.error(
             title="Member Left",
             description=description,
             author=member,
@@ -1,12 +1,70 @@
 import discord
 import asyncio
+import re
+from typing import Dict, List
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.attachment_archive import attachment_archive
+from utils.log_record import LogRecord
 from utils.suspicious import suspicious_detector
 from database.queries import get_guild_settings
 
+ARCHIVE_MODULE = "AttachmentArchive" # Opt-in flag in enabled_modules, like AutoLog
+ARCHIVE_WAIT = 1.0 # Max seconds to wait for a deleted message's downloads still in progress
+MAX_UPLOADS = 10 # Discord's per-message file limit
+
 class MessageDelete(BaseLogger):
+    def __init__(self, bot: commands.Bot):
+        super().__init__(bot)
+        self._archive_opt_in: Dict[int, bool] = {} # guild_id -> local AttachmentArchive flag
+
+    async def _archive_enabled(self, guild_id: int) -> bool:
+        enabled = self._archive_opt_in.get(guild_id)
+        if enabled is None:
+            res = await get_guild_settings(guild_id)
+            enabled = self._archive_opt_in[guild_id] = bool(res and res[6] and res[6].get(ARCHIVE_MODULE, False))
+        if enabled and hasattr(self.bot, "config_sync"):
+            guild_cfg = self.bot.config_sync.get(guild_id)
+            if guild_cfg and guild_cfg.get("enabled_modules", {}).get("attachment_archive") is False:
+                return False
+        return enabled
+
+    @commands.Cog.listener()
+    async def on_settings_invalidated(self, op_name: str, guild_ids: List[int]):
+        for guild_id in guild_ids:
+            self._archive_opt_in.pop(guild_id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self._archive_opt_in.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # CDN links of deleted messages die quickly, so opted-in guilds archive attachments
+        # up front. submit() only queues them; the archive's workers download.
+        if not message.attachments or not message.guild or message.author.bot or message.webhook_id:
+            return
+        if not attachment_archive.running or not await self._archive_enabled(message.guild.id):
+            return
+        if not await self.should_log(message.guild, message.author, message.channel):
+            return
+        attachment_archive.submit(message.guild.id, message.id, message.attachments)
+
+    def _attach_archived(self, record: LogRecord, guild: discord.Guild, archived: list) -> List[str]:
+        """Adds archived files within the guild's upload limit; returns their upload names."""
+        budget = guild.filesize_limit
+        names = []
+        for f in archived:
+            if len(names) >= MAX_UPLOADS:
+                break
+            if f.size > budget:
+                continue
+            budget -= f.size
+            name = f"{len(names)}_" + re.sub(r"[^\w.-]", "_", f.filename)
+            record.attach_file(f.path, name)
+            names.append(name)
+        return names
+
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
         if not await self.should_log(message.guild, message.author, message.channel):
@@ -20,6 +78,11 @@ class MessageDelete(BaseLogger):
         if not message.guild:
             return
 
+        # Archived copies of the attachments, looked up while we wait for the audit log
+        archived_lookup = None
+        if message.attachments and attachment_archive.running:
+            archived_lookup = asyncio.create_task(attachment_archive.files_for(message.id, timeout=ARCHIVE_WAIT))
+
         # Check if it was in a log channel
         is_log_channel = False
         autolog_enabled = False
@@ -39,21 +102,29 @@ class MessageDelete(BaseLogger):
         # Webhook embed deletions are rarely logged accurately by Discord's UI,
         # so we skip this time-consuming check entirely for log channels to ensure instant response.
         if not is_log_channel:
-            try:
-                await asyncio.sleep(0.5) 
-                async for entry in message.guild.audit_logs(limit=3, action=discord.AuditLogAction.message_delete):
-                    if hasattr(entry.extra, "channel") and entry.extra.channel.id == message.channel.id:
-                        target_match = getattr(entry.target, "id", None) == message.author.id
+            await asyncio.sleep(0.5) # Give audit log a moment
+            with self.audit_lookup():
+                try:
+                    async for entry in message.guild.audit_logs(limit=3, action=discord.AuditLogAction.message_delete):
+                        if hasattr(entry.extra, "channel") and entry.extra.channel.id == message.channel.id:
+                            target_match = getattr(entry.target, "id", None) == message.author.id
                         
-                        if target_match:
-                            if abs((discord.utils.utcnow() - entry.created_at).total_seconds()) < 10:
-                                executor = entry.user
-                                break
-            except Exception:
-                pass
+                            if target_match:
+                                if abs((discord.utils.utcnow() - entry.created_at).total_seconds()) < 10:
+                                    executor = entry.user
+                                    break
+                except Exception:
+                    pass
 
         # Suspicious check
         is_suspicious = suspicious_detector.check_message_delete(message.guild.id, message.author.id)
+
+        archived = []
+        if archived_lookup:
+            try:
+                archived = await archived_lookup
+            except Exception:
+                pass
         
         # Attachments helper
         def format_attachments(attachments):
@@ -76,7 +147,7 @@ class MessageDelete(BaseLogger):
                 embed.color = discord.Color.dark_red()
                 await self.log_event(message.guild, embed, suspicious=True)
             else:
-                embed = EmbedBuilder.error(
+                embed = LogRecord.error(
                     title="[RESTORED] Message Restored",
                     description=message.content or "*No text content*",
                     author=message.author,
@@ -111,13 +182,20 @@ class MessageDelete(BaseLogger):
             description += "\n\n**Attachments:**\n"
             description += format_attachments(message.attachments)
 
-        embed = EmbedBuilder.error(
+        embed = LogRecord.error(
             title="Message Deleted",
             description=description,
             author=message.author,
             footer=f"User ID: {message.author.id} | Message ID: {message.id}{footer}"
         )
         
+        uploaded = self._attach_archived(embed, message.guild, archived) if archived else []
+        if uploaded:
+            embed.add_field(name="Archived Attachments", value=f"{len(uploaded)} of {len(message.attachments)} re-uploaded with this log", inline=False)
+            # The CDN link is dead by now; show the archived copy instead
+            if single_image_url and len(uploaded) == 1:
+                single_image_url = f"attachment://{uploaded[0]}"
+
         if single_image_url:
             embed.set_image(url=single_image_url)
         
@@ -145,16 +223,17 @@ class MessageDelete(BaseLogger):
         # Try to find who purged via Audit Log
         executor = None
         reason = None
-        try:
-            await asyncio.sleep(0.5) # Give audit log a moment
-            async for entry in guild.audit_logs(limit=3, action=discord.AuditLogAction.message_bulk_delete):
-                if entry.extra.count == count and entry.target.id == channel.id:
-                    if (discord.utils.utcnow() - entry.created_at).total_seconds() < 10:
-                        executor = entry.user
-                        reason = entry.reason
-                        break
-        except discord.Forbidden:
-            pass
+        await asyncio.sleep(0.5) # Give audit log a moment
+        with self.audit_lookup():
+            try:
+                async for entry in guild.audit_logs(limit=3, action=discord.AuditLogAction.message_bulk_delete):
+                    if entry.extra.count == count and entry.target.id == channel.id:
+                        if (discord.utils.utcnow() - entry.created_at).total_seconds() < 10:
+                            executor = entry.user
+                            reason = entry.reason
+                            break
+            except discord.Forbidden:
+                pass
 
         if is_log_channel:
             description = f"**⚠️ WARNING: {count} log entries were bulk deleted in {channel.mention}**"
@@ -163,7 +242,7 @@ class MessageDelete(BaseLogger):
         
         isbot = " | Bot" if executor and executor.bot else ""
 
-        embed = EmbedBuilder.error(
+        embed = LogRecord.error(
             title="Bulk Message Delete",
             description=description,
             footer=f"Channel ID: {channel.id}{isbot}",
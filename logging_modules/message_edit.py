@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 from utils.suspicious import suspicious_detector
 
 class MessageEdit(BaseLogger):
@@ -21,7 +21,7 @@ class MessageEdit(BaseLogger):
 
         removed = before_files - after_files
         if removed:
-            embed = EmbedBuilder.warning(
+            embed = LogRecord.warning(
                 title="Message Attachment Removed",
                 description=f"Attachment removed from a message in {after.channel.mention}",
                 fields=[
@@ -51,7 +51,7 @@ class MessageEdit(BaseLogger):
             f"[Jump to Message]({after.jump_url})"
         )
 
-        embed = EmbedBuilder.warning(
+        embed = LogRecord.warning(
             title="Message Edited",
             description=description,
             author=before.author,
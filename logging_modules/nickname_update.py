@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 
 class NicknameUpdate(BaseLogger):
     @commands.Cog.listener()
@@ -19,7 +19,7 @@ class NicknameUpdate(BaseLogger):
                 return f"{nick} (Nickname)"
             return f"{member.name} (Global)"
 
-        embed = EmbedBuilder.build(
+        embed = LogRecord.build(
             title="Name/Nickname Changed",
             description=f"{after.mention} updated their name.",
             fields=[
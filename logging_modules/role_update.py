@@ -1,12 +1,25 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.aggregator import EventAggregator, listed
+from utils.log_record import LogRecord
+from utils.permission_diff import dangerous_granted, diff_permissions, flag_names
 
 class RoleUpdate(BaseLogger):
+    def __init__(self, bot: commands.Bot):
+        super().__init__(bot)
+        self.storms = EventAggregator("RoleUpdate.storms")
+        # Reordering fires one role update per shifted role; report the whole reorder once
+        self.storms.register("role_positions", self._summarize_reorder, window=1.5, max_items=100)
+        # Mass grants: the first member is logged as usual, the rest of the same change is summarized
+        self.storms.register("member_roles", self._summarize_grants, window=3.0, max_items=100, max_wait=15.0, leading=True)
+
+    async def cog_unload(self):
+        self.storms.stop()
+
     @commands.Cog.listener()
     async def on_guild_role_create(self, role: discord.Role):
-        embed = EmbedBuilder.success(
+        embed = LogRecord.success(
             title="Role Created",
             description=f"Role {role.mention} (`{role.name}`) was created."
         )
@@ -14,7 +27,7 @@ class RoleUpdate(BaseLogger):
 
     @commands.Cog.listener()
     async def on_guild_role_delete(self, role: discord.Role):
-        embed = EmbedBuilder.error(
+        embed = LogRecord.error(
             title="Role Deleted",
             description=f"Role `{role.name}` was deleted."
         )
@@ -45,29 +58,26 @@ class RoleUpdate(BaseLogger):
         if before.mentionable != after.mentionable:
             changes.append(f"Mentionable: `{before.mentionable}` -> `{after.mentionable}`")
             
-        # 6. Detailed Permission Logic
-        perm_changes = []
-        if before.permissions.value != after.permissions.value:
-            for perm, value in before.permissions:
-                if getattr(after.permissions, perm) != value:
-                    # Format: administrator: True -> False
-                    perm_changes.append(f"{perm}: {value} -> {getattr(after.permissions, perm)}")
-            
-            if perm_changes:
-                # Add a header for permissions
-                changes.append(f"**Permissions Changed:**\n" + "\n".join(perm_changes))
+        # 6. Detailed Permission Logic (raw bitfield diff)
+        perm_diff = diff_permissions(before.permissions.value, after.permissions.value)
+        if perm_diff:
+            perm_changes = [f"{perm}: False -> True" for perm in flag_names(perm_diff.granted)]
+            perm_changes += [f"{perm}: True -> False" for perm in flag_names(perm_diff.revoked)]
+            # Add a header for permissions
+            changes.append(f"**Permissions Changed:**\n" + "\n".join(perm_changes))
 
         if not changes:
+            if before.position != after.position:
+                self.storms.submit(after.guild.id, "role_positions", (before.position, after))
             return
 
-        suspicious = False
         # Check for dangerous permissions being granted
-        if perm_changes:
-            lower_perms = "".join(perm_changes).lower()
-            if "administrator: false -> true" in lower_perms or "manage_guild: false -> true" in lower_perms:
-               suspicious = True
+        dangerous = dangerous_granted(perm_diff.granted)
+        if dangerous:
+            changes.append("**Dangerous Permissions Granted:** " + ", ".join(f"`{p}`" for p in dangerous))
+        suspicious = bool(dangerous)
 
-        embed = EmbedBuilder.warning(
+        embed = LogRecord.warning(
             title="Role Updated",
             description=f"Role {after.mention} was updated.\n\n" + "\n".join(changes)
         )
@@ -89,13 +99,17 @@ class RoleUpdate(BaseLogger):
         if not new_roles and not removed_roles:
             return
 
+        subkey = (frozenset(r.id for r in new_roles), frozenset(r.id for r in removed_roles))
+        if not self.storms.submit(after.guild.id, "member_roles", (after, new_roles, removed_roles), subkey=subkey):
+            return # Part of a mass grant, summarized once it settles
+
         changes = []
         for role in new_roles:
             changes.append(f"**Added:** {role.mention}")
         for role in removed_roles:
             changes.append(f"**Removed:** {role.mention}")
             
-        embed = EmbedBuilder.build(
+        embed = LogRecord.build(
             title="Member Roles Updated",
             description=f"Roles updated for {after.mention}.\n\n" + "\n".join(changes),
             footer=f"User ID: {after.id}"
@@ -103,5 +117,33 @@ class RoleUpdate(BaseLogger):
         
         await self.log_event(after.guild, embed)
 
+    async def _summarize_reorder(self, guild_id: int, moves: list):
+        # Keep each role's first known position and its latest state
+        by_role = {}
+        for old_position, role in moves:
+            by_role[role.id] = (by_role.get(role.id, (old_position, role))[0], role)
+
+        ordered = sorted(by_role.values(), key=lambda move: -move[1].position)
+        lines = [f"{role.mention}: `{old}` → `{role.position}`" for old, role in ordered]
+        embed = LogRecord.warning(
+            title="Roles Reordered",
+            description=f"{len(lines)} role(s) changed position.\n\n" + listed(lines)
+        )
+        await self.log_event(ordered[0][1].guild, embed)
+
+    async def _summarize_grants(self, guild_id: int, updates: list):
+        members = {member.id: member for member, _, _ in updates}
+        _, added, removed = updates[0] # Same role change for every member in this storm
+        changes = [f"**Added:** {role.mention}" for role in added] + [f"**Removed:** {role.mention}" for role in removed]
+
+        embed = LogRecord.build(
+            title="Member Roles Updated",
+            description=(
+                f"Roles updated for {len(members)} more member(s).\n\n" + "\n".join(changes)
+                + "\n\n**Members:**\n" + listed([m.mention for m in members.values()])
+            )
+        )
+        await self.log_event(updates[0][0].guild, embed)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(RoleUpdate(bot))
@@ -1,12 +1,12 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 
 class ThreadsUpdate(BaseLogger):
     @commands.Cog.listener()
     async def on_thread_create(self, thread):
-        embed = EmbedBuilder.info(
+        embed = LogRecord.info(
             title="Thread Created",
             description=f"Thread `{thread.name}` created in {thread.parent.mention}",
             fields=[
@@ -17,7 +17,7 @@ class ThreadsUpdate(BaseLogger):
 
     @commands.Cog.listener()
     async def on_thread_delete(self, thread):
-        embed = EmbedBuilder.info(
+        embed = LogRecord.info(
             title="Thread Deleted",
             description=f"Thread `{thread.name}` deleted in {thread.parent.mention if thread.parent else 'Unknown'}",
             fields=[
@@ -28,7 +28,7 @@ class ThreadsUpdate(BaseLogger):
 
     @commands.Cog.listener()
     async def on_thread_remove(self, thread):
-        embed = EmbedBuilder.info(
+        embed = LogRecord.info(
             title="Thread Removed",
             description=f"Thread `{thread.name}` removed in {thread.parent.mention if thread.parent else 'Unknown'}",
             fields=[
@@ -40,7 +40,7 @@ class ThreadsUpdate(BaseLogger):
     @commands.Cog.listener()
     async def on_thread_update(self, before, after):
         if before.name != after.name:
-            embed = EmbedBuilder.info(
+            embed = LogRecord.info(
                 title="Thread Name Changed",
                 description=f"Thread `{before.name}` renamed to `{after.name}` in {after.parent.mention if after.parent else 'Unknown'}",
                 fields=[
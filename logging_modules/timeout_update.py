@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 from datetime import datetime
 
 class TimeoutUpdate(BaseLogger):
@@ -21,7 +21,7 @@ class TimeoutUpdate(BaseLogger):
             title = "Timeout Removed"
             desc = f"Timeout removed for {after.mention}"
 
-        embed = EmbedBuilder.warning(
+        embed = LogRecord.warning(
             title=title,
             description=desc
         )
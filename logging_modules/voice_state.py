@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from utils.log_record import LogRecord
 
 class VoiceState(BaseLogger):
     @commands.Cog.listener()
@@ -33,7 +33,7 @@ class VoiceState(BaseLogger):
                     f"{before.channel.mention} to {after.channel.mention}"
                 )
 
-            embed = EmbedBuilder.build(
+            embed = LogRecord.build(
                 title=title,
                 description=description,
                 footer=f"ID: {member.id}",
@@ -53,7 +53,7 @@ class VoiceState(BaseLogger):
         diff("Server Deafened", before.deaf, after.deaf)
 
         if changes:
-            embed = EmbedBuilder.warning(
+            embed = LogRecord.warning(
                 title="Voice State Updated",
                 description=f"Voice state changed for {member.mention}",
                 fields=[("Changes", "\n".join(changes), False)]
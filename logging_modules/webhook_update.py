@@ -1,12 +1,39 @@
+import asyncio
+import hashlib
 import discord
 from discord.ext import commands
 from .base import BaseLogger
-from utils.embed_builder import EmbedBuilder
+from database.queries import (
+    get_guild_settings, load_webhook_snapshots, save_webhook_snapshots, delete_webhook_snapshots
+)
+from utils.log_record import LogRecord
+from utils.logger import get_logger
+from utils.memory import memory
+from utils.metrics import WEBHOOK_FETCHES_TOTAL
+from utils.webhook_snapshots import WebhookSnapshotStore
+
+log = get_logger()
+
+PREFETCH_CONCURRENCY = 2
+PREFETCH_INTERVAL = 1.0 # Seconds each prefetch worker waits between guilds (~2 requests/s overall)
+PREFETCH_MAX_AGE = 6 * 3600 # Guilds snapshotted more recently than this are not refetched at boot
 
 class WebhookUpdate(BaseLogger):
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
-        self._webhook_cache = {}
+        self.snapshots = WebhookSnapshotStore(load_webhook_snapshots, save_webhook_snapshots, delete_webhook_snapshots)
+        self._refreshing: set[int] = set() # Channels with a fetch in flight
+        self._pending: set[int] = set() # ...that got another event meanwhile
+        self._prefetch_task = None
+        memory.register_cache("WebhookUpdate.snapshots", lambda: self.snapshots._snapshots)
+
+    async def cog_load(self):
+        self._prefetch_task = asyncio.create_task(self._prefetch())
+
+    async def cog_unload(self):
+        if self._prefetch_task:
+            self._prefetch_task.cancel()
+        memory.unregister_cache("WebhookUpdate.snapshots")
 
     def _snapshot(self, webhooks: list[discord.Webhook]):
         """
@@ -16,7 +43,8 @@ class WebhookUpdate(BaseLogger):
             wh.id: {
                 "name": wh.name,
                 "type": str(wh.type),
-                "url": wh.url if wh.type is discord.WebhookType.incoming else None,
+                # Only a digest of the tokened URL is kept (and persisted); still shows token resets
+                "url": hashlib.sha256(wh.url.encode()).hexdigest()[:16] if wh.type is discord.WebhookType.incoming else None,
                 "avatar": wh.avatar.url if wh.avatar else None,
                 "channel_id": wh.channel_id,
                 "guild_id": wh.guild_id,
@@ -49,20 +77,112 @@ class WebhookUpdate(BaseLogger):
             "updated": updated,
         }
 
+    async def _module_enabled(self, guild: discord.Guild) -> bool:
+        """Same authority order as _deliver: dashboard config if present, else local settings."""
+        dash_cfg = self.bot.config_sync.get(guild.id) if hasattr(self.bot, "config_sync") else {}
+        dash_enabled = dash_cfg.get("enabled_modules", {}) if dash_cfg else {}
+        if "webhook_update" in dash_enabled:
+            return dash_enabled["webhook_update"] is not False
+        res = await get_guild_settings(guild.id)
+        return bool(res and res[6].get(self.module_name, False))
+
+    async def _prefetch(self):
+        """
+        Warms snapshots for guilds with this module on, one guild.webhooks()
+        call per guild, a couple at a time. Guilds snapshotted recently
+        (persisted from the last run) are skipped.
+        """
+        try:
+            await self.snapshots.load()
+            await self.bot.wait_until_ready()
+            if hasattr(self.bot, "config_sync"):
+                await self.bot.config_sync.wait_until_synced(timeout=60)
+
+            queue: asyncio.Queue = asyncio.Queue()
+            for guild in self.bot.guilds:
+                if guild.unavailable or self.snapshots.is_fresh(guild.id, PREFETCH_MAX_AGE):
+                    continue
+                if not guild.me or not guild.me.guild_permissions.manage_webhooks:
+                    continue
+                if await self._module_enabled(guild):
+                    queue.put_nowait(guild)
+
+            if queue.empty():
+                return
+            total = queue.qsize()
+            log.info(f"WebhookUpdate: Prefetching webhook snapshots for {total} guild(s).")
+
+            async def worker():
+                while not queue.empty():
+                    guild = queue.get_nowait()
+                    await self._prefetch_guild(guild)
+                    await asyncio.sleep(PREFETCH_INTERVAL)
+
+            await asyncio.gather(*(worker() for _ in range(PREFETCH_CONCURRENCY)))
+            log.info(f"WebhookUpdate: Prefetched webhook snapshots for {total} guild(s).")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.error("WebhookUpdate: Webhook prefetch failed", exc_info=e)
+
+    async def _prefetch_guild(self, guild: discord.Guild):
+        try:
+            webhooks = await guild.webhooks()
+        except (discord.Forbidden, discord.NotFound):
+            return
+        except discord.HTTPException as e:
+            log.warning(f"WebhookUpdate: Failed to prefetch webhooks for guild {guild.id}: {e}")
+            return
+        WEBHOOK_FETCHES_TOTAL.inc(source="prefetch")
+
+        by_channel = {}
+        for wh in webhooks:
+            by_channel.setdefault(wh.channel_id, []).append(wh)
+        await self.snapshots.replace_guild(
+            guild.id, {channel_id: self._snapshot(hooks) for channel_id, hooks in by_channel.items()}
+        )
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        await self.snapshots.drop_guild(guild.id)
+
     @commands.Cog.listener()
     async def on_webhooks_update(self, channel: discord.TextChannel):
-        guild = channel.guild
+        # Bursts for one channel share a fetch: events arriving while it runs
+        # are folded into a single follow-up fetch once it finishes.
+        if channel.id in self._refreshing:
+            self._pending.add(channel.id)
+            WEBHOOK_FETCHES_TOTAL.inc(source="coalesced")
+            return
 
-        cache_key = (guild.id, channel.id)
+        self._refreshing.add(channel.id)
+        try:
+            while True:
+                self._pending.discard(channel.id)
+                await self._refresh_channel(channel)
+                if channel.id not in self._pending:
+                    break
+        finally:
+            self._refreshing.discard(channel.id)
+
+    async def _refresh_channel(self, channel: discord.TextChannel):
+        guild = channel.guild
+        await self.snapshots.load()
 
         # get previous state, fetch curr state and then diff
-        before = self._webhook_cache.get(cache_key, {})
-        webhooks = await channel.webhooks()
+        before = self.snapshots.get(guild.id, channel.id)
+        try:
+            webhooks = await channel.webhooks()
+        except discord.HTTPException as e:
+            log.warning(f"WebhookUpdate: Failed to fetch webhooks for channel {channel.id}: {e}")
+            return
+        WEBHOOK_FETCHES_TOTAL.inc(source="event")
         after = self._snapshot(webhooks)
-        diff = self._diff_webhooks(before, after)
+        # No earlier state at all (guild not prefetched yet): everything present counts as created
+        diff = self._diff_webhooks(before or {}, after)
 
         # update cache immediately so we don't brick ourselves
-        self._webhook_cache[cache_key] = after
+        await self.snapshots.put(guild.id, channel.id, after)
 
         if not any(diff.values()):
             # nothing changed, Discord just sneezed
@@ -90,7 +210,7 @@ class WebhookUpdate(BaseLogger):
 
         description = "\n\n".join(parts)
 
-        embed = EmbedBuilder.warning(
+        embed = LogRecord.warning(
             title=f"Webhooks changed in {channel.mention}",
             description=description
         )
@@ -1,6 +1,8 @@
 import asyncio
 from discord.ext import commands, tasks
+from config import shared_config
 from database.core import db
+from database.queries import purge_expired_guild_settings
 from utils.logger import get_logger
 
 log = get_logger()
@@ -8,7 +10,9 @@ log = get_logger()
 class CleanupService(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.cleanup_task.start()
+        # The purge is database-wide, so in cluster mode only cluster 0 runs it
+        if not shared_config.CLUSTER_ID:
+            self.cleanup_task.start()
 
     def cog_unload(self):
         self.cleanup_task.cancel()
@@ -22,31 +26,12 @@ class CleanupService(commands.Cog):
             return
 
         try:
-            # SQLite modifier for -60 days
-            threshold_query = "datetime('now', '-60 days')"
+            # guild_settings deletes cascade to logs and list entries (ON DELETE CASCADE).
+            # Goes through the storage writer when running as a cluster worker.
+            removed = await purge_expired_guild_settings(days=60)
             
-            # Select IDs for logging purposes (optional, but good for tracking)
-            # Or just delete directly.
-            
-            # Delete settings first (Logs cascade delete if we had ON DELETE CASCADE, 
-            # but our hard_delete helper handles it manually.
-            # However, since we are doing bulk SQL, let's trust a direct SQL DELETE for efficiency
-            # IF foreign keys are enforcing it. 
-            # core.py HAS "FOREIGN KEY (guild_id) REFERENCES guild_settings(guild_id) ON DELETE CASCADE"
-            # So deleting guild_settings is enough!
-            # goodie good schizophrenia
-            
-            cursor = await db.connection.execute(f"""
-                DELETE FROM guild_settings 
-                WHERE deleted_at IS NOT NULL 
-                AND deleted_at < {threshold_query}
-            """)
-            
-            # Note: We need to commit
-            await db.connection.commit()
-            
-            if cursor.rowcount > 0:
-                log.database(f"Cleanup Task: Permanently removed {cursor.rowcount} expired guild configurations.")
+            if removed > 0:
+                log.database(f"Cleanup Task: Permanently removed {removed} expired guild configurations.")
                 
         except Exception as e:
             log.error("Failed to run cleanup task", exc_info=e)
@@ -0,0 +1,51 @@
+from aiohttp import web
+from discord.ext import commands
+from config import shared_config
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+log = get_logger()
+
+class MetricsServer(commands.Cog):
+    """
+    Serves the in-process metrics registry at /metrics in Prometheus text format.
+    Disabled unless METRICS_PORT is set; binds to loopback unless METRICS_HOST says otherwise.
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._runner = None
+
+    async def cog_load(self):
+        if not shared_config.METRICS_PORT:
+            log.info("Metrics endpoint disabled (METRICS_PORT not set).")
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            site = web.TCPSite(self._runner, shared_config.METRICS_HOST, shared_config.METRICS_PORT)
+            await site.start()
+            log.network(f"Metrics endpoint listening on http://{shared_config.METRICS_HOST}:{shared_config.METRICS_PORT}/metrics")
+        except OSError as e:
+            # Port taken or bad host: keep the bot running without metrics
+            log.error(f"Failed to start metrics endpoint: {e}")
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def cog_unload(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=metrics.render(),
+            content_type="text/plain",
+            headers={"X-Content-Type-Options": "nosniff"},
+            charset="utf-8"
+        )
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MetricsServer(bot))
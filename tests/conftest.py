@@ -1,6 +1,8 @@
 import pytest
 import discord
 from unittest.mock import MagicMock, AsyncMock
+from database import core, queries
+from database.core import DatabaseManager
 
 @pytest.fixture
 def mock_guild():
@@ -32,3 +34,14 @@ def mock_db(mocker):
     # Mock the database.queries imports in the modules we test
     # We will likely mock specific query functions in the test files
     pass
+
+@pytest.fixture
+async def tmp_db(tmp_path, mocker):
+    # A real, empty database on disk, patched in wherever the queries and
+    # writer ops look up `db` (so nothing is forwarded to a storage writer)
+    manager = DatabaseManager(str(tmp_path / "test.sqlite"))
+    await manager.connect()
+    mocker.patch.object(queries, "db", manager)
+    mocker.patch.object(core, "db", manager)
+    yield manager
+    await manager.close()
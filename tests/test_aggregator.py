@@ -0,0 +1,80 @@
+import asyncio
+import discord
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from logging_modules.channel_update import ChannelUpdate
+from logging_modules.role_update import RoleUpdate
+from utils.aggregator import EventAggregator, listed
+
+@pytest.mark.asyncio
+async def test_storm_is_summarized_once_quiet():
+    batches = []
+    async def summarize(guild_id, items):
+        batches.append((guild_id, items))
+
+    storms = EventAggregator()
+    storms.register("burst", summarize, window=0.05)
+    storms.register("lead", summarize, window=0.05, leading=True)
+    storms.register("small", summarize, window=5, max_items=3)
+
+    assert [storms.submit(1, "burst", i) for i in range(4)] == [False] * 4
+    assert [storms.submit(1, "lead", i) for i in range(3)] == [True, False, False]
+    for i in range(7):
+        storms.submit(2, "small", i)
+    await asyncio.sleep(0.15)
+
+    assert (1, [0, 1, 2, 3]) in batches and (1, [1, 2]) in batches
+    assert [items for gid, items in batches if gid == 2] == [[0, 1, 2], [3, 4, 5]] # Size flushes, 6 still buffered
+    assert storms.submit(1, "lead", 9) # Storm over: the next event leads again
+    await storms.flush_all()
+    assert (2, [6]) in batches
+
+def test_listed_truncates_long_summaries():
+    assert listed(["a", "b"]) == "a\nb"
+    assert listed([str(i) for i in range(20)], sep=" ", limit=3) == "0 1 2 ...and 17 more"
+
+@pytest.mark.asyncio
+async def test_channel_ripple_logs_only_the_audited_mover(mocker, mock_guild):
+    cog = ChannelUpdate(MagicMock())
+    mocker.patch.object(cog, "should_log", return_value=True)
+    mock_log = mocker.patch.object(cog, "log_event", new_callable=AsyncMock)
+
+    def channel(cid, position):
+        ch = MagicMock(spec=discord.TextChannel)
+        ch.id, ch.position, ch.guild, ch.mention = cid, position, mock_guild, f"#{cid}"
+        return ch
+
+    entry = MagicMock()
+    entry.target.id = 10
+    entry.after.position = 0
+    async def audit_logs(**kwargs):
+        yield entry
+    mock_guild.audit_logs = audit_logs
+
+    for cid in (10, 11, 12):
+        await cog._queue_position_update(channel(cid, cid), channel(cid, cid + 1))
+    await cog.storms.flush_all()
+
+    mock_log.assert_called_once()
+    embed = mock_log.call_args[0][1]
+    assert embed.title == "Channel Moved" and "#10" in embed.description
+
+@pytest.mark.asyncio
+async def test_mass_role_grant_logs_first_then_summary(mocker, mock_guild):
+    cog = RoleUpdate(MagicMock())
+    mocker.patch.object(cog, "should_log", return_value=True)
+    mock_log = mocker.patch.object(cog, "log_event", new_callable=AsyncMock)
+    role = MagicMock(spec=discord.Role); role.id = 5; role.mention = "@Event"
+
+    for uid in range(20):
+        before, after = MagicMock(spec=discord.Member), MagicMock(spec=discord.Member)
+        before.guild = after.guild = mock_guild
+        after.id, after.mention = uid, f"@u{uid}"
+        before.roles, after.roles = [], [role]
+        await cog.on_member_update(before, after)
+    assert mock_log.call_count == 1
+    await cog.storms.flush_all()
+
+    assert mock_log.call_count == 2
+    summary = mock_log.call_args[0][1]
+    assert "19 more member(s)" in summary.description and "...and 4 more" in summary.description
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import os
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from database import queries
+from logging_modules.message_delete import MessageDelete
+from utils.attachment_archive import AttachmentArchive
+from utils.log_record import LogRecord
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.status = 200
+        self.content_length = len(body)
+        self.content = SimpleNamespace(iter_chunked=self._chunks)
+        self._body = body
+
+    async def _chunks(self, size):
+        for i in range(0, len(self._body), size):
+            yield self._body[i:i + size]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeSession:
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+
+    def get(self, url, timeout=None):
+        self.requests.append(url)
+        return FakeResponse(self.files[url])
+
+def attachment(attachment_id, url, size, filename="proof.png"):
+    return SimpleNamespace(id=attachment_id, url=url, size=size, filename=filename, content_type="image/png")
+
+@pytest.fixture
+async def archive(tmp_db, tmp_path):
+    archive = AttachmentArchive()
+    archive.configure(
+        save=queries.save_archived_attachment, lookup=queries.get_archived_attachments,
+        usage=queries.get_archive_usage, evict=queries.evict_archived_attachments,
+        root=str(tmp_path / "blobs"), max_file_bytes=100, guild_quota_bytes=250, concurrency=2
+    )
+    yield archive
+    archive.stop()
+
+@pytest.mark.asyncio
+async def test_downloads_in_the_background_and_dedupes_by_hash(archive):
+    session = FakeSession({"a": b"x" * 80, "b": b"x" * 80, "big": b"y" * 500})
+    archive.start(session)
+
+    # Same bytes posted twice (and a file too big to keep)
+    assert archive.submit(1, 10, [attachment(100, "a", 80), attachment(101, "big", 50)]) == 2
+    assert archive.submit(1, 11, [attachment(102, "b", 80)]) == 1
+    assert archive.submit(1, 12, [attachment(103, "c", 5000)]) == 0
+
+    first = await archive.files_for(10, timeout=1)
+    second = await archive.files_for(11, timeout=1)
+    assert [f.filename for f in first] == ["proof.png"] # "big" was over max_file_bytes once read
+    assert first[0].sha256 == second[0].sha256 and first[0].path == second[0].path
+    assert len(os.listdir(os.path.dirname(first[0].path))) == 1
+    assert await queries.get_archive_usage(1) == 80 # Charged once per blob
+
+@pytest.mark.asyncio
+async def test_eviction_by_quota_and_age_removes_unreferenced_blobs(archive, mocker):
+    clock = mocker.patch("utils.attachment_archive.time.time", return_value=1000.0)
+    session = FakeSession({url: url.encode() * 90 for url in "abcd"})
+    archive.start(session)
+    for n, url in enumerate("abc"):
+        clock.return_value += 1
+        archive.submit(1, n, [attachment(n, url, 90)])
+        await archive.files_for(n, timeout=1)
+    # 270 bytes > 250 quota: the oldest blob went
+    assert await archive.files_for(0) == []
+    assert not os.path.exists(archive.path_for(hashlib.sha256(b"a" * 90).hexdigest()))
+    assert len(await archive.files_for(1)) == 1 and len(await archive.files_for(2)) == 1
+
+    clock.return_value += archive.max_age + 1.5
+    archive.submit(2, 3, [attachment(3, "d", 90)])
+    await archive.files_for(3, timeout=1)
+    await archive.evict()
+    assert await archive.files_for(1) == [] and await archive.files_for(2) == []
+    assert len(await archive.files_for(3)) == 1
+
+@pytest.mark.asyncio
+async def test_delete_log_reuploads_archived_files_within_the_upload_limit(mocker):
+    cog = MessageDelete(MagicMock())
+    guild = MagicMock()
+    guild.filesize_limit = 100
+    archived = [SimpleNamespace(path=f"/a/{n}", filename="my proof.png", size=60) for n in range(3)]
+    record = LogRecord.error("Message Deleted", "desc")
+
+    assert cog._attach_archived(record, guild, archived) == ["0_my_proof.png"]
+    assert record.files == [("/a/0", "0_my_proof.png")]
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_of_the_same_blob_all_succeed(tmp_path):
+    path = str(tmp_path / "ab" / "ab12")
+    data = b"z" * 200_000
+    results = await asyncio.gather(*(asyncio.to_thread(AttachmentArchive._write_blob, path, data) for _ in range(8)))
+    assert any(results)
+    assert open(path, "rb").read() == data
+    assert os.listdir(tmp_path / "ab") == ["ab12"] # No temp files left behind
@@ -0,0 +1,62 @@
+import pytest
+import discord
+from discord import app_commands
+from discord.ext import commands
+from utils.boot import BootTimeline, command_tree_fingerprint, command_module_map
+
+def make_tree():
+    client = discord.Client(intents=discord.Intents.none())
+    return app_commands.CommandTree(client)
+
+def add_ping(tree, description="Pong"):
+    @tree.command(name="ping", description=description)
+    async def ping(interaction: discord.Interaction):
+        pass
+
+def test_fingerprint_is_stable_across_trees():
+    first, second = make_tree(), make_tree()
+    add_ping(first)
+    add_ping(second)
+    assert command_tree_fingerprint(first) == command_tree_fingerprint(second)
+
+def test_fingerprint_changes_with_command_payload():
+    before, after = make_tree(), make_tree()
+    add_ping(before)
+    add_ping(after, description="Pong, but different")
+    assert command_tree_fingerprint(before) != command_tree_fingerprint(after)
+
+@pytest.mark.asyncio
+async def test_boot_timeline_records_failed_phase():
+    boot = BootTimeline()
+    async with boot.phase("database connect"):
+        pass
+    with pytest.raises(RuntimeError):
+        async with boot.phase("extensions"):
+            raise RuntimeError("boom")
+
+    assert [p[0] for p in boot.phases] == ["database connect", "extensions"]
+    assert boot.phases[1][2] == "failed"
+    assert "extensions" in boot.render()
+
+def test_command_module_map_resolves_groups_cogs_and_aliases():
+    class LogManagementCommands(commands.Cog):
+        log_group = app_commands.Group(name="log", description="Logs")
+
+        @log_group.command(name="enable", description="Enable")
+        async def enable(self, interaction: discord.Interaction):
+            pass
+
+        @app_commands.command(name="setup", description="Setup")
+        async def setup(self, interaction: discord.Interaction):
+            pass
+
+    tree = make_tree()
+    cog = LogManagementCommands()
+    for command in cog.__cog_app_commands__:
+        tree.add_command(command)
+    add_ping(tree)
+
+    modules = command_module_map(tree)
+    assert modules["log enable"] == ("log", "log_management", "logging")
+    assert modules["setup"] == ("log_management", "logging")
+    assert modules["ping"] == ()
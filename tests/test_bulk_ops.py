@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from database import queries
+
+def test_chunked_splits_evenly():
+    assert [len(c) for c in queries.chunked(range(1201), size=500)] == [500, 500, 201]
+    assert list(queries.chunked([])) == []
+
+@pytest.mark.asyncio
+async def test_restore_active_guilds_past_variable_limit(tmp_db):
+    # 40k active guilds: far past SQLite's bound-variable limit for a single IN (...)
+    await tmp_db.connection.executemany(
+        "INSERT INTO guild_settings (guild_id, deleted_at) VALUES (?, CURRENT_TIMESTAMP)",
+        [(i,) for i in range(1, 40001, 2)] + [(50001,)]
+    )
+    await tmp_db.connection.commit()
+
+    assert await queries.restore_settings_for_active_guilds(list(range(1, 40001))) == 20000
+    cursor = await tmp_db.connection.execute("SELECT guild_id FROM guild_settings WHERE deleted_at IS NOT NULL")
+    assert await cursor.fetchall() == [(50001,)]
+    cursor = await tmp_db.connection.execute("SELECT COUNT(*) FROM temp.bulk_ids")
+    assert (await cursor.fetchone())[0] == 0
+
+@pytest.mark.asyncio
+async def test_failed_transaction_only_rolls_back_its_own_writes(tmp_db):
+    await tmp_db.connection.execute("INSERT INTO guild_settings (guild_id) VALUES (1)")
+    await tmp_db.connection.commit()
+
+    async def failing_import():
+        async with tmp_db.transaction():
+            await tmp_db.connection.execute(
+                "INSERT INTO server_lists (guild_id, list_type, entity_type, entity_id, entity_name) VALUES (1, 'blacklist', 'user', 1, 'a')"
+            )
+            await asyncio.sleep(0.05) # Another writer gets scheduled meanwhile
+            raise RuntimeError("boom")
+
+    failing = asyncio.create_task(failing_import())
+    await asyncio.sleep(0.01)
+    assert await queries.add_list_item(1, "blacklist", "user", 2, "b")
+    with pytest.raises(RuntimeError):
+        await failing
+
+    # The failed transaction's row is gone, the other writer's row is committed
+    cursor = await tmp_db.connection.execute("SELECT entity_id FROM server_lists")
+    assert await cursor.fetchall() == [(2,)]
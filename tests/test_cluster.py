@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from cluster.protocol import encode_frame, read_frame
+from cluster.supervisor import shard_ranges
+from config import Config
+from database.core import db, writer_op, WRITER_OPS
+
+def test_shard_ranges_are_contiguous_and_balanced():
+    ranges = shard_ranges(10, 3)
+    assert ranges == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    # More clusters than shards collapses to one shard each
+    assert shard_ranges(2, 5) == [[0], [1]]
+
+def test_parse_shard_ids():
+    assert Config._parse_shard_ids("0-3") == [0, 1, 2, 3]
+    assert Config._parse_shard_ids("4, 6,5") == [4, 5, 6]
+    assert Config._parse_shard_ids("") is None
+
+@pytest.mark.asyncio
+async def test_frame_roundtrip():
+    reader = asyncio.StreamReader()
+    message = {"op": "logs", "rows": [[1, "message_delete", "hello"]]}
+    reader.feed_data(encode_frame(message))
+    reader.feed_eof()
+    assert await read_frame(reader) == message
+
+@pytest.fixture
+def _set_thing(mocker):
+    # Registered into a copy of WRITER_OPS, so the op is gone after the test
+    mocker.patch.dict(WRITER_OPS)
+
+    @writer_op()
+    async def _set_thing(guild_id, value):
+        return value
+    return _set_thing
+
+@pytest.mark.asyncio
+async def test_writer_op_runs_locally_and_notifies(mocker, _set_thing):
+    mocker.patch.object(db, "remote", None)
+    mocker.patch.object(db, "_invalidation_listeners", [])
+    seen = []
+    db.add_invalidation_listener(lambda op_name, guild_ids: seen.append((op_name, guild_ids)))
+
+    assert await _set_thing(42, "on") == "on"
+    assert seen == [("_set_thing", [42])]
+    assert "_set_thing" in WRITER_OPS
+
+@pytest.mark.asyncio
+async def test_writer_op_forwards_in_cluster_mode(mocker, _set_thing):
+    remote = mocker.MagicMock()
+    remote.call = AsyncMock(return_value="from writer")
+    mocker.patch.object(db, "remote", remote)
+
+    assert await _set_thing(42, value="on") == "from writer"
+    remote.call.assert_awaited_once_with("_set_thing", (42,), {"value": "on"})
+
+    # Writer unreachable -> the op's default, not an exception in the listener
+    remote.call.side_effect = ConnectionError("gone")
+    assert await _set_thing(42, "on") is None
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from utils.fair_queue import FairQueue, FairScheduler, QueueOverflow
+
+def drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+        queue.task_done()
+    return items
+
+def test_quiet_guild_is_served_between_noisy_items():
+    queue = FairQueue("test", key=lambda row: row[0])
+    for i in range(50):
+        queue.put_nowait((1, i))
+    queue.put_nowait((2, "a"))
+    queue.put_nowait((2, "b"))
+    order = drain(queue)
+    assert order[:4] == [(1, 0), (2, "a"), (1, 1), (2, "b")]
+    assert [i for g, i in order if g == 1] == list(range(50))
+
+def test_weights_and_costs_follow_deficit_round_robin():
+    queue = FairQueue("test", key=lambda row: row[0], weight=lambda g: 2 if g == 1 else 1)
+    for i in range(4):
+        queue.put_nowait((1, i))
+        queue.put_nowait((2, i))
+    assert [g for g, _ in drain(queue)] == [1, 1, 2, 1, 1, 2, 2, 2]
+
+    queue = FairQueue("test", key=lambda row: row[0], quantum=100, cost=lambda row: len(row[1]))
+    queue.put_nowait((1, "x" * 150))
+    queue.put_nowait((1, "x" * 10))
+    queue.put_nowait((2, "x" * 60))
+    queue.put_nowait((2, "x" * 60))
+    # Guild 1 needs two turns of credit for its big item, guild 2 spends one turn per item
+    assert [(g, len(v)) for g, v in drain(queue)] == [(2, 60), (1, 150), (1, 10), (2, 60)]
+
+@pytest.mark.asyncio
+async def test_caps_evict_the_noisy_guilds_oldest_items():
+    dropped = []
+    queue = FairQueue("test", key=lambda row: row[0], per_key_cap=3, max_size=5, on_drop=lambda g, row: dropped.append(row))
+    for i in range(5):
+        queue.put_nowait((1, i))
+    assert dropped == [(1, 0), (1, 1)]
+    queue.put_nowait((2, 0))
+    queue.put_nowait((3, 0))
+    assert not queue.put_nowait((3, 1)) # Full: the longest sub-queue (guild 1) gives way
+    assert dropped[-1] == (1, 2) and queue.overflow == {1: 3}
+    assert drain(queue) == [(1, 3), (2, 0), (3, 0), (1, 4), (3, 1)]
+    await asyncio.wait_for(queue.join(), 1)
+
+@pytest.mark.asyncio
+async def test_scheduler_hands_free_slots_out_fairly():
+    scheduler = FairScheduler("test", concurrency=1, per_key_cap=3)
+    order = []
+    gate = asyncio.Event()
+
+    async def send(guild_id, n):
+        try:
+            async with scheduler.slot(guild_id):
+                order.append((guild_id, n))
+                await gate.wait()
+        except QueueOverflow:
+            order.append((guild_id, "dropped"))
+
+    tasks = [asyncio.create_task(send(1, n)) for n in range(5)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(send(2, 0)))
+    await asyncio.sleep(0)
+    assert order == [(1, 0), (1, "dropped")] # 1 holds the slot, 1/1 was evicted by 1/4
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert order[2:] == [(1, 2), (2, 0), (1, 3), (1, 4)]
+    assert scheduler.in_flight() == 0 and scheduler.overflow == {1: 1}
@@ -0,0 +1,34 @@
+import pytest
+from database import queries
+from utils.list_io import export_csv, parse_import
+
+def test_parse_import_accepts_ids_mentions_and_csv():
+    rows = parse_import(
+        "id,type,name\n"
+        "123456789012345678,role,Muted\n"
+        "<@234567890123456789> <#345678901234567890>\n"
+        "not an id 12\n"
+    )
+    assert [(r.entity_id, r.entity_type) for r in rows[:3]] == [
+        (123456789012345678, "role"),
+        (234567890123456789, "user"),
+        (345678901234567890, "channel"),
+    ]
+    assert rows[0].entity_name == "Muted"
+    assert rows[3].error == "no valid ID"
+
+def test_export_round_trips_through_import():
+    items = [{"entity_type": "user", "entity_id": 123456789012345678, "entity_name": "", "added_at": "2024-01-01 00:00:00"}]
+    (row,) = parse_import(export_csv(items))
+    assert (row.entity_id, row.entity_type, row.entity_name) == (123456789012345678, "user", None)
+
+@pytest.mark.asyncio
+async def test_import_list_items_reports_existing_and_replaces(tmp_db):
+    await tmp_db.connection.execute("INSERT INTO guild_settings (guild_id) VALUES (1)")
+    await tmp_db.connection.commit()
+
+    assert await queries.import_list_items(1, "blacklist", [("user", 10, "a"), ("role", 20, "b")]) == []
+    assert await queries.import_list_items(1, "blacklist", [("role", 20, "b2"), ("channel", 30, "c")], replace=True) == [20]
+
+    rows = await queries.get_list_items(1, "blacklist")
+    assert sorted((r["entity_id"], r["entity_name"]) for r in rows) == [(20, "b2"), (30, "c")]
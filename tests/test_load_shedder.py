@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from logging_modules import base
+from logging_modules.voice_state import VoiceState
+from utils import load_shedder as shedding
+from utils.load_shedder import LoadShedder, Priority
+from utils.log_record import LogRecord
+
+def test_priorities_default_and_override():
+    shedder = LoadShedder()
+    assert shedder.priority("MemberBan") == Priority.CRITICAL
+    assert shedder.priority("VoiceState", suspicious=True) == Priority.CRITICAL
+    assert shedder.priority("MemberJoin") == Priority.NORMAL
+    shedder.configure(priorities={"VoiceState": "high", "MemberJoin": "bogus"})
+    assert shedder.priority("VoiceState") == Priority.HIGH
+    assert shedder.priority("MemberJoin") == Priority.NORMAL
+
+@pytest.mark.asyncio
+async def test_samples_then_digests_then_reports_once_lag_recedes(mocker):
+    clock = mocker.patch.object(shedding.time, "monotonic", return_value=100.0)
+    shedder = LoadShedder(sample_lag=5, digest_lag=20)
+    reporter = AsyncMock()
+    shedder.register_reporter("VoiceState", reporter)
+
+    shedder.observe(8)
+    assert shedder.level == 1
+    kept = [shedder.admit(1, "VoiceState", Priority.LOW, "Joined Voice") for _ in range(10)]
+    assert kept.count(True) == 2 # 1 in SAMPLE_EVERY
+    assert all(shedder.admit(1, "MemberJoin", Priority.NORMAL) for _ in range(10))
+
+    shedder.observe(60)
+    assert shedder.level == 2
+    assert not any(shedder.admit(1, "VoiceState", Priority.LOW, "Left Voice") for _ in range(4))
+    assert shedder.admit(1, "MemberBan", Priority.CRITICAL)
+
+    # Still above half the sample threshold: no flapping back to 0
+    shedder.lag = 3
+    shedder.observe(3)
+    assert shedder.level == 1
+
+    clock.return_value += shedder.QUIET_AFTER # No deliveries for a while: lag is gone
+    shedder._update_level(clock.return_value)
+    assert shedder.level == 0
+    await shedder.report()
+    guild_id, tally = reporter.await_args.args
+    assert guild_id == 1 and (tally.sampled, tally.digested) == (8, 4)
+    assert tally.titles == {"Joined Voice": 8, "Left Voice": 4} and tally.peak_lag > 20
+    shedder.stop()
+
+@pytest.mark.asyncio
+async def test_shed_event_is_never_routed_or_rendered(mocker, mock_guild):
+    bot = MagicMock()
+    bot.config_sync.get.return_value = {"enabled_modules": {"voice_state": True}, "log_channel_id": "5"}
+    cog = VoiceState(bot)
+    mocker.patch.object(base, "get_guild_settings", AsyncMock(return_value=None))
+    mocker.patch.object(base.load_shedder, "admit", return_value=False)
+    render = mocker.spy(LogRecord, "to_embed")
+
+    assert await cog._deliver(mock_guild, LogRecord.info("Joined Voice", "hi"), priority=Priority.LOW) == "shed"
+    render.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_restored_embed_with_old_timestamp_does_not_raise_shed_level(mocker, mock_guild):
+    import datetime
+    import discord
+    from logging_modules.message_delete import MessageDelete
+    bot = MagicMock()
+    bot.config_sync.get.return_value = {"enabled_modules": {"message_delete": True}, "log_channel_id": "5"}
+    cog = MessageDelete(bot)
+    channel = MagicMock()
+    channel.send = AsyncMock()
+    mock_guild.get_channel.return_value = channel
+    mocker.patch.object(base, "get_guild_settings", AsyncMock(return_value=None))
+    mocker.patch.object(base, "add_log", AsyncMock())
+    shedder = LoadShedder(sample_lag=5, digest_lag=20)
+    mocker.patch.object(base, "load_shedder", shedder)
+
+    # AutoLog re-posting a log entry from days ago
+    restored = discord.Embed(title="[RESTORED] Member Joined", timestamp=discord.utils.utcnow() - datetime.timedelta(days=3))
+    assert await cog._deliver(mock_guild, restored, suspicious=True) == "sent"
+    assert shedder.level == 0 and shedder.lag < 5
+    shedder.stop()
@@ -0,0 +1,44 @@
+import discord
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from logging_modules import base
+from logging_modules.member_join import MemberJoin
+from utils.log_record import LogRecord
+
+def test_record_renders_and_flattens_like_an_embed():
+    record = LogRecord.warning("Role Updated", "desc", fields=[("Name", "a -> b", False)], footer="f")
+    record.add_field(name="By", value="@mod")
+    embed = record.to_embed(suspicious=True)
+    assert embed.title == "⚠️ Suspicious Activity: Role Updated"
+    assert embed.color == discord.Color.dark_red()
+    assert [f.name for f in embed.fields] == ["Name", "By"]
+    assert embed.timestamp == record.timestamp
+    assert record.to_log_content() == "Role Updated: desc | Name: a -> b | By: @mod"
+    assert record.to_log_content(suspicious=True).startswith("⚠️ Suspicious Activity: Role Updated: desc")
+
+@pytest.mark.asyncio
+async def test_disabled_module_never_renders(mocker, mock_guild):
+    bot = MagicMock()
+    bot.config_sync.get.return_value = {"enabled_modules": {"member_join": False}}
+    cog = MemberJoin(bot)
+    mocker.patch.object(base, "get_guild_settings", AsyncMock(return_value=None))
+    render = mocker.spy(LogRecord, "to_embed")
+
+    assert await cog._deliver(mock_guild, LogRecord.success("Member Joined", "hi")) == "disabled"
+    render.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_enabled_record_is_rendered_sent_and_persisted(mocker, mock_guild):
+    bot = MagicMock()
+    bot.config_sync.get.return_value = {"enabled_modules": {"member_join": True}, "log_channel_id": "5"}
+    cog = MemberJoin(bot)
+    channel = MagicMock()
+    channel.send = AsyncMock()
+    mock_guild.get_channel.return_value = channel
+    mocker.patch.object(base, "get_guild_settings", AsyncMock(return_value=None))
+    add_log = mocker.patch.object(base, "add_log", AsyncMock())
+
+    record = LogRecord.success("Member Joined", "hi", fields=[("Age", "1d", True)])
+    assert await cog._deliver(mock_guild, record) == "sent"
+    assert channel.send.await_args.kwargs["embed"].title == "Member Joined"
+    add_log.assert_awaited_once_with(mock_guild.id, "MemberJoin", "Member Joined: hi | Age: 1d")
@@ -0,0 +1,45 @@
+import json
+import logging
+import os
+import sys
+from utils.logger import (
+    JsonLinesFormatter, _InProcessQueueHandler, _caller_module_name, module_name_from_path
+)
+
+def make_record(msg, *args, exc_info=None):
+    pathname = os.path.join(os.getcwd(), "logging_modules", "base.py")
+    return logging.LogRecord("test", logging.INFO, pathname, 1, msg, args, exc_info)
+
+def test_module_name_from_path_is_cached():
+    module_name_from_path.cache_clear()
+    path = os.path.join(os.getcwd(), "utils", "__init__.py")
+    assert module_name_from_path(path) == "utils"
+    module_name_from_path(path)
+    assert module_name_from_path.cache_info().hits == 1
+
+def test_caller_module_name_uses_frame_globals():
+    assert _caller_module_name(depth=1) == __name__
+
+def test_queue_handler_resolves_args_before_enqueue():
+    """
+    Mutable args must be rendered on the calling thread, not when the writer gets to them.
+    """
+    handler = _InProcessQueueHandler(None)
+    guilds = [1]
+    record = handler.prepare(make_record("guilds=%s", guilds))
+    guilds.append(2)
+
+    assert record.getMessage() == "guilds=[1]"
+    assert record.args is None
+
+def test_json_lines_formatter():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record("sent %d", 3, exc_info=sys.exc_info())
+
+    entry = json.loads(JsonLinesFormatter().format(record))
+    assert entry["msg"] == "sent 3"
+    assert entry["module"] == "logging_modules.base"
+    assert entry["level"] == "INFO"
+    assert "ValueError: boom" in entry["exc"]
@@ -0,0 +1,41 @@
+import pytest
+from utils.memory import MemoryInspector, approx_size
+
+def test_approx_size_scales_sampled_items():
+    small = {n: "x" * 100 for n in range(10)}
+    large = {n: "x" * 100 for n in range(1000)}
+    assert approx_size(small) > 10 * 100
+    # Only `sample` items are measured, the rest are extrapolated
+    assert approx_size(large, sample=8) == pytest.approx(approx_size(large), rel=0.1)
+    assert approx_size(large) > 50 * approx_size(small)
+
+def test_cache_stats_sort_by_size_and_skip_broken_sources():
+    inspector = MemoryInspector()
+    inspector.register_cache("small", lambda: [1, 2])
+    inspector.register_cache("nested", lambda: {1: [0] * 50, 2: [0] * 50}, count=lambda d: sum(map(len, d.values())))
+    inspector.register_cache("broken", lambda: 1 / 0)
+    inspector.register_cache("gone", lambda: None)
+
+    stats = inspector.cache_stats()
+    assert [s.name for s in stats] == ["nested", "small"]
+    assert stats[0].entries == 100
+
+    inspector.unregister_cache("nested")
+    assert [s.name for s in inspector.cache_stats()] == ["small"]
+
+@pytest.mark.asyncio
+async def test_diff_reports_growth_since_baseline():
+    inspector = MemoryInspector()
+    assert await inspector.diff() is None # Not tracing
+    inspector.start_tracing()
+    try:
+        await inspector.mark_baseline()
+        hoard = [bytearray(1024) for _ in range(2000)]
+        grown = await inspector.diff()
+        assert grown and "test_memory.py" in grown[0].where
+        assert grown[0].size >= 2000 * 1024
+        assert any("test_memory.py" in a.where for a in await inspector.top_allocators())
+    finally:
+        inspector.stop_tracing()
+    assert not inspector.tracing and await inspector.diff() is None
+    del hoard
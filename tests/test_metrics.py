@@ -0,0 +1,62 @@
+import pytest
+from utils.metrics import MetricsRegistry
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry(prefix="t_")
+    sends = registry.counter("sends_total", "Sends", ("bucket",))
+    depth = registry.gauge("depth", "Depth")
+
+    sends.inc(bucket="webhook")
+    sends.inc(2, bucket="webhook")
+    depth.set(7)
+
+    text = registry.render()
+    assert "# TYPE t_sends_total counter" in text
+    assert 't_sends_total{bucket="webhook"} 3' in text
+    assert "t_depth 7" in text
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(prefix="t_")
+    hist = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 0.5, 5.0):
+        hist.observe(value)
+
+    text = registry.render()
+    assert 't_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 't_latency_seconds_bucket{le="1"} 3' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "t_latency_seconds_count 4" in text
+
+def test_histogram_quantile_interpolates():
+    registry = MetricsRegistry(prefix="t_")
+    hist = registry.histogram("q_seconds", "Q", buckets=(1.0, 2.0))
+
+    for _ in range(10):
+        hist.observe(1.5)
+
+    assert 1.0 < hist.quantile(0.5) <= 2.0
+    assert registry.histogram("empty_seconds", "E").quantile(0.5) is None
+
+def test_label_mismatch_raises():
+    registry = MetricsRegistry(prefix="t_")
+    counter = registry.counter("c_total", "C", ("module",))
+    with pytest.raises(ValueError):
+        counter.inc(guild="1")
+
+def test_register_is_idempotent():
+    registry = MetricsRegistry(prefix="t_")
+    first = registry.counter("x_total", "X")
+    assert registry.counter("x_total", "X") is first
+    with pytest.raises(ValueError):
+        registry.gauge("x_total", "X")
+
+def test_summary_skips_empty_metrics():
+    registry = MetricsRegistry(prefix="t_")
+    registry.counter("unused_total", "Unused")
+    hist = registry.histogram("db_seconds", "DB")
+    hist.observe(0.01)
+
+    summary = registry.summary()
+    assert "unused_total" not in summary
+    assert summary["db_seconds"]["all"]["count"] == 1
@@ -0,0 +1,73 @@
+import pytest
+from types import SimpleNamespace
+from utils.name_index import NameIndex, NameIndexRegistry, normalize
+
+def make_index():
+    index = NameIndex()
+    index.add(1, "role", "Senior Mod")
+    index.add(2, "role", "Moderators")
+    index.add(3, "channel", "mod-log")
+    index.add(4, "user", "Zoë", "zoe_99")
+    return index
+
+def test_normalize_folds_case_accents_and_separators():
+    assert normalize("  Ünïcode-Mod_Team ") == "unicode mod team"
+
+def test_prefix_matches_words_and_ranks_shortest_first():
+    index = make_index()
+    assert index.prefix("mod") == [3, 1, 2]
+    assert index.prefix("zoe") == [4]
+
+def test_contains_and_fuzzy():
+    index = make_index()
+    assert index.contains("erato") == [2]
+    assert index.fuzzy("moderaters") == [2]
+    assert index.fuzzy("qqqqq") == []
+
+def test_rename_and_remove_update_the_index():
+    index = make_index()
+    index.add(2, "role", "Helpers")
+    assert index.prefix("moderators") == []
+    assert index.prefix("help") == [2]
+
+    index.remove(2)
+    assert index.search("help") == []
+    assert index.get(2) is None
+
+@pytest.mark.asyncio
+async def test_registry_builds_lazily_and_evicts_lru():
+    registry = NameIndexRegistry(max_guilds=1)
+    guild = lambda gid: SimpleNamespace(
+        id=gid,
+        roles=[SimpleNamespace(id=10, name="Admin")],
+        channels=[],
+        members=[SimpleNamespace(id=20, name="bob", global_name=None, nick="Bobby", display_name="Bobby")]
+    )
+    assert registry.peek(1) is None
+    registry.upsert(1, 30, "role", "Ignored") # No index yet, nothing to update
+    index = await registry.get(guild(1))
+    assert index.search("bob") == [20]
+
+    assert index.get(30) is None
+
+    await registry.get(guild(2))
+    assert registry.peek(1) is None
+
+@pytest.mark.asyncio
+async def test_lookup_builds_in_background_and_scan_answers_meanwhile():
+    registry = NameIndexRegistry()
+    guild = SimpleNamespace(
+        id=1,
+        roles=[SimpleNamespace(id=10, name="Moderators")],
+        channels=[SimpleNamespace(id=11, name="mod-log")],
+        members=[SimpleNamespace(id=20, name="modbot", global_name=None, nick=None, display_name="modbot")]
+    )
+    # Not built yet: no waiting, the scan covers the first few entities
+    assert registry.lookup(guild) is None
+    scanned = registry.scan(guild, "mod")
+    assert sorted(scanned.search("mod")) == [10, 11, 20]
+    assert registry.scan(guild, "mod", limit=1).search("mod") == [10]
+
+    await registry._building[1]
+    index = registry.lookup(guild)
+    assert index is not None and index.prefix("modbot") == [20]
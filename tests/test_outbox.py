@@ -0,0 +1,61 @@
+import asyncio
+import discord
+import pytest
+from database import queries
+from utils.outbox import DeliveryOutbox, OutboxEntry
+
+@pytest.fixture
+async def outbox(tmp_db):
+    box = DeliveryOutbox()
+    box.configure(write=queries.write_outbox, load=queries.load_outbox, mark_attempted=queries.mark_outbox_attempted)
+    yield box
+
+async def stored_tokens():
+    return [row[1] for row in await queries.load_outbox()]
+
+@pytest.mark.asyncio
+async def test_only_slow_or_interrupted_deliveries_reach_the_disk(outbox, mocker):
+    embed = discord.Embed(title="Member Banned")
+    with outbox.pending(1, "MemberBan", None, 5, embed, "fast"):
+        await outbox.flush() # Younger than FLUSH_AFTER: not written yet
+    await outbox.flush()
+    assert await stored_tokens() == []
+
+    release = asyncio.Event()
+    async def send():
+        with outbox.pending(1, "MemberBan", None, 5, embed, "slow"):
+            await release.wait()
+
+    slow = asyncio.create_task(send())
+    interrupted = asyncio.create_task(send())
+    await asyncio.sleep(0)
+    mocker.patch.object(outbox, "FLUSH_AFTER", 0)
+    await outbox.flush()
+    assert len(await stored_tokens()) == 2
+
+    interrupted.cancel() # Shutdown: stays stored
+    release.set()
+    await asyncio.gather(slow, interrupted, return_exceptions=True)
+    await outbox.drain(timeout=1)
+    rows = await queries.load_outbox()
+    assert len(rows) == 1 and OutboxEntry.from_row(rows[0]).embed["title"] == "Member Banned"
+
+@pytest.mark.asyncio
+async def test_replay_sends_local_rows_and_drops_expired_ones(outbox, mocker):
+    clock = mocker.patch("utils.outbox.time.time", return_value=1_000_000.0)
+    rows = [
+        OutboxEntry(f"old.{i}", guild_id, "MemberKick", None, 5, {"title": f"Kick {i}"}, f"Kick {i}", created_at).to_row()
+        for i, (guild_id, created_at) in enumerate([(1, 999_000.0), (2, 999_000.0), (1, 900_000.0), (1, 999_500.0), (2, 900_000.0)])
+    ]
+    await queries.write_outbox(rows, [])
+    send = mocker.AsyncMock(side_effect=lambda entry: entry.token != "old.3")
+
+    assert await outbox.replay(send, is_local=lambda guild_id: guild_id == 1) == (1, 1, 2)
+    assert sorted(e.args[0].token for e in send.await_args_list) == ["old.0", "old.3"]
+    remaining = {row[1]: row[-1] for row in await queries.load_outbox()}
+    assert remaining == {"old.1": 0, "old.3": 1} # Other cluster's guild untouched unless expired, failure counted
+
+    clock.return_value += 1
+    outbox.MAX_ATTEMPTS = 1
+    await outbox.replay(send, is_local=lambda guild_id: True)
+    assert await stored_tokens() == []
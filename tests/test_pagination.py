@@ -0,0 +1,44 @@
+import discord
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from database import queries
+from utils.views import KeysetPaginator
+
+@pytest.mark.asyncio
+async def test_logs_page_is_keyset_paginated_and_filtered(tmp_db):
+    await tmp_db.connection.execute("INSERT INTO guild_settings (guild_id) VALUES (1)")
+    await tmp_db.connection.executemany(
+        "INSERT INTO logs (guild_id, module_name, content) VALUES (1, ?, ?)",
+        [("MessageDelete" if i % 2 else "MemberJoin", f"log {i}") for i in range(1, 8)]
+    )
+    await tmp_db.connection.commit()
+
+    first = await queries.get_logs_page(1, limit=3)
+    assert [r["content"] for r in first] == ["log 7", "log 6", "log 5"]
+    assert isinstance(first[0]["ts"], int)
+    second = await queries.get_logs_page(1, before_id=first[-1]["id"], limit=3)
+    assert [r["content"] for r in second] == ["log 4", "log 3", "log 2"]
+
+    deletes = await queries.get_logs_page(1, limit=10, module_name="MessageDelete")
+    assert [r["content"] for r in deletes] == ["log 7", "log 5", "log 3", "log 1"]
+
+@pytest.mark.asyncio
+async def test_paginator_walks_forward_and_back():
+    data = [{"id": i} for i in range(10, 0, -1)]
+    async def fetch(before_id, limit):
+        return [row for row in data if before_id is None or row["id"] < before_id][:limit]
+    render = lambda rows, page: discord.Embed(title=f"{page}:{[r['id'] for r in rows]}")
+
+    view = KeysetPaginator(fetch, render, page_size=4)
+    assert (await view.load()).title == "1:[10, 9, 8, 7]"
+    assert view.previous.disabled and not view.next.disabled
+
+    interaction = MagicMock()
+    interaction.response.edit_message = AsyncMock()
+    await view.next.callback(interaction)
+    await view.next.callback(interaction)
+    assert interaction.response.edit_message.await_args.kwargs["embed"].title == "3:[2, 1]"
+    assert view.next.disabled
+
+    await view.previous.callback(interaction)
+    assert interaction.response.edit_message.await_args.kwargs["embed"].title == "2:[6, 5, 4, 3]"
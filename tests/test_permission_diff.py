@@ -0,0 +1,40 @@
+import discord
+import pytest
+from discord.abc import _Overwrites
+from unittest.mock import AsyncMock, MagicMock
+from logging_modules.channel_permissions_update import ChannelPermissionUpdate
+from utils.permission_diff import diff_overwrites, diff_permissions, flag_names, dangerous_granted
+
+def _channel(guild, overwrites):
+    channel = MagicMock(spec=discord.TextChannel)
+    channel.id, channel.guild, channel.mention = 50, guild, "#general"
+    channel._overwrites = [_Overwrites({"id": i, "allow": a, "deny": d, "type": t}) for i, t, a, d in overwrites]
+    return channel
+
+def test_flag_names_use_canonical_names():
+    perms = discord.Permissions(view_channel=True, manage_roles=True, administrator=True)
+    assert flag_names(perms.value) == ("administrator", "read_messages", "manage_roles")
+    assert diff_permissions(perms.value, discord.Permissions(view_channel=True).value).revoked == perms.value & ~1024
+    assert dangerous_granted(discord.Permissions(send_messages=True, ban_members=True).value) == ("ban_members",)
+
+@pytest.mark.asyncio
+async def test_overwrite_diff_is_shared_and_flags_dangerous_grants(mocker, mock_guild):
+    mock_guild.get_role.return_value = None
+    mock_guild.get_member.return_value = None
+    everyone = discord.Permissions(send_messages=True).value
+    before = _channel(mock_guild, [(1, 0, 0, everyone), (7, 1, everyone, 0)])
+    after = _channel(mock_guild, [(1, 0, discord.Permissions(administrator=True).value, everyone)])
+
+    diffs = diff_overwrites(before, after)
+    assert diff_overwrites(before, after) is diffs # Cached for this event
+    role_diff, member_diff = diffs
+    assert role_diff.dangerous == ("administrator",) and not role_diff.created
+    assert member_diff.deleted and member_diff.allow_removed == everyone
+
+    cog = ChannelPermissionUpdate(MagicMock())
+    mock_log = mocker.patch.object(cog, "log_event", new_callable=AsyncMock)
+    await cog.on_guild_channel_update(before, after)
+    embed = mock_log.call_args[0][1]
+    assert mock_log.call_args.kwargs["suspicious"]
+    text = "\n".join(field.value for field in embed.fields)
+    assert "✅ `administrator` allowed" in text and "Member: 7 (overwrite removed)" in text
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from utils.presence import PresenceUpdater, ShardGuildCounter
+
+def make_guild(guild_id, shard_id=0):
+    return SimpleNamespace(id=guild_id, shard_id=shard_id)
+
+def make_bot(shards=(0, 1)):
+    bot = MagicMock()
+    bot.shard_count = len(shards)
+    bot.shards = {sid: MagicMock() for sid in shards}
+    bot.change_presence = AsyncMock()
+    return bot
+
+def test_counter_ignores_duplicate_events():
+    counter = ShardGuildCounter()
+    counter.rebuild([make_guild(1), make_guild(2, shard_id=1)])
+    assert counter.add(make_guild(1)) is None # Already counted
+    assert counter.add(make_guild(3, shard_id=1)) == 1
+    assert counter.remove(make_guild(9)) is None
+    assert (counter.count(0), counter.count(1), counter.total) == (1, 2, 3)
+
+@pytest.mark.asyncio
+async def test_presence_coalesces_and_skips_unchanged_shards():
+    bot = make_bot()
+    counter = ShardGuildCounter()
+    counter.rebuild([make_guild(1), make_guild(2, shard_id=1)])
+    presence = PresenceUpdater(bot, counter, delay=0)
+
+    presence.mark()
+    await presence._task
+    assert bot.change_presence.await_count == 2
+
+    # A join/leave wave on shard 0 that nets out, plus a real change on shard 1
+    for i in range(10, 20):
+        presence.mark(counter.add(make_guild(i)))
+        presence.mark(counter.remove(make_guild(i)))
+    presence.mark(counter.add(make_guild(5, shard_id=1)))
+    await presence._task
+
+    assert bot.change_presence.await_count == 3
+    assert bot.change_presence.await_args.kwargs["shard_id"] == 1
+    assert presence.updates_skipped == 1
+
+@pytest.mark.asyncio
+async def test_presence_force_resends_and_skips_foreign_shards():
+    bot = make_bot(shards=(0,))
+    counter = ShardGuildCounter()
+    presence = PresenceUpdater(bot, counter, delay=0)
+
+    presence.mark(0)
+    presence.mark(3) # Another cluster's shard
+    await presence._task
+    presence.mark(0, force=True)
+    await presence._task
+
+    assert [c.kwargs["shard_id"] for c in bot.change_presence.await_args_list] == [0, 0]
+
+@pytest.mark.asyncio
+async def test_presence_mark_during_flush_is_not_lost():
+    bot = make_bot(shards=(0,))
+    counter = ShardGuildCounter()
+    counter.rebuild([make_guild(1)])
+    presence = PresenceUpdater(bot, counter, delay=0)
+
+    sending, release = asyncio.Event(), asyncio.Event()
+    async def slow_presence(**kwargs):
+        sending.set()
+        await release.wait()
+    bot.change_presence.side_effect = slow_presence
+
+    presence.mark(0)
+    await sending.wait()
+    presence.mark(counter.add(make_guild(2))) # Join while the first update is in flight
+    release.set()
+    await presence._task
+
+    assert [c.kwargs["activity"].name for c in bot.change_presence.await_args_list] == [
+        "over 1 guilds | Shard 1/1", "over 2 guilds | Shard 1/1"
+    ]
+    assert not presence._dirty
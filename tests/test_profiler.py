@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from utils.profiler import HotPathProfiler, percentile
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+@pytest.mark.asyncio
+async def test_disabled_profiler_records_nothing():
+    profiler = HotPathProfiler()
+
+    async def listener():
+        with profiler.phase("filter"):
+            return "ok"
+
+    wrapped = profiler.wrap_listener("MessageDelete", "on_message_delete", listener)
+    assert await wrapped() == "ok"
+    assert profiler.report()["traces"] == 0
+
+@pytest.mark.asyncio
+async def test_trace_records_phases_and_guild():
+    profiler = HotPathProfiler()
+    profiler.enable()
+
+    async def listener(guild_id):
+        profiler.tag_guild(guild_id)
+        with profiler.phase("filter"):
+            pass
+        with profiler.phase("send"):
+            pass
+
+    wrapped = profiler.wrap_listener("MemberJoin", "on_member_join", listener)
+    await wrapped(1)
+    await wrapped(2)
+
+    report = profiler.report()
+    assert report["traces"] == 2
+    assert report["modules"]["MemberJoin"]["count"] == 2
+    assert set(report["phases"]) == {"filter", "send"}
+    assert {t["guild_id"] for t in report["slowest"]} == {1, 2}
+
+@pytest.mark.asyncio
+async def test_base_logger_listeners_are_wrapped(mock_guild, mocker):
+    """
+    Verify BaseLogger shadows its listeners so the cog registers the profiled version.
+    """
+    from logging_modules.member_join import MemberJoin
+    from logging_modules import base
+
+    profiler = HotPathProfiler()
+    profiler.enable()
+    mocker.patch.object(base, "profiler", profiler)
+
+    cog = MemberJoin(MagicMock())
+    mocker.patch.object(cog, "should_log", AsyncMock(return_value=False))
+    listener = dict(cog.get_listeners())["on_member_join"]
+
+    member = MagicMock()
+    member.guild = mock_guild
+    await listener(member)
+
+    assert profiler.report()["modules"]["MemberJoin"]["count"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from database import queries
+from utils.seeding import DashboardSeeder, build_seed_payload, payload_digest
+
+def _row(guild_id, **modules):
+    return {"guild_id": guild_id, "log_channel_id": 5, "msg_id": None, "mem_id": None, "modules": modules or {"MessageDelete": True}}
+
+def _seeder(rows, config_sync, confirmed=None, **kwargs):
+    async def fetch_chunks():
+        for i in range(0, len(rows), 2):
+            yield rows[i:i + 2]
+    saved = []
+    async def save(entries):
+        saved.extend(entries)
+    seeder = DashboardSeeder(
+        config_sync, fetch_chunks, AsyncMock(return_value=confirmed or {}), save, AsyncMock(), **kwargs
+    )
+    return seeder, saved
+
+def _config_sync(existing=(), ok=True):
+    sync = MagicMock()
+    sync._cache = {gid: {"log_mode": "simple"} for gid in existing}
+    sync.get = lambda gid: sync._cache.get(gid)
+    sync.has_guilds = lambda: bool(sync._cache)
+    sync.seed_batch = AsyncMock(return_value=ok)
+    return sync
+
+def test_payload_normalizes_modules_and_mode():
+    payload = build_seed_payload({"guild_id": 1, "log_channel_id": 5, "msg_id": 6, "mem_id": None, "modules": {"MessageDelete": False}})
+    assert payload["enabled_modules"] == {"message_delete": False}
+    assert payload["log_mode"] == "complex"
+    assert payload["complex_logs"] == {"system": "5", "message": "6", "member": "None"}
+
+@pytest.mark.asyncio
+async def test_seeder_skips_known_guilds_and_bounds_batches():
+    rows = [_row(i) for i in range(1, 8)]
+    sync = _config_sync(existing=["1"])
+    batch_bytes = len(json.dumps(build_seed_payload(rows[0]))) * 2 + 20
+    confirmed = {"2": payload_digest(build_seed_payload(rows[1])), "3": "stale"}
+    seeder, saved = _seeder(rows, sync, confirmed=confirmed, batch_bytes=batch_bytes, concurrency=2)
+
+    report = await seeder.run()
+    sent = [gid for call in sync.seed_batch.await_args_list for gid in call.args[0]]
+    assert sorted(sent) == ["3", "4", "5", "6", "7"]
+    assert all(len(call.args[0]) <= 2 for call in sync.seed_batch.await_args_list)
+    assert (report.on_dashboard, report.already_confirmed, report.confirmed) == (1, 1, 5)
+    assert sorted(gid for gid, _ in saved) == sent and len(sent) == 5
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_not_remembered():
+    sync = _config_sync(ok=False)
+    seeder, saved = _seeder([_row(1), _row(2)], sync)
+    report = await seeder.run()
+    assert report.failed == 2 and saved == []
+
+@pytest.mark.asyncio
+async def test_failed_confirmation_save_does_not_stall_the_seed():
+    sync = _config_sync()
+    async def fetch_chunks():
+        yield [_row(i) for i in range(1, 9)]
+    save = AsyncMock(side_effect=RuntimeError("database is locked"))
+    seeder = DashboardSeeder(sync, fetch_chunks, AsyncMock(return_value={}), save, AsyncMock(), batch_max_guilds=1, concurrency=1)
+
+    report = await asyncio.wait_for(seeder.run(), timeout=5)
+    assert report.batches == 8 and report.confirmed == 8
+    assert save.await_count == 8
+
+@pytest.mark.asyncio
+async def test_seed_confirmations_round_trip(tmp_db):
+    await tmp_db.connection.executemany(
+        "INSERT INTO guild_settings (guild_id, enabled_modules) VALUES (?, ?)",
+        [(i, json.dumps({"MemberJoin": True})) for i in range(1, 6)]
+    )
+    await tmp_db.connection.commit()
+
+    chunks = [chunk async for chunk in queries.iter_guild_settings_chunks(chunk_size=2)]
+    assert [[r["guild_id"] for r in c] for c in chunks] == [[1, 2], [3, 4], [5]]
+    assert chunks[0][0]["modules"] == {"MemberJoin": True}
+
+    await queries.mark_dashboard_seeded([("1", "a"), ("2", "b")])
+    assert await queries.get_dashboard_seeded() == {"1": "a", "2": "b"}
+    await queries.clear_dashboard_seeded()
+    assert await queries.get_dashboard_seeded() == {}
@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from database import core, queries
+from commands.stats import Stats, sparkline, summarize_volume
+
+@pytest.mark.asyncio
+async def test_volume_rolls_up_into_every_grain(tmp_db, mocker):
+    clock = mocker.patch.object(core.time, "time", return_value=1_700_000_130) # 2023-11-14 22:15:30 UTC
+
+    tmp_db.record_volume(1, "MessageDelete", 3)
+    tmp_db.record_volume(1, "MemberJoin")
+    clock.return_value += 120
+    tmp_db.record_volume(1, "MessageDelete")
+    await tmp_db.flush_rollups()
+    tmp_db.record_volume(1, "MessageDelete", 2)
+    await tmp_db.flush_rollups()
+
+    minutes = await queries.get_log_volume(1, "minute", 0, "MessageDelete")
+    assert minutes == [(1_700_000_100, "MessageDelete", 3), (1_700_000_220, "MessageDelete", 3)]
+    hours = await queries.get_log_volume(1, "hour", 0)
+    assert sorted(hours) == [(1_699_999_200, "MemberJoin", 1), (1_699_999_200, "MessageDelete", 6)]
+    assert await queries.get_log_volume(1, "day", 1_700_000_000) == []
+
+    # Two days later the minute rows are pruned, hours and days are kept
+    clock.return_value += 3 * 86400
+    tmp_db.record_volume(1, "MemberJoin")
+    await tmp_db.flush_rollups()
+    assert len(await queries.get_log_volume(1, "minute", 0)) == 1
+    assert len(await queries.get_log_volume(1, "hour", 0)) == 3
+
+def test_summary_fills_gaps_and_squeezes_the_sparkline():
+    totals, series = summarize_volume([(0, "A", 2), (120, "B", 5), (120, "A", 1)], start=0, step=60, buckets=4)
+    assert totals == {"A": 3, "B": 5} and series == [2, 0, 6, 0]
+    assert sparkline(series) == "▄▁█▁"
+    assert len(sparkline([1] * 168)) == 42
+
+@pytest.mark.asyncio
+async def test_stats_command_renders_modules_and_peak(mocker):
+    mocker.patch("commands.stats.time.time", return_value=7200)
+    mocker.patch("commands.stats.get_log_volume", AsyncMock(return_value=[(0, "MemberJoin", 4), (3600, "MessageDelete", 12)]))
+    interaction = MagicMock()
+    interaction.guild_id = 1
+    interaction.response.defer = AsyncMock()
+    interaction.followup.send = AsyncMock()
+
+    await Stats.stats.callback(Stats(MagicMock()), interaction, "24h")
+    embed = interaction.followup.send.await_args.kwargs["embed"]
+    fields = {f.name: f.value for f in embed.fields}
+    assert "**16** logs" in fields["Total"]
+    assert fields["By Module"].startswith("`MessageDelete` **12** (75%)")
+    assert "<t:3600:f>" in fields["Peak"]
@@ -0,0 +1,204 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from utils.status import ConfigSync
+
+def make_sync(**kwargs):
+    bot = MagicMock()
+    return ConfigSync(api_url="dashboard.local", bot_id="chromium", bot=bot, **kwargs)
+
+@pytest.mark.asyncio
+async def test_config_snapshot_warms_cache():
+    """
+    Verify a persisted snapshot is served by get() before the first live pull.
+    """
+    loader = AsyncMock(return_value={"1": {"log_channel_id": "42"}})
+    sync = make_sync(load_snapshot=loader)
+
+    loaded = await sync.load_snapshot()
+
+    assert loaded == 1
+    assert sync.snapshot_loaded
+    assert sync.get(1) == {"log_channel_id": "42"}
+    # The snapshot must NOT count as a live sync
+    assert not sync.synced.is_set()
+
+@pytest.mark.asyncio
+async def test_config_snapshot_does_not_clobber_live_data():
+    loader = AsyncMock(return_value={"1": {"log_channel_id": "stale"}})
+    sync = make_sync(load_snapshot=loader)
+    sync._cache = {"1": {"log_channel_id": "fresh"}}
+    sync.synced.set()
+
+    await sync.load_snapshot()
+
+    assert sync.get(1) == {"log_channel_id": "fresh"}
+
+@pytest.mark.asyncio
+async def test_config_snapshot_only_saved_on_change():
+    saver = AsyncMock(return_value=True)
+    sync = make_sync(save_snapshot=saver)
+    data = {"1": {"enabled_modules": {"message_delete": True}}}
+
+    await sync._persist_snapshot(data)
+    await sync._persist_snapshot({"1": {"enabled_modules": {"message_delete": True}}})
+    saver.assert_called_once()
+
+    await sync._persist_snapshot({"1": {"enabled_modules": {"message_delete": False}}})
+    assert saver.call_count == 2
+
+@pytest.mark.asyncio
+async def test_config_snapshot_failures_never_raise():
+    sync = make_sync(
+        load_snapshot=AsyncMock(side_effect=RuntimeError("disk gone")),
+        save_snapshot=AsyncMock(side_effect=RuntimeError("disk gone")),
+    )
+
+    assert await sync.load_snapshot() == 0
+    await sync._persist_snapshot({"1": {}})
+    # A failed save must be retried on the next sync
+    assert sync._snapshot_digest is None
+
+@pytest.mark.asyncio
+async def test_wait_until_synced_times_out():
+    sync = make_sync()
+    assert not await sync.wait_until_synced(timeout=0.01)
+    sync.synced.set()
+    assert await sync.wait_until_synced(timeout=0.01)
+
+def _session_answering(*statuses):
+    """A session whose posts answer with `statuses` in order; records each request's headers."""
+    session = MagicMock()
+    responses = iter(statuses)
+    def post(url, data=None, headers=None, timeout=None):
+        session.sent.append(dict(headers))
+        ctx = MagicMock()
+        ctx.__aenter__ = AsyncMock(return_value=MagicMock(status=next(responses)))
+        ctx.__aexit__ = AsyncMock(return_value=False)
+        return ctx
+    session.sent = []
+    session.post = post
+    return session
+
+@pytest.mark.asyncio
+async def test_seed_batch_only_drops_gzip_on_415():
+    sync = make_sync()
+    session = _session_answering(400)
+    sync._get_session = AsyncMock(return_value=session)
+    # A 400 is about the payload, not the encoding
+    assert not await sync.seed_batch({"1": {}}, retries=0)
+    assert sync._seed_gzip
+
+    session = _session_answering(415, 200)
+    sync._get_session = AsyncMock(return_value=session)
+    assert await sync.seed_batch({"1": {}}, retries=0)
+    assert not sync._seed_gzip
+    assert [h.get("Content-Encoding") for h in session.sent] == ["gzip", None]
+
+# BotMonitor Tests
+
+from utils.status import BotMonitor
+
+def make_guild(gid, shard_id=0, members=10, channels=3):
+    guild = MagicMock()
+    guild.id = gid
+    guild.shard_id = shard_id
+    guild.member_count = members
+    guild.channels = [MagicMock() for _ in range(channels)]
+    return guild
+
+def make_monitor(guilds, **kwargs):
+    bot = MagicMock()
+    bot.guilds = list(guilds)
+    bot.shards = {}
+    bot.latency = 0.05
+    bot.is_closed.return_value = False
+    monitor = BotMonitor(MagicMock(), bot, **kwargs)
+    monitor.rebuild()
+    return monitor
+
+@pytest.mark.asyncio
+async def test_monitor_incremental_aggregates():
+    """
+    Verify guild/member/channel aggregates follow events without a rescan.
+    """
+    monitor = make_monitor([make_guild(1), make_guild(2, shard_id=1)])
+    # Events must be served from the counters, not from bot.guilds
+    monitor.bot.guilds = []
+
+    await monitor._on_guild_join(make_guild(3, members=5, channels=2))
+    await monitor._on_channel_create(MagicMock())
+    await monitor._on_member_join(MagicMock())
+    await monitor._on_guild_remove(make_guild(2, shard_id=1))
+
+    assert monitor._guild_ids == {1, 3}
+    assert monitor._guilds_by_shard == {0: 2, 1: 0}
+    assert monitor._member_count == 10 + 5 + 1
+    assert monitor._channel_count == 3 + 2 + 1
+
+@pytest.mark.asyncio
+async def test_monitor_sends_guild_deltas_then_full_resync():
+    monitor = make_monitor([make_guild(1), make_guild(2)], full_sync_every=3)
+
+    # First payload is always a full list
+    payload = monitor._collect_all()
+    assert payload["guild_ids_mode"] == "full"
+    assert sorted(payload["guild_ids"]) == ["1", "2"]
+    monitor._ack(True)
+
+    new_guild = make_guild(3)
+    monitor.bot.guilds.append(new_guild)
+    await monitor._on_guild_join(new_guild)
+    payload = monitor._collect_all()
+    assert payload["guild_ids_mode"] == "delta"
+    assert payload["guild_ids_added"] == ["3"]
+    assert "guild_ids" not in payload
+    monitor._ack(True)
+
+    # Nothing changed: empty delta
+    payload = monitor._collect_all()
+    assert payload["guild_ids_added"] == [] and payload["guild_ids_removed"] == []
+    monitor._ack(True)
+
+    # Third tick since the last full one: full resync
+    payload = monitor._collect_all()
+    assert payload["guild_ids_mode"] == "full"
+    assert sorted(payload["guild_ids"]) == ["1", "2", "3"]
+
+@pytest.mark.asyncio
+async def test_monitor_failed_send_forces_full_resync():
+    monitor = make_monitor([make_guild(1)])
+    monitor._collect_all()
+    monitor._ack(True)
+
+    await monitor._on_guild_remove(make_guild(1))
+    monitor._collect_all()
+    monitor._ack(False)
+
+    payload = monitor._collect_all()
+    assert payload["guild_ids_mode"] == "full"
+
+def test_cluster_monitor_sends_its_own_guild_list():
+    monitor = make_monitor([make_guild(1), make_guild(2)], cluster_id=2)
+
+    payload = monitor._collect_all()
+    assert payload["cluster_id"] == 2
+    # Replaces this cluster's guilds only, the dashboard merges the clusters
+    assert payload["guild_ids_mode"] == "cluster"
+    assert sorted(payload["guild_ids"]) == ["1", "2"]
+    monitor._ack(True)
+
+    payload = monitor._collect_all()
+    assert payload["cluster_id"] == 2
+    assert payload["guild_ids_mode"] == "delta"
+
+def test_disabled_modules_follow_config_updates():
+    sync = make_sync()
+    sync._set_cache({"1": {"enabled_modules": {"logging": False, "utility": True}}})
+    assert sync.disabled_modules(1) == {"logging"}
+    assert sync.disabled_modules(2) == frozenset()
+
+    sync._set_guild(1, {"enabled_modules": {"logging": True, "stats": False}})
+    assert sync.disabled_modules(1) == {"stats"}
+
+    sync.maintenance_mode = True
+    assert sync.disabled_modules(1) == frozenset()
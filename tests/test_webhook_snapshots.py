@@ -0,0 +1,73 @@
+import asyncio
+import discord
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from database import queries
+from logging_modules.webhook_update import WebhookUpdate
+from utils.webhook_snapshots import WebhookSnapshotStore
+
+def _webhook(wid, name, channel_id=123):
+    wh = MagicMock()
+    wh.id, wh.name, wh.channel_id = wid, name, channel_id
+    wh.type = discord.WebhookType.channel_follower
+    wh.avatar = wh.user = None
+    wh.guild_id, wh.application_id = 1, None
+    return wh
+
+def _channel(guild, webhooks):
+    channel = MagicMock()
+    channel.id = 123
+    channel.guild = guild
+    channel.mention = "#logs"
+    channel.webhooks = AsyncMock(return_value=webhooks)
+    return channel
+
+@pytest.mark.asyncio
+async def test_snapshots_survive_a_restart(tmp_db, mocker, mock_guild):
+    store = lambda: WebhookSnapshotStore(queries.load_webhook_snapshots, queries.save_webhook_snapshots, queries.delete_webhook_snapshots)
+
+    first = WebhookUpdate(MagicMock())
+    first.snapshots = store()
+    mocker.patch.object(first, "log_event", new_callable=AsyncMock)
+    await first.on_webhooks_update(_channel(mock_guild, [_webhook(999, "deploys")]))
+
+    # New process: the existing webhook is the baseline, not a creation
+    second = WebhookUpdate(MagicMock())
+    second.snapshots = store()
+    mock_log = mocker.patch.object(second, "log_event", new_callable=AsyncMock)
+    await second.on_webhooks_update(_channel(mock_guild, [_webhook(999, "deploys")]))
+    mock_log.assert_not_called()
+
+    await second.on_webhooks_update(_channel(mock_guild, [_webhook(999, "deploys"), _webhook(1000, "sus-hook")]))
+    embed = mock_log.call_args[0][1]
+    assert "sus-hook" in embed.description and "deploys" not in embed.description
+
+    # A prefetched guild is complete: an unseen channel has no webhooks yet
+    reloaded = store()
+    await reloaded.replace_guild(2, {55: {1: {"name": "a"}}})
+    await reloaded.load()
+    assert reloaded.get(2, 55) == {1: {"name": "a"}} and reloaded.get(2, 56) == {}
+    assert reloaded.get(3, 1) is None
+
+@pytest.mark.asyncio
+async def test_event_burst_is_coalesced(mocker, mock_guild):
+    cog = WebhookUpdate(MagicMock())
+    cog.snapshots = WebhookSnapshotStore(AsyncMock(return_value=({}, {})), AsyncMock(), AsyncMock())
+    mocker.patch.object(cog, "log_event", new_callable=AsyncMock)
+
+    release = asyncio.Event()
+    async def slow_fetch():
+        await release.wait()
+        return [_webhook(999, "deploys")]
+    channel = _channel(mock_guild, [])
+    channel.webhooks = AsyncMock(side_effect=slow_fetch)
+
+    first = asyncio.create_task(cog.on_webhooks_update(channel))
+    await asyncio.sleep(0)
+    for _ in range(5):
+        await cog.on_webhooks_update(channel)
+    release.set()
+    await first
+    # One fetch for the first event, one follow-up for the five that arrived during it
+    assert channel.webhooks.await_count == 2
+    cog.log_event.assert_called_once()
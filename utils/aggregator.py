@@ -0,0 +1,143 @@
+# Event-storm aggregation
+# Some Discord actions arrive as a burst of per-object events: moving one
+# channel shifts the position of every channel below it, reordering roles
+# updates each role, a mass role grant updates each member and an emoji pack
+# upload adds emojis one by one. EventAggregator collects those per (guild,
+# kind, subkey) over a short window and hands the batch to a summarizer, so N
+# events become one embed instead of N.
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils.logger import get_logger
+from utils.memory import memory
+from utils.metrics import metrics
+
+log = get_logger()
+
+AGGREGATED_TOTAL = metrics.counter("storm_events_aggregated_total", "Events folded into a storm summary", ("kind",))
+SUMMARIES_TOTAL = metrics.counter("storm_summaries_total", "Storm summaries flushed", ("kind", "reason"))
+
+Summarizer = Callable[[int, List[Any]], Awaitable[None]]
+
+MAX_LISTED = 15 # Items a summary embed lists before "...and N more"
+
+def listed(items: List[str], sep: str = "\n", limit: int = MAX_LISTED) -> str:
+    """Joins the first `limit` items of a summary, noting how many were left out."""
+    shown = list(items[:limit])
+    if len(items) > limit:
+        shown.append(f"...and {len(items) - limit} more")
+    return sep.join(shown)
+
+@dataclass
+class StormSpec:
+    summarize: Summarizer # (guild_id, items) -> emits the summary
+    window: float = 2.0 # The storm ends after this long without events
+    max_items: int = 50 # Flush early once this many items are buffered
+    max_wait: float = 10.0 # ...or once the oldest buffered item is this old
+    leading: bool = False # Let the first event through as-is, aggregate only what follows
+
+@dataclass
+class _Storm:
+    last: float
+    opened: float = 0.0
+    items: List[Any] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+
+class EventAggregator:
+    MAX_IDLE_KEYS = 1000 # Leading-edge markers kept before expired ones are pruned
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self._specs: Dict[str, StormSpec] = {}
+        self._storms: Dict[Tuple[int, str, Hashable], _Storm] = {}
+        if name:
+            memory.register_cache(name, lambda: self._storms) # Listed by /debug memory
+
+    def register(self, kind: str, summarize: Summarizer, **options):
+        self._specs[kind] = StormSpec(summarize, **options)
+
+    def submit(self, guild_id: int, kind: str, item: Any, subkey: Hashable = None) -> bool:
+        """
+        Adds one event to its storm. Returns True if the caller should handle
+        this event itself (the leading event of a `leading` kind), False if it
+        was buffered for the summarizer.
+        """
+        spec = self._specs[kind]
+        key = (guild_id, kind, subkey)
+        now = time.monotonic()
+        storm = self._storms.get(key)
+
+        if storm and storm.task is None and now - storm.last >= spec.window:
+            storm = None # Leading-edge marker from a storm that already ended
+        if storm is None:
+            if len(self._storms) > self.MAX_IDLE_KEYS:
+                self._prune(now)
+            storm = self._storms[key] = _Storm(last=now)
+            if spec.leading:
+                return True
+
+        storm.last = now
+        if not storm.items:
+            storm.opened = now
+        storm.items.append(item)
+        AGGREGATED_TOTAL.inc(kind=kind)
+        if storm.task is None:
+            storm.task = asyncio.create_task(self._watch(key, storm, spec))
+        if len(storm.items) >= spec.max_items:
+            self._flush(key, storm, spec, "size")
+        return False
+
+    def _flush(self, key, storm: _Storm, spec: StormSpec, reason: str):
+        items, storm.items = storm.items, []
+        SUMMARIES_TOTAL.inc(kind=key[1], reason=reason)
+        asyncio.create_task(self._summarize(key, spec, items))
+
+    async def _summarize(self, key, spec: StormSpec, items: List[Any]):
+        try:
+            await spec.summarize(key[0], items)
+        except Exception as e:
+            log.error(f"Failed to summarize {len(items)} {key[1]} event(s) in guild {key[0]}", exc_info=e)
+
+    async def _watch(self, key, storm: _Storm, spec: StormSpec):
+        """Flushes when the storm goes quiet, and every max_wait while it keeps going."""
+        try:
+            while True:
+                await asyncio.sleep(spec.window / 2)
+                now = time.monotonic()
+                quiet = now - storm.last >= spec.window
+                if storm.items and (quiet or now - storm.opened >= spec.max_wait):
+                    self._flush(key, storm, spec, "quiet" if quiet else "age")
+                if quiet:
+                    if self._storms.get(key) is storm:
+                        del self._storms[key]
+                    return
+        except asyncio.CancelledError:
+            pass
+
+    def _prune(self, now: float):
+        for key, storm in list(self._storms.items()):
+            if storm.task is None and now - storm.last >= self._specs[key[1]].window:
+                del self._storms[key]
+
+    async def flush_all(self):
+        """Summarizes everything buffered right away (tests, shutdown)."""
+        pending = []
+        for key, storm in list(self._storms.items()):
+            if storm.task:
+                storm.task.cancel()
+            if storm.items:
+                items, storm.items = storm.items, []
+                pending.append(self._summarize(key, self._specs[key[1]], items))
+        self._storms.clear()
+        await asyncio.gather(*pending)
+
+    def stop(self):
+        for storm in self._storms.values():
+            if storm.task:
+                storm.task.cancel()
+        self._storms.clear()
+        if self.name:
+            memory.unregister_cache(self.name)
@@ -0,0 +1,249 @@
+# Deleted-message attachment archive (opt-in per guild, module "AttachmentArchive")
+# Discord's CDN links stop working soon after a message is deleted, so the
+# MessageDelete log used to point at files nobody could open anymore. For
+# guilds that opt in, attachments are downloaded when the message is posted:
+# MessageDelete.on_message only queues them, and a small pool of workers
+# downloads them on the shared http session, per-guild round-robin (FairQueue).
+# Files are stored once per SHA-256 (reposts and cross-posts share a blob).
+# References live in SQLite and are evicted by age and by a per-guild byte
+# quota; a blob is deleted once nothing references it. The delete log
+# re-uploads the archived files.
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from utils.fair_queue import FairQueue
+from utils.logger import get_logger
+from utils.memory import memory
+from utils.metrics import ARCHIVE_BYTES_TOTAL, ARCHIVE_FILES_TOTAL
+
+log = get_logger()
+
+@dataclass
+class ArchiveJob:
+    guild_id: int
+    message_id: int
+    attachment_id: int
+    url: str
+    filename: str
+    content_type: Optional[str]
+    size: int
+
+@dataclass
+class ArchivedFile:
+    path: str
+    filename: str
+    content_type: Optional[str]
+    size: int
+    sha256: str
+
+class AttachmentArchive:
+    EVICT_INTERVAL = 3600
+    DOWNLOAD_TIMEOUT = 60
+    CHUNK = 64 * 1024
+
+    def __init__(self):
+        self.root = "attachment_archive"
+        self.max_file_bytes = 8 * 1024 * 1024
+        self.guild_quota_bytes = 100 * 1024 * 1024
+        self.max_age = 7 * 86400
+        self.concurrency = 3
+        self._save: Optional[Callable[[list], Awaitable[Any]]] = None
+        self._lookup: Optional[Callable[[int], Awaitable[list]]] = None
+        self._usage: Optional[Callable[[int], Awaitable[int]]] = None
+        self._evict: Optional[Callable[..., Awaitable[List[str]]]] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._queue = FairQueue("attachment_archive", key=lambda job: job.guild_id,
+                                per_key_cap=50, max_size=1000, on_drop=self._dropped)
+        self._inflight: Dict[int, List] = {} # message_id -> [jobs left, Event set when done]
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def configure(self, *, save, lookup, usage, evict, root: Optional[str] = None, max_file_bytes: Optional[int] = None,
+                  guild_quota_bytes: Optional[int] = None, max_age: Optional[float] = None, concurrency: Optional[int] = None):
+        self._save, self._lookup, self._usage, self._evict = save, lookup, usage, evict
+        if root is not None:
+            self.root = root
+        if max_file_bytes is not None:
+            self.max_file_bytes = max_file_bytes
+        if guild_quota_bytes is not None:
+            self.guild_quota_bytes = guild_quota_bytes
+        if max_age is not None:
+            self.max_age = max_age
+        if concurrency is not None:
+            self.concurrency = concurrency
+
+    def start(self, session: aiohttp.ClientSession):
+        if self._tasks:
+            return
+        self._session = session
+        os.makedirs(self.root, exist_ok=True)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._evict_loop()))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def submit(self, guild_id: int, message_id: int, attachments: list) -> int:
+        """Queues a message's attachments for download. Never waits; returns how many were queued."""
+        if not self.running:
+            return 0
+        queued = 0
+        for a in attachments:
+            if a.size > self.max_file_bytes or a.size > self.guild_quota_bytes:
+                ARCHIVE_FILES_TOTAL.inc(outcome="too_large")
+                continue
+            self._queue.put_nowait(ArchiveJob(guild_id, message_id, a.id, a.url, a.filename, a.content_type, a.size))
+            queued += 1
+        if queued:
+            entry = self._inflight.setdefault(message_id, [0, asyncio.Event()])
+            entry[0] += queued
+        return queued
+
+    async def files_for(self, message_id: int, timeout: float = 0.0) -> List[ArchivedFile]:
+        """
+        Archived files of a message. If its downloads are still running, waits
+        for them up to `timeout` seconds.
+        """
+        if self._lookup is None:
+            return []
+        entry = self._inflight.get(message_id)
+        if entry and timeout > 0:
+            try:
+                await asyncio.wait_for(entry[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        files = []
+        for sha256, filename, content_type, size in await self._lookup(message_id):
+            path = self.path_for(sha256)
+            if os.path.exists(path):
+                files.append(ArchivedFile(path, filename, content_type, size, sha256))
+        return files
+
+    def _finish(self, job: ArchiveJob):
+        entry = self._inflight.get(job.message_id)
+        if entry is None:
+            return
+        entry[0] -= 1
+        if entry[0] <= 0:
+            entry[1].set()
+            del self._inflight[job.message_id]
+
+    def _dropped(self, guild_id: int, job: ArchiveJob):
+        ARCHIVE_FILES_TOTAL.inc(outcome="dropped")
+        self._finish(job)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                outcome = await self._archive(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"AttachmentArchive: Failed archiving {job.filename} from guild {job.guild_id}", exc_info=e)
+                outcome = "error"
+            finally:
+                self._queue.task_done()
+                self._finish(job)
+            ARCHIVE_FILES_TOTAL.inc(outcome=outcome)
+
+    async def _archive(self, job: ArchiveJob) -> str:
+        data = await self._download(job.url)
+        if data is None:
+            return "failed"
+        if len(data) > self.max_file_bytes:
+            return "too_large"
+
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path_for(sha256)
+        stored = await asyncio.to_thread(self._write_blob, path, data)
+        await self._save([job.guild_id, job.message_id, job.attachment_id, sha256, job.filename, job.content_type, len(data), time.time()])
+        if stored:
+            ARCHIVE_BYTES_TOTAL.inc(len(data))
+
+        if await self._usage(job.guild_id) > self.guild_quota_bytes:
+            await self._remove_blobs(await self._evict(0, self.guild_quota_bytes, job.guild_id))
+        return "archived" if stored else "deduplicated"
+
+    async def _download(self, url: str) -> Optional[bytes]:
+        """Body of url, or None if it fails or grows past max_file_bytes."""
+        timeout = aiohttp.ClientTimeout(total=self.DOWNLOAD_TIMEOUT)
+        async with self._session.get(url, timeout=timeout) as resp:
+            if resp.status != 200:
+                return None
+            if (resp.content_length or 0) > self.max_file_bytes:
+                return None
+            chunks, size = [], 0
+            async for chunk in resp.content.iter_chunked(self.CHUNK):
+                size += len(chunk)
+                if size > self.max_file_bytes:
+                    return None # Lied about (or didn't send) its length
+                chunks.append(chunk)
+            return b"".join(chunks)
+
+    @staticmethod
+    def _write_blob(path: str, data: bytes) -> bool:
+        """
+        Writes a blob unless it already exists. Returns whether it was written.
+        Workers can race on the same bytes (a re-post), so each writes its own
+        temp file, and the loser of the rename counts as a duplicate.
+        """
+        if os.path.exists(path):
+            return False
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            if os.path.exists(path):
+                return False # Another worker stored it meanwhile
+            os.replace(tmp, path)
+            return True
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    async def _remove_blobs(self, hashes: List[str]):
+        def remove():
+            for sha256 in hashes:
+                try:
+                    os.remove(self.path_for(sha256))
+                except FileNotFoundError:
+                    pass
+        if hashes:
+            await asyncio.to_thread(remove)
+            ARCHIVE_FILES_TOTAL.inc(len(hashes), outcome="evicted")
+
+    async def evict(self):
+        """Drops references past max_age and over each guild's quota, then unreferenced blobs."""
+        await self._remove_blobs(await self._evict(time.time() - self.max_age, self.guild_quota_bytes))
+
+    async def _evict_loop(self):
+        while True:
+            try:
+                await self.evict()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error("AttachmentArchive: Eviction failed", exc_info=e)
+            await asyncio.sleep(self.EVICT_INTERVAL)
+
+attachment_archive = AttachmentArchive()
+memory.register_cache("attachment_archive.queue", lambda: attachment_archive._queue)
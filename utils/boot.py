@@ -0,0 +1,101 @@
+# Startup helpers: per-phase boot timeline, command tree fingerprinting and
+# the command -> dashboard module map.
+# Used by Chromium.setup_hook to skip redundant tree.sync() calls, to log
+# where boot time actually goes and to resolve which dashboard modules gate
+# each slash command once instead of on every interaction.
+
+import hashlib
+import json
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from discord import app_commands
+
+class BootTimeline:
+    """Records how long each named startup phase took, in order."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float, Optional[str]]] = []
+
+    @asynccontextmanager
+    async def phase(self, name: str):
+        start = time.perf_counter()
+        status = None
+        try:
+            yield
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            self.phases.append((name, time.perf_counter() - start, status))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def render(self) -> str:
+        lines = [f"Boot timeline ({self.elapsed():.2f}s total):"]
+        for name, seconds, status in self.phases:
+            suffix = f" [{status}]" if status else ""
+            lines.append(f"  {name:<24}{seconds * 1000:>9.0f}ms{suffix}")
+        return "\n".join(lines)
+
+def command_tree_fingerprint(tree: app_commands.CommandTree) -> str:
+    """
+    Stable hash of the global command payload tree.sync() would upload.
+    Any change to names, descriptions, options, permissions or context menus changes it.
+    """
+    payload = []
+    for command in tree.get_commands():
+        try:
+            payload.append(command.to_dict(tree))
+        except TypeError: # discord.py < 2.4: to_dict() takes no tree
+            payload.append(command.to_dict())
+    payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+# Dashboard module keys that also gate a command group or cog
+MODULE_ALIASES = {
+    "setup": "utility",
+    "log_management": "logging",
+    "list": "logging",
+    "export": "logging",
+}
+_CAMEL_BOUNDARY = re.compile(r"(?<!^)(?=[A-Z])")
+_COG_SUFFIXES = ("commands", "cog", "commandsgroup", "logger")
+
+def command_modules(command) -> Tuple[str, ...]:
+    """
+    Dashboard module keys that gate a command, in the order they're checked:
+    its root group, its cog (snake_case, minus suffixes like "Commands"), and
+    their MODULE_ALIASES.
+    """
+    names = []
+    root = getattr(command, "root_parent", None)
+    if root is not None:
+        names.append(root.name.lower())
+    binding = getattr(command, "binding", None)
+    if binding is not None:
+        normalized = _CAMEL_BOUNDARY.sub("_", binding.__class__.__name__).lower()
+        for suffix in _COG_SUFFIXES:
+            if normalized.endswith("_" + suffix):
+                normalized = normalized[:-len(suffix) - 1]
+            elif normalized.endswith(suffix) and len(normalized) > len(suffix):
+                normalized = normalized[:-len(suffix)]
+        names.append(normalized)
+
+    modules = []
+    for name in names:
+        modules.append(name)
+        if name in MODULE_ALIASES:
+            modules.append(MODULE_ALIASES[name])
+    return tuple(dict.fromkeys(modules))
+
+def command_module_map(tree: app_commands.CommandTree) -> Dict[str, Tuple[str, ...]]:
+    """qualified_name -> command_modules() for every slash command in the tree."""
+    return {
+        command.qualified_name: command_modules(command)
+        for command in tree.walk_commands()
+        if isinstance(command, app_commands.Command)
+    }
@@ -1,6 +1,7 @@
 import discord
 from datetime import datetime, timezone
 from typing import Optional
+from utils.profiler import profiler
 
 MAX_TITLE = 256
 MAX_DESC = 4096
@@ -74,30 +75,31 @@ class EmbedBuilder:
         fields: Optional[list] = None
     ) -> discord.Embed:
 
-        embed = discord.Embed(
-            title=clamp(title, MAX_TITLE),
-            description=clamp(description, MAX_DESC),
-            color=color,
-            timestamp=datetime.now(timezone.utc)
-        )
-
-        if author:
-            embed.set_author(
-                name=clamp(f"{author.name} ({author.id})", MAX_TITLE),
-                icon_url=author.display_avatar.url
+        with profiler.phase("embed"):
+            embed = discord.Embed(
+                title=clamp(title, MAX_TITLE),
+                description=clamp(description, MAX_DESC),
+                color=color,
+                timestamp=datetime.now(timezone.utc)
             )
 
-        embed.set_footer(text=clamp(footer, MAX_FOOTER))
-
-        if fields:
-            for name, value, inline in fields:
-                embed.add_field(
-                    name=clamp(str(name), MAX_FIELD_NAME),
-                    value=clamp(str(value), MAX_FIELD_VALUE),
-                    inline=inline
+            if author:
+                embed.set_author(
+                    name=clamp(f"{author.name} ({author.id})", MAX_TITLE),
+                    icon_url=author.display_avatar.url
                 )
 
-        return embed
+            embed.set_footer(text=clamp(footer, MAX_FOOTER))
+
+            if fields:
+                for name, value, inline in fields:
+                    embed.add_field(
+                        name=clamp(str(name), MAX_FIELD_NAME),
+                        value=clamp(str(value), MAX_FIELD_VALUE),
+                        inline=inline
+                    )
+
+            return embed
 
     @staticmethod
     def success(title: str, description: str, **kwargs) -> discord.Embed:
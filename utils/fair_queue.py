@@ -0,0 +1,250 @@
+# Per-guild fair queuing
+# A raided guild can produce thousands of logs a minute. In a single FIFO,
+# every other guild's logs wait behind (or get evicted by) that backlog.
+# FairQueue keeps one sub-queue per key (guild) and serves them by deficit
+# round-robin, so a quiet guild's next item is at most one round away no
+# matter how deep a noisy guild's sub-queue is. Caps apply per key first;
+# when the whole queue is full, the longest sub-queue gives up its oldest
+# item. Evictions are counted per key.
+#
+# FairScheduler builds on it to admit a bounded number of concurrent holders
+# (e.g. in-flight Discord sends), handing free slots to waiters in the same
+# fair order and limiting how many slots one key can hold at once.
+
+import asyncio
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+from utils.metrics import FAIR_QUEUE_DROPPED_TOTAL
+
+class QueueOverflow(Exception):
+    """Raised to a FairScheduler waiter that was evicted by a cap."""
+
+class FairQueue:
+    """
+    The asyncio.Queue subset the repo uses (put_nowait, get, get_nowait, qsize,
+    empty, task_done, join), with one sub-queue per key(item) served by deficit
+    round-robin. Each turn a key gets quantum * weight(key) credit and is served
+    while its head item's cost fits.
+    """
+    def __init__(
+        self,
+        name: str,
+        key: Callable[[Any], Hashable],
+        *,
+        per_key_cap: Optional[int] = None,
+        max_size: Optional[int] = None,
+        quantum: float = 1.0,
+        weight: Optional[Callable[[Hashable], float]] = None,
+        cost: Optional[Callable[[Any], float]] = None,
+        on_drop: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.name = name
+        self.key = key
+        self.per_key_cap = per_key_cap
+        self.max_size = max_size
+        self.quantum = quantum
+        self.weight = weight or (lambda _: 1.0)
+        self.cost = cost or (lambda _: 1.0)
+        self.on_drop = on_drop
+        self.overflow: Counter = Counter() # key -> items evicted
+        self._queues: Dict[Hashable, Deque[Any]] = {}
+        self._active: Deque[Hashable] = deque() # Round-robin order of non-empty keys
+        self._deficit: Dict[Hashable, float] = {}
+        self._in_turn = False # Whether _active[0] already got its quantum this turn
+        self._size = 0
+        self._getters: Deque[asyncio.Future] = deque()
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def key_size(self, key: Hashable) -> int:
+        queue = self._queues.get(key)
+        return len(queue) if queue else 0
+
+    def put_nowait(self, item: Any) -> bool:
+        """Queues item. Returns False if an older item had to be evicted to make room."""
+        key = self.key(item)
+        evicted = True
+        if self.per_key_cap is not None and self.key_size(key) >= self.per_key_cap:
+            self._evict(key, "key_cap")
+        elif self.max_size is not None and self._size >= self.max_size:
+            self._evict(max(self._queues, key=lambda k: len(self._queues[k])), "full")
+        else:
+            evicted = False
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._active.append(key)
+            self._deficit[key] = 0.0
+        queue.append(item)
+        self._size += 1
+        self._unfinished += 1
+        self._finished.clear()
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
+        return not evicted
+
+    def get_nowait(self, eligible: Optional[Callable[[Hashable], bool]] = None) -> Any:
+        """
+        Next item in fair order. Keys for which eligible(key) is False are passed
+        over this round. Raises asyncio.QueueEmpty if nothing is eligible.
+        """
+        blocked = 0
+        while blocked < len(self._active):
+            key = self._active[0]
+            if eligible is not None and not eligible(key):
+                blocked += 1
+                self._end_turn()
+                continue
+            blocked = 0
+            if not self._in_turn:
+                self._deficit[key] += self.quantum * max(self.weight(key), 0.01)
+                self._in_turn = True
+            queue = self._queues[key]
+            cost = self.cost(queue[0])
+            if self._deficit[key] >= cost:
+                item = queue.popleft()
+                self._deficit[key] -= cost
+                self._size -= 1
+                if not queue:
+                    self._retire(key)
+                return item
+            self._end_turn()
+        raise asyncio.QueueEmpty
+
+    async def get(self) -> Any:
+        while not self._size:
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except asyncio.CancelledError:
+                getter.cancel()
+                raise
+        return self.get_nowait()
+
+    def task_done(self):
+        if self._unfinished <= 0:
+            raise ValueError("task_done() called too many times")
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
+
+    def _end_turn(self):
+        self._active.rotate(-1)
+        self._in_turn = False
+
+    def _retire(self, key: Hashable):
+        """Forgets an emptied key (DRR drops the credit of idle flows)."""
+        if self._active and self._active[0] == key:
+            self._active.popleft()
+            self._in_turn = False
+        else:
+            self._active.remove(key)
+        del self._queues[key], self._deficit[key]
+
+    def _evict(self, key: Hashable, reason: str):
+        queue = self._queues[key]
+        item = queue.popleft()
+        self._size -= 1
+        if not queue:
+            self._retire(key)
+        self.overflow[key] += 1
+        FAIR_QUEUE_DROPPED_TOTAL.inc(queue=self.name, reason=reason)
+        self.task_done()
+        if self.on_drop:
+            self.on_drop(key, item)
+
+class FairScheduler:
+    """
+    At most `concurrency` holders at once, at most `per_key_active` of them for
+    one key. Waiters get free slots in FairQueue order; a waiter evicted by a
+    cap gets QueueOverflow instead of a slot.
+    """
+    def __init__(self, name: str, concurrency: int, *, per_key_active: Optional[int] = None,
+                 per_key_cap: Optional[int] = None, max_waiting: Optional[int] = None):
+        self.concurrency = concurrency
+        self.per_key_active = per_key_active or concurrency
+        self._free = concurrency
+        self._holders: Counter = Counter()
+        self._waiting = FairQueue(name, key=lambda waiter: waiter[0], per_key_cap=per_key_cap,
+                                  max_size=max_waiting, on_drop=self._reject)
+
+    @property
+    def overflow(self) -> Counter:
+        return self._waiting.overflow
+
+    def waiting(self) -> int:
+        return self._waiting.qsize()
+
+    def in_flight(self) -> int:
+        return self.concurrency - self._free
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable):
+        if self._free and self._waiting.empty() and self._eligible(key):
+            self._take(key)
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiting.put_nowait((key, waiter))
+            self._dispatch()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release(key) # Granted just as we were cancelled
+                raise
+        try:
+            yield
+        finally:
+            self._release(key)
+
+    def _eligible(self, key: Hashable) -> bool:
+        return self._holders[key] < self.per_key_active
+
+    def _take(self, key: Hashable):
+        self._free -= 1
+        self._holders[key] += 1
+
+    def _release(self, key: Hashable):
+        self._free += 1
+        self._holders[key] -= 1
+        if self._holders[key] <= 0:
+            del self._holders[key]
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._free:
+            try:
+                key, waiter = self._waiting.get_nowait(self._eligible)
+            except asyncio.QueueEmpty:
+                return
+            self._waiting.task_done()
+            if waiter.done():
+                continue # Cancelled while waiting
+            self._take(key)
+            waiter.set_result(None)
+
+    @staticmethod
+    def _reject(key: Hashable, waiter):
+        _, future = waiter
+        if not future.done():
+            future.set_exception(QueueOverflow(f"Too many waiters for {key}"))
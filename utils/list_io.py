@@ -0,0 +1,116 @@
+# Blacklist/whitelist import & export file formats
+# Imports accept whatever other bots tend to export: one ID per line, mentions,
+# comma/space separated IDs, or a CSV with optional type and name columns
+# (header row optional). Exports are CSV in the same shape, so they round-trip.
+
+import csv
+import io
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+ENTITY_TYPES = ("user", "role", "channel")
+EXPORT_HEADER = ["entity_type", "entity_id", "entity_name", "added_at"]
+MAX_IMPORT_ROWS = 10000
+MAX_IMPORT_BYTES = 2 * 1024 * 1024
+
+_SNOWFLAKE = re.compile(r"^(?:<(?P<kind>@!?|@&|#))?(?P<id>\d{15,21})>?$")
+_MENTION_TYPES = {"@": "user", "@!": "user", "@&": "role", "#": "channel"}
+_TYPE_ALIASES = {"member": "user", "users": "user", "roles": "role", "channels": "channel"}
+
+class ImportRow(NamedTuple):
+    line: int
+    raw: str
+    entity_id: Optional[int]
+    entity_type: Optional[str] # Hint from the file (column or mention form), if any
+    entity_name: Optional[str]
+    error: Optional[str] = None
+
+def _parse_type(cell: str) -> Optional[str]:
+    cell = cell.strip().lower()
+    cell = _TYPE_ALIASES.get(cell, cell)
+    return cell if cell in ENTITY_TYPES else None
+
+_HEADER_COLUMNS = {
+    "id": ("entity_id", "id", "user_id", "role_id", "channel_id"),
+    "type": ("entity_type", "type", "kind"),
+    "name": ("entity_name", "name", "username"),
+}
+
+def parse_import(text: str) -> List[ImportRow]:
+    """
+    One ImportRow per entity found. With a header row naming the columns (our
+    own export, for one) cells are read by column. Otherwise a row's first
+    snowflake (or mention) cell is the ID, a user/role/channel cell is the type
+    hint and the first other text cell is the name. Lines of whitespace
+    separated IDs yield one row per ID.
+    """
+    rows: List[ImportRow] = []
+    columns = None
+    for line_no, cells in enumerate(csv.reader(io.StringIO(text)), start=1):
+        cells = [c.strip() for c in cells]
+        if not any(cells):
+            continue
+        raw = ",".join(c for c in cells if c)
+
+        if line_no == 1 and not any(ch.isdigit() for ch in raw):
+            header = [c.lower() for c in cells]
+            columns = {
+                key: next((header.index(n) for n in names if n in header), None)
+                for key, names in _HEADER_COLUMNS.items()
+            }
+            if columns["id"] is None:
+                columns = None
+            continue # Header row names its columns, it never holds an ID
+
+        if columns:
+            pick = lambda key: cells[columns[key]] if columns[key] is not None and columns[key] < len(cells) else ""
+            if _SNOWFLAKE.match(pick("id")):
+                rows.append(_row_from_cells(line_no, raw, [c for c in (pick("id"), pick("type"), pick("name")) if c]))
+                continue
+            # Row doesn't follow the header, fall back to guessing
+
+        cells = [c for c in cells if c]
+        # "123 456 789" or "<@1> <@2>" on one line
+        if len(cells) == 1 and " " in cells[0]:
+            parts = cells[0].split()
+            if all(_SNOWFLAKE.match(p) for p in parts):
+                for part in parts:
+                    rows.append(_row_from_cells(line_no, part, [part]))
+                continue
+
+        rows.append(_row_from_cells(line_no, raw, cells))
+    return rows
+
+def _row_from_cells(line_no: int, raw: str, cells: List[str]) -> ImportRow:
+    entity_id = entity_type = entity_name = None
+    for cell in cells:
+        match = _SNOWFLAKE.match(cell)
+        if match and entity_id is None:
+            entity_id = int(match.group("id"))
+            if match.group("kind"):
+                entity_type = _MENTION_TYPES[match.group("kind")]
+        elif entity_type is None and _parse_type(cell):
+            entity_type = _parse_type(cell)
+        elif entity_name is None and not cell.isdigit():
+            entity_name = cell[:100]
+
+    if entity_id is None:
+        return ImportRow(line_no, raw, None, entity_type, entity_name, "no valid ID")
+    return ImportRow(line_no, raw, entity_id, entity_type, entity_name)
+
+def export_csv(items: Iterable) -> str:
+    """CSV of server_lists rows (mappings with entity_type/entity_id/entity_name/added_at)."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_HEADER)
+    for item in items:
+        writer.writerow([item["entity_type"], item["entity_id"], item["entity_name"] or "", item["added_at"] or ""])
+    return out.getvalue()
+
+def report_csv(results: Iterable[tuple]) -> str:
+    """Per-row import report: (line, input, status, detail) tuples."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["line", "input", "status", "detail"])
+    writer.writerows(results)
+    return out.getvalue()
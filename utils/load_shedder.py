@@ -0,0 +1,205 @@
+# Adaptive load shedding for log delivery
+# During a raid every module competes for the same Discord sends, so bans and
+# permission escalations end up as far behind as voice joins. Each module has
+# a priority class. LoadShedder follows delivery lag (event creation to
+# successful send) and, while it is high, first samples and then digests the
+# low classes. Skipped events are tallied per guild and module, and every
+# module posts one summary of what it skipped once the lag recedes.
+#
+#   level 0  below sample_lag   everything is delivered
+#   level 1  sample_lag         LOW is sampled (1 in SAMPLE_EVERY)
+#   level 2  digest_lag         LOW is digested (summary only), NORMAL is sampled
+#
+# CRITICAL and HIGH are never shed. Suspicious events count as CRITICAL.
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+from utils.logger import get_logger
+from utils.metrics import LOGS_SHED_TOTAL, SHED_LEVEL, metrics
+
+log = get_logger()
+
+class Priority(IntEnum):
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+# Modules not listed here are NORMAL. Overridable with LOG_PRIORITIES.
+DEFAULT_PRIORITIES: Dict[str, Priority] = {
+    "MemberBan": Priority.CRITICAL,
+    "MemberKick": Priority.CRITICAL,
+    "ChannelPermissionUpdate": Priority.HIGH,
+    "RoleUpdate": Priority.HIGH,
+    "WebhookUpdate": Priority.HIGH,
+    "TimeoutUpdate": Priority.HIGH,
+    "GuildUpdate": Priority.HIGH,
+    "VoiceState": Priority.LOW,
+    "ThreadsUpdate": Priority.LOW,
+    "NicknameUpdate": Priority.LOW,
+    "EmojiUpdate": Priority.LOW,
+    "InviteUpdate": Priority.LOW,
+}
+
+@dataclass
+class ShedTally:
+    sampled: int = 0 # Dropped while the module was being sampled
+    digested: int = 0 # Dropped while the module was being digested
+    titles: Counter = field(default_factory=Counter) # What was dropped, by embed title
+    peak_lag: float = 0.0 # Worst lag of the episode, filled in when reported
+
+    @property
+    def total(self) -> int:
+        return self.sampled + self.digested
+
+Reporter = Callable[[int, ShedTally], Awaitable[None]]
+
+class LoadShedder:
+    SAMPLE_EVERY = 5 # Sampling keeps one event in this many, per guild and module
+    QUIET_AFTER = 10.0 # Seconds without a delivery after which the lag counts as gone
+    ALPHA = 0.3 # Smoothing of the lag average
+    MAX_TITLES = 10 # Distinct titles kept per digest, the rest are counted as "Other"
+
+    def __init__(self, sample_lag: float = 5.0, digest_lag: float = 20.0):
+        self.enabled = True
+        self.sample_lag = sample_lag
+        self.digest_lag = digest_lag
+        self.priorities: Dict[str, Priority] = dict(DEFAULT_PRIORITIES)
+        self.level = 0
+        self.lag = 0.0
+        self.peak_lag = 0.0
+        self._last_observed = 0.0
+        self._seen: Dict[Tuple[int, str], int] = {}
+        self._tallies: Dict[int, Dict[str, ShedTally]] = {}
+        self._reporters: Dict[str, Reporter] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+    def configure(self, priorities: Optional[Mapping[str, str]] = None, sample_lag: Optional[float] = None,
+                  digest_lag: Optional[float] = None, enabled: Optional[bool] = None):
+        for module_name, name in (priorities or {}).items():
+            try:
+                self.priorities[module_name] = Priority[name.upper()]
+            except KeyError:
+                log.warning(f"LoadShedder: Unknown priority '{name}' for {module_name}, keeping {self.priority(module_name).name.lower()}")
+        if sample_lag is not None:
+            self.sample_lag = sample_lag
+        if digest_lag is not None:
+            self.digest_lag = max(digest_lag, self.sample_lag)
+        if enabled is not None:
+            self.enabled = enabled
+
+    def priority(self, module_name: str, suspicious: bool = False) -> Priority:
+        if suspicious:
+            return Priority.CRITICAL
+        return self.priorities.get(module_name, Priority.NORMAL)
+
+    def register_reporter(self, module_name: str, reporter: Reporter):
+        """reporter(guild_id, tally) posts the module's summary once the load recedes."""
+        self._reporters[module_name] = reporter
+
+    def observe(self, lag: float):
+        """Feeds the delivery lag (seconds) of one successful send."""
+        now = time.monotonic()
+        if now - self._last_observed >= self.QUIET_AFTER:
+            self.lag = lag # Start over instead of averaging with a stale value
+        else:
+            self.lag += self.ALPHA * (lag - self.lag)
+        self._last_observed = now
+        self._update_level(now)
+
+    def admit(self, guild_id: int, module_name: str, priority: Priority, title: str = "") -> bool:
+        """True if the event should be delivered, False if it was shed (and tallied)."""
+        if not self.enabled or priority <= Priority.HIGH:
+            return True
+        self._update_level(time.monotonic())
+        if self.level == 0:
+            return True
+
+        if priority == Priority.LOW and self.level >= 2:
+            mode = "digested"
+        elif priority == Priority.LOW or self.level >= 2:
+            key = (guild_id, module_name)
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+            if seen % self.SAMPLE_EVERY == 0:
+                return True
+            mode = "sampled"
+        else:
+            return True
+
+        tally = self._tallies.setdefault(guild_id, {}).setdefault(module_name, ShedTally())
+        setattr(tally, mode, getattr(tally, mode) + 1)
+        title = title or "Other"
+        if title not in tally.titles and len(tally.titles) >= self.MAX_TITLES:
+            title = "Other"
+        tally.titles[title] += 1
+        LOGS_SHED_TOTAL.inc(module=module_name, mode=mode)
+        return False
+
+    def _target_level(self, lag: float, scale: float = 1.0) -> int:
+        if lag >= self.digest_lag * scale:
+            return 2
+        if lag >= self.sample_lag * scale:
+            return 1
+        return 0
+
+    def _update_level(self, now: float):
+        lag = self.lag if now - self._last_observed < self.QUIET_AFTER else 0.0
+        up = self._target_level(lag)
+        # Only step down once the lag is well under the threshold, so the level doesn't flap
+        level = up if up >= self.level else max(up, min(self.level, self._target_level(lag, 0.5)))
+        if level == self.level:
+            if level:
+                self.peak_lag = max(self.peak_lag, lag)
+            return
+
+        if level > self.level:
+            log.warning(f"LoadShedder: Delivery lag {lag:.1f}s, shedding level {self.level} -> {level}")
+        else:
+            log.info(f"LoadShedder: Delivery lag {lag:.1f}s, shedding level {self.level} -> {level}")
+        self.level = level
+        SHED_LEVEL.set(level)
+        if level:
+            self.peak_lag = max(self.peak_lag, lag)
+            if self._watcher is None or self._watcher.done():
+                self._watcher = asyncio.create_task(self._watch())
+        else:
+            self._seen.clear()
+            if self._tallies:
+                asyncio.create_task(self.report())
+
+    async def _watch(self):
+        """Re-checks the level while shedding, so the lag recedes even if traffic stops."""
+        try:
+            while self.level:
+                await asyncio.sleep(1.0)
+                self._update_level(time.monotonic())
+        except asyncio.CancelledError:
+            pass
+
+    async def report(self):
+        """Hands each (guild, module) tally to the module's reporter and resets the episode."""
+        tallies, self._tallies = self._tallies, {}
+        peak, self.peak_lag = self.peak_lag, 0.0
+        for guild_id, modules in tallies.items():
+            for module_name, tally in modules.items():
+                tally.peak_lag = peak
+                reporter = self._reporters.get(module_name)
+                if reporter is None:
+                    continue
+                try:
+                    await reporter(guild_id, tally)
+                except Exception as e:
+                    log.error(f"LoadShedder: Failed to report {tally.total} shed {module_name} event(s) in guild {guild_id}", exc_info=e)
+
+    def stop(self):
+        if self._watcher:
+            self._watcher.cancel()
+
+load_shedder = LoadShedder()
+metrics.gauge("shed_delivery_lag_seconds", "Smoothed delivery lag the load shedder acts on", fn=lambda: load_shedder.lag)
@@ -0,0 +1,127 @@
+# Compact log event records
+# Logging modules describe an event as a LogRecord: a few slots holding the
+# text, severity and related objects. Nothing Discord-specific is built until
+# the delivery path has decided the event is enabled and routed: to_embed()
+# renders it for sending and to_log_content() gives the row stored in `logs`.
+
+import time
+from datetime import datetime, timezone
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+import discord
+
+from utils.embed_builder import EmbedBuilder, clamp, MAX_DESC, MAX_FIELD_VALUE
+
+SEVERITY_COLORS = {
+    "info": discord.Color.blue(),
+    "success": discord.Color.green(),
+    "error": discord.Color.red(),
+    "warning": discord.Color.gold(),
+    "notice": discord.Color.blurple(),
+}
+
+class Field(NamedTuple):
+    name: Any
+    value: Any
+    inline: bool = True
+
+class LogRecord:
+    __slots__ = (
+        "type", "title", "description", "severity", "actor",
+        "fields", "footer", "thumbnail", "image", "color", "created_at", "files",
+    )
+
+    def __init__(
+        self,
+        title: str,
+        description: str,
+        severity: str = "info",
+        *,
+        actor: Optional[discord.abc.User] = None,
+        fields: Optional[list] = None,
+        footer: Optional[str] = None,
+        color: Optional[discord.Color] = None,
+    ):
+        self.type: Optional[str] = None # Module name, set by BaseLogger.log_event
+        self.title = title
+        self.description = description
+        self.severity = severity
+        self.actor = actor # Rendered as the embed author
+        self.fields: List[Field] = [Field(*f) for f in fields] if fields else []
+        self.footer = footer
+        self.thumbnail: Optional[str] = None
+        self.image: Optional[str] = None
+        self.color = color # Explicit override of the severity color
+        self.created_at = time.time()
+        self.files: List[Tuple[str, str]] = [] # (path, filename) uploaded with the embed
+
+    # Same call shapes as EmbedBuilder, so modules describe events the way they always have
+    @classmethod
+    def build(cls, *, title: str, description: str, color: Optional[discord.Color] = None, author=None, footer: Optional[str] = None, fields: Optional[list] = None):
+        return cls(title, description, actor=author, footer=footer, fields=fields, color=color)
+
+    @classmethod
+    def success(cls, title: str, description: str, author=None, **kwargs):
+        return cls(title, description, "success", actor=author, **kwargs)
+
+    @classmethod
+    def error(cls, title: str, description: str, author=None, **kwargs):
+        return cls(title, description, "error", actor=author, **kwargs)
+
+    @classmethod
+    def warning(cls, title: str, description: str, author=None, **kwargs):
+        return cls(title, description, "warning", actor=author, **kwargs)
+
+    @classmethod
+    def info(cls, title: str, description: str, author=None, **kwargs):
+        return cls(title, description, "notice", actor=author, **kwargs)
+
+    # discord.Embed-compatible setters used by modules that add detail after the fact
+    def add_field(self, *, name: Any, value: Any, inline: bool = True):
+        self.fields.append(Field(name, value, inline))
+        return self
+
+    def set_thumbnail(self, *, url: Optional[str]):
+        self.thumbnail = url
+        return self
+
+    def set_image(self, *, url: Optional[str]):
+        self.image = url
+        return self
+
+    def attach_file(self, path: str, filename: str):
+        """Uploads a local file with the embed (reference it as attachment://filename)."""
+        self.files.append((path, filename))
+        return self
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at, timezone.utc)
+
+    def _title(self, suspicious: bool) -> str:
+        return f"⚠️ Suspicious Activity: {self.title}" if suspicious else self.title
+
+    def to_embed(self, suspicious: bool = False) -> discord.Embed:
+        title = self._title(suspicious)
+        color = discord.Color.dark_red() if suspicious else self.color or SEVERITY_COLORS.get(self.severity, SEVERITY_COLORS["info"])
+        kwargs = {"footer": self.footer} if self.footer else {}
+        embed = EmbedBuilder.build(
+            title=title, description=self.description, color=color,
+            author=self.actor, fields=self.fields, **kwargs
+        )
+        embed.timestamp = self.timestamp # When it happened, not when it was rendered
+        if self.thumbnail:
+            embed.set_thumbnail(url=self.thumbnail)
+        if self.image:
+            embed.set_image(url=self.image)
+        return embed
+
+    def to_log_content(self, suspicious: bool = False) -> str:
+        """Row text for `logs.content` (same shape the flattened embeds used to have)."""
+        content = f"{self._title(suspicious)}: {clamp(self.description, MAX_DESC)}"
+        if self.fields:
+            content += " | " + " | ".join(f"{f.name}: {clamp(str(f.value), MAX_FIELD_VALUE)}" for f in self.fields)
+        return content
+
+    def __repr__(self) -> str:
+        return f"<LogRecord type={self.type} severity={self.severity} title={self.title!r}>"
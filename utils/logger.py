@@ -1,8 +1,12 @@
+import atexit
+import functools
+import json
 import logging
+import logging.handlers
+import queue
 import sys
 import os
-import inspect
-from datetime import datetime
+from datetime import datetime, timezone
 from config import shared_config, Environment
 
 # custom log levels
@@ -27,6 +31,20 @@ logging.addLevelName(NETWORK_LEVEL, "NETWORK")
 logging.addLevelName(DISCORD_LEVEL, "DISCORD")
 logging.addLevelName(TRACE_LEVEL, "TRACE")
 
+# Resolved once: the bot never chdir()s, and getcwd() per record adds up
+_CWD = os.getcwd()
+
+@functools.lru_cache(maxsize=1024)
+def module_name_from_path(pathname: str) -> str:
+    """'/app/logging_modules/base.py' -> 'logging_modules.base' (memoized, pathnames repeat constantly)."""
+    module_path = pathname.replace(_CWD, "").lstrip(os.sep)
+    module_parts = module_path.split(os.sep)
+    
+    if len(module_parts) > 1:
+        module_parts[-1] = os.path.splitext(module_parts[-1])[0]
+    
+    return ".".join(p for p in module_parts if p and p != "__init__")
+
 class ColoredFormatter(logging.Formatter):
     COLORS = {
         TRACE_LEVEL: "\033[90m",                    # gray
@@ -55,21 +73,8 @@ class ColoredFormatter(logging.Formatter):
             # Show full timestamp for local debugging
             time_str = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')
 
-        # Auto-context: simplify module path
-        # If the logger name is set (via get_logger), usually we trust it?
-        # But if we want to enforce the file-path logic regardless:
-        module_path = record.pathname.replace(os.getcwd(), "").lstrip(os.sep)
-        module_parts = module_path.split(os.sep)
-        
-        if len(module_parts) > 1:
-            module_parts[-1] = os.path.splitext(module_parts[-1])[0]
-        
-        module_name = ".".join(p for p in module_parts if p and p != "__init__")
-        
-        # In Flurazide, get_logger sets the logger name. 
-        # The formatter here uses the pathname to derive context dynamically. 
-        # Ideally, we primarily use the logger name if it's meaningful, but the path fallback is robust.
-        # Let's stick to the path fallback for consistency.
+        # Auto-context: derive the module from the file path (cached per pathname)
+        module_name = module_name_from_path(record.pathname)
         
         formatted = f"[{time_str}] [{record.levelname:^8}] [{module_name}] {record.getMessage()}"
 
@@ -81,8 +86,79 @@ class ColoredFormatter(logging.Formatter):
 
         return f"{color}{formatted}{self.RESET}"
 
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line for log shippers (LOG_FORMAT=json)."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "module": module_name_from_path(record.pathname),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that only resolves the %-args on the calling thread.
+    The stock prepare() runs the full formatter (colors, timestamps, tracebacks)
+    before enqueueing; records never leave the process, so that work can wait
+    for the writer thread.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Args may be mutable objects that change before the writer gets to them
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 # Configure root/base settings (so get_logger childs inherit or reuse)
 # We won't set a root logger here to avoid conflicts, just a factory function.
+# Every logger shares one QueueHandler; a single QueueListener thread formats
+# and writes to stdout so the event loop never blocks on a slow pipe.
+
+_queue_handler = None
+_listener = None
+
+def _build_output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    if shared_config.LOG_FORMAT == "json":
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        handler.setFormatter(ColoredFormatter())
+    return handler
+
+def _get_queue_handler() -> logging.Handler:
+    global _queue_handler, _listener
+    if _queue_handler is None:
+        log_queue = queue.SimpleQueue()
+        _queue_handler = _InProcessQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, _build_output_handler(), respect_handler_level=False)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return _queue_handler
+
+def shutdown_logging():
+    """Flushes queued records and stops the writer thread. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _caller_module_name(depth: int = 2) -> str:
+    """Module name of the code calling get_logger, via the raw frame (no inspect.stack())."""
+    try:
+        frame = sys._getframe(depth)
+    except ValueError:
+        return "Chromium"
+    name = frame.f_globals.get("__name__")
+    if name and name != "__main__":
+        return name
+    # fallback to file-based path
+    return module_name_from_path(frame.f_code.co_filename) or "Chromium"
 
 def get_logger(name=None) -> logging.Logger:
     """
@@ -90,33 +166,20 @@ def get_logger(name=None) -> logging.Logger:
     Auto-detects the caller's module/filename if name is not provided.
     """
     if not name:
-        # Inspect call stack
-        try:
-            frame = inspect.stack()[1]
-            module = inspect.getmodule(frame[0])
-            if module and hasattr(module, '__name__') and module.__name__ not in ("__main__",):
-                name = module.__name__
-            else:
-                 # fallback to file-based path
-                path = frame.filename.replace(os.getcwd(), "").lstrip(os.sep)
-                parts = path.split(os.sep)
-                parts[-1] = os.path.splitext(parts[-1])[0]
-                name = ".".join(parts)
-        except Exception:
-            name = "Chromium"
+        name = _caller_module_name()
 
     logger = logging.getLogger(name)
     logger.setLevel(logging.TRACE_LEVEL if shared_config.ENVIRONMENT == Environment.DEVELOPMENT else logging.EVENT_LEVEL)
     
     # Check if handler exists to avoid duplicates
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(ColoredFormatter())
-        logger.addHandler(handler)
+        logger.addHandler(_get_queue_handler())
         
     return logger
 
 # Add convenience methods to Logger class
+# They take %-style args so hot paths only pay for formatting when the level is
+# enabled: log.trace("Queue size for %s: %d", guild_id, size), not an f-string.
 def trace(self, message, *args, **kwargs):
     if self.isEnabledFor(TRACE_LEVEL):
         kwargs.setdefault('stacklevel', 2)
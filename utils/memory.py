@@ -0,0 +1,222 @@
+# Memory introspection
+# On memory-limited containers we couldn't tell which cache was growing. Caches
+# register a source here (discord.py's member/message caches, the suspicious
+# activity trackers, webhook snapshots, queues...) and report their entry
+# count plus an approximate size. The size is sampled: a few items per level
+# are measured with sys.getsizeof and extrapolated, so a 100k-member cache
+# costs milliseconds, not a full walk.
+#
+# tracemalloc is off by default (it slows every allocation down). Once started,
+# with MEMORY_TRACING or `/debug memory`, snapshots give the top allocating
+# lines and a diff against a baseline. The telemetry loop refreshes the cache
+# gauges and, while tracing, logs what grew since its last run.
+
+import asyncio
+import itertools
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+from utils.metrics import CACHE_BYTES, CACHE_ENTRIES, metrics
+
+log = get_logger()
+
+_CONTAINERS = (list, tuple, set, frozenset)
+
+def approx_size(obj: Any, depth: int = 3, sample: int = 32) -> int:
+    """
+    Approximate deep size of obj in bytes. Containers measure up to `sample`
+    items, `depth` levels down, and scale the average by their length. Shared
+    objects are counted once per reference, so this overestimates interned data.
+    """
+    try:
+        size = sys.getsizeof(obj)
+    except TypeError:
+        return 0
+    if depth <= 0 or isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+
+    if isinstance(obj, dict):
+        items = list(itertools.islice(obj.items(), sample))
+        if items:
+            measured = sum(approx_size(k, depth - 1, sample) + approx_size(v, depth - 1, sample) for k, v in items)
+            size += measured * len(obj) // len(items)
+        return size
+    if isinstance(obj, _CONTAINERS) or (hasattr(obj, "__len__") and hasattr(obj, "__iter__") and not hasattr(obj, "__dict__")):
+        try:
+            items = list(itertools.islice(iter(obj), sample))
+            length = len(obj)
+        except Exception:
+            return size
+        if items:
+            size += sum(approx_size(item, depth - 1, sample) for item in items) * length // len(items)
+        return size
+
+    attrs = getattr(obj, "__dict__", None)
+    if attrs is not None:
+        size += approx_size(attrs, depth - 1, sample)
+    for slot in getattr(type(obj), "__slots__", ()):
+        value = getattr(obj, slot, None)
+        if value is not None:
+            size += approx_size(value, depth - 1, sample)
+    return size
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), None elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _where(trace: tracemalloc.Traceback) -> str:
+    frame = trace[0]
+    filename = frame.filename
+    for marker in ("site-packages" + os.sep, os.getcwd() + os.sep):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    return f"{filename}:{frame.lineno}"
+
+@dataclass
+class CacheStats:
+    name: str
+    entries: int
+    bytes: int
+
+@dataclass
+class Allocation:
+    where: str # file:line of the allocating frame
+    size: int # Bytes currently held (diffs: bytes gained since the baseline)
+    count: int
+
+class MemoryInspector:
+    TOP = 10
+
+    def __init__(self):
+        self._caches: Dict[str, Tuple[Callable[[], Any], Optional[Callable[[Any], int]]]] = {}
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._last_telemetry: Optional[tracemalloc.Snapshot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def register_cache(self, name: str, source: Callable[[], Any], count: Optional[Callable[[Any], int]] = None):
+        """
+        source() returns the cache object; its entries are len(obj), or
+        count(obj) for caches split over several containers.
+        """
+        self._caches[name] = (source, count)
+
+    def unregister_cache(self, name: str):
+        self._caches.pop(name, None)
+
+    def cache_stats(self) -> List[CacheStats]:
+        """Every registered cache, largest first. A source that fails is left out."""
+        stats = []
+        for name, (source, count) in list(self._caches.items()):
+            try:
+                obj = source()
+                if obj is None:
+                    continue
+                stats.append(CacheStats(name, count(obj) if count else len(obj), approx_size(obj)))
+            except Exception as e:
+                log.debug(f"Memory: Can't size cache {name}: {e}")
+        stats.sort(key=lambda s: s.bytes, reverse=True)
+        return stats
+
+    # -- tracemalloc --
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self, frames: int = 1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            log.info(f"Memory: tracemalloc started ({frames} frame(s) per allocation)")
+
+    def stop_tracing(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            log.info("Memory: tracemalloc stopped")
+        self._baseline = self._last_telemetry = None
+
+    @staticmethod
+    def traced() -> Tuple[int, int]:
+        """(current, peak) bytes allocated since tracing started."""
+        return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+    async def snapshot(self) -> tracemalloc.Snapshot:
+        """Traced allocations, minus tracemalloc's and the import system's own. Taken off the event loop."""
+        def take():
+            return tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            ))
+        return await asyncio.to_thread(take)
+
+    async def top_allocators(self, limit: int = TOP) -> List[Allocation]:
+        if not self.tracing:
+            return []
+        snapshot = await self.snapshot()
+        return [Allocation(_where(s.traceback), s.size, s.count) for s in snapshot.statistics("lineno")[:limit]]
+
+    async def mark_baseline(self):
+        """Remembers the current allocations for diff()."""
+        if self.tracing:
+            self._baseline = await self.snapshot()
+
+    async def diff(self, limit: int = TOP) -> Optional[List[Allocation]]:
+        """Biggest growth since mark_baseline(), or None if there is no baseline yet."""
+        if not self.tracing or self._baseline is None:
+            return None
+        return self._compare(await self.snapshot(), self._baseline, limit)
+
+    @staticmethod
+    def _compare(snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot, limit: int) -> List[Allocation]:
+        stats = [s for s in snapshot.compare_to(baseline, "lineno") if s.size_diff > 0]
+        return [Allocation(_where(s.traceback), s.size_diff, s.count_diff) for s in stats[:limit]]
+
+    # -- Telemetry --
+
+    async def report(self) -> List[CacheStats]:
+        """Refreshes the cache gauges and, while tracing, logs the lines that grew since the last report."""
+        stats = self.cache_stats()
+        for s in stats:
+            CACHE_ENTRIES.set(s.entries, cache=s.name)
+            CACHE_BYTES.set(s.bytes, cache=s.name)
+
+        if self.tracing:
+            snapshot = await self.snapshot()
+            if self._last_telemetry is not None:
+                grown = self._compare(snapshot, self._last_telemetry, 5)
+                if grown:
+                    log.info("Memory: Grew since last report: " + ", ".join(f"{a.where} +{a.size // 1024}KiB" for a in grown))
+            self._last_telemetry = snapshot
+        return stats
+
+    def start(self, interval: float):
+        if interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run(interval))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                await self.report()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error("Memory: Telemetry report failed", exc_info=e)
+
+memory = MemoryInspector()
+metrics.gauge("process_rss_bytes", "Resident memory of this process", fn=rss_bytes)
+metrics.gauge("tracemalloc_bytes", "Bytes traced by tracemalloc (0 while it's off)", fn=lambda: memory.traced()[0])
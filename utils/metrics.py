@@ -0,0 +1,292 @@
+# In-process metrics registry (counters, gauges, fixed-bucket histograms)
+# Rendered in Prometheus text format by services/metrics_server.py and
+# summarised into the dashboard telemetry payload by BotMonitor.
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, tuned for Discord REST / SQLite timings
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        try:
+            key = tuple(str(labels[n]) for n in self.labelnames)
+        except KeyError:
+            key = None
+        if key is None or len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return key
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def summary(self):
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in sorted(self._values.items())
+        ]
+
+    def summary(self):
+        if not self.labelnames:
+            return self._values.get((), 0.0)
+        return {"|".join(k): v for k, v in self._values.items()}
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._fn = fn
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float]):
+        """Evaluate `fn` at scrape time instead of storing a value (unlabelled gauges only)."""
+        self._fn = fn
+
+    def _current(self) -> Dict[Tuple[str, ...], float]:
+        if self._fn is not None:
+            try:
+                return {(): float(self._fn())}
+            except Exception:
+                return {}
+        return self._values
+
+    def value(self, **labels) -> float:
+        return self._current().get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in sorted(self._current().items())
+        ]
+
+    def summary(self):
+        values = self._current()
+        if not self.labelnames:
+            return values.get((), 0.0)
+        return {"|".join(k): v for k, v in values.items()}
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            # Non-cumulative storage; cumulated at render time
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        state = self._values.get(self._key(labels))
+        if not state or not state[-1]:
+            return None
+        return self._quantile_from(state, q)
+
+    def _quantile_from(self, state: List[float], q: float) -> float:
+        target = q * state[-1]
+        seen = 0
+        lower = 0.0
+        for i, bound in enumerate(self.buckets):
+            count = state[i]
+            if count and seen + count >= target:
+                if bound == math.inf:
+                    return lower # Best effort: we only know it's above the last finite bound
+                return lower + (bound - lower) * ((target - seen) / count)
+            seen += count
+            lower = bound if bound != math.inf else lower
+        return lower
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {int(state[-1])}")
+        return lines
+
+    def summary(self):
+        out = {}
+        for key, state in self._values.items():
+            if not state[-1]:
+                continue
+            out["|".join(key) or "all"] = {
+                "count": int(state[-1]),
+                "avg_ms": round(state[-2] / state[-1] * 1000, 2),
+                "p50_ms": round(self._quantile_from(state, 0.50) * 1000, 2),
+                "p95_ms": round(self._quantile_from(state, 0.95) * 1000, 2),
+            }
+        return out
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "chromium_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, cls, name, help_text, labelnames, **kwargs):
+        full = self.prefix + name
+        existing = self._metrics.get(full)
+        if existing is not None:
+            # Idempotent so extensions can be reloaded without blowing up
+            if not isinstance(existing, cls) or existing.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {full} already registered with a different type/labels")
+            return existing
+        metric = cls(full, help_text, labelnames, **kwargs)
+        self._metrics[full] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = (), fn=None) -> Gauge:
+        gauge = self._register(Gauge, name, help_text, labelnames)
+        if fn is not None:
+            gauge.set_function(fn)
+        return gauge
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(self.prefix + name) or self._metrics.get(name)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, object]:
+        """Compact JSON-able view for the dashboard telemetry payload."""
+        out = {}
+        for full, metric in self._metrics.items():
+            try:
+                value = metric.summary()
+            except Exception:
+                continue
+            if value in ({}, 0, 0.0):
+                continue
+            out[full[len(self.prefix):] if full.startswith(self.prefix) else full] = value
+        return out
+
+# Global registry
+metrics = MetricsRegistry()
+
+# Shared instruments, declared once so every call site agrees on names/labels
+LOG_EVENT_SECONDS = metrics.histogram("log_event_seconds", "Time spent in BaseLogger.log_event", ("module",))
+DELIVERY_LATENCY_SECONDS = metrics.histogram("delivery_latency_seconds", "Embed creation to successful delivery", ("module",))
+LOG_EVENTS_TOTAL = metrics.counter("log_events_total", "log_event outcomes", ("module", "outcome"))
+SHOULD_LOG_SECONDS = metrics.histogram("should_log_seconds", "Time spent evaluating list filters", ("module",))
+SHOULD_LOG_TOTAL = metrics.counter("should_log_total", "Filter decisions", ("module", "decision"))
+AUDIT_LOOKUP_SECONDS = metrics.histogram("audit_lookup_seconds", "Time spent reading the audit log for an event", ("module",))
+DB_BATCH_SECONDS = metrics.histogram("db_batch_seconds", "Log batch insert + trim + commit time")
+DB_ROWS_TOTAL = metrics.counter("db_rows_written_total", "Log rows written to SQLite")
+DB_QUEUE_DEPTH = metrics.gauge("db_queue_depth", "Log rows waiting for the DB writer")
+SEND_SECONDS = metrics.histogram("send_seconds", "Discord send time including backoff", ("bucket",))
+SEND_TOTAL = metrics.counter("sends_total", "Discord send outcomes", ("bucket", "outcome"))
+RATE_LIMITED_TOTAL = metrics.counter("rate_limited_total", "HTTP 429 responses", ("bucket",))
+QUEUE_DEPTH = metrics.gauge("event_queue_depth", "Embeds waiting in the EventQueue")
+QUEUE_DROPPED_TOTAL = metrics.counter("event_queue_dropped_total", "Embeds evicted from a full EventQueue")
+FAIR_QUEUE_DROPPED_TOTAL = metrics.counter("fair_queue_dropped_total", "Items evicted from a per-guild fair queue", ("queue", "reason"))
+OUTBOX_TOTAL = metrics.counter("outbox_total", "Delivery outbox rows by outcome", ("outcome",))
+ARCHIVE_FILES_TOTAL = metrics.counter("attachment_archive_files_total", "Attachment archive outcomes per file", ("outcome",))
+ARCHIVE_BYTES_TOTAL = metrics.counter("attachment_archive_bytes_total", "Bytes written to the attachment archive")
+CONFIG_SYNC_SECONDS = metrics.histogram("config_sync_seconds", "Dashboard pull_all round trip")
+CONFIG_SYNC_TOTAL = metrics.counter("config_sync_total", "Dashboard pull_all outcomes", ("outcome",))
+WEBHOOK_FETCHES_TOTAL = metrics.counter("webhook_fetches_total", "Webhook list fetches, and update events folded into one", ("source",))
+LOGS_SHED_TOTAL = metrics.counter("logs_shed_total", "Log events skipped by the load shedder", ("module", "mode"))
+SHED_LEVEL = metrics.gauge("shed_level", "Load shedding level (0 off, 1 sampling, 2 digesting)")
+CACHE_ENTRIES = metrics.gauge("cache_entries", "Entries per registered cache, refreshed by the memory report", ("cache",))
+CACHE_BYTES = metrics.gauge("cache_bytes", "Approximate size per registered cache, refreshed by the memory report", ("cache",))
+
+def record_config_sync(outcome: str, seconds: float):
+    """ConfigSync on_sync_result hook (status.py stays free of repo imports)."""
+    CONFIG_SYNC_TOTAL.inc(outcome=outcome)
+    if outcome == "ok":
+        CONFIG_SYNC_SECONDS.observe(seconds)
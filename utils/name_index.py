@@ -0,0 +1,362 @@
+# Per-guild name search index for /blacklist and /whitelist
+# Replaces scanning every role/channel/member (and difflib over all of them)
+# on each autocomplete keystroke. Names are normalized once, then indexed two ways:
+#   - a sorted (token, id) array for prefix lookups via bisect. Same queries as
+#     a prefix trie, at a fraction of the memory on 100k-member guilds.
+#   - a trigram -> ids posting map for substring and fuzzy lookups.
+# Indexes are built lazily on first use, kept current from gateway events and
+# evicted LRU so only guilds that actually use the list commands pay for one.
+# Autocomplete never waits for a build (a 100k-member guild takes longer than
+# Discord's 3s deadline): it starts one in the background and answers from a
+# bounded scan of the guild cache until it's ready.
+
+import asyncio
+import difflib
+import itertools
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from utils.logger import get_logger
+from utils.memory import memory
+from utils.metrics import metrics
+
+log = get_logger()
+
+NAME_INDEX_SECONDS = metrics.histogram("name_index_search_seconds", "Name index lookup time", ("kind",))
+NAME_INDEX_GUILDS = metrics.gauge("name_index_guilds", "Guilds with a built name index")
+
+_WORD_SPLIT = re.compile(r"[\s\-_.|/]+")
+
+def normalize(name: str) -> str:
+    """Casefolds and strips accents/decoration, so 'Ünïcode-Mod' matches 'unicode mod'."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_WORD_SPLIT.split(stripped.casefold())).strip()
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class Entry(NamedTuple):
+    kind: str # 'user', 'role', 'channel' (matches server_lists.entity_type)
+    label: str # What autocomplete shows
+    names: Tuple[str, ...] # Normalized names it can be found by
+
+class NameIndex:
+    # Postings bigger than this are skipped by fuzzy search when a rarer trigram
+    # exists, so a query made of common trigrams can't degrade to a full scan.
+    MAX_POSTING = 5000
+    FUZZY_CANDIDATES = 64
+
+    def __init__(self):
+        self._entries: Dict[int, Entry] = {}
+        self._prefix: List[Tuple[str, int]] = []
+        self._trigrams: Dict[str, Set[int]] = defaultdict(set)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, entity_id: int) -> Optional[Entry]:
+        return self._entries.get(entity_id)
+
+    def ids(self, limit: int = 25) -> List[int]:
+        """First `limit` IDs in insertion order."""
+        return [entity_id for entity_id, _ in zip(self._entries, range(limit))]
+
+    # -- Maintenance --
+
+    def add(self, entity_id: int, kind: str, label: str, *names: str):
+        """Adds or replaces an entity. Every name in `names` (plus the label) is searchable."""
+        normalized = tuple(dict.fromkeys(n for n in map(normalize, (label, *names)) if n))
+        current = self._entries.get(entity_id)
+        if current and current.names == normalized:
+            if current.label != label or current.kind != kind:
+                self._entries[entity_id] = Entry(kind, label, normalized)
+            return
+        if current:
+            self.remove(entity_id)
+
+        self._entries[entity_id] = Entry(kind, label, normalized)
+        for token in self._tokens(normalized):
+            insort(self._prefix, (token, entity_id))
+        for gram in self._grams(normalized):
+            self._trigrams[gram].add(entity_id)
+
+    def extend(self, items: Iterable[Tuple]):
+        """Bulk add of (entity_id, kind, label, *names) tuples; sorts once instead of insort per token."""
+        for entity_id, kind, label, *names in items:
+            normalized = tuple(dict.fromkeys(n for n in map(normalize, (label, *names)) if n))
+            if entity_id in self._entries:
+                self.remove(entity_id)
+            self._entries[entity_id] = Entry(kind, label, normalized)
+            self._prefix.extend((token, entity_id) for token in self._tokens(normalized))
+            for gram in self._grams(normalized):
+                self._trigrams[gram].add(entity_id)
+        self._prefix.sort()
+
+    def remove(self, entity_id: int):
+        entry = self._entries.pop(entity_id, None)
+        if not entry:
+            return
+        for token in self._tokens(entry.names):
+            i = bisect_left(self._prefix, (token, entity_id))
+            if i < len(self._prefix) and self._prefix[i] == (token, entity_id):
+                del self._prefix[i]
+        for gram in self._grams(entry.names):
+            posting = self._trigrams.get(gram)
+            if posting is not None:
+                posting.discard(entity_id)
+                if not posting:
+                    del self._trigrams[gram]
+
+    @staticmethod
+    def _tokens(names: Iterable[str]) -> Set[str]:
+        # Whole name plus each word, so "mod" finds "Senior Mod"
+        tokens = set()
+        for name in names:
+            tokens.add(name)
+            tokens.update(name.split(" "))
+        return tokens
+
+    @staticmethod
+    def _grams(names: Iterable[str]) -> Set[str]:
+        grams = set()
+        for name in names:
+            grams |= trigrams(name)
+        return grams
+
+    # -- Lookups --
+
+    def prefix(self, query: str, limit: int = 25) -> List[int]:
+        """IDs with a name or word starting with `query`, closest (shortest) matches first."""
+        q = normalize(query)
+        if not q:
+            return []
+        found: Dict[int, int] = {}
+        i = bisect_left(self._prefix, (q, -1))
+        # Over-collect a little so ranking by length has something to work with
+        while i < len(self._prefix) and len(found) < limit * 4:
+            token, entity_id = self._prefix[i]
+            if not token.startswith(q):
+                break
+            found[entity_id] = min(found.get(entity_id, len(token)), len(token))
+            i += 1
+        return sorted(found, key=lambda eid: (found[eid], min(map(len, self._entries[eid].names)), eid))[:limit]
+
+    def contains(self, query: str, limit: int = 25) -> List[int]:
+        """IDs whose name contains `query` (3+ chars). Intersects postings rarest-first."""
+        q = normalize(query)
+        grams = trigrams(q)
+        if not grams:
+            return []
+        postings = sorted((self._trigrams.get(g, ()) for g in grams), key=len)
+        if not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return []
+
+        results = []
+        for entity_id in sorted(candidates):
+            if any(q in name for name in self._entries[entity_id].names):
+                results.append(entity_id)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def fuzzy(self, query: str, limit: int = 1, cutoff: float = 0.6) -> List[int]:
+        """Closest names by trigram overlap, confirmed with difflib's ratio (same cutoff as before)."""
+        q = normalize(query)
+        grams = trigrams(q)
+        if not grams:
+            return self.prefix(q, limit)
+
+        postings = sorted((self._trigrams.get(g, ()) for g in grams), key=len)
+        rare = [p for p in postings if 0 < len(p) <= self.MAX_POSTING]
+        hits = Counter()
+        for posting in (rare or [p for p in postings if p][:1]):
+            hits.update(posting)
+
+        scored = []
+        for entity_id, _ in hits.most_common(self.FUZZY_CANDIDATES):
+            ratio = max(difflib.SequenceMatcher(None, q, name).ratio() for name in self._entries[entity_id].names)
+            if ratio >= cutoff:
+                scored.append((ratio, entity_id))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [entity_id for _, entity_id in scored[:limit]]
+
+    def search(self, query: str, limit: int = 25) -> List[int]:
+        """Autocomplete order: prefix (exact matches rank first), substring, then fuzzy to fill up."""
+        started = time.perf_counter()
+        q = normalize(query)
+        results = self.prefix(q, limit)
+        if len(results) < limit:
+            for entity_id in self.contains(q, limit):
+                if entity_id not in results:
+                    results.append(entity_id)
+        if len(results) < limit:
+            for entity_id in self.fuzzy(q, limit - len(results), cutoff=0.5):
+                if entity_id not in results:
+                    results.append(entity_id)
+        NAME_INDEX_SECONDS.observe(time.perf_counter() - started, kind="search")
+        return results[:limit]
+
+def member_names(member) -> Tuple[str, ...]:
+    return tuple(n for n in (member.name, getattr(member, "global_name", None), getattr(member, "nick", None)) if n)
+
+class NameIndexRegistry:
+    """Lazily built per-guild entity indexes plus per-(guild, list) entry indexes, LRU-capped."""
+    # Entities the fallback scan looks at while a guild's index builds
+    SCAN_BUDGET = 5000
+
+    def __init__(self, max_guilds: int = 16):
+        self.max_guilds = max_guilds
+        self._guilds: "OrderedDict[int, NameIndex]" = OrderedDict()
+        self._lists: "OrderedDict[Tuple[int, str], NameIndex]" = OrderedDict()
+        self._building: Dict[int, asyncio.Task] = {}
+        self._missed: Dict[int, list] = defaultdict(list)
+
+    @staticmethod
+    def _entities(guild) -> Iterator[Tuple]:
+        yield from ((role.id, "role", role.name) for role in guild.roles)
+        yield from ((channel.id, "channel", channel.name) for channel in guild.channels)
+        yield from ((member.id, "user", member.display_name, *member_names(member)) for member in guild.members)
+
+    def _snapshot(self, guild) -> List[Tuple]:
+        return list(self._entities(guild))
+
+    def _store(self, guild_id: int, index: NameIndex, started: float) -> NameIndex:
+        log.trace("Built name index for guild %s: %d entities in %.1fms", guild_id, len(index), (time.perf_counter() - started) * 1000)
+        self._guilds[guild_id] = index
+        while len(self._guilds) > self.max_guilds:
+            self._guilds.popitem(last=False)
+        NAME_INDEX_GUILDS.set(len(self._guilds))
+        return index
+
+    async def get(self, guild) -> NameIndex:
+        """
+        The guild's entity index, built from its cache on first use. The build runs
+        in a thread so a 100k-member guild doesn't stall the event loop; events
+        seen mid-build are replayed onto it afterwards.
+        """
+        index = self._guilds.get(guild.id)
+        if index is not None:
+            self._guilds.move_to_end(guild.id)
+            return index
+
+        # Shielded so one cancelled command doesn't cancel the build others wait on
+        return await asyncio.shield(self._start_build(guild))
+
+    def lookup(self, guild) -> Optional[NameIndex]:
+        """
+        The guild's index if it's built. Otherwise starts the build in the
+        background and returns None; callers answer from scan() meanwhile.
+        """
+        index = self._guilds.get(guild.id)
+        if index is not None:
+            self._guilds.move_to_end(guild.id)
+            return index
+        self._start_build(guild)
+        return None
+
+    def scan(self, guild, query: str, limit: int = 25) -> NameIndex:
+        """
+        Stand-in for a guild whose index isn't built yet: the first `limit`
+        entities (out of at most SCAN_BUDGET) whose name contains `query`,
+        as a small index to search and render like the real one.
+        """
+        started = time.perf_counter()
+        q = normalize(query)
+        matches = []
+        if q:
+            for entity_id, kind, label, *names in itertools.islice(self._entities(guild), self.SCAN_BUDGET):
+                if any(q in normalize(name) for name in (label, *names)):
+                    matches.append((entity_id, kind, label, *names))
+                    if len(matches) >= limit:
+                        break
+        index = NameIndex()
+        index.extend(matches)
+        NAME_INDEX_SECONDS.observe(time.perf_counter() - started, kind="scan")
+        return index
+
+    def _start_build(self, guild) -> asyncio.Task:
+        task = self._building.get(guild.id)
+        if task is None:
+            task = asyncio.create_task(self._build(guild))
+            task.add_done_callback(self._build_done)
+            self._building[guild.id] = task
+        return task
+
+    @staticmethod
+    def _build_done(task: asyncio.Task):
+        # Background builds have nobody awaiting them to see a failure
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Failed to build name index", exc_info=task.exception())
+
+    async def _build(self, guild) -> NameIndex:
+        started = time.perf_counter()
+        try:
+            index = NameIndex()
+            await asyncio.to_thread(index.extend, self._snapshot(guild))
+            for op in self._missed.pop(guild.id, ()):
+                op(index)
+            return self._store(guild.id, index, started)
+        finally:
+            self._building.pop(guild.id, None)
+            self._missed.pop(guild.id, None)
+
+    def _apply(self, guild_id: int, op):
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            op(index)
+        elif guild_id in self._building:
+            self._missed[guild_id].append(op)
+        # No index: nothing to keep current, the next build reads the cache
+
+    def upsert(self, guild_id: int, entity_id: int, kind: str, label: str, *names: str):
+        """Event hook: adds/renames an entity in the guild's index, if it has one."""
+        self._apply(guild_id, lambda index: index.add(entity_id, kind, label, *names))
+
+    def discard(self, guild_id: int, entity_id: int):
+        """Event hook: removes an entity from the guild's index, if it has one."""
+        self._apply(guild_id, lambda index: index.remove(entity_id))
+
+    def peek(self, guild_id: int) -> Optional[NameIndex]:
+        """The guild's index if one is built, without building one."""
+        return self._guilds.get(guild_id)
+
+    def for_list(self, guild_id: int, list_type: str) -> Optional[NameIndex]:
+        key = (guild_id, list_type)
+        index = self._lists.get(key)
+        if index is not None:
+            self._lists.move_to_end(key)
+        return index
+
+    def set_list(self, guild_id: int, list_type: str, rows: Iterable[dict]) -> NameIndex:
+        index = NameIndex()
+        index.extend((row["entity_id"], row["entity_type"], row["entity_name"] or str(row["entity_id"])) for row in rows)
+        self._lists[(guild_id, list_type)] = index
+        while len(self._lists) > self.max_guilds * 2:
+            self._lists.popitem(last=False)
+        return index
+
+    def drop_lists(self, guild_id: int):
+        for key in [k for k in self._lists if k[0] == guild_id]:
+            del self._lists[key]
+
+    def drop(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+        self.drop_lists(guild_id)
+        NAME_INDEX_GUILDS.set(len(self._guilds))
+
+# Global instance
+name_index = NameIndexRegistry()
+memory.register_cache(
+    "name_index", lambda: (name_index._guilds, name_index._lists),
+    count=lambda parts: sum(len(indexes) for indexes in parts)
+)
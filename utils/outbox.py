@@ -0,0 +1,234 @@
+# Durable delivery outbox
+# A log only reached the logs table after Discord accepted its embed, so
+# anything waiting for a send slot or sleeping in send_with_backoff was lost
+# when a deploy cancelled every task. Deliveries are tracked here while in
+# flight. The ones still pending after FLUSH_AFTER are written to SQLite in
+# batches (most sends finish sooner and never touch the disk), delivered ones
+# are removed in the same batches, and whatever is left at shutdown is stored
+# so the next start can replay it.
+#
+# Delivery is at-least-once: a send that succeeds just as the process is
+# killed is sent again after the restart.
+
+import asyncio
+import itertools
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+from utils.memory import memory
+from utils.metrics import OUTBOX_TOTAL, metrics
+
+log = get_logger()
+
+@dataclass
+class OutboxEntry:
+    token: str
+    guild_id: int
+    module_name: str
+    webhook_url: Optional[str]
+    channel_id: Optional[int]
+    embed: Any # discord.Embed while live, its to_dict() once loaded back
+    content: str # Log row to persist once delivered
+    created_at: float
+    attempts: int = 0
+
+    def to_row(self) -> list:
+        embed = self.embed if isinstance(self.embed, dict) else self.embed.to_dict()
+        return [
+            self.token, self.guild_id, self.module_name, self.webhook_url,
+            int(self.channel_id) if self.channel_id else None,
+            json.dumps(embed), self.content, self.created_at, self.attempts
+        ]
+
+    @classmethod
+    def from_row(cls, row) -> "OutboxEntry":
+        _, token, guild_id, module_name, webhook_url, channel_id, embed, content, created_at, attempts = row
+        return cls(token, guild_id, module_name, webhook_url, channel_id, json.loads(embed), content, created_at, attempts)
+
+class DeliveryOutbox:
+    FLUSH_AFTER = 1.0 # Seconds a delivery may be in flight before it is written down
+    MAX_AGE = 24 * 3600 # Stored deliveries older than this are dropped instead of replayed
+    MAX_ATTEMPTS = 3 # Replays per delivery before it is dropped
+    REPLAY_PAGE = 200
+
+    def __init__(self):
+        self._write: Optional[Callable[[list, list], Awaitable[bool]]] = None
+        self._load: Optional[Callable[[int, int], Awaitable[list]]] = None
+        self._mark_attempted: Optional[Callable[[list], Awaitable[Any]]] = None
+        self._pending: Dict[str, OutboxEntry] = {}
+        self._stored: set = set() # Pending tokens that have a row
+        self._done: List[str] = [] # Rows to delete on the next flush
+        # Tokens are unique per process start, so replay can tell its own live rows apart
+        self._prefix = f"{os.getpid():x}.{int(time.time()):x}"
+        self._seq = itertools.count()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(self, write, load, mark_attempted):
+        self._write = write
+        self._load = load
+        self._mark_attempted = mark_attempted
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @contextmanager
+    def pending(self, guild_id: int, module_name: str, webhook_url: Optional[str], channel_id: Optional[int], embed, content: str):
+        """
+        Tracks one delivery for the duration of the block. Leaving it, normally or
+        with an error, settles the delivery; only a cancellation (shutdown) keeps
+        it for replay.
+        """
+        token = f"{self._prefix}.{next(self._seq)}"
+        self._pending[token] = OutboxEntry(token, guild_id, module_name, webhook_url, channel_id, embed, content, time.time())
+        self._idle.clear()
+        try:
+            yield token
+        except asyncio.CancelledError:
+            raise
+        except BaseException:
+            self._settle(token)
+            raise
+        else:
+            self._settle(token)
+
+    def _settle(self, token: str):
+        self._pending.pop(token, None)
+        if token in self._stored:
+            self._stored.discard(token)
+            self._done.append(token)
+        if not self._pending:
+            self._idle.set()
+
+    async def flush(self, everything: bool = False):
+        """Stores deliveries pending for over FLUSH_AFTER (all of them with everything) and deletes delivered rows."""
+        if self._write is None:
+            return
+        async with self._flush_lock:
+            cutoff = time.time() - (0 if everything else self.FLUSH_AFTER)
+            new = [e for token, e in self._pending.items() if token not in self._stored and e.created_at <= cutoff]
+            done, self._done = self._done, []
+            if not new and not done:
+                return
+
+            rows = []
+            for entry in new:
+                try:
+                    rows.append(entry.to_row())
+                except Exception as e:
+                    log.error(f"Outbox: Can't store {entry.module_name} delivery for guild {entry.guild_id}", exc_info=e)
+            if not await self._write(rows, done):
+                self._done = done + self._done # Rows (if any) are retried on the next flush
+                return
+
+            OUTBOX_TOTAL.inc(len(rows), outcome="stored")
+            for entry in new:
+                if entry.token in self._pending:
+                    self._stored.add(entry.token)
+                else:
+                    self._done.append(entry.token) # Delivered while we were writing it
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.sleep(self.FLUSH_AFTER)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error("Outbox: Flush failed", exc_info=e)
+
+    async def drain(self, timeout: float):
+        """Shutdown: waits up to `timeout` for in-flight deliveries, then stores the rest for replay."""
+        if self._pending:
+            log.info(f"Outbox: Waiting up to {timeout:.0f}s for {len(self._pending)} in-flight delivery(ies)...")
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self.stop()
+        await self.flush(everything=True)
+        if self._pending:
+            log.warning(f"Outbox: {len(self._pending)} delivery(ies) stored, they are replayed after the restart.")
+
+    async def replay(
+        self,
+        send: Callable[[OutboxEntry], Awaitable[bool]],
+        is_local: Callable[[int], bool],
+        concurrency: int = 4,
+    ) -> Tuple[int, int, int]:
+        """
+        Re-sends stored deliveries of guilds this process serves, oldest first and
+        at most `concurrency` at a time. Returns (delivered, failed, expired).
+        Failed ones stay stored until they run out of attempts or age out.
+        """
+        if self._load is None:
+            return 0, 0, 0
+        delivered = failed = expired = 0
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def replay_one(entry: OutboxEntry) -> bool:
+            async with semaphore:
+                try:
+                    return await send(entry)
+                except Exception as e:
+                    log.error(f"Outbox: Replay of {entry.module_name} delivery for guild {entry.guild_id} crashed", exc_info=e)
+                    return False
+
+        after_id = 0
+        while True:
+            rows = await self._load(after_id, self.REPLAY_PAGE)
+            if not rows:
+                break
+            after_id = rows[-1][0]
+            now = time.time()
+            entries, stale = [], []
+            for row in rows:
+                if row[1].startswith(self._prefix + "."):
+                    continue # Stored by this run's live deliveries
+                try:
+                    entry = OutboxEntry.from_row(row)
+                except (TypeError, ValueError):
+                    stale.append(row[1]) # Corrupt row
+                    continue
+                if now - entry.created_at > self.MAX_AGE or entry.attempts >= self.MAX_ATTEMPTS:
+                    stale.append(entry.token) # Any process may expire a row, even for a guild it doesn't serve
+                    continue
+                if not is_local(entry.guild_id):
+                    continue # Another cluster's guild (or one we left)
+                entries.append(entry)
+
+            if entries:
+                # Counted before sending, so a delivery that crashes the process can't loop forever
+                await self._mark_attempted([e.token for e in entries])
+            results = await asyncio.gather(*(replay_one(e) for e in entries))
+            sent = [e.token for e, ok in zip(entries, results) if ok]
+            delivered += len(sent)
+            failed += len(entries) - len(sent)
+            expired += len(stale)
+            if sent or stale:
+                await self._write([], sent + stale)
+
+        OUTBOX_TOTAL.inc(delivered, outcome="replayed")
+        OUTBOX_TOTAL.inc(failed, outcome="replay_failed")
+        OUTBOX_TOTAL.inc(expired, outcome="expired")
+        return delivered, failed, expired
+
+outbox = DeliveryOutbox()
+metrics.gauge("outbox_in_flight", "Deliveries tracked by the outbox right now", fn=outbox.in_flight)
+memory.register_cache("outbox.pending", lambda: outbox._pending)
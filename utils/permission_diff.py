@@ -0,0 +1,153 @@
+# Permission diffing on raw bitfields
+# Channel overwrite and role permission changes are diffed as plain integers
+# (allow/deny/value) against a precomputed bit -> name table, instead of
+# walking discord.Permissions flag by flag. ChannelUpdate and
+# ChannelPermissionUpdate receive the same before/after objects for one
+# event, so overwrite diffs are cached per event and computed once.
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+import discord
+
+# bit -> name, first name wins so aliases (view_channel, manage_permissions, ...) map to
+# the same names iterating discord.Permissions yields
+PERMISSION_NAMES = {}
+for _name, _bit in discord.Permissions.VALID_FLAGS.items():
+    PERMISSION_NAMES.setdefault(_bit, _name)
+
+DANGEROUS_PERMISSIONS = (
+    "administrator", "manage_guild", "manage_roles", "manage_channels", "manage_webhooks",
+    "ban_members", "kick_members", "moderate_members", "mention_everyone",
+)
+DANGEROUS_MASK = 0
+for _name in DANGEROUS_PERMISSIONS:
+    DANGEROUS_MASK |= discord.Permissions.VALID_FLAGS[_name]
+
+@lru_cache(maxsize=1024)
+def flag_names(mask: int) -> Tuple[str, ...]:
+    """Names of the set bits, lowest bit first."""
+    names = []
+    while mask:
+        bit = mask & -mask
+        names.append(PERMISSION_NAMES.get(bit, f"unknown_{bit.bit_length() - 1}"))
+        mask ^= bit
+    return tuple(names)
+
+def dangerous_granted(granted: int) -> Tuple[str, ...]:
+    """Dangerous permissions among newly granted bits (shared suspicious-activity check)."""
+    return flag_names(granted & DANGEROUS_MASK)
+
+class PermissionDiff(NamedTuple):
+    granted: int
+    revoked: int
+
+    def __bool__(self) -> bool:
+        return bool(self.granted or self.revoked)
+
+def diff_permissions(before: int, after: int) -> PermissionDiff:
+    return PermissionDiff(after & ~before, before & ~after)
+
+class OverwriteDiff(NamedTuple):
+    target_id: int
+    is_role: bool
+    allow_added: int
+    allow_removed: int
+    deny_added: int
+    deny_removed: int
+    created: bool = False # Target had no overwrite before
+    deleted: bool = False # Target's overwrite was removed
+
+    @property
+    def dangerous(self) -> Tuple[str, ...]:
+        return dangerous_granted(self.allow_added)
+
+    def target_label(self, guild: discord.Guild) -> str:
+        if self.is_role:
+            role = guild.get_role(self.target_id)
+            return f"Role: {role.name}" if role else f"Role: {self.target_id}"
+        member = guild.get_member(self.target_id)
+        return f"Member: {member.name}" if member else f"Member: {self.target_id}"
+
+    def lines(self) -> List[str]:
+        return (
+            [f"✅ `{p}` allowed" for p in flag_names(self.allow_added)]
+            + [f"➖ `{p}` allow removed" for p in flag_names(self.allow_removed)]
+            + [f"❌ `{p}` denied" for p in flag_names(self.deny_added)]
+            + [f"➖ `{p}` deny removed" for p in flag_names(self.deny_removed)]
+        )
+
+def raw_overwrites(channel) -> dict:
+    """target_id -> (is_role, allow, deny) straight from the channel's payload data."""
+    raw = getattr(channel, "_overwrites", None)
+    if isinstance(raw, list):
+        return {ow.id: (ow.type == 0, ow.allow, ow.deny) for ow in raw}
+    # Not a discord.py channel object (tests, partials): go through the public mapping
+    result = {}
+    for target, overwrite in channel.overwrites.items():
+        allow, deny = overwrite.pair()
+        result[target.id] = (isinstance(target, discord.Role), allow.value, deny.value)
+    return result
+
+_CACHE_SIZE = 128
+_overwrite_cache: "OrderedDict[int, tuple]" = OrderedDict()
+
+def diff_overwrites(before, after) -> Tuple[OverwriteDiff, ...]:
+    """
+    Per-target overwrite changes between two states of a channel. Cached for
+    the (before, after) pair of one event, so every listener of that event
+    shares the result.
+    """
+    cached = _overwrite_cache.get(after.id)
+    if cached and cached[0] is before and cached[1] is after:
+        return cached[2]
+
+    b_map, a_map = raw_overwrites(before), raw_overwrites(after)
+    diffs = []
+    for target_id in sorted(b_map.keys() | a_map.keys()):
+        b = b_map.get(target_id)
+        a = a_map.get(target_id)
+        b_allow, b_deny = (b[1], b[2]) if b else (0, 0)
+        a_allow, a_deny = (a[1], a[2]) if a else (0, 0)
+        if b_allow == a_allow and b_deny == a_deny and (a is None) == (b is None):
+            continue
+        diffs.append(OverwriteDiff(
+            target_id, (a or b)[0],
+            a_allow & ~b_allow, b_allow & ~a_allow,
+            a_deny & ~b_deny, b_deny & ~a_deny,
+            created=b is None, deleted=a is None,
+        ))
+
+    result = tuple(diffs)
+    _overwrite_cache[after.id] = (before, after, result)
+    _overwrite_cache.move_to_end(after.id)
+    if len(_overwrite_cache) > _CACHE_SIZE:
+        _overwrite_cache.popitem(last=False)
+    return result
+
+def overwrite_fields(diffs, guild: discord.Guild, name: str = "Permission Changes", limit: Optional[int] = None) -> list:
+    """Embed fields for overwrite diffs, split to stay under the 1024-char field limit."""
+    entries = []
+    for diff in diffs[:limit]:
+        lines = diff.lines()
+        header = diff.target_label(guild)
+        if diff.created:
+            header += " (overwrite added)"
+        elif diff.deleted:
+            header += " (overwrite removed)"
+        if lines or diff.created or diff.deleted:
+            entries.append(f"**{header}**\n" + "\n".join(lines))
+    if limit is not None and len(diffs) > limit:
+        entries.append(f"...and {len(diffs) - limit} more target(s)")
+
+    fields = []
+    chunk = ""
+    for entry in entries:
+        if len(chunk) + len(entry) + 2 > 1024:
+            fields.append((name, chunk.strip(), False))
+            chunk = ""
+        chunk += entry[:1000] + "\n\n"
+    if chunk.strip():
+        fields.append((name, chunk.strip(), False))
+    return fields
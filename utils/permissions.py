@@ -22,6 +22,7 @@ MODULE_PERMISSIONS: Dict[str, List[str]] = {
     "TimeoutUpdate": ["view_audit_log", "moderate_members"],
     "WebhookUpdate": ["manage_webhooks"],
     "InviteUpdate": ["manage_guild"],
+    "AttachmentArchive": ["view_channel", "attach_files"],
     "RolePermissionUpdate": ["view_audit_log"],
     "RolePermissionUpdate": ["view_audit_log"],
 }
@@ -34,6 +35,7 @@ PERMISSION_DISPLAY_NAMES: Dict[str, str] = {
     "manage_webhooks": "Manage Webhooks",
     "manage_guild": "Manage Server",
     "moderate_members": "Moderate Members",
+    "attach_files": "Attach Files",
 }
 
 def check_bot_permissions(guild: discord.Guild) -> Dict[str, List[str]]:
@@ -0,0 +1,112 @@
+# Per-shard guild counts and debounced presence updates
+# Counts are kept incrementally from guild available/join/remove events instead of
+# rescanning bot.guilds per shard. Presence changes are coalesced: a burst of
+# joins/leaves marks shards dirty, and one flush a few seconds later updates
+# only the shards whose status text actually changed.
+
+import asyncio
+from typing import Dict, Iterable, Optional, Set
+
+import discord
+
+from utils.logger import get_logger
+
+log = get_logger()
+
+class ShardGuildCounter:
+    """guild -> shard membership and per-shard counts, O(1) per event."""
+    def __init__(self):
+        self._shard_of: Dict[int, int] = {}
+        self._counts: Dict[int, int] = {}
+
+    def rebuild(self, guilds: Iterable[discord.Guild]):
+        """Full recount from the guild cache."""
+        self._shard_of = {guild.id: guild.shard_id or 0 for guild in guilds}
+        self._counts = {}
+        for sid in self._shard_of.values():
+            self._counts[sid] = self._counts.get(sid, 0) + 1
+
+    def add(self, guild: discord.Guild) -> Optional[int]:
+        """Returns the guild's shard if its count changed."""
+        if guild.id in self._shard_of:
+            return None
+        sid = guild.shard_id or 0
+        self._shard_of[guild.id] = sid
+        self._counts[sid] = self._counts.get(sid, 0) + 1
+        return sid
+
+    def remove(self, guild: discord.Guild) -> Optional[int]:
+        sid = self._shard_of.pop(guild.id, None)
+        if sid is None:
+            return None
+        self._counts[sid] = max(0, self._counts.get(sid, 0) - 1)
+        return sid
+
+    def count(self, shard_id: int) -> int:
+        return self._counts.get(shard_id, 0)
+
+    @property
+    def total(self) -> int:
+        return len(self._shard_of)
+
+class PresenceUpdater:
+    """
+    Coalesces presence changes. mark() schedules one flush `delay` seconds out
+    (later marks join it rather than pushing it back, so a storm can't starve
+    it); the flush calls change_presence only for shards whose text changed.
+    """
+    def __init__(self, bot, counter: ShardGuildCounter, delay: float = 10.0):
+        self.bot = bot
+        self.counter = counter
+        self.delay = delay
+        self._dirty: Set[int] = set()
+        self._sent: Dict[int, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.updates_sent = 0
+        self.updates_skipped = 0
+
+    def status_text(self, shard_id: int) -> str:
+        total_shards = self.bot.shard_count or 1
+        return f"over {self.counter.count(shard_id)} guilds | Shard {shard_id+1}/{total_shards}"
+
+    def mark(self, shard_id: Optional[int] = None, force: bool = False):
+        """Marks one shard (or every shard this process runs) for the next flush."""
+        shard_ids = [shard_id] if shard_id is not None else list(self.bot.shards) or [0]
+        for sid in shard_ids:
+            self._dirty.add(sid)
+            if force:
+                # Identify/reconnect resets presence, so resend even if the text is the same
+                self._sent.pop(sid, None)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Marks that land while a flush awaits change_presence find this task
+        # still running, so keep going until nothing is left dirty
+        while True:
+            await asyncio.sleep(self.delay)
+            await self.flush()
+            if not self._dirty:
+                break
+
+    async def flush(self):
+        dirty, self._dirty = self._dirty, set()
+        for shard_id in sorted(dirty):
+            if shard_id not in self.bot.shards:
+                continue # Owned by another cluster, or not connected yet
+            text = self.status_text(shard_id)
+            if self._sent.get(shard_id) == text:
+                self.updates_skipped += 1
+                continue
+            try:
+                activity = discord.Activity(type=discord.ActivityType.watching, name=text)
+                await self.bot.change_presence(activity=activity, shard_id=shard_id)
+                self._sent[shard_id] = text
+                self.updates_sent += 1
+            except Exception as e:
+                # non-fatal, retried on the next mark/refresh
+                log.error(f"Failed to update status for shard {shard_id+1}", exc_info=e)
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
@@ -0,0 +1,146 @@
+# Opt-in hot-path profiler for BaseLogger listeners
+# Each listener invocation becomes a trace; code on the hot path marks phases
+# (filter, settings, audit, embed, send, persist) with `profiler.phase(...)`.
+# When disabled, the listener wrapper is a single attribute check and
+# phase() returns a shared no-op context manager.
+
+import functools
+import heapq
+import math
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional
+
+PHASES = ("filter", "settings", "audit", "embed", "send", "persist")
+
+_NOOP = nullcontext()
+
+class Trace:
+    __slots__ = ("module", "event", "guild_id", "started", "total", "phases")
+
+    def __init__(self, module: str, event: str):
+        self.module = module
+        self.event = event
+        self.guild_id: Optional[int] = None
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.phases: Dict[str, float] = {}
+
+_current: ContextVar[Optional[Trace]] = ContextVar("chromium_trace", default=None)
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile over an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class HotPathProfiler:
+    def __init__(self, window_seconds: float = 900.0, max_traces: int = 5000):
+        self.enabled = False
+        self.window_seconds = window_seconds
+        # (finished_at_monotonic, Trace)
+        self._traces: Deque[tuple] = deque(maxlen=max_traces)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self._traces.clear()
+
+    # -- Instrumentation --
+
+    def wrap_listener(self, module: str, event: str, func):
+        """Wrap a bound listener coroutine so each call is traced when enabled."""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not self.enabled or _current.get() is not None:
+                return await func(*args, **kwargs)
+            trace = Trace(module, event)
+            token = _current.set(trace)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current.reset(token)
+                trace.total = time.perf_counter() - trace.started
+                self._traces.append((time.monotonic(), trace))
+        return wrapper
+
+    def phase(self, name: str):
+        """Time a phase of the current trace. No-op outside a traced listener."""
+        if not self.enabled:
+            return _NOOP
+        trace = _current.get()
+        if trace is None:
+            return _NOOP
+        return self._timed(trace, name)
+
+    @contextmanager
+    def _timed(self, trace: Trace, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            trace.phases[name] = trace.phases.get(name, 0.0) + (time.perf_counter() - start)
+
+    def tag_guild(self, guild_id: int):
+        """Attach the guild being handled to the current trace (first call wins)."""
+        if not self.enabled:
+            return
+        trace = _current.get()
+        if trace is not None and trace.guild_id is None:
+            trace.guild_id = guild_id
+
+    # -- Reporting --
+
+    def _recent(self) -> List[Trace]:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._traces and self._traces[0][0] < cutoff:
+            self._traces.popleft()
+        return [t for _, t in self._traces]
+
+    def report(self, slowest: int = 5) -> dict:
+        """
+        Percentiles (ms) per module and per phase over the rolling window,
+        plus the slowest recent traces.
+        """
+        traces = self._recent()
+        by_module: Dict[str, List[float]] = {}
+        by_phase: Dict[str, List[float]] = {}
+        for t in traces:
+            by_module.setdefault(t.module, []).append(t.total)
+            for phase, seconds in t.phases.items():
+                by_phase.setdefault(phase, []).append(seconds)
+
+        def stats(values: List[float]) -> dict:
+            values.sort()
+            return {
+                "count": len(values),
+                "p50": percentile(values, 0.50) * 1000,
+                "p95": percentile(values, 0.95) * 1000,
+                "p99": percentile(values, 0.99) * 1000,
+            }
+
+        return {
+            "window_seconds": self.window_seconds,
+            "traces": len(traces),
+            "modules": {m: stats(v) for m, v in by_module.items()},
+            "phases": {p: stats(by_phase[p]) for p in PHASES if p in by_phase},
+            "slowest": [
+                {
+                    "module": t.module,
+                    "event": t.event,
+                    "guild_id": t.guild_id,
+                    "total_ms": t.total * 1000,
+                    "phases_ms": {p: s * 1000 for p, s in t.phases.items()},
+                }
+                for t in heapq.nlargest(slowest, traces, key=lambda t: t.total)
+            ],
+        }
+
+profiler = HotPathProfiler()
@@ -5,9 +5,10 @@ import asyncio
 import time
 from dataclasses import dataclass, field
 from typing import Optional, Callable, Any
-from collections import deque
 import discord
+from utils.fair_queue import FairQueue
 from utils.logger import get_logger
+from utils.metrics import SEND_SECONDS, SEND_TOTAL, RATE_LIMITED_TOTAL, QUEUE_DEPTH, QUEUE_DROPPED_TOTAL
 
 log = get_logger()
 
@@ -49,19 +50,25 @@ class EventQueue:
     """
     Async queue for batching Discord API calls.
     Processes events with rate limiting and exponential backoff.
+    Guilds are served round-robin, so one guild's backlog can't starve (or evict) the rest.
     """
-    def __init__(self, bot, max_queue_size: int = 500, batch_delay: float = 0.5):
+    def __init__(self, bot, max_queue_size: int = 500, per_guild_cap: int = 100, batch_delay: float = 0.5):
         self.bot = bot
-        self.queue: deque[QueuedEvent] = deque(maxlen=max_queue_size)
+        self.queue = FairQueue(
+            "event_queue", key=lambda event: event.guild_id,
+            per_key_cap=per_guild_cap, max_size=max_queue_size,
+            on_drop=lambda guild_id, event: QUEUE_DROPPED_TOTAL.inc()
+        )
         self.batch_delay = batch_delay
         self._processing = False
         self._task: Optional[asyncio.Task] = None
         self._failed_webhooks: set[str] = set()  # Track webhooks that have failed
         
     def enqueue(self, event: QueuedEvent):
-        """Add an event to the queue."""
-        self.queue.append(event)
-        log.trace(f"[Queue] Enqueued event for guild {event.guild_id}, queue size: {len(self.queue)}")
+        """Add an event to the queue. Over the guild's cap (or when full) the guild's (or the longest guild's) oldest event is dropped."""
+        self.queue.put_nowait(event)
+        QUEUE_DEPTH.set(len(self.queue))
+        log.trace("[Queue] Enqueued event for guild %s, queue size: %d", event.guild_id, len(self.queue))
         
     def start_processing(self):
         """Start the background queue processor."""
@@ -83,8 +90,14 @@ class EventQueue:
                     await asyncio.sleep(self.batch_delay)
                     continue
                 
-                event = self.queue.popleft()
-                await self._send_event(event)
+                event = self.queue.get_nowait()
+                self.queue.task_done()
+                QUEUE_DEPTH.set(len(self.queue))
+                bucket = "queue_webhook" if event.webhook_url else "queue_channel"
+                start = time.perf_counter()
+                ok = await self._send_event(event)
+                SEND_SECONDS.observe(time.perf_counter() - start, bucket=bucket)
+                SEND_TOTAL.inc(bucket=bucket, outcome="ok" if ok else "failed")
                 
                 # Small delay between sends to prevent bursting
                 await asyncio.sleep(0.1)
@@ -110,7 +123,8 @@ class EventQueue:
                 # 429 - TRUST THE RETRY_AFTER
                 # Add a small buffer (0.1s) to be safe
                 delay = e.retry_after + 0.1
-                log.warning(f"[Queue] Rate limited (bucket: {e.bucket}), retry after {delay:.2f}s")
+                RATE_LIMITED_TOTAL.inc(bucket="queue_webhook" if event.webhook_url else "queue_channel")
+                log.warning(f"[Queue] Rate limited, retry after {delay:.2f}s")
                 await asyncio.sleep(delay)
                 # Do NOT consume an attempt count for forced rate limits, just wait
                 # But to prevent infinite loops, we might assume the backoff limiter handles it if we used it,
@@ -119,6 +133,7 @@ class EventQueue:
                 
             except discord.HTTPException as e:
                 if e.status == 429: # Should be caught by RateLimited but just in case
+                    RATE_LIMITED_TOTAL.inc(bucket="queue_webhook" if event.webhook_url else "queue_channel")
                     delay = backoff.get_delay()
                     log.warning(f"[Queue] HTTP 429, backing off for {delay:.1f}s")
                     await asyncio.sleep(delay)
@@ -185,7 +200,8 @@ class EventQueue:
 async def send_with_backoff(
     coro_factory: Callable[[], Any],
     max_attempts: int = 5,
-    base_delay: float = 1.0
+    base_delay: float = 1.0,
+    bucket: str = "default"
 ) -> tuple[bool, Optional[Exception]]:
     """
     Execute a coroutine with exponential backoff on rate limits.
@@ -194,10 +210,23 @@ async def send_with_backoff(
         coro_factory: A callable that returns a new coroutine each time (lambda: channel.send(...))
         max_attempts: Maximum number of retry attempts
         base_delay: Initial delay in seconds
+        bucket: Metrics label for the kind of route (e.g. 'webhook', 'channel')
         
     Returns:
         Tuple of (success: bool, last_exception: Optional[Exception])
     """
+    start = time.perf_counter()
+    success, error = await _send_with_backoff(coro_factory, max_attempts, base_delay, bucket)
+    SEND_SECONDS.observe(time.perf_counter() - start, bucket=bucket)
+    SEND_TOTAL.inc(bucket=bucket, outcome="ok" if success else "failed")
+    return success, error
+
+async def _send_with_backoff(
+    coro_factory: Callable[[], Any],
+    max_attempts: int,
+    base_delay: float,
+    bucket: str
+) -> tuple[bool, Optional[Exception]]:
     backoff = ExponentialBackoff(base_delay=base_delay, max_attempts=max_attempts)
     last_error = None
     
@@ -208,6 +237,7 @@ async def send_with_backoff(
             
         except discord.RateLimited as e:
             # Handle explicit rate limit exception
+            RATE_LIMITED_TOTAL.inc(bucket=bucket)
             delay = e.retry_after + 0.1
             log.warning(f"[Backoff] Rate limited, waiting {delay:.2f}s")
             await asyncio.sleep(delay)
@@ -218,6 +248,7 @@ async def send_with_backoff(
             last_error = e
             
             if e.status == 429:
+                RATE_LIMITED_TOTAL.inc(bucket=bucket)
                 delay = backoff.get_delay()
                 log.warning(f"[Backoff] HTTP 429, waiting {delay:.1f}s")
                 await asyncio.sleep(delay)
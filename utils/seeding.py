@@ -0,0 +1,163 @@
+# Dashboard seeding pipeline (Chromium._push_initial_state)
+# Streams local guild settings in chunks, skips guilds the dashboard already
+# has (or already confirmed with the same payload), packs the rest into
+# size-bounded batches and sends them with a few workers. Confirmed guilds are
+# remembered, so a seed cut short by maintenance or a failed batch only sends
+# the remainder next time.
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+from utils.logger import get_logger
+
+log = get_logger()
+
+@lru_cache(maxsize=256)
+def normalize_module_name(name: str) -> str:
+    """'MessageDelete' -> 'message_delete' (the dashboard's key style). Module names are a small fixed set."""
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+def build_seed_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Dashboard settings for one get_all_guild_settings_full-style row."""
+    is_complex = bool(row["msg_id"] or row["mem_id"])
+    payload = {
+        "log_channel_id": str(row["log_channel_id"]) if row["log_channel_id"] else None,
+        "enabled_modules": {normalize_module_name(k): v for k, v in row["modules"].items()},
+        "log_mode": "complex" if is_complex else "simple"
+    }
+    if is_complex:
+        payload["complex_logs"] = {
+            "system": str(row["log_channel_id"]),
+            "message": str(row["msg_id"]),
+            "member": str(row["mem_id"])
+        }
+    return payload
+
+def payload_digest(payload: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+@dataclass
+class SeedReport:
+    checked: int = 0
+    on_dashboard: int = 0
+    already_confirmed: int = 0
+    sent: int = 0
+    confirmed: int = 0
+    failed: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.checked} checked, {self.on_dashboard} already on dashboard, "
+            f"{self.already_confirmed} previously confirmed, {self.confirmed}/{self.sent} seeded "
+            f"in {self.batches} batch(es), {self.failed} failed ({self.seconds:.1f}s)"
+        )
+
+class DashboardSeeder:
+    def __init__(
+        self,
+        config_sync,
+        fetch_chunks: Callable[[], AsyncIterator[List[Dict[str, Any]]]],
+        load_confirmed: Callable[[], Awaitable[Dict[str, str]]],
+        save_confirmed: Callable[[List[Tuple[str, str]]], Awaitable[Any]],
+        clear_confirmed: Callable[[], Awaitable[Any]],
+        *,
+        batch_bytes: int = 256 * 1024,
+        batch_max_guilds: int = 500,
+        concurrency: int = 4,
+    ):
+        self.config_sync = config_sync
+        self.fetch_chunks = fetch_chunks
+        self.load_confirmed = load_confirmed
+        self.save_confirmed = save_confirmed
+        self.clear_confirmed = clear_confirmed
+        self.batch_bytes = batch_bytes
+        self.batch_max_guilds = batch_max_guilds
+        self.concurrency = concurrency
+        self._lock = asyncio.Lock() # One seed at a time (boot + maintenance-cleared can overlap)
+
+    async def run(self) -> SeedReport:
+        async with self._lock:
+            return await self._run()
+
+    async def _run(self) -> SeedReport:
+        report = SeedReport()
+        started = time.monotonic()
+
+        confirmed = await self.load_confirmed()
+        if confirmed and not self.config_sync.has_guilds():
+            # Dashboard came back empty (wiped/restored); what it confirmed before is gone
+            log.info(f"StartupSync: Dashboard has no guilds, forgetting {len(confirmed)} earlier confirmation(s).")
+            await self.clear_confirmed()
+            confirmed = {}
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue, report)) for _ in range(self.concurrency)]
+
+        batch: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        batch_size = 0
+        try:
+            async for rows in self.fetch_chunks():
+                for row in rows:
+                    report.checked += 1
+                    guild_id = str(row["guild_id"])
+                    # If dashboard already has settings for this guild, DO NOT overwrite them.
+                    # The dashboard is the source of truth for existing entries.
+                    if self.config_sync.get(guild_id):
+                        report.on_dashboard += 1
+                        continue
+                    try:
+                        payload = build_seed_payload(row)
+                    except Exception as e:
+                        log.error(f"StartupSync: Failed preparing guild {guild_id}: {e}")
+                        continue
+                    digest = payload_digest(payload)
+                    if confirmed.get(guild_id) == digest:
+                        report.already_confirmed += 1
+                        continue
+
+                    size = len(json.dumps(payload, separators=(",", ":"))) + len(guild_id) + 4
+                    if batch and (batch_size + size > self.batch_bytes or len(batch) >= self.batch_max_guilds):
+                        await queue.put(batch) # Backpressure: waits while workers are busy
+                        batch, batch_size = {}, 0
+                    batch[guild_id] = (payload, digest)
+                    batch_size += size
+            if batch:
+                await queue.put(batch)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        report.seconds = time.monotonic() - started
+        return report
+
+    async def _worker(self, queue: asyncio.Queue, report: SeedReport):
+        # Nothing may end this loop before its None: the producer blocks on a full queue
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            report.batches += 1
+            report.sent += len(batch)
+            try:
+                ok = await self.config_sync.seed_batch({gid: payload for gid, (payload, _) in batch.items()})
+            except Exception as e:
+                log.error(f"StartupSync: Seed batch crashed: {e}")
+                ok = False
+            if ok:
+                report.confirmed += len(batch)
+                try:
+                    await self.save_confirmed([(gid, digest) for gid, (_, digest) in batch.items()])
+                except Exception as e:
+                    # Seeded, just not remembered: the next seed resends these guilds
+                    log.error(f"StartupSync: Failed to save {len(batch)} seed confirmation(s): {e}")
+            else:
+                report.failed += len(batch)
@@ -22,12 +22,14 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import gzip
+import hashlib
 import json
 import logging
 import platform
 import time
 import os
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Optional
 
 import aiohttp
 from cryptography.hazmat.primitives import hashes, serialization
@@ -42,7 +44,15 @@ logger = logging.getLogger(__name__)
 class StatusReporter:
     """Signs and sends status payloads to the dashboard server."""
 
-    def __init__(self, api_url: str, private_key_pem: str, bot_id: str):
+    def __init__(
+        self,
+        api_url: str,
+        private_key_pem: str,
+        bot_id: str,
+        *,
+        compress: bool = True,
+        compress_threshold: int = 1024,
+    ):
         api_url = api_url.rstrip("/")
         if not api_url.startswith(("http://", "https://")):
             api_url = f"http://{api_url}"
@@ -53,6 +63,10 @@ class StatusReporter:
             password=None,
         )
         self._session: Optional[aiohttp.ClientSession] = None
+        # gzip bodies above the threshold; switched off for good if the
+        # dashboard answers 415 (doesn't understand Content-Encoding)
+        self.compress = compress
+        self.compress_threshold = compress_threshold
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Re-use a single session for connection pooling."""
@@ -75,6 +89,14 @@ class StatusReporter:
         )
         return base64.b64encode(sig).decode()
 
+    def _encode(self, payload: dict) -> tuple[bytes, Dict[str, str]]:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.compress and len(body) >= self.compress_threshold:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
     async def send(self, data: dict, *, max_retries: int = 3) -> bool:
         """
         Send a status update.  Returns True on success, False on failure.
@@ -90,12 +112,17 @@ class StatusReporter:
         for attempt in range(max_retries):
             try:
                 session = await self._get_session()
+                body, headers = self._encode(payload)
                 async with session.post(
-                    f"{self.api_url}/status/update", json=payload,
+                    f"{self.api_url}/status/update", data=body, headers=headers,
                 ) as resp:
                     if resp.status == 200:
                         logger.debug("Status sent for %s", self.bot_id)
                         return True
+                    if resp.status == 415 and "Content-Encoding" in headers:
+                        logger.warning("Dashboard rejected gzip payloads, sending uncompressed from now on.")
+                        self.compress = False
+                        continue
                     body = await resp.text()
                     logger.warning(
                         "Attempt %d/%d failed (%d): %s",
@@ -122,6 +149,15 @@ class BotMonitor:
     """
     Collects real metrics from a discord.py / Pycord Bot instance
     and feeds them to a StatusReporter on a single 60s cadence.
+
+    Guild/member/channel aggregates are maintained incrementally from gateway
+    events (the monitor registers its own listeners), so a tick never walks
+    every guild. Guild IDs are sent as add/remove deltas, with a full list
+    every `full_sync_every` ticks or after any failed send.
+
+    Cluster workers pass their `cluster_id`: every payload is tagged with it and
+    the full list goes out as mode "cluster", which replaces only that cluster's
+    guilds on the dashboard instead of the bot's whole list.
     """
 
     def __init__(
@@ -130,24 +166,136 @@ class BotMonitor:
         bot: "discord.Bot | discord.AutoShardedBot",
         *,
         interval: int = 60,
+        full_sync_every: int = 10,
         custom_metrics_callback=None,
+        cluster_id: Optional[int] = None,
     ):
         self.reporter = reporter
+        self.cluster_id = cluster_id
         self.bot = bot
         self.interval = interval
+        self.full_sync_every = full_sync_every
         self._start_time = time.monotonic()
         self.custom_metrics_callback = custom_metrics_callback
 
+        # Incremental aggregates
+        self._guild_ids: set[int] = set()
+        self._guilds_by_shard: Dict[int, int] = {}
+        self._member_count = 0
+        self._channel_count = 0
+
+        # Delta bookkeeping for guild IDs
+        self._added: set[int] = set()
+        self._removed: set[int] = set()
+        self._ticks_since_full = 0
+        self._force_full = True
+        self._inflight: Optional[tuple[bool, frozenset, frozenset]] = None
+
+        for event, handler in (
+            ("on_ready", self._on_ready),
+            ("on_guild_join", self._on_guild_join),
+            ("on_guild_remove", self._on_guild_remove),
+            ("on_guild_channel_create", self._on_channel_create),
+            ("on_guild_channel_delete", self._on_channel_delete),
+            ("on_member_join", self._on_member_join),
+            ("on_raw_member_remove", self._on_raw_member_remove),
+        ):
+            bot.add_listener(handler, event)
+
+    # -- Aggregate maintenance --
+
+    def rebuild(self):
+        """Full recount from the guild cache. Runs on ready and on full resyncs."""
+        guild_ids = set()
+        by_shard: Dict[int, int] = {}
+        members = channels = 0
+        for g in self.bot.guilds:
+            guild_ids.add(g.id)
+            sid = getattr(g, "shard_id", 0) or 0
+            by_shard[sid] = by_shard.get(sid, 0) + 1
+            members += g.member_count or 0
+            channels += len(g.channels)
+        self._guild_ids = guild_ids
+        self._guilds_by_shard = by_shard
+        self._member_count = members
+        self._channel_count = channels
+
+    async def _on_ready(self):
+        self.rebuild()
+        self._force_full = True
+
+    async def _on_guild_join(self, guild: "discord.Guild"):
+        if guild.id in self._guild_ids:
+            return
+        self._guild_ids.add(guild.id)
+        sid = getattr(guild, "shard_id", 0) or 0
+        self._guilds_by_shard[sid] = self._guilds_by_shard.get(sid, 0) + 1
+        self._member_count += guild.member_count or 0
+        self._channel_count += len(guild.channels)
+        if guild.id in self._removed:
+            self._removed.discard(guild.id)
+        else:
+            self._added.add(guild.id)
+
+    async def _on_guild_remove(self, guild: "discord.Guild"):
+        if guild.id not in self._guild_ids:
+            return
+        self._guild_ids.discard(guild.id)
+        sid = getattr(guild, "shard_id", 0) or 0
+        self._guilds_by_shard[sid] = max(0, self._guilds_by_shard.get(sid, 0) - 1)
+        self._member_count = max(0, self._member_count - (guild.member_count or 0))
+        self._channel_count = max(0, self._channel_count - len(guild.channels))
+        if guild.id in self._added:
+            self._added.discard(guild.id)
+        else:
+            self._removed.add(guild.id)
+
+    async def _on_channel_create(self, channel):
+        self._channel_count += 1
+
+    async def _on_channel_delete(self, channel):
+        self._channel_count = max(0, self._channel_count - 1)
+
+    async def _on_member_join(self, member):
+        self._member_count += 1
+
+    async def _on_raw_member_remove(self, payload):
+        self._member_count = max(0, self._member_count - 1)
+
+    # -- Loop --
+
     async def run_forever(self):
         """Launch the metric loop. Never raises."""
-        await asyncio.sleep(15)  # Warm up cache
+        await self.bot.wait_until_ready()
+        if not self._guild_ids:
+            self.rebuild()
         while True:
             try:
-                await self.reporter.send(self._collect_all())
+                ok = await self.reporter.send(self._collect_all())
+                self._ack(ok)
             except Exception as exc:
+                self._ack(False)
                 logger.error("Metric loop error: %s", exc)
             await asyncio.sleep(self.interval)
 
+    def _ack(self, ok: bool):
+        """Settle the deltas carried by the last payload."""
+        if self._inflight is None:
+            return
+        full, added, removed = self._inflight
+        self._inflight = None
+        if not ok:
+            # We can't know what the dashboard applied, resend everything next tick
+            self._force_full = True
+            return
+        self._added -= added
+        self._removed -= removed
+        if full:
+            self._ticks_since_full = 0
+            self._force_full = False
+        else:
+            self._ticks_since_full += 1
+
     def _collect_all(self) -> Dict[str, Any]:
         uptime = time.monotonic() - self._start_time
         import math
@@ -156,11 +304,10 @@ class BotMonitor:
                 return -1.0
             return round(lat * 1000, 1)
 
-        guilds = self.bot.guilds
-        guilds_by_shard = {}
-        for g in guilds:
-            sid = getattr(g, "shard_id", 0)
-            guilds_by_shard[sid] = guilds_by_shard.get(sid, 0) + 1
+        full = self._force_full or self._ticks_since_full >= self.full_sync_every - 1
+        if full:
+            # Cheap insurance against drift from missed events
+            self.rebuild()
 
         shards = []
         if hasattr(self.bot, "shards") and self.bot.shards:
@@ -169,14 +316,14 @@ class BotMonitor:
                     "id": sid,
                     "latency_ms": safe_latency(shard.latency),
                     "is_closed": shard.is_closed(),
-                    "guild_count": guilds_by_shard.get(sid, 0),
+                    "guild_count": self._guilds_by_shard.get(sid, 0),
                 })
         else:
             shards.append({
                 "id": 0,
                 "latency_ms": safe_latency(self.bot.latency),
                 "is_closed": self.bot.is_closed(),
-                "guild_count": guilds_by_shard.get(0, len(guilds)),
+                "guild_count": self._guilds_by_shard.get(0, len(self._guild_ids)),
             })
 
         custom_data = {}
@@ -196,11 +343,23 @@ class BotMonitor:
                 "python": platform.python_version(),
                 "os": platform.system(),
             },
-            "guild_count": len(guilds),
-            "guild_ids": [str(g.id) for g in guilds],
-            "member_count": sum(g.member_count or 0 for g in guilds),
-            "channel_count": sum(len(g.channels) for g in guilds),
+            "guild_count": len(self._guild_ids),
+            "member_count": self._member_count,
+            "channel_count": self._channel_count,
         }
+        if self.cluster_id is not None:
+            payload["cluster_id"] = self.cluster_id
+
+        added, removed = frozenset(self._added), frozenset(self._removed)
+        if full:
+            payload["guild_ids_mode"] = "full" if self.cluster_id is None else "cluster"
+            payload["guild_ids"] = [str(gid) for gid in self._guild_ids]
+        else:
+            payload["guild_ids_mode"] = "delta"
+            payload["guild_ids_added"] = [str(gid) for gid in added]
+            payload["guild_ids_removed"] = [str(gid) for gid in removed]
+        self._inflight = (full, added, removed)
+
         payload.update(custom_data)
         return payload
 
@@ -216,10 +375,18 @@ class ConfigSync:
             bot_id="chromium",
             bot=bot,
         )
+        await config_sync.load_snapshot()  # Optional: warm from the last persisted sync
         asyncio.create_task(config_sync.run_forever())
 
         # Later, in a command or event:
         settings = config_sync.get(guild_id)
+
+        # Or, to block until the first live pull has landed:
+        await config_sync.wait_until_synced()
+
+    Persistence is opt-in: pass `load_snapshot` / `save_snapshot` coroutine
+    functions and the cache is restored at boot and re-saved after every
+    successful bulk pull that actually changed something.
     """
 
     def __init__(
@@ -230,6 +397,9 @@ class ConfigSync:
         *,
         interval: int = 30,
         on_maintenance_cleared=None,
+        load_snapshot=None,
+        save_snapshot=None,
+        on_sync_result=None,
     ):
         api_url = api_url.rstrip("/")
         if not api_url.startswith(("http://", "https://")):
@@ -243,6 +413,18 @@ class ConfigSync:
         self._last_sync: float = 0
         self.maintenance_mode: bool = False
         self._on_maintenance_cleared = on_maintenance_cleared
+        self._load_snapshot = load_snapshot
+        self._save_snapshot = save_snapshot
+        # Optional instrumentation hook: on_sync_result(outcome: str, seconds: float)
+        self._on_sync_result = on_sync_result
+        self._snapshot_digest: Optional[str] = None
+        self.snapshot_loaded: bool = False
+        # Set once the first live pull_all has landed (not by the snapshot)
+        self.synced = asyncio.Event()
+        # Seed batches go gzip'd until the dashboard says it can't take that
+        self._seed_gzip: bool = True
+        # guild_id -> modules switched off on the dashboard, derived lazily from _cache
+        self._disabled: Dict[str, FrozenSet[str]] = {}
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
@@ -255,12 +437,91 @@ class ConfigSync:
             )
         return self._session
 
+    @staticmethod
+    def _digest(data: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
+
+    async def load_snapshot(self) -> int:
+        """
+        Warm the cache from the last persisted sync. Call before anything
+        reads config so cold starts route exactly like the previous run.
+        Returns the number of guilds loaded. Never raises.
+        """
+        if not self._load_snapshot:
+            return 0
+        try:
+            data = await self._load_snapshot()
+        except Exception as exc:
+            logger.warning("ConfigSync: Failed to load config snapshot: %s", exc)
+            return 0
+        if not data:
+            return 0
+        # A live pull may already have landed; never clobber fresher data
+        if not self.synced.is_set():
+            self._set_cache(data)
+            self._snapshot_digest = self._digest(data)
+            self.snapshot_loaded = True
+            logger.info("ConfigSync: Loaded config snapshot for %d guilds", len(data))
+        return len(data)
+
+    async def _persist_snapshot(self, data: Dict[str, Any]):
+        """Persist the cache if it differs from what was last saved."""
+        if not self._save_snapshot:
+            return
+        digest = self._digest(data)
+        if digest == self._snapshot_digest:
+            return
+        try:
+            if await self._save_snapshot(data) is not False:
+                self._snapshot_digest = digest
+        except Exception as exc:
+            logger.warning("ConfigSync: Failed to save config snapshot: %s", exc)
+
+    async def wait_until_synced(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the first live pull. Returns False if the timeout elapsed."""
+        try:
+            await asyncio.wait_for(self.synced.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
     def get(self, guild_id: int | str) -> Dict[str, Any]:
         """Get cached config for a guild. Returns empty dict if none or in maintenance."""
         if self.maintenance_mode:
             return {}
         return self._cache.get(str(guild_id), {})
 
+    def has_guilds(self) -> bool:
+        """Whether the dashboard has config for any guild (ignores maintenance mode)."""
+        return bool(self._cache)
+
+    def disabled_modules(self, guild_id: int | str) -> FrozenSet[str]:
+        """
+        Module keys set to False in a guild's `enabled_modules`. Derived once per
+        config update, so per-interaction checks are a set lookup.
+        """
+        if self.maintenance_mode:
+            return frozenset()
+        key = str(guild_id)
+        disabled = self._disabled.get(key)
+        if disabled is None:
+            modules = self._cache.get(key, {}).get("enabled_modules")
+            disabled = frozenset(
+                name for name, enabled in modules.items() if enabled is False
+            ) if isinstance(modules, dict) else frozenset()
+            self._disabled[key] = disabled
+        return disabled
+
+    def _set_cache(self, data: Dict[str, Dict[str, Any]]):
+        self._cache = data
+        self._disabled = {}
+
+    def _set_guild(self, guild_id: int | str, settings: Dict[str, Any]):
+        self._cache[str(guild_id)] = settings
+        self._disabled.pop(str(guild_id), None)
+
     async def push_config(self, guild_id: int | str, settings: Dict[str, Any]):
         """Push internal state to the dashboard."""
         try:
@@ -270,7 +531,7 @@ class ConfigSync:
                 if resp.status == 200:
                     logger.info("ConfigSync: Successfully pushed state for guild %s", guild_id)
                     # Update local cache to match what we just pushed
-                    self._cache[str(guild_id)] = settings
+                    self._set_guild(guild_id, settings)
                     return True
                 else:
                     logger.debug("Config push for guild %s returned %d", guild_id, resp.status)
@@ -293,7 +554,7 @@ class ConfigSync:
                     # Update local cache
                     for gid, settings in guilds_data.items():
                         if gid not in self._cache:
-                            self._cache[str(gid)] = settings
+                            self._set_guild(gid, settings)
                     return True
                 else:
                     logger.debug("Bulk sync returned %d", resp.status)
@@ -301,6 +562,55 @@ class ConfigSync:
             logger.warning("Bulk sync failed: %s", exc)
         return False
 
+    async def seed_batch(
+        self,
+        guilds_data: Dict[str, Dict[str, Any]],
+        *,
+        retries: int = 3,
+        timeout: float = 30.0,
+    ) -> bool:
+        """
+        One bounded seeding batch (same endpoint as bulk_sync), gzip-compressed,
+        retried with backoff on network errors, 429 and 5xx. If the dashboard
+        answers 415 to the compressed body, compression is switched off for
+        good and the batch is resent as plain JSON (same rule as StatusReporter).
+        """
+        body = json.dumps({"guilds": guilds_data}, separators=(",", ":")).encode()
+        url = f"{self.api_url}/config/sync/{self.bot_id}"
+        attempt = 0
+        while True:
+            headers = {"Content-Type": "application/json"}
+            data = body
+            if self._seed_gzip:
+                data = gzip.compress(body)
+                headers["Content-Encoding"] = "gzip"
+            try:
+                session = await self._get_session()
+                async with session.post(
+                    url, data=data, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as resp:
+                    if resp.status == 200:
+                        for gid, settings in guilds_data.items():
+                            if str(gid) not in self._cache:
+                                self._set_guild(gid, settings)
+                        return True
+                    if resp.status == 415 and self._seed_gzip:
+                        logger.info("ConfigSync: Dashboard doesn't accept gzip seed bodies, sending uncompressed")
+                        self._seed_gzip = False
+                        continue
+                    if resp.status != 429 and resp.status < 500:
+                        logger.warning("ConfigSync: Seed batch of %d guilds rejected (%d)", len(guilds_data), resp.status)
+                        return False
+                    logger.debug("Seed batch returned %d", resp.status)
+            except Exception as exc:
+                logger.debug("Seed batch failed: %s", exc)
+
+            attempt += 1
+            if attempt > retries:
+                logger.warning("ConfigSync: Seed batch of %d guilds failed after %d attempts", len(guilds_data), attempt)
+                return False
+            await asyncio.sleep(min(2 ** attempt, 30))
+
     async def pull_one(self, guild_id: int | str) -> Dict[str, Any]:
         """Pull config for a single guild from the dashboard."""
         try:
@@ -310,7 +620,7 @@ class ConfigSync:
                 if resp.status == 200:
                     data = await resp.json()
                     settings = data.get("settings", {})
-                    self._cache[str(guild_id)] = settings
+                    self._set_guild(guild_id, settings)
                     return settings
                 else:
                     logger.debug("Config pull for guild %s returned %d", guild_id, resp.status)
@@ -318,12 +628,20 @@ class ConfigSync:
             logger.warning("Config pull failed for guild %s: %s", guild_id, exc)
         return self._cache.get(str(guild_id), {})
 
+    def _report(self, outcome: str, started: float):
+        if self._on_sync_result:
+            try:
+                self._on_sync_result(outcome, time.monotonic() - started)
+            except Exception as exc:
+                logger.debug("ConfigSync: on_sync_result hook failed: %s", exc)
+
     async def sync_all(self):
         """Bulk pull config for all guilds the bot is in."""
         if not self.bot.is_ready():
             return
 
         was_in_maintenance = self.maintenance_mode
+        started = time.monotonic()
 
         try:
             session = await self._get_session()
@@ -341,6 +659,7 @@ class ConfigSync:
                 if self._last_sync != -1: # Log only once
                     logger.warning("ConfigSync: Dashboard is in MAINTENANCE mode. Bypassing dashboard settings.")
                     self._last_sync = -1 
+                self._report("maintenance", started)
                 return
 
             url = f"{self.api_url}/config/pull_all/{self.bot_id}"
@@ -348,13 +667,16 @@ class ConfigSync:
                 if resp.status == 200:
                     data = await resp.json()
                     # Keep local cache clean by replacing it entirely
-                    self._cache = data
+                    self._set_cache(data)
                     
                     self._last_sync = time.monotonic()
+                    self.synced.set()
+                    self._report("ok", started)
                     logger.info(
                         "ConfigSync: Successfully synced config for %d guilds for bot '%s'",
                         len(data), self.bot_id,
                     )
+                    await self._persist_snapshot(data)
                     
                     # If we just left maintenance, fire the callback so the bot
                     # can re-seed any missing guilds into the dashboard.
@@ -367,14 +689,17 @@ class ConfigSync:
 
                 elif resp.status == 418:
                     self.maintenance_mode = True
+                    self._report("maintenance", started)
                 else:
                     logger.debug("Bulk config pull returned %d", resp.status)
+                    self._report("http_error", started)
         except Exception as exc:
             logger.warning("Bulk config pull failed: %s", exc)
+            self._report("error", started)
 
     async def run_forever(self):
         """Background loop. Never raises."""
-        await asyncio.sleep(5)  # Wait for bot to be ready
+        await self.bot.wait_until_ready()
         while True:
             try:
                 await self.sync_all()
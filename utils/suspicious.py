@@ -3,6 +3,8 @@ from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from typing import Dict
 
+from utils.memory import memory
+
 @dataclass
 class ActivityTracker:
     deletes: deque = field(default_factory=lambda: deque(maxlen=20))
@@ -86,3 +88,7 @@ class SuspiciousDetector:
                 del self.guild_joins[guild_id]
 
 suspicious_detector = SuspiciousDetector()
+memory.register_cache(
+    "suspicious.trackers", lambda: suspicious_detector.trackers,
+    count=lambda trackers: sum(len(users) for users in trackers.values())
+)
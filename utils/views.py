@@ -1,5 +1,5 @@
 import discord
-from typing import Optional
+from typing import Awaitable, Callable, List, Optional
 
 class ConfirmationView(discord.ui.View):
     def __init__(self, timeout: float = 180.0, author_id: Optional[int] = None):
@@ -29,3 +29,73 @@ class ConfirmationView(discord.ui.View):
     async def on_timeout(self):
         self.value = False
         self.stop()
+
+class KeysetPaginator(discord.ui.View):
+    """
+    Newest-first pager over a keyset query. fetch(before_id, limit) returns rows
+    ordered by id DESC; render(rows, page_number) builds the embed. Only the
+    current page is ever loaded, and a page N deep costs the same as page 1.
+    """
+    def __init__(
+        self,
+        fetch: Callable[[Optional[int], int], Awaitable[List[dict]]],
+        render: Callable[[List[dict], int], discord.Embed],
+        page_size: int = 8,
+        author_id: Optional[int] = None,
+        timeout: float = 300.0
+    ):
+        super().__init__(timeout=timeout)
+        self.fetch = fetch
+        self.render = render
+        self.page_size = page_size
+        self.author_id = author_id
+        self.message: Optional[discord.Message] = None
+        self.rows: List[dict] = []
+        # before_id of every page visited so far; Previous pops back through it
+        self._cursors: List[Optional[int]] = [None]
+        self._has_next = False
+
+    async def load(self) -> discord.Embed:
+        """Fetches the page at the current cursor (one extra row tells us if there's a next page)."""
+        rows = await self.fetch(self._cursors[-1], self.page_size + 1)
+        self._has_next = len(rows) > self.page_size
+        self.rows = rows[:self.page_size]
+        self.first.disabled = self.previous.disabled = len(self._cursors) == 1
+        self.next.disabled = not self._has_next
+        return self.render(self.rows, len(self._cursors))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if self.author_id and interaction.user.id != self.author_id:
+            await interaction.response.send_message("This menu is not for you.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction):
+        embed = await self.load()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="First", emoji="⏮️", style=discord.ButtonStyle.secondary)
+    async def first(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self._cursors = [None]
+        await self._show(interaction)
+
+    @discord.ui.button(label="Previous", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self._cursors) > 1:
+            self._cursors.pop()
+        await self._show(interaction)
+
+    @discord.ui.button(label="Next", emoji="▶️", style=discord.ButtonStyle.primary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self._has_next and self.rows:
+            self._cursors.append(self.rows[-1]["id"])
+        await self._show(interaction)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
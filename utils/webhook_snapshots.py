@@ -0,0 +1,85 @@
+# Persisted webhook snapshots for WebhookUpdate
+# on_webhooks_update only says "something changed in this channel", so the
+# cog diffs a fresh channel.webhooks() against the last known state. Keeping
+# that state in SQLite (and warming it with a background guild.webhooks()
+# prefetch) means a restart doesn't report every existing webhook as created.
+
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+log = get_logger()
+
+Snapshot = Dict[int, dict] # webhook_id -> comparable fields
+
+class WebhookSnapshotStore:
+    """
+    In-memory (guild_id, channel_id) -> Snapshot map backed by the
+    webhook_snapshots table. A guild that was prefetched is "complete": a
+    channel missing from it has no webhooks, rather than an unknown state.
+    """
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[Tuple[Dict[Tuple[int, int], Snapshot], Dict[int, int]]]],
+        save: Callable[..., Awaitable[bool]],
+        delete: Callable[[int], Awaitable[bool]],
+    ):
+        self._load = load
+        self._save = save
+        self._delete = delete
+        self._snapshots: Dict[Tuple[int, int], Snapshot] = {}
+        self._complete: Dict[int, float] = {} # guild_id -> fetched_at (epoch)
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def load(self):
+        """Reads the persisted snapshots once; later calls return immediately."""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            snapshots, complete = await self._load()
+            # Anything recorded while loading is newer than the table
+            self._snapshots = {**snapshots, **self._snapshots}
+            self._complete = {**complete, **self._complete}
+            self._loaded = True
+            log.info(f"Loaded {len(snapshots)} webhook snapshot(s) for {len({g for g, _ in snapshots} | set(complete))} guild(s).")
+
+    def get(self, guild_id: int, channel_id: int) -> Optional[Snapshot]:
+        """Last known webhooks for a channel, or None if nothing is known about it."""
+        snapshot = self._snapshots.get((guild_id, channel_id))
+        if snapshot is None and guild_id in self._complete:
+            return {}
+        return snapshot
+
+    def is_fresh(self, guild_id: int, max_age: float) -> bool:
+        fetched_at = self._complete.get(guild_id)
+        return fetched_at is not None and time.time() - fetched_at < max_age
+
+    async def put(self, guild_id: int, channel_id: int, snapshot: Snapshot):
+        self._snapshots[(guild_id, channel_id)] = snapshot
+        await self._save(guild_id, [[channel_id, json.dumps(snapshot, default=str)]])
+
+    async def replace_guild(self, guild_id: int, by_channel: Dict[int, Snapshot]):
+        """Stores a complete guild snapshot (guild.webhooks() grouped by channel)."""
+        for key in [key for key in self._snapshots if key[0] == guild_id]:
+            del self._snapshots[key]
+        for channel_id, snapshot in by_channel.items():
+            self._snapshots[(guild_id, channel_id)] = snapshot
+        self._complete[guild_id] = time.time()
+        await self._save(
+            guild_id, [[channel_id, json.dumps(snapshot, default=str)] for channel_id, snapshot in by_channel.items()], complete=True
+        )
+
+    async def drop_guild(self, guild_id: int):
+        for key in [key for key in self._snapshots if key[0] == guild_id]:
+            del self._snapshots[key]
+        self._complete.pop(guild_id, None)
+        await self._delete(guild_id)
+
+    def __len__(self) -> int:
+        return len(self._snapshots)